@@ -4,16 +4,17 @@ API REST para el Web Scraper
 Expone endpoints para el frontend React
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 import json
 import os
 import logging
 import re
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import threading
 import time
+import uuid
 from urllib.parse import urlparse, parse_qs, unquote
 
 # Importar sistema de autenticación
@@ -26,21 +27,30 @@ sys.path.insert(0, str(project_root))
 from backend.core.auth_system import AuthSystem, require_auth, require_admin, require_user_or_admin
 
 # Importar sistema de competitive intelligence
-from backend.systems.competitive_intelligence_system import CompetitiveIntelligenceSystem
+from backend.systems.competitive_intelligence_system import CompetitiveIntelligenceSystem, normalize_domain
 from backend.utils.ai_keyword_analyzer import get_ai_suggestions
-
-# Sistema de notificaciones simplificado (sin WebSocket)
-def send_scraping_notification(message, status="info"): 
-    logger.info(f"[SCRAPING] {status.upper()}: {message}")
-
-def send_payment_notification(user_id, message, status="info"): 
-    logger.info(f"[PAYMENT] {status.upper()}: {message}")
-
-def send_admin_notification(message, status="info"): 
-    logger.info(f"[ADMIN] {status.upper()}: {message}")
-
-def send_system_notification(message, status="info"): 
-    logger.info(f"[SYSTEM] {status.upper()}: {message}")
+from backend.systems.trending_predictor_system import ensure_term_daily_counts_table
+from backend.systems.corpus_stats_index import CorpusStatsIndex
+from backend.systems.chat_retrieval import ChatRetriever, ChatSessionCache
+from backend.systems.vector_index import ArticleVectorIndex
+from backend.systems.story_clusters import StoryClusterIndex, STORY_KEY_SQL
+from backend.systems.article_ingest import record_article_ingest
+from backend.core.response_cache import ResponseCache
+from backend.core.response_layer import init_response_layer, json_list_response
+from backend.core.llm_gateway import LLMGateway, LLMProvider, LLMResponseCache, openai_chat_body, parse_ollama_stream_line
+from backend.utils.data_version import ARTICLES, SOCIAL, ensure_data_versions_table, bump_data_version
+from backend.utils.sentiment_analyzer import article_polarity
+from backend.utils.article_store import (
+    ARTICLES_VIEW, ensure_article_bodies_table, register_article_functions, prune_orphan_bodies,
+    ensure_article_images_schema, migrate_images_data, fetch_article_images,
+    primary_image_sql, image_count_sql
+)
+
+# Notificaciones en tiempo real (bus de eventos -> WebSocket / SSE)
+from backend.core.event_bus import (
+    event_bus, TOPIC_SCRAPING, TOPIC_SYSTEM, TOPIC_ADMIN, user_topic,
+    send_scraping_notification, send_scraping_progress
+)
 
 # Importar nuestros scrapers
 from backend.scrapers.hybrid_crawler import HybridDataCrawler, crawl_complete_hybrid
@@ -48,7 +58,8 @@ from backend.scrapers.optimized_scraper import SmartScraper, ArticleData
 from backend.scrapers.improved_scraper import ImprovedScraper
 from backend.scrapers.intelligent_analyzer import IntelligentPageAnalyzer
 from backend.scrapers.elperuano_scraper import scrape_elperuano_economia
-from backend.scrapers.pagination_crawler import PaginationCrawler
+from backend.scrapers.pagination_crawler import PaginationCrawler, PAGE_WORKERS
+from backend.scrapers.host_scheduler import start_job, fetch_report, job_deadline, DEFAULT_JOB_DEADLINE
 import pandas as pd
 from sqlalchemy import create_engine, text
 import io
@@ -217,6 +228,7 @@ def check_duplicate_url(url: str, category: str = '') -> bool:
 
 app = Flask(__name__)
 CORS(app)  # Permitir CORS para React
+init_response_layer(app)  # orjson + compresión br/gzip para todas las rutas
 
 # Configuración de la base de datos SQLite
 # Las bases de datos se mantienen en la raíz del proyecto
@@ -226,6 +238,18 @@ DB_PATH = str(project_root / "news_database.db")
 # Inicializar sistema de autenticación
 auth_system = AuthSystem()
 
+# Índice de estadísticas del corpus (nube de palabras y sugerencias de keywords)
+corpus_index = CorpusStatsIndex(DB_PATH)
+
+# Índice vectorial local (búsqueda semántica del chat, búsqueda avanzada y artículos relacionados)
+vector_index = ArticleVectorIndex(os.environ.get('VECTOR_INDEX_DIR', str(project_root / 'vector_index')))
+
+# Historias (clusters de casi duplicados) asignadas en la ingesta
+story_index = StoryClusterIndex()
+
+# Caché de respuestas de lectura (invalidada por versión de datos, con ETag/304)
+response_cache = ResponseCache(DB_PATH, plan_resolver=lambda user_id: _user_plan_name(user_id))
+
 # ============================================================
 # Cargar variables de entorno desde .env (si existe)
 # Formato esperado:
@@ -345,214 +369,70 @@ def _llm_available() -> bool:
     # Siempre retornar True para intentar APIs gratuitas sin key
     return True
 
-def _llm_generate_free_no_key(prompt: str, system_prompt: str = '') -> Optional[str]:
-    """Intentar generar texto usando APIs gratuitas sin key (múltiples intentos)."""
-    import requests  # type: ignore
-    
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    messages.append({"role": "user", "content": prompt})
-    
-    # Intentar múltiples APIs gratuitas sin key
-    apis_to_try = [
-        # 1. Together AI (gratuito sin key para algunos modelos)
-        {
-            "name": "Together AI",
-            "url": "https://api.together.xyz/v1/chat/completions",
-            "headers": {"Content-Type": "application/json"},
-            "body": {
-                "model": "mistralai/Mixtral-8x7B-Instruct-v0.1",
-                "messages": messages,
-                "max_tokens": 200,
-                "temperature": 0.7
-            },
-            "timeout": 10
-        },
-        # 2. Perplexity (puede funcionar sin key en algunos casos)
-        {
-            "name": "Perplexity",
-            "url": "https://api.perplexity.ai/chat/completions",
-            "headers": {"Content-Type": "application/json"},
-            "body": {
-                "model": "llama-3.1-8b-instant",
-                "messages": messages,
-                "max_tokens": 200,
-                "temperature": 0.7
-            },
-            "timeout": 10
-        },
-        # 3. DeepInfra (gratuito con límites)
-        {
-            "name": "DeepInfra",
-            "url": "https://api.deepinfra.com/v1/openai/chat/completions",
-            "headers": {"Content-Type": "application/json"},
-            "body": {
-                "model": "meta-llama/Llama-2-7b-chat-hf",
-                "messages": messages,
-                "max_tokens": 200,
-                "temperature": 0.7
-            },
-            "timeout": 10
-        }
+def _llm_providers() -> List[LLMProvider]:
+    """Proveedores LLM en orden de preferencia inicial (el marcador de la pasarela lo reordena)."""
+    # APIs gratuitas sin key
+    providers = [
+        LLMProvider("Together AI", "https://api.together.xyz/v1/chat/completions",
+                    openai_chat_body("mistralai/Mixtral-8x7B-Instruct-v0.1"), timeout=10),
+        LLMProvider("Perplexity", "https://api.perplexity.ai/chat/completions",
+                    openai_chat_body("llama-3.1-8b-instant"), timeout=10),
+        LLMProvider("DeepInfra", "https://api.deepinfra.com/v1/openai/chat/completions",
+                    openai_chat_body("meta-llama/Llama-2-7b-chat-hf"), timeout=10),
     ]
     
-    for api in apis_to_try:
-        try:
-            r = requests.post(api["url"], headers=api["headers"], json=api["body"], timeout=api["timeout"])
-            if r.status_code == 200:
-                data = r.json()
-                result = data.get('choices', [{}])[0].get('message', {}).get('content')
-                if result:
-                    logger.info(f"✅ LLM funcionó con {api['name']}")
-                    return result
-        except Exception as e:
-            logger.debug(f"API {api['name']} falló: {e}")
-            continue
-    
-    return None
-
-def _llm_generate(prompt: str, system_prompt: str = '') -> Optional[str]:
-    """Generar texto usando el proveedor configurado (prioriza APIs gratuitas)."""
-    try:
-        import requests  # type: ignore
-        
-        # Primero intentar APIs gratuitas sin key
-        result = _llm_generate_free_no_key(prompt, system_prompt)
-        if result:
-            return result
-        
-        # Si fallan, intentar con el proveedor configurado
-        # Groq: API gratuita y muy rápida (recomendada)
-        if LLM_PROVIDER == 'groq':
-            groq_api_key = os.environ.get('GROQ_API_KEY', '')
-            if not groq_api_key:
-                # Si no hay key, intentar usar Hugging Face como fallback automático
-                logger.info("Groq requiere API key, intentando Hugging Face como alternativa gratuita")
-                # Cambiar temporalmente a Hugging Face (nueva API)
-                hf_token = os.environ.get('HUGGINGFACE_API_KEY', '')
-                model = "mistralai/Mistral-7B-Instruct-v0.2"
-                headers = {
-                    "Authorization": f"Bearer {hf_token}" if hf_token else "",
-                    "Content-Type": "application/json"
-                }
-                messages = []
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                body = {
-                    "model": model,
-                    "messages": messages,
-                    "max_tokens": 200,
-                    "temperature": 0.7
-                }
-                try:
-                    r = requests.post("https://router.huggingface.co/chat/completions", headers=headers, json=body, timeout=12)
-                    if r.status_code == 200:
-                        data = r.json()
-                        return data.get('choices', [{}])[0].get('message', {}).get('content')
-                except Exception as e:
-                    logger.warning(f"Hugging Face fallback error: {e}")
-                return None
-            
-            # Groq con API key
-            headers = {
-                "Authorization": f"Bearer {groq_api_key}",
-                "Content-Type": "application/json"
-            }
+    # Proveedor configurado
+    hf_token = os.environ.get('HUGGINGFACE_API_KEY', '')
+    hf_headers = {"Authorization": f"Bearer {hf_token}"} if hf_token else {}
+    if LLM_PROVIDER == 'groq':
+        groq_api_key = os.environ.get('GROQ_API_KEY', '')
+        if groq_api_key:
             # Modelos gratuitos de Groq: llama-3.1-8b-instant, mixtral-8x7b-32768, gemma-7b-it
-            model = LLM_MODEL if LLM_MODEL else "llama-3.1-8b-instant"
-            body = {
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": (system_prompt or "Eres un asistente amable del portal de noticias. Responde en español con calidez y precisión.")},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 200  # Respuestas más cortas = más rápidas
-            }
-            r = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=body, timeout=8)
-            if r.status_code == 200:
-                data = r.json()
-                return data.get('choices', [{}])[0].get('message', {}).get('content')
-            else:
-                logger.warning(f"Groq error {r.status_code}: {r.text[:200]}")
-                return None
-        
-        # Hugging Face: API gratuita (nueva URL router.huggingface.co)
-        elif LLM_PROVIDER == 'huggingface':
-            hf_token = os.environ.get('HUGGINGFACE_API_KEY', '')
-            model = LLM_MODEL if LLM_MODEL else "mistralai/Mistral-7B-Instruct-v0.2"
-            headers = {
-                "Authorization": f"Bearer {hf_token}" if hf_token else "",
-                "Content-Type": "application/json"
-            }
-            # Nueva API de Hugging Face (router.huggingface.co)
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            body = {
-                "model": model,
-                "messages": messages,
-                "max_tokens": 200,
-                "temperature": 0.7
-            }
-            # Usar la nueva URL del router
-            r = requests.post("https://router.huggingface.co/chat/completions", headers=headers, json=body, timeout=12)
-            if r.status_code == 200:
-                data = r.json()
-                return data.get('choices', [{}])[0].get('message', {}).get('content')
-            else:
-                logger.warning(f"Hugging Face error {r.status_code}: {r.text[:200]}")
-                return None
-        
-        # OpenRouter: requiere API key
-        elif LLM_PROVIDER == 'openrouter' and OPENROUTER_API_KEY:
-            headers = {
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost",
-                "X-Title": "WebScraper Assistant"
-            }
-            body = {
-                "model": LLM_MODEL,
-                "messages": [
-                    {"role": "system", "content": (system_prompt or "Eres un asistente del portal de noticias. Responde en español con calidez y precisión.")},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7
-            }
-            r = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=body, timeout=15)
-            if r.status_code == 200:
-                data = r.json()
-                return data.get('choices', [{}])[0].get('message', {}).get('content')
-            else:
-                logger.warning(f"OpenRouter error {r.status_code}: {r.text[:200]}")
-                return None
-        
-        # Ollama: local
-        elif LLM_PROVIDER == 'ollama':
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            payload = {
+            providers.append(LLMProvider("Groq", "https://api.groq.com/openai/v1/chat/completions",
+                                         openai_chat_body(LLM_MODEL or "llama-3.1-8b-instant"),
+                                         headers={"Authorization": f"Bearer {groq_api_key}"}, timeout=8))
+        else:
+            # Sin key de Groq, Hugging Face como alternativa gratuita
+            providers.append(LLMProvider("Hugging Face", "https://router.huggingface.co/chat/completions",
+                                         openai_chat_body("mistralai/Mistral-7B-Instruct-v0.2"),
+                                         headers=hf_headers, timeout=12))
+    elif LLM_PROVIDER == 'huggingface':
+        providers.append(LLMProvider("Hugging Face", "https://router.huggingface.co/chat/completions",
+                                     openai_chat_body(LLM_MODEL or "mistralai/Mistral-7B-Instruct-v0.2"),
+                                     headers=hf_headers, timeout=12))
+    elif LLM_PROVIDER == 'openrouter' and OPENROUTER_API_KEY:
+        providers.append(LLMProvider("OpenRouter", "https://openrouter.ai/api/v1/chat/completions",
+                                     openai_chat_body(LLM_MODEL, max_tokens=None),
+                                     headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                                              "HTTP-Referer": "http://localhost",
+                                              "X-Title": "WebScraper Assistant"}, timeout=15))
+    elif LLM_PROVIDER == 'ollama':
+        def ollama_body(messages):
+            return {
                 "model": LLM_MODEL,
                 "messages": messages,
                 "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "num_predict": 200,  # Respuestas más largas
-                    "top_p": 0.9,
-                    "top_k": 40
-                }
+                "options": {"temperature": 0.7, "num_predict": 200, "top_p": 0.9, "top_k": 40}
             }
-            r = requests.post('http://localhost:11434/api/chat', json=payload, timeout=10)
-            if r.status_code == 200:
-                data = r.json()
-                return data.get('message', {}).get('content')
+        providers.append(LLMProvider("Ollama", "http://localhost:11434/api/chat", ollama_body, timeout=10,
+                                     parse=lambda data: data.get('message', {}).get('content'),
+                                     parse_stream=parse_ollama_stream_line))
+    return providers
+
+# Pasarela LLM: caché de respuestas + llamadas hedged ordenadas por latencia/salud
+llm_gateway = LLMGateway(
+    _llm_providers,
+    cache=LLMResponseCache(max_entries=int(os.environ.get('LLM_CACHE_SIZE', '512')),
+                           ttl=float(os.environ.get('LLM_CACHE_TTL', '3600'))),
+    hedge_delay=float(os.environ.get('LLM_HEDGE_DELAY', '1.5'))
+)
+
+def _llm_generate(prompt: str, system_prompt: str = '', context_ids=(), cache_text: Optional[str] = None,
+                  deadline: float = 8.0) -> Optional[str]:
+    """Generar texto con el primer proveedor que responda (respuestas cacheadas por prompt + artículos)."""
+    try:
+        return llm_gateway.generate(prompt, system_prompt, context_ids=context_ids,
+                                    cache_text=cache_text, deadline=deadline)
     except Exception as e:
         logger.warning(f"LLM error: {e}")
     return None
@@ -576,6 +456,7 @@ def llm_status():
             'model': model,
             'key_present': key_present,
             'available': available,
+            'gateway': llm_gateway.status(),
             'note': 'Groq y Hugging Face son gratuitas. Groq es muy rápida.' if provider in ['groq', 'huggingface'] else ''
         })
     except Exception as e:
@@ -584,195 +465,32 @@ def llm_status():
 # ============================================================
 # Chatbot Inteligente (MVP)
 # ============================================================
+# Búsquedas recientes por sesión de chat: un "resumen" tras un "buscar" reutiliza los resultados
+chat_sessions = ChatSessionCache(
+    max_sessions=int(os.environ.get('CHAT_SESSION_CACHE_SIZE', '1000')),
+    ttl=float(os.environ.get('CHAT_SESSION_TTL', '900'))
+)
+
+def _chat_retriever() -> ChatRetriever:
+    """Retriever del turno actual (uno por request, memoiza todas las búsquedas del turno)."""
+    retriever = getattr(request, 'chat_retriever', None)
+    if retriever is None:
+        payload = request.get_json(silent=True) or {}
+        user_id = (getattr(request, 'current_user', None) or {}).get('user_id')
+        session_key = (user_id, payload.get('session_id'))
+        vector_index.sync_in_background(DB_PATH)
+        retriever = ChatRetriever(DB_PATH, sessions=chat_sessions, session_key=session_key, vector_index=vector_index)
+        request.chat_retriever = retriever
+    return retriever
+
 def _search_articles(query: str = '', date_from: Optional[str] = None, date_to: Optional[str] = None, limit: int = 20, newspaper: Optional[str] = None):
-    """Búsqueda simple en la BD con soporte de rango de fechas y texto."""
-    conn = get_db_connection()
-    if not conn:
-        return []
+    """Búsqueda rankeada en la BD con soporte de rango de fechas y texto (sin memo de sesión)."""
     try:
-        # Normalizar query básica
-        raw_query = (query or '').strip().strip('"').strip("'")
-        params = []
-        q = "SELECT id, title, url, summary, date, newspaper, images_data, content FROM articles WHERE 1=1"
-        
-        # Filtrar por periódico si se especifica
-        if newspaper:
-            q += " AND newspaper = ?"
-            params.append(newspaper)
-        # Registrar función para normalizar (lower + quitar tildes)
-        import unicodedata
-        def normalize_text(s: Optional[str]):
-            if not s:
-                return ''
-            s = s.lower()
-            s = ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
-            return s
-        conn.create_function('normalize_text', 1, normalize_text)
-        if raw_query:
-            # Dividir la query en palabras para búsqueda más precisa
-            query_words = [w.strip() for w in raw_query.strip().split() if w.strip() and len(w.strip()) > 2]
-            # Filtrar palabras de parada
-            stop_words = set(['de','la','el','los','las','y','o','u','en','del','al','para','por','con','un','una','que','se','su','sus','a','es','son','estan','están','fue','fueron','sobre','articulos','artículos','noticias','noticia'])
-            query_words = [w for w in query_words if normalize_text(w) not in stop_words]
-            
-            if not query_words:
-                # Si después de filtrar no quedan palabras, usar la query original
-                query_words = [raw_query.strip()]
-            
-            if len(query_words) > 1:
-                # Búsqueda con múltiples palabras: TODAS deben estar presentes (AND)
-                # Esto asegura relevancia - si buscas "huelga docente", ambos términos deben estar
-                search_conditions = []
-                search_params = []
-                for word in query_words:
-                    word_like = f"%{word}%"
-                    # Cada palabra debe estar en al menos uno de los campos
-                    if newspaper:
-                        search_conditions.append("(normalize_text(title) LIKE normalize_text(?) OR normalize_text(content) LIKE normalize_text(?) OR normalize_text(summary) LIKE normalize_text(?))")
-                        search_params.extend([word_like, word_like, word_like])
-                    else:
-                        search_conditions.append("(normalize_text(title) LIKE normalize_text(?) OR normalize_text(content) LIKE normalize_text(?) OR normalize_text(summary) LIKE normalize_text(?) OR normalize_text(newspaper) LIKE normalize_text(?))")
-                        search_params.extend([word_like, word_like, word_like, word_like])
-                if search_conditions:
-                    # AND entre palabras para mayor relevancia
-                    q += " AND (" + " AND ".join(search_conditions) + ")"
-                    params.extend(search_params)
-            else:
-                # Búsqueda con una sola palabra: buscar en todos los campos
-                like = f"%{query_words[0]}%"
-                if newspaper:
-                    q += " AND (normalize_text(title) LIKE normalize_text(?) OR normalize_text(content) LIKE normalize_text(?) OR normalize_text(summary) LIKE normalize_text(?))"
-                    params.extend([like, like, like])
-                else:
-                    # Buscar en todos los campos incluyendo newspaper
-                    q += " AND (normalize_text(title) LIKE normalize_text(?) OR normalize_text(content) LIKE normalize_text(?) OR normalize_text(summary) LIKE normalize_text(?) OR normalize_text(newspaper) LIKE normalize_text(?))"
-                    params.extend([like, like, like, like])
-        # Normalizador de fechas (misma función usada en get_articles)
-        def sqlite_parse_date(date_str):
-            if not date_str:
-                return None
-            try:
-                if 'T' in date_str:
-                    return date_str[:10]
-                import re
-                m = re.search(r'(\\d{1,2})\\s+(\\w{3})\\s+(\\d{4})', date_str)
-                if m:
-                    day, mon, year = m.groups()
-                    month_map = {'Jan':'01','Feb':'02','Mar':'03','Apr':'04','May':'05','Jun':'06','Jul':'07','Aug':'08','Sep':'09','Oct':'10','Nov':'11','Dec':'12'}
-                    return f"{year}-{month_map.get(mon,'01')}-{day.zfill(2)}"
-                if '-' in date_str[:10]:
-                    return date_str[:10]
-            except Exception:
-                return None
-            return None
-        conn.create_function('parse_date', 1, sqlite_parse_date)
-        if date_from:
-            q += " AND (parse_date(date) >= ? OR date >= ?)"
-            params.extend([date_from, date_from])
-        if date_to:
-            q += " AND (parse_date(date) <= ? OR date <= ?)"
-            params.extend([date_to, date_to + 'T23:59:59'])
-        # Optimizar: usar índice si existe, ordenar por fecha más reciente
-        q += " ORDER BY scraped_at DESC LIMIT ?"
-        params.append(min(limit, 50))  # Limitar a máximo 50 para evitar timeouts
-        cur = conn.cursor()
-        cur.execute(q, params)
-        rows = cur.fetchall()
-        articles = []
-        for r in rows:
-            images = []
-            try:
-                images = json.loads(r[6]) if r[6] else []
-            except Exception:
-                images = []
-            articles.append({
-                'id': r[0],
-                'title': r[1],
-                'url': r[2],
-                'summary': r[3],
-                'date': r[4],
-                'newspaper': r[5],
-                'image': images[0]['url'] if images else None
-            })
-        # Si no hubo resultados o hay pocos, aplicar scoring por tokens (búsqueda semántica mejorada)
-        # Siempre intentar búsqueda semántica si hay query para encontrar más resultados
-        if raw_query and len(articles) < limit:
-            try:
-                stop = set(['de','la','el','los','las','y','o','u','en','del','al','para','por','con','un','una','que','se','su','sus','a','es','son','estan','están','fue','fueron'])
-                tokens = [t for t in normalize_text(raw_query).split() if len(t) > 2 and t not in stop]
-                if tokens:
-                    where = ""
-                    extra_params = []
-                    if newspaper:
-                        where += " AND newspaper = ?"
-                        extra_params.append(newspaper)
-                    if date_from:
-                        where += " AND (parse_date(date) >= ? OR date >= ?)"
-                        extra_params.extend([date_from, date_from])
-                    if date_to:
-                        where += " AND (parse_date(date) <= ? OR date <= ?)"
-                        extra_params.extend([date_to, date_to + 'T23:59:59'])
-                    # Traer más artículos para score (aumentado para mejor cobertura)
-                    pool_limit = 200 if not newspaper else 150
-                    cur.execute(f"""
-                        SELECT id, title, url, summary, date, newspaper, images_data, 
-                               LOWER(COALESCE(title,'')||' '||COALESCE(summary,'')||' '||COALESCE(content,'')) as fulltext
-                        FROM articles
-                        WHERE 1=1 {where}
-                        ORDER BY scraped_at DESC LIMIT ?
-                    """, extra_params + [pool_limit])
-                    pool = cur.fetchall()
-                    scored = []
-                    existing_ids = {a['id'] for a in articles}  # Evitar duplicados
-                    for row in pool:
-                        if row[0] in existing_ids:
-                            continue
-                        ft = normalize_text(row[7] or '')
-                        # Mejor scoring: contar coincidencias y dar más peso a títulos
-                        title_norm = normalize_text(row[1] or '')
-                        summary_norm = normalize_text(row[3] or '')
-                        score = 0
-                        tokens_found = 0
-                        for t in tokens:
-                            found = False
-                            if t in ft:
-                                score += 1
-                                found = True
-                            if t in title_norm:
-                                score += 2  # Más peso a títulos
-                                found = True
-                            if t in summary_norm:
-                                score += 1.5  # Peso medio a resúmenes
-                                found = True
-                            if found:
-                                tokens_found += 1
-                        # Requerir que al menos la mitad de los tokens estén presentes para relevancia
-                        min_tokens_required = max(1, len(tokens) // 2) if len(tokens) > 1 else 1
-                        if score > 0 and tokens_found >= min_tokens_required:
-                            images = []
-                            try:
-                                images = json.loads(row[6]) if row[6] else []
-                            except Exception:
-                                images = []
-                            scored.append((score, {
-                                'id': row[0],
-                                'title': row[1],
-                                'url': row[2],
-                                'summary': row[3],
-                                'date': row[4],
-                                'newspaper': row[5],
-                                'image': images[0]['url'] if images else None
-                            }))
-                    scored.sort(key=lambda x: x[0], reverse=True)
-                    # Agregar los mejores resultados semánticos a los existentes
-                    # Solo agregar si tienen un score mínimo razonable (al menos 2 puntos)
-                    semantic_articles = [a for score, a in scored if score >= 2][:limit - len(articles)]
-                    articles.extend(semantic_articles)
-            except Exception as e:
-                logger.warning(f"Semantic-like search error: {e}")
-        return articles
-    finally:
-        conn.close()
+        return ChatRetriever(DB_PATH, vector_index=vector_index).search(
+            query, date_from=date_from, date_to=date_to, limit=limit, newspaper=newspaper)
+    except Exception as e:
+        logger.warning(f"Search articles error: {e}")
+        return []
 
 def _summarize_articles(articles: List[Dict], max_points: int = 5) -> List[str]:
     """Resumen muy simple por heurística (títulos + primeras frases)."""
@@ -1134,17 +852,19 @@ def chat_endpoint():
         # Limitar el número de resultados para evitar timeouts
         search_limit = min(limit or 10, 15)  # Máximo 15 artículos para el chatbot
         
+        # Todas las búsquedas del turno pasan por el mismo retriever (memoizadas)
+        retriever = _chat_retriever()
         # Si detectamos un periódico, buscar específicamente en ese periódico
         if detected_newspaper:
             # Si solo mencionó el periódico sin tema adicional, traer los más recientes
             if not query or len(query.strip()) < 3:
-                articles = _search_articles(query='', date_from=date_from, date_to=date_to, limit=search_limit, newspaper=detected_newspaper)
+                articles = retriever.search(query='', date_from=date_from, date_to=date_to, limit=search_limit, newspaper=detected_newspaper)
             else:
                 # Buscar en el periódico específico con el tema
-                articles = _search_articles(query=query, date_from=date_from, date_to=date_to, limit=search_limit, newspaper=detected_newspaper)
+                articles = retriever.search(query=query, date_from=date_from, date_to=date_to, limit=search_limit, newspaper=detected_newspaper)
         else:
             # Si no hay periódico específico, buscar por tema en todos los periódicos
-            articles = _search_articles(query=query, date_from=date_from, date_to=date_to, limit=search_limit)
+            articles = retriever.search(query=query, date_from=date_from, date_to=date_to, limit=search_limit)
 
         # Si no hay resultados, intentar scrappear en caliente si detectamos el medio
         if not articles:
@@ -1161,8 +881,9 @@ def chat_endpoint():
                         scraper.close()
                     if found:
                         save_articles_to_db(found, category='General', newspaper=source_name, region='')
-                        # reintentar la búsqueda
-                        articles = _search_articles(query=query, date_from=date_from, date_to=date_to, limit=limit)
+                        # reintentar la búsqueda (hay artículos nuevos: lo memoizado ya no vale)
+                        retriever.invalidate()
+                        articles = retriever.search(query=query, date_from=date_from, date_to=date_to, limit=limit)
                 except Exception as e:
                     logger.warning(f"Chatbot fallback scrape failed for {guess}: {e}")
 
@@ -1190,33 +911,16 @@ def chat_endpoint():
             recent_citations = []
             if guess:
                 try:
-                    conn = get_db_connection()
-                    cur = conn.cursor()
                     source_url, source_name = guess
-                    # Stats del medio
-                    cur.execute("SELECT COUNT(*), MAX(date) FROM articles WHERE LOWER(newspaper) LIKE ?", (f"%{source_name.lower()}%",))
-                    row = cur.fetchone()
-                    count = row[0] if row else 0
-                    last_date = row[1] if row else None
-                    if count > 0:
-                        db_hint = f" En tu base, '{source_name}' tiene {count} artículos. Última fecha: {last_date or 'N/A'}."
-                        # Top 5 más recientes del medio para que el usuario tenga opciones
-                        cur.execute("""
-                            SELECT title, url FROM articles
-                            WHERE LOWER(newspaper) LIKE ?
-                            ORDER BY scraped_at DESC LIMIT 5
-                        """, (f"%{source_name.lower()}%",))
-                        rows = cur.fetchall()
-                        for t,u in rows:
-                            if t and u:
-                                recent_citations.append({'title': t, 'url': u})
+                    # Stats del medio + top 5 más recientes para que el usuario tenga opciones
+                    overview = retriever.source_overview(source_name)
+                    if overview['count'] > 0:
+                        db_hint = f" En tu base, '{source_name}' tiene {overview['count']} artículos. Última fecha: {overview['last_date'] or 'N/A'}."
+                        for a in overview['recent']:
+                            if a['title'] and a['url']:
+                                recent_citations.append({'title': a['title'], 'url': a['url']})
                 except Exception as e:
                     logger.warning(f"DB stats error: {e}")
-                finally:
-                    try:
-                        conn.close()
-                    except:
-                        pass
             reply = f"😔 No encontré artículos para esa búsqueda{detail}.{db_hint}\n\n💡 Sugerencias:\n- Prueba con términos más generales\n- Verifica el rango de fechas\n- Usa los filtros en la página de Artículos para búsquedas más precisas"
             if recent_citations:
                 reply += "\n\n📰 Te dejo los últimos artículos de esa fuente que tengo en la base:"
@@ -1227,34 +931,25 @@ def chat_endpoint():
     # Intent: resumir
     if any(k in msg_lower for k in ['resumen', 'resúmeme', 'resumir']):
         query_for_summary = message.replace('resumen','').strip()
-        articles = _search_articles(query=query_for_summary, date_from=date_from, date_to=date_to, limit=limit)
+        retriever = _chat_retriever()
+        # "resumen" a secas (o "resúmelo", "resumen de eso") tras una búsqueda: reutilizar sus resultados
+        last = retriever.last_results()
+        if last and _is_summary_followup(query_for_summary):
+            articles = last['articles'][:limit]
+        else:
+            articles = retriever.search(query=query_for_summary, date_from=date_from, date_to=date_to, limit=limit)
         # Si no hay artículos para resumir, usar los más recientes de la base (o del medio si se detecta)
         if not articles:
             # Detectar medio si lo hay
             guess = _guess_source_url(query_for_summary)
             try:
-                conn = get_db_connection()
-                cur = conn.cursor()
                 if guess:
                     source_url, source_name = guess
-                    cur.execute("""
-                        SELECT title, url, summary FROM articles
-                        WHERE LOWER(newspaper) LIKE ?
-                        ORDER BY scraped_at DESC LIMIT 5
-                    """, (f"%{source_name.lower()}%",))
+                    articles = list(retriever.source_overview(source_name)['recent'])
                 else:
-                    cur.execute("""
-                        SELECT title, url, summary FROM articles
-                        ORDER BY scraped_at DESC LIMIT 5
-                    """)
-                rows = cur.fetchall()
-                for t,u,s in rows:
-                    articles.append({'title': t, 'url': u, 'summary': s})
+                    articles = retriever.search(query='', limit=5)
             except Exception as e:
                 logger.warning(f"Resumen fallback error: {e}")
-            finally:
-                try: conn.close()
-                except: pass
         bullets = _summarize_articles(articles, max_points=5)
         if bullets:
             # Resumen directo sin LLM (más rápido) con formato mejorado
@@ -1284,43 +979,96 @@ def chat_endpoint():
         return jsonify({'reply': reply})
 
     # Small-talk/otro: intentar LLM primero, luego fallback inteligente
-    # Siempre intentar LLM (puede funcionar sin key con algunas APIs)
-    llm_worked = False
-    if True:  # Siempre intentar LLM primero
-        # Construir contexto completo con KB del sitio
-        kb_context = ""
-        if SITE_KB:
-            kb_about = SITE_KB.get('about', '')
-            kb_sections = SITE_KB.get('sections', {})
-            kb_howto = SITE_KB.get('howto', {})
-            
-            kb_context = f"\n\nInformación sobre este portal:\n"
-            if kb_about:
-                kb_context += f"Descripción: {kb_about}\n"
-            if kb_sections:
-                kb_context += "\nSecciones disponibles:\n"
-                for s, desc in list(kb_sections.items())[:10]:  # Limitar a 10 secciones
-                    kb_context += f"- {s}: {desc}\n"
-            if kb_howto:
-                kb_context += "\nCómo hacer cosas:\n"
-                for key, desc in list(kb_howto.items())[:5]:  # Limitar a 5 instrucciones
-                    kb_context += f"- {desc}\n"
-        
-        # Obtener estadísticas actuales para contexto
+    # En /api/chat/stream esta parte se genera token a token fuera de aquí
+    if getattr(request, 'chat_stream', False):
+        return None
+    
+    # Misma recuperación que /api/chat/stream: los artículos van al prompt y a la clave de caché
+    articles = []
+    try:
+        articles = _chat_retriever().search(query=message, date_from=date_from, date_to=date_to, limit=5)
+    except Exception as e:
+        logger.warning(f"⚠️ Error recuperando artículos para el chat: {e}")
+    system_prompt, user_prompt = _build_chat_llm_prompts(message, articles)
+    # La pasarela espera como máximo 8s (proveedores en paralelo) y cachea por mensaje normalizado
+    # más los ids de los artículos: las estadísticas en vivo no invalidan las preguntas frecuentes,
+    # pero un artículo nuevo recuperado sí
+    text = _llm_generate(user_prompt, system_prompt, context_ids=[a['id'] for a in articles],
+                         cache_text=message, deadline=8)
+    
+    # Si el LLM funcionó, usar su respuesta
+    if text and text.strip():
+        _record_chat_usage(user_id, role)
+        citations = [{'title': a['title'], 'url': a['url']} for a in articles if a.get('title') and a.get('url')]
+        return jsonify({'reply': text, 'citations': citations} if citations else {'reply': text})
+    
+    # Fallback inteligente: respuesta contextual basada en el mensaje (siempre se ejecuta si LLM falla)
+    reply = _chat_fallback_reply(message)
+    _record_chat_usage(user_id, role)
+    return jsonify({'reply': reply, 'plan': plan_name})
+
+_SUMMARY_FOLLOWUP_WORDS = {
+    'resumen', 'resúmeme', 'resumeme', 'resumir', 'resúmelo', 'resumelo', 'resúmelos', 'resumelos',
+    'de', 'del', 'eso', 'esto', 'esos', 'estos', 'esas', 'estas', 'lo', 'los', 'las', 'anterior', 'anteriores',
+    'artículos', 'articulos', 'noticias', 'resultados', 'por', 'favor', 'un', 'una', 'me', 'dame', 'haz', 'hazme'
+}
+
+def _is_summary_followup(text: str) -> bool:
+    """True si el pedido de resumen no trae un tema nuevo (se refiere a la búsqueda anterior)."""
+    words = re.findall(r'\w+', (text or '').lower())
+    return all(w in _SUMMARY_FOLLOWUP_WORDS for w in words)
+
+def _record_chat_usage(user_id: int, role: str):
+    """Registrar un mensaje de chat en el consumo del plan (admin no consume)."""
+    if role != 'admin':
         try:
-            conn = get_db_connection()
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) FROM articles")
-            total_articles = cur.fetchone()[0]
-            cur.execute("SELECT COUNT(DISTINCT newspaper) FROM articles")
-            total_newspapers = cur.fetchone()[0]
-            conn.close()
-            kb_context += f"\nEstado actual: {total_articles} artículos de {total_newspapers} periódicos en la base de datos.\n"
-        except:
+            auth_system.subscription_system.update_chat_usage(user_id, 1)
+        except Exception:
             pass
+
+def _build_chat_llm_prompts(message: str, articles: Optional[List[Dict]] = None) -> Tuple[str, str]:
+    """Prompts (system, user) para el LLM con la KB del sitio y, si los hay, los artículos recuperados."""
+    # Construir contexto completo con KB del sitio
+    kb_context = ""
+    if SITE_KB:
+        kb_about = SITE_KB.get('about', '')
+        kb_sections = SITE_KB.get('sections', {})
+        kb_howto = SITE_KB.get('howto', {})
         
-        # System prompt mejorado y más específico para responder cualquier pregunta sobre el portal
-        system_prompt = """Eres un asistente amable y profesional del portal de noticias Web Scraper. 
+        kb_context = f"\n\nInformación sobre este portal:\n"
+        if kb_about:
+            kb_context += f"Descripción: {kb_about}\n"
+        if kb_sections:
+            kb_context += "\nSecciones disponibles:\n"
+            for s, desc in list(kb_sections.items())[:10]:  # Limitar a 10 secciones
+                kb_context += f"- {s}: {desc}\n"
+        if kb_howto:
+            kb_context += "\nCómo hacer cosas:\n"
+            for key, desc in list(kb_howto.items())[:5]:  # Limitar a 5 instrucciones
+                kb_context += f"- {desc}\n"
+    
+    # Obtener estadísticas actuales para contexto
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM articles")
+        total_articles = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(DISTINCT newspaper) FROM articles")
+        total_newspapers = cur.fetchone()[0]
+        conn.close()
+        kb_context += f"\nEstado actual: {total_articles} artículos de {total_newspapers} periódicos en la base de datos.\n"
+    except:
+        pass
+    
+    # Artículos recuperados para la pregunta (el LLM debe apoyarse en ellos)
+    if articles:
+        kb_context += "\nArtículos relevantes de la base de datos:\n"
+        for i, a in enumerate(articles[:5], 1):
+            summary = (a.get('summary') or '')[:300]
+            kb_context += f"[{i}] {a.get('title')} ({a.get('newspaper') or 'N/A'}, {a.get('date') or 's/f'}): {summary}\n"
+    
+    # System prompt mejorado y más específico para responder cualquier pregunta sobre el portal
+    system_prompt = """Eres un asistente amable y profesional del portal de noticias Web Scraper. 
 Tu objetivo es ayudar a los usuarios de forma clara, amigable y útil respondiendo CUALQUIER pregunta sobre el portal.
 
 IMPORTANTE:
@@ -1344,50 +1092,19 @@ IMPORTANTE:
 - Mantén las respuestas informativas pero concisas (2-5 líneas normalmente, más si es necesario)
 - Si no sabes algo específico, admítelo amablemente y ofrece ayuda alternativa
 - Usa emojis de forma moderada para hacer la conversación más amigable (👋 📰 ✅ 💡 🔍 📊)"""
-        
-        user_prompt = f"""Usuario pregunta: "{message}"
+    
+    user_prompt = f"""Usuario pregunta: "{message}"
 
 Contexto completo del portal:
 {kb_context}
 
 Responde de forma amigable, natural y útil. Usa toda la información del contexto para dar una respuesta completa y precisa. Si el usuario pregunta sobre cómo hacer algo, explica paso a paso. Si pregunta sobre funcionalidades, describe claramente qué puede hacer y cómo. Sé conversacional, amigable y siempre útil."""
-        
-        # Usar threading con timeout para evitar demoras excesivas
-        import threading
-        result = [None]
-        exception_occurred = [False]
-        
-        def call_llm():
-            try:
-                result[0] = _llm_generate(user_prompt, system_prompt)
-            except Exception as e:
-                exception_occurred[0] = True
-                logger.warning(f"LLM error en chat: {e}")
-        
-        thread = threading.Thread(target=call_llm)
-        thread.daemon = True
-        thread.start()
-        thread.join(timeout=8)  # Máximo 8 segundos para LLM (APIs gratuitas son rápidas)
-        
-        if thread.is_alive():
-            # Si aún está corriendo, usar fallback inteligente
-            logger.debug("LLM timeout, usando respuesta inteligente")
-            text = None
-        else:
-            text = result[0]
-        
-        # Si el LLM funcionó, usar su respuesta
-        if text and not exception_occurred[0] and text.strip():
-            llm_worked = True
-            # Registrar uso del chat
-            if role != 'admin':
-                try:
-                    auth_system.subscription_system.update_chat_usage(user_id, 1)
-                except Exception:
-                    pass
-            return jsonify({'reply': text})
-    
-    # Fallback inteligente: respuesta contextual basada en el mensaje (siempre se ejecuta si LLM falla)
+    if articles:
+        user_prompt += "\nSi usas información de los artículos relevantes, cítalos con su número entre corchetes, p.ej. [1]."
+    return system_prompt, user_prompt
+
+def _chat_fallback_reply(message: str) -> str:
+    """Respuesta sin LLM basada en la KB del sitio."""
     kb_context_for_fallback = ""
     if SITE_KB:
         kb_about = SITE_KB.get('about', '')
@@ -1398,15 +1115,93 @@ Responde de forma amigable, natural y útil. Usa toda la información del contex
             for s, desc in list(kb_sections.items())[:10]:
                 kb_context_for_fallback += f"- {s}: {desc}\n"
     
-    reply = _generate_intelligent_fallback(message, kb_context_for_fallback, SITE_KB)
-    
-    # Registrar uso del chat
-    if role != 'admin':
-        try:
-            auth_system.subscription_system.update_chat_usage(user_id, 1)
-        except Exception:
-            pass
-    return jsonify({'reply': reply, 'plan': plan_name})
+    return _generate_intelligent_fallback(message, kb_context_for_fallback, SITE_KB)
+
+@app.route('/api/chat/stream', methods=['POST'])
+@require_auth
+def chat_stream_endpoint():
+    """Chat en streaming por Server-Sent Events (mismo payload que /api/chat).
+
+    Eventos emitidos:
+    - citations: artículos recuperados, en cuanto termina la búsqueda
+    - token: fragmento de la respuesta del LLM según llega del proveedor
+    - message: respuesta completa (intents sin LLM o fallback sin LLM)
+    - error: error con el mismo mensaje que devolvería /api/chat
+    - done: fin del stream con la respuesta completa
+    Las intenciones deterministas (estadísticas, búsqueda, resumen, plan...) se
+    resuelven con la misma lógica de /api/chat y se envían como un único 'message'.
+    """
+    try:
+        payload = request.get_json() or {}
+        message = (payload.get('message') or '').strip()
+        date_from = payload.get('date_from')
+        date_to = payload.get('date_to')
+        user_id = request.current_user.get('user_id')
+        role = request.current_user.get('role', 'user')
+        
+        # Intents sin LLM: misma respuesta que /api/chat (None = toca generar con el LLM)
+        request.chat_stream = True
+        result = chat_endpoint.__wrapped__()
+        
+        if result is not None:
+            response = app.make_response(result)
+            data = response.get_json(silent=True) or {}
+            
+            def generate_static():
+                if response.status_code >= 400:
+                    yield _sse_event('error', {'error': data.get('error', 'Error en el chat'), 'status': response.status_code})
+                else:
+                    if data.get('citations'):
+                        yield _sse_event('citations', {'citations': data['citations']})
+                    yield _sse_event('message', data)
+                yield _sse_event('done', {'reply': data.get('reply', '')})
+            
+            stream = generate_static()
+        else:
+            retriever = _chat_retriever()
+            
+            def generate_llm():
+                # 1) Recuperación: las citas salen antes que el primer token
+                articles = []
+                try:
+                    articles = retriever.search(query=message, date_from=date_from, date_to=date_to, limit=5)
+                except Exception as e:
+                    logger.warning(f"⚠️ Error recuperando artículos para el chat: {e}")
+                citations = [{'title': a['title'], 'url': a['url']} for a in articles if a.get('title') and a.get('url')]
+                if citations:
+                    yield _sse_event('citations', {'citations': citations})
+                
+                # 2) Respuesta del LLM token a token (el primer proveedor en responder gana)
+                system_prompt, user_prompt = _build_chat_llm_prompts(message, articles)
+                parts = []
+                for delta in llm_gateway.stream(user_prompt, system_prompt, context_ids=[a['id'] for a in articles],
+                                                cache_text=message, deadline=8):
+                    parts.append(delta)
+                    yield _sse_event('token', {'text': delta})
+                reply = ''.join(parts)
+                
+                # 3) Sin LLM: fallback inteligente como en /api/chat
+                if not reply.strip():
+                    try:
+                        reply = _chat_fallback_reply(message)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Error en fallback del chat: {e}")
+                        reply = "💡 Puedo ayudarte a buscar noticias, hacer resúmenes, ver estadísticas o consultar tu plan. ¿Qué te gustaría hacer?"
+                    yield _sse_event('message', {'reply': reply, 'citations': citations, 'fallback': True})
+                
+                _record_chat_usage(user_id, role)
+                yield _sse_event('done', {'reply': reply})
+            
+            stream = generate_llm()
+        
+        response = app.response_class(stream_with_context(stream), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except Exception as e:
+        logger.error(f"❌ Error en chat streaming: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 def _generate_intelligent_fallback(message: str, kb_context: str, site_kb: dict) -> str:
     """Generar respuesta inteligente sin LLM basada en el contexto."""
@@ -1507,7 +1302,7 @@ def _generate_intelligent_fallback(message: str, kb_context: str, site_kb: dict)
     
     return f"¡Hola! 👋{kb_info}{stats_text}\n\n💡 Puedo ayudarte a:\n• 🔍 Buscar noticias y artículos\n• 📰 Hacer resúmenes\n• 📅 Filtrar por fechas\n• 📊 Mostrar estadísticas\n• 💳 Consultar tu plan\n• ❓ Responder preguntas sobre el portal\n\n¿Qué te gustaría hacer?"
 # Inicializar sistema de competitive intelligence
-ci_system = CompetitiveIntelligenceSystem()
+ci_system = CompetitiveIntelligenceSystem(news_db_path=DB_PATH)
 
 # Estado global del scraping
 scraping_status = {
@@ -1519,9 +1314,27 @@ scraping_status = {
     'images_found': 0,
     'error': None,
     'start_time': None,
-    'end_time': None
+    'end_time': None,
+    'job_id': None
 }
 
+
+# Las páginas de un job se extraen en varios hilos: los contadores se actualizan bajo este lock
+_scraping_status_lock = threading.Lock()
+
+
+def _update_scraping_status(changes: Dict, increments: Optional[Dict[str, int]] = None):
+    """Actualizar el estado del scraping y publicarlo en el bus (coalescido por job).
+
+    increments suma a los contadores indicados (progress, articles_found...) de forma atómica.
+    """
+    with _scraping_status_lock:
+        scraping_status.update(changes)
+        for key, amount in (increments or {}).items():
+            scraping_status[key] = (scraping_status.get(key) or 0) + amount
+        # Publicar dentro del lock: el último evento coalescido es siempre el estado más reciente
+        send_scraping_progress(scraping_status.get('job_id') or 'scraping', dict(scraping_status))
+
 AUTO_UPDATE_INTERVAL_MINUTES = int(os.environ.get('AUTO_UPDATE_INTERVAL_MINUTES', '30'))
 _auto_update_scheduler: Optional[BackgroundScheduler] = None
 
@@ -1847,6 +1660,22 @@ def detect_user_manual_urls(newspaper_name: str, days_back: int = 30):
         return []
 
 
+def start_realtime_server():
+    """Arrancar el servidor WebSocket en este proceso, sobre el loop del bus de eventos"""
+    if os.environ.get('WEBSOCKET_ENABLED', '1') != '1':
+        return
+    try:
+        from backend.core.websocket_server import websocket_server
+    except ImportError:
+        logger.warning("⚠️ websockets no disponible: notificaciones solo por SSE (/api/events/stream)")
+        return
+    try:
+        websocket_server.start_server()
+        logger.info(f"📡 WebSocket escuchando en ws://{websocket_server.host}:{websocket_server.port}")
+    except Exception as e:
+        logger.error(f"❌ Error iniciando servidor WebSocket: {e}")
+
+
 def start_auto_update_scheduler():
     """Iniciar scheduler en segundo plano para actualizaciones automáticas usando cron schedules."""
     global _auto_update_scheduler
@@ -2009,7 +1838,10 @@ def get_db_connection():
     """Obtener conexión a la base de datos SQLite"""
     try:
         import sqlite3
-        return sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(DB_PATH)
+        # article_body() para leer content desde la vista articles_with_body
+        register_article_functions(conn)
+        return conn
     except Exception as e:
         logger.error(f"Error conectando a la base de datos: {e}")
         return None
@@ -2102,6 +1934,59 @@ def init_database():
             cursor.execute("ALTER TABLE articles ADD COLUMN user_category TEXT")
         except Exception:
             pass
+
+        # Dominio extraído de la URL (indexado) para filtros por dominio sin LIKE '%...%'
+        try:
+            cursor.execute("ALTER TABLE articles ADD COLUMN domain TEXT")
+        except Exception:
+            pass
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_domain ON articles(domain)")
+
+        # Polaridad de título y resumen (se calcula en la ingesta; las filas antiguas con backfill_article_sentiment.py)
+        try:
+            cursor.execute("ALTER TABLE articles ADD COLUMN sentiment TEXT")
+        except Exception:
+            pass
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_sentiment ON articles(sentiment)")
+
+        # Fallos por dominio (cortacircuitos) y presupuesto agotado de cada sesión
+        for column, definition in (('failed_domains', 'TEXT'), ('deadline_exceeded', 'INTEGER DEFAULT 0')):
+            try:
+                cursor.execute(f"ALTER TABLE scraping_stats ADD COLUMN {column} {definition}")
+            except Exception:
+                pass
+
+        # Imágenes como filas de images (posición e imagen principal) en lugar del JSON images_data
+        ensure_article_images_schema(cursor)
+        migrated_images = migrate_images_data(cursor)
+        if migrated_images:
+            logger.info(f"🖼️ Imágenes de {migrated_images} artículos convertidas a filas de images")
+
+        # Índice de listados (los de cobertura de versiones anteriores ya no se usan)
+        cursor.execute("DROP INDEX IF EXISTS idx_articles_card")
+        cursor.execute("DROP INDEX IF EXISTS idx_articles_list")
+        cursor.execute(ARTICLE_LIST_INDEX)
+
+        # Columnas cluster_id/is_duplicate de historias (antes de recrear la vista)
+        story_index.init_tables(cursor)
+        
+        # Cuerpos comprimidos en article_bodies y vista articles_with_body (después de los ALTER de articles)
+        ensure_article_bodies_table(cursor)
+        
+        # Los artículos guardados antes de existir la detección de duplicados se asignan con un script
+        # (descomprimir y firmar todo el corpus bloquearía el arranque)
+        pending_stories = story_index.pending_backfill(cursor)
+        if pending_stories:
+            logger.info(f"ℹ️ {pending_stories} artículos sin historia asignada: ejecutar backend/scripts/backfill_story_clusters.py")
+
+        # Conteos diarios de términos para el predictor de tendencias (se actualizan en la ingesta)
+        ensure_term_daily_counts_table(cursor)
+        
+        # Índice de estadísticas del corpus (document frequency y conteos por ventana)
+        corpus_index.init_tables(cursor)
+        
+        # Contadores de versión de datos (invalidan la caché de respuestas)
+        ensure_data_versions_table(cursor)
         
         # Tabla de redes sociales (PROYECTO ACADÉMICO)
         create_social_media_table = """
@@ -2123,7 +2008,8 @@ def init_database():
                 video_url TEXT,
                 created_at TEXT,
                 scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                processed_at TIMESTAMP
+                processed_at TIMESTAMP,
+                dedup_key TEXT
             )
         """
         
@@ -2784,6 +2670,8 @@ def clear_all_data():
     
     try:
         cursor = conn.cursor()
+        # Adjuntar CI antes de escribir: sus marcas de análisis se resetean en la misma transacción
+        ci_schema = ci_system.attach_to(cursor)
         
         # Contar registros antes de borrar
         cursor.execute("SELECT COUNT(*) FROM articles")
@@ -2797,14 +2685,21 @@ def clear_all_data():
         
         # Borrar todos los datos
         cursor.execute("DELETE FROM articles")
+        cursor.execute("DELETE FROM article_bodies")
         cursor.execute("DELETE FROM images")
         cursor.execute("DELETE FROM scraping_stats")
+        cursor.execute("DELETE FROM term_daily_counts")
+        corpus_index.clear(cursor)
+        story_index.clear(cursor)
         
         # Resetear contadores de auto-incremento
         cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('articles', 'images', 'scraping_stats')")
+        ci_system.reset_article_watermarks(cursor, ci_schema)
+        bump_data_version(cursor, ARTICLES)
         
         conn.commit()
         conn.close()
+        vector_index.clear()
         
         logger.info(f"🗑️ Datos borrados: {articles_count} artículos, {images_count} imágenes, {stats_count} estadísticas")
         
@@ -2826,6 +2721,80 @@ def get_status():
     """Obtener estado actual del scraping"""
     return jsonify(scraping_status)
 
+# Segundos sin eventos tras los que se envía un comentario keep-alive por SSE
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _sse_event(event_type: str, data: Dict, event_id: Optional[int] = None) -> str:
+    """Formatear un evento Server-Sent Events"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event_type}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+
+@app.route('/api/events/stream', methods=['GET'])
+def stream_events():
+    """Eventos en tiempo real por Server-Sent Events (sustituye al polling de /api/status)
+
+    EventSource no permite cabeceras, así que el token también se acepta como ?token=.
+    Sin token solo se reciben los temas públicos (scraping y system); con token se
+    añade el tema del usuario y, para administradores, el de admin.
+    ?topics=scraping,system limita los temas públicos recibidos.
+    """
+    try:
+        token = request.args.get('token')
+        auth_header = request.headers.get('Authorization', '')
+        if not token and auth_header.startswith('Bearer '):
+            token = auth_header.split(' ', 1)[1]
+        
+        payload = auth_system.verify_token(token) if token else None
+        if token and not payload:
+            return jsonify({'error': 'Token inválido o expirado'}), 401
+        
+        public_topics = {TOPIC_SCRAPING, TOPIC_SYSTEM}
+        requested = request.args.get('topics')
+        if requested:
+            public_topics &= {t.strip() for t in requested.split(',')}
+        topics = set(public_topics)
+        if payload:
+            topics.add(user_topic(payload.get('user_id')))
+            if payload.get('role') == 'admin':
+                topics.add(TOPIC_ADMIN)
+        
+        subscription = event_bus.subscribe(topics)
+        snapshot = dict(scraping_status)
+        
+        def generate():
+            try:
+                yield "retry: 3000\n\n"
+                # Estado actual al conectar, para no depender de /api/status
+                if TOPIC_SCRAPING in topics:
+                    yield _sse_event('scraping_progress', {
+                        'type': 'scraping_progress',
+                        'topic': TOPIC_SCRAPING,
+                        'job_id': snapshot.get('job_id'),
+                        'scraping_status': snapshot,
+                        'timestamp': datetime.now().isoformat()
+                    })
+                while True:
+                    event = subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                    if event is None:
+                        if subscription.closed:
+                            break
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield _sse_event(event.get('type', 'message'), event, event.get('id'))
+            finally:
+                event_bus.unsubscribe(subscription)
+        
+        response = app.response_class(generate(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # evitar buffering en nginx
+        return response
+        
+    except Exception as e:
+        logger.error(f"❌ Error abriendo stream de eventos: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/start-scraping', methods=['POST'])
 @require_auth
 def start_scraping():
@@ -2897,7 +2866,7 @@ def start_scraping():
         logger.info(f"📋 Razones: {', '.join(analysis['reasoning'])}")
         
         # Actualizar el estado con la información del análisis
-        scraping_status.update({
+        _update_scraping_status({
             'analysis': analysis,
             'suggested_method': method,
             'confidence': confidence
@@ -2916,7 +2885,7 @@ def start_scraping():
         }), 409
     
     # Inicializar estado
-    scraping_status.update({
+    _update_scraping_status({
         'is_running': True,
         'progress': 0,
         'total': max_articles,
@@ -2925,11 +2894,12 @@ def start_scraping():
         'images_found': 0,
         'error': None,
         'start_time': datetime.now().isoformat(),
-        'end_time': None
+        'end_time': None,
+        'job_id': uuid.uuid4().hex
     })
     
     # Notificar inicio del scraping
-    send_scraping_notification(f"Iniciando scraping de {url} con método {method}", "info")
+    send_scraping_notification(f"Iniciando scraping de {url} con método {method}", "info", scraping_status['job_id'])
     
     # Ejecutar scraping en hilo separado
     thread = threading.Thread(
@@ -2949,18 +2919,16 @@ def scrape_with_pagination(url: str, max_articles: int, max_images: int, method:
     try:
         logger.info(f"🔄 Iniciando scraping con paginación para: {url}")
         
-        # Crear función de extracción según el método
-        if method == 'hybrid':
-            extract_func = lambda page_url: extract_articles_hybrid(page_url, max_articles)
-        elif method == 'optimized':
-            extract_func = lambda page_url: extract_articles_optimized(page_url, max_articles)
-        elif method == 'improved':
-            extract_func = lambda page_url: extract_articles_improved(page_url, max_articles)
-        elif method == 'selenium':
-            extract_func = lambda page_url: extract_articles_selenium(page_url, max_articles)
-        else:
-            # Método automático - usar improved por defecto
-            extract_func = lambda page_url: extract_articles_improved(page_url, max_articles)
+        # Un solo scraper (con su sesión y su navegador) para todas las páginas del job
+        extract_func, scrape_article_func, close_extractor, page_workers = open_page_extractor(method, max_articles)
+        
+        def extract_and_report(page_url):
+            # Publicar el avance página a página (el bus coalesce el progreso del job)
+            page_articles = extract_func(page_url)
+            # Con page_workers > 1 corre en varios hilos: sumar con increments (bajo lock), no leer y reescribir
+            _update_scraping_status({'current_url': page_url},
+                                    increments={'progress': len(page_articles), 'articles_found': len(page_articles)})
+            return page_articles
         
         # Usar PaginationCrawler
         pagination_crawler = PaginationCrawler(use_selenium=True)
@@ -2968,7 +2936,9 @@ def scrape_with_pagination(url: str, max_articles: int, max_images: int, method:
             articles = pagination_crawler.crawl_all_pages(
                 url=url,
                 max_articles=max_articles,
-                extract_articles_func=extract_func
+                extract_articles_func=extract_and_report,
+                page_workers=page_workers,
+                scrape_article_func=scrape_article_func
             )
             
             # Guardar en base de datos
@@ -2979,67 +2949,112 @@ def scrape_with_pagination(url: str, max_articles: int, max_images: int, method:
             
         finally:
             pagination_crawler.close()
+            close_extractor()
             
     except Exception as e:
         logger.error(f"❌ Error en scraping con paginación: {e}")
         return []
 
-def extract_articles_hybrid(url, max_articles):
-    """Extraer artículos usando método híbrido"""
-    try:
+def open_page_extractor(method: str, max_articles: int):
+    """Scraper reutilizable para todas las páginas de un job:
+    (extract_func, scrape_article_func, close_func, page_workers).
+    
+    Los métodos con navegador extraen una página cada vez (page_workers=1);
+    los basados en requests admiten varias páginas a la vez. scrape_article_func
+    (o None) extrae un artículo suelto de los que aparecen tras 'VER MÁS'.
+    """
+    if method == 'hybrid':
         crawler = HybridDataCrawler()
+        return (lambda page_url: extract_articles_hybrid(page_url, max_articles, crawler)), None, crawler.close, 1
+    if method == 'optimized':
+        scraper = SmartScraper(max_workers=10)
+        return ((lambda page_url: extract_articles_optimized(page_url, max_articles, scraper)), None,
+                scraper.close, PAGE_WORKERS)
+    if method == 'selenium':
+        drivers = []
+        
+        def extract_with_driver(page_url):
+            if not drivers:
+                drivers.append(create_extraction_driver())
+            return extract_articles_selenium(page_url, max_articles, drivers[0])
+        
+        def close_driver():
+            for driver in drivers:
+                driver.quit()
+        return extract_with_driver, None, close_driver, 1
+    
+    # 'improved' y método automático
+    scraper = ImprovedScraper()
+    return ((lambda page_url: extract_articles_improved(page_url, max_articles, scraper)), scraper.scrape_article,
+            scraper.close, PAGE_WORKERS)
+
+def extract_articles_hybrid(url, max_articles, crawler=None):
+    """Extraer artículos usando método híbrido (con `crawler` se reutiliza y no se cierra)"""
+    try:
+        own_crawler = crawler is None
+        crawler = crawler or HybridDataCrawler()
         try:
             articles = crawler.hybrid_crawl_articles(url, max_articles)
             return articles
         finally:
-            crawler.close()
+            if own_crawler:
+                crawler.close()
     except Exception as e:
         logger.error(f"❌ Error en extracción híbrida: {e}")
         return []
 
-def extract_articles_optimized(url, max_articles):
-    """Extraer artículos usando método optimizado"""
+def extract_articles_optimized(url, max_articles, scraper=None):
+    """Extraer artículos usando método optimizado (con `scraper` se reutiliza y no se cierra)"""
     try:
-        scraper = SmartScraper(max_workers=10)
+        own_scraper = scraper is None
+        scraper = scraper or SmartScraper(max_workers=10)
         try:
             articles = scraper.scrape_articles(url, max_articles)
             return articles
         finally:
-            scraper.close()
+            if own_scraper:
+                scraper.close()
     except Exception as e:
         logger.error(f"❌ Error en extracción optimizada: {e}")
         return []
 
-def extract_articles_improved(url, max_articles):
-    """Extraer artículos usando método mejorado"""
+def extract_articles_improved(url, max_articles, scraper=None):
+    """Extraer artículos usando método mejorado (con `scraper` se reutiliza y no se cierra)"""
     try:
-        scraper = ImprovedScraper()
+        own_scraper = scraper is None
+        scraper = scraper or ImprovedScraper()
         try:
             articles = scraper.scrape_articles(url, max_articles)
             return articles
         finally:
-            scraper.close()
+            if own_scraper:
+                scraper.close()
     except Exception as e:
         logger.error(f"❌ Error en extracción mejorada: {e}")
         return []
 
-def extract_articles_selenium(url, max_articles):
-    """Extraer artículos usando Selenium"""
+def create_extraction_driver():
+    """Chrome headless para extract_articles_selenium"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    
+    service = Service('/usr/local/bin/chromedriver')
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+def extract_articles_selenium(url, max_articles, driver=None):
+    """Extraer artículos usando Selenium (con `driver` se reutiliza y no se cierra)"""
     try:
         # Implementación básica con Selenium
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
         from selenium.webdriver.common.by import By
-        from webdriver_manager.chrome import ChromeDriverManager
-        from selenium.webdriver.chrome.service import Service
-        
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
         
-        service = Service('/usr/local/bin/chromedriver')
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        own_driver = driver is None
+        driver = driver or create_extraction_driver()
         
         try:
             driver.get(url)
@@ -3081,7 +3096,8 @@ def extract_articles_selenium(url, max_articles):
             return articles
             
         finally:
-            driver.quit()
+            if own_driver:
+                driver.quit()
             
     except Exception as e:
         logger.error(f"❌ Error en extracción Selenium: {e}")
@@ -3093,6 +3109,7 @@ def run_scraping(url: str, max_articles: int, max_images: int, method: str, down
     
     try:
         logger.info(f"🚀 Iniciando scraping con paginación: {url}")
+        start_job(DEFAULT_JOB_DEADLINE)
         
         # Scraper específico para El Peruano
         if 'elperuano.pe' in url and 'economia' in url:
@@ -3102,7 +3119,7 @@ def run_scraping(url: str, max_articles: int, max_images: int, method: str, down
             # Guardar en base de datos
             save_articles_to_db(articles, category, newspaper, region)
             
-            scraping_status.update({
+            _update_scraping_status({
                 'articles_found': len(articles),
                 'images_found': sum(len(article.get('images_data', [])) for article in articles),
                 'progress': max_articles
@@ -3113,7 +3130,7 @@ def run_scraping(url: str, max_articles: int, max_images: int, method: str, down
             logger.info("🔄 Usando sistema de paginación automática")
             articles = scrape_with_pagination(url, max_articles, max_images, method, download_images, category, newspaper, region)
             
-            scraping_status.update({
+            _update_scraping_status({
                 'articles_found': len(articles),
                 'images_found': sum(len(article.get('images_data', [])) for article in articles),
                 'progress': max_articles
@@ -3145,7 +3162,7 @@ def run_scraping(url: str, max_articles: int, max_images: int, method: str, down
                         except:
                             pass
                 
-                scraping_status.update({
+                _update_scraping_status({
                     'articles_found': len(articles),
                     'images_found': total_images,
                     'progress': max_articles
@@ -3163,7 +3180,7 @@ def run_scraping(url: str, max_articles: int, max_images: int, method: str, down
                 # Guardar en base de datos
                 save_articles_to_db(articles, category, newspaper, region)
                 
-                scraping_status.update({
+                _update_scraping_status({
                     'articles_found': len(articles),
                     'images_found': sum(article.get('images_found', 0) for article in articles),
                     'progress': max_articles
@@ -3180,24 +3197,25 @@ def run_scraping(url: str, max_articles: int, max_images: int, method: str, down
         
     except Exception as e:
         logger.error(f"❌ Error en scraping: {e}")
-        scraping_status['error'] = str(e)
+        _update_scraping_status({'error': str(e)})
         
         # Notificar error
-        send_scraping_notification(f"Error en scraping: {str(e)}", "error")
+        send_scraping_notification(f"Error en scraping: {str(e)}", "error", scraping_status['job_id'])
     
     finally:
-        scraping_status.update({
+        job_deadline.clear()
+        _update_scraping_status({
             'is_running': False,
             'end_time': datetime.now().isoformat()
         })
         
         # Notificar finalización
         if scraping_status.get('error'):
-            send_scraping_notification("Scraping finalizado con errores", "warning")
+            send_scraping_notification("Scraping finalizado con errores", "warning", scraping_status['job_id'])
         else:
             articles_count = scraping_status.get('articles_found', 0)
             images_count = scraping_status.get('images_found', 0)
-            send_scraping_notification(f"Scraping completado: {articles_count} artículos, {images_count} imágenes", "success")
+            send_scraping_notification(f"Scraping completado: {articles_count} artículos, {images_count} imágenes", "success", scraping_status['job_id'])
 
 def save_articles_to_db(articles: List[Dict], category: str = '', newspaper: str = '', region: str = ''):
     """Guardar artículos en la base de datos SQLite"""
@@ -3237,6 +3255,16 @@ def save_articles_to_db(articles: List[Dict], category: str = '', newspaper: str
     try:
         cursor = conn.cursor()
         re_enabled_newspapers = set()
+        # Artículos pendientes de análisis de competidores: (id, texto, url) y datos para alertas
+        competitor_batch = []
+        competitor_context = {}
+        # Ids de los artículos insertados (no actualizados) para term_daily_counts
+        new_ids = set()
+        # Artículos insertados o actualizados (id, title, content, newspaper, scraped_at) para el índice del corpus
+        corpus_rows = []
+        vector_rows = []
+        # (id, article_id, images_data) para reescribir las filas de images del lote
+        image_rows = []
         
         for article in articles:
             if isinstance(article, ArticleData):
@@ -3297,13 +3325,13 @@ def save_articles_to_db(articles: List[Dict], category: str = '', newspaper: str
                         title = ?, content = ?, summary = ?, author = ?, date = ?, 
                         category = ?, newspaper = ?, url = ?,
                         images_found = ?, images_downloaded = ?, images_data = ?, 
-                        scraped_at = ?, region = ?, user_category = ?
+                        scraped_at = ?, region = ?, user_category = ?, domain = ?
                         WHERE article_id = ? OR url = ?
                     """, (
-                        article.title, article.content, article.summary, article.author,
+                        article.title, None, article.summary, article.author,
                         article.date, article_category, article_newspaper, article_url,
-                        article.images_found, article.images_downloaded, article.images_data,
-                        article.scraped_at, article_region, manual_category,
+                        article.images_found, article.images_downloaded, None,
+                        article.scraped_at, article_region, manual_category, normalize_domain(article_url),
                         article_id, article_url
                     ))
                     article_id_db = existing[0]
@@ -3312,41 +3340,24 @@ def save_articles_to_db(articles: List[Dict], category: str = '', newspaper: str
                     cursor.execute("""
                         INSERT INTO articles 
                         (title, content, summary, author, date, category, newspaper, url, 
-                         images_found, images_downloaded, images_data, scraped_at, article_id, region, user_category)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                         images_found, images_downloaded, images_data, scraped_at, article_id, region, user_category, domain)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """, (
-                        article.title, article.content, article.summary, article.author,
+                        article.title, None, article.summary, article.author,
                         article.date, article_category, article_newspaper, article_url,
-                        article.images_found, article.images_downloaded, article.images_data,
-                        article.scraped_at, article_id, article_region, manual_category
+                        article.images_found, article.images_downloaded, None,
+                        article.scraped_at, article_id, article_region, manual_category, normalize_domain(article_url)
                     ))
                     article_id_db = cursor.lastrowid
+                    new_ids.add(article_id_db)
                 
-                # Analizar el artículo en busca de menciones de competidores
-                try:
-                    article_text = f"{article.title} {article.content} {article.summary}"
-                    mentions = ci_system.analyze_article_for_competitors(
-                        article_id_db, article_text, article_url
-                    )
-                    
-                    # Crear alertas si hay menciones importantes
-                    for mention in mentions:
-                        if mention['relevance_score'] > 0.7:  # Solo menciones muy relevantes
-                            ci_system.create_alert(
-                                mention['user_id'],
-                                mention['competitor_id'],
-                                'high_relevance_mention',
-                                f"Mención importante de {mention['competitor_name']} en {article.newspaper}",
-                                {
-                                    'article_title': article.title,
-                                    'article_url': article.url,
-                                    'keyword': mention['keyword'],
-                                    'sentiment': mention['sentiment_label'],
-                                    'relevance': mention['relevance_score']
-                                }
-                            )
-                except Exception as e:
-                    logger.warning(f"Error analizando competidores en artículo {article_id_db}: {e}")
+                corpus_rows.append((article_id_db, article.title, article.content, article_newspaper, article.scraped_at))
+                vector_rows.append((article_id_db, article.title, f"{article.summary or ''} {article.content or ''}"))
+                image_rows.append((article_id_db, article_id, article.images_data))
+                
+                # Encolar el artículo para el análisis de competidores del lote
+                competitor_batch.append((article_id_db, f"{article.title} {article.content} {article.summary}", article_url))
+                competitor_context[article_id_db] = (article.newspaper, article.title, article.url)
             else:
                 # Si es diccionario, priorizar categoría manual si se proporcionó
                 article_category = normalize_category_value(article.get('category') or article.get('user_category'))
@@ -3364,12 +3375,8 @@ def save_articles_to_db(articles: List[Dict], category: str = '', newspaper: str
                     article_text = f"{article.get('title', '')} {article.get('content', '')} {article.get('summary', '')}"
                     article_region = normalize_region_value(detect_language_and_region(article_text))
                 
-                # Convertir images_data a JSON string si es una lista
-                images_data = article.get('images_data', '[]')
-                if isinstance(images_data, list):
-                    images_data = json.dumps(images_data)
-                elif not isinstance(images_data, str):
-                    images_data = '[]'
+                # Imágenes del artículo (se guardan como filas de images)
+                images_data = article.get('images_data') or []
                 
                 # Asegurar que siempre haya un article_id válido
                 article_id = article.get('article_id', '')
@@ -3413,14 +3420,14 @@ def save_articles_to_db(articles: List[Dict], category: str = '', newspaper: str
                         title = ?, content = ?, summary = ?, author = ?, date = ?, 
                         category = ?, newspaper = ?, url = ?,
                         images_found = ?, images_downloaded = ?, images_data = ?, 
-                        scraped_at = ?, region = ?, user_category = ?
+                        scraped_at = ?, region = ?, user_category = ?, domain = ?
                         WHERE article_id = ? OR url = ?
                     """, (
-                        article.get('title', ''), article.get('content', ''), article.get('summary', ''),
+                        article.get('title', ''), None, article.get('summary', ''),
                         article.get('author', ''), article.get('date', ''), article_category,
                         article_newspaper, article_url, article.get('images_found', 0),
-                        article.get('images_downloaded', 0), images_data,
-                        article.get('scraped_at', ''), article_region, manual_category,
+                        article.get('images_downloaded', 0), None,
+                        article.get('scraped_at', ''), article_region, manual_category, normalize_domain(article_url),
                         article_id, article_url
                     ))
                     article_id_db = existing[0]
@@ -3429,47 +3436,75 @@ def save_articles_to_db(articles: List[Dict], category: str = '', newspaper: str
                     cursor.execute("""
                         INSERT INTO articles 
                         (title, content, summary, author, date, category, newspaper, url, 
-                         images_found, images_downloaded, images_data, scraped_at, article_id, region, user_category)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                         images_found, images_downloaded, images_data, scraped_at, article_id, region, user_category, domain)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """, (
-                        article.get('title', ''), article.get('content', ''), article.get('summary', ''),
+                        article.get('title', ''), None, article.get('summary', ''),
                         article.get('author', ''), article.get('date', ''), article_category,
                         article_newspaper, article_url, article.get('images_found', 0),
-                        article.get('images_downloaded', 0), images_data,
-                        article.get('scraped_at', ''), article_id, article_region, manual_category
+                        article.get('images_downloaded', 0), None,
+                        article.get('scraped_at', ''), article_id, article_region, manual_category, normalize_domain(article_url)
                     ))
                     article_id_db = cursor.lastrowid
+                    new_ids.add(article_id_db)
                 
-                # Usar el ID del artículo para análisis de competidores
+                corpus_rows.append((
+                    article_id_db, article.get('title', ''), article.get('content', ''),
+                    article_newspaper, article.get('scraped_at', '')
+                ))
+                vector_rows.append((
+                    article_id_db, article.get('title', ''),
+                    f"{article.get('summary') or ''} {article.get('content') or ''}"
+                ))
+                image_rows.append((article_id_db, article_id, images_data))
                 
-                # Analizar el artículo en busca de menciones de competidores
-                try:
-                    article_text = f"{article.get('title', '')} {article.get('content', '')} {article.get('summary', '')}"
-                    mentions = ci_system.analyze_article_for_competitors(
-                        article_id_db, article_text, article_url
-                    )
-                    
-                    # Crear alertas si hay menciones importantes
-                    for mention in mentions:
-                        if mention['relevance_score'] > 0.7:  # Solo menciones muy relevantes
-                            ci_system.create_alert(
-                                mention['user_id'],
-                                mention['competitor_id'],
-                                'high_relevance_mention',
-                                f"Mención importante de {mention['competitor_name']} en {article_newspaper}",
-                                {
-                                    'article_title': article.get('title', ''),
-                                    'article_url': article.get('url', ''),
-                                    'keyword': mention['keyword'],
-                                    'sentiment': mention['sentiment_label'],
-                                    'relevance': mention['relevance_score']
-                                }
-                            )
-                except Exception as e:
-                    logger.warning(f"Error analizando competidores en artículo {article_id_db}: {e}")
+                # Encolar el artículo para el análisis de competidores del lote
+                competitor_batch.append((
+                    article_id_db,
+                    f"{article.get('title', '')} {article.get('content', '')} {article.get('summary', '')}",
+                    article_url
+                ))
+                competitor_context[article_id_db] = (article_newspaper, article.get('title', ''), article.get('url', ''))
+        
+        # Historia, términos diarios, índice del corpus, cuerpos, imágenes y versión de datos del lote (compartido con el scraper independiente)
+        clusters = record_article_ingest(cursor, corpus_rows, new_ids, image_rows, story_index, corpus_index)
         
         conn.commit()
         conn.close()
+        
+        # Vectores de los artículos nuevos/actualizados (tras el commit: el índice vive fuera de la BD)
+        try:
+            vector_index.add(vector_rows)
+        except Exception as e:
+            logger.warning(f"⚠️ Error actualizando el índice vectorial: {e}")
+        
+        # Analizar todo el lote en busca de menciones de competidores (una transacción)
+        try:
+            mentions = ci_system.analyze_articles_for_competitors(
+                competitor_batch, story_ids={article_id: cluster[0] for article_id, cluster in clusters.items()}
+            )
+            
+            # Crear alertas si hay menciones importantes (una por historia: los casi duplicados no alertan)
+            alerts = []
+            for mention in mentions:
+                if mention['relevance_score'] > 0.7 and not clusters[mention['article_id']][1]:
+                    alert_newspaper, alert_title, alert_url = competitor_context[mention['article_id']]
+                    alerts.append((
+                        mention['user_id'],
+                        mention['competitor_id'],
+                        'high_relevance_mention',
+                        f"Mención importante de {mention['competitor_name']} en {alert_newspaper}",
+                        {
+                            'article_title': alert_title,
+                            'article_url': alert_url,
+                            'keyword': mention['keyword'],
+                            'sentiment': mention['sentiment_label'],
+                            'relevance': mention['relevance_score']
+                        }
+                    ))
+            ci_system.create_alerts(alerts)
+        except Exception as e:
+            logger.warning(f"Error analizando competidores en el lote de artículos: {e}")
         logger.info(f"✅ {len(articles)} artículos guardados en la base de datos")
         
         # Después de guardar, verificar si hay periódicos nuevos que agregar a auto-update
@@ -3509,6 +3544,7 @@ def save_images_to_db(images: List[Dict]):
                 image.get('size_bytes'),
                 image.get('relevance_score', 0)
             ))
+        bump_data_version(cursor, ARTICLES)
         conn.commit()
         logger.info(f"✅ {len(images)} imágenes guardadas en la base de datos")
         
@@ -3527,11 +3563,15 @@ def save_scraping_stats(url: str, articles_found: int, images_found: int, method
         start_time = datetime.fromisoformat(scraping_status['start_time'])
         end_time = datetime.now()
         duration = int((end_time - start_time).total_seconds())
+        failures = fetch_report()
+        if failures['failed_domains']:
+            logger.warning(f"⛔ Dominios con fallos: {', '.join(failures['failed_domains'])}")
         
         cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO scraping_stats (session_id, url_scraped, articles_found, images_found, images_downloaded, duration_seconds, method_used)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO scraping_stats (session_id, url_scraped, articles_found, images_found, images_downloaded, duration_seconds, method_used,
+                                        failed_domains, deadline_exceeded)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             f"session_{int(time.time())}",
             url,
@@ -3539,8 +3579,11 @@ def save_scraping_stats(url: str, articles_found: int, images_found: int, method
             images_found,
             images_found,  # Asumimos que todas se descargaron
             duration,
-            method
+            method,
+            json.dumps(failures['failed_domains']) if failures['failed_domains'] else None,
+            int(failures['deadline_exceeded'])
         ))
+        bump_data_version(cursor, ARTICLES)
         conn.commit()
         logger.info("✅ Estadísticas guardadas")
         
@@ -3549,6 +3592,76 @@ def save_scraping_stats(url: str, articles_found: int, images_found: int, method
     finally:
         conn.close()
 
+# ============================================================
+# PROYECCIÓN DE CAMPOS DE ARTÍCULOS (fields= y vista "card")
+# ============================================================
+
+# Columnas que se pueden pedir con fields=
+ARTICLE_COLUMNS = (
+    'id', 'article_id', 'title', 'content', 'summary', 'author', 'date', 'category',
+    'user_category', 'newspaper', 'region', 'url', 'domain', 'images_found',
+    'images_downloaded', 'images_data', 'scraped_at'
+)
+
+# Vista de lista: lo que pintan las tarjetas (sin content ni todas las imágenes).
+# 'thumbnail' devuelve images_data con solo la imagen principal.
+ARTICLE_CARD_FIELDS = (
+    'id', 'article_id', 'title', 'summary', 'author', 'date', 'category', 'user_category',
+    'newspaper', 'region', 'url', 'images_found', 'scraped_at', 'thumbnail'
+)
+
+# Índice de los listados ordenados por scraped_at. No es de cobertura: con el cuerpo en
+# article_bodies las filas de articles ya son pequeñas, y copiar 13 columnas en el índice
+# duplicaba la tabla y encarecía cada INSERT. La imagen principal sale de idx_images_primary.
+ARTICLE_LIST_INDEX = "CREATE INDEX IF NOT EXISTS idx_articles_scraped_at ON articles(scraped_at DESC)"
+
+
+def _article_projection(fields_param: Optional[str], view: Optional[str],
+                        default: Tuple[str, ...] = ARTICLE_COLUMNS) -> List[str]:
+    """Resolver los campos pedidos (fields=a,b,c o view=card). Lanza ValueError si hay campos desconocidos."""
+    if fields_param:
+        fields = [f.strip() for f in fields_param.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in ARTICLE_COLUMNS and f != 'thumbnail']
+        if unknown:
+            raise ValueError(f"Campos no válidos: {', '.join(unknown)}")
+        return list(dict.fromkeys(fields))
+    if view == 'card':
+        return list(ARTICLE_CARD_FIELDS)
+    return list(default)
+
+
+def _article_select_sql(fields: List[str], alias: str = 'a') -> str:
+    """Lista de columnas SQL para una proyección sobre la tabla con alias {alias}"""
+    columns = []
+    for field in fields:
+        if field == 'thumbnail':
+            columns.append(primary_image_sql(alias))
+        elif field != 'images_data':  # images_data se completa desde images
+            columns.append(f"{alias}.{field}")
+    if 'id' not in fields:
+        columns.append(f"{alias}.id AS _ref")
+    return ', '.join(columns)
+
+
+def _articles_to_dicts(cursor, rows, fields: List[str]) -> List[Dict]:
+    """Convertir filas proyectadas (de cursor) en los dicts de la API"""
+    column_names = [description[0] for description in cursor.description]
+    articles = [dict(zip(column_names, row)) for row in rows]
+    refs = [article['id'] if 'id' in article else article['_ref'] for article in articles]
+    if 'images_data' in fields:
+        images = fetch_article_images(cursor, refs)
+        for article, ref in zip(articles, refs):
+            article['images_data'] = images.get(ref, [])
+    for article in articles:
+        article.pop('_ref', None)
+        if 'thumbnail_url' in article:
+            thumb_url = article.pop('thumbnail_url')
+            thumb_path = article.pop('thumbnail_path', None)
+            if 'images_data' not in article:
+                # Mismo formato que images_data para que el frontend lo pinte igual
+                article['images_data'] = [{'url': thumb_url, 'local_path': thumb_path}] if (thumb_url or thumb_path) else []
+    return articles
+
 @app.route('/api/articles', methods=['GET'])
 def get_articles():
     """Obtener artículos de la base de datos SQLite"""
@@ -3568,10 +3681,17 @@ def get_articles():
 
         logger.info(f"[ARTICLES] params={dict(request.args)}")
         
+        try:
+            fields = _article_projection(request.args.get('fields'), request.args.get('view'))
+        except ValueError as e:
+            conn.close()
+            return jsonify({'error': str(e)}), 400
+        
         offset = (page - 1) * limit
         
-        # Construir query
-        query = "SELECT * FROM articles WHERE 1=1"
+        # Construir query (solo las columnas pedidas; la vista con cuerpo solo si hace falta content)
+        source = ARTICLES_VIEW if ('content' in fields or search) else 'articles'
+        query = f"SELECT {_article_select_sql(fields)} FROM {source} a WHERE 1=1"
         params = []
         
         if newspaper:
@@ -3700,22 +3820,10 @@ def get_articles():
         cursor.execute(query, params)
         rows = cursor.fetchall()
         
-        # Obtener nombres de columnas
-        column_names = [description[0] for description in cursor.description]
-        
-        articles = []
-        for row in rows:
-            article_dict = dict(zip(column_names, row))
-            # Parsear imágenes si existen
-            if article_dict.get('images_data'):
-                try:
-                    article_dict['images_data'] = json.loads(article_dict['images_data'])
-                except:
-                    article_dict['images_data'] = []
-            articles.append(article_dict)
+        articles = _articles_to_dicts(cursor, rows, fields)
         
         # Obtener total
-        count_query = "SELECT COUNT(*) as total FROM articles WHERE 1=1"
+        count_query = f"SELECT COUNT(*) as total FROM {ARTICLES_VIEW if search else 'articles'} WHERE 1=1"
         count_params = []
         if newspaper:
             count_query += " AND newspaper = ?"
@@ -3820,14 +3928,11 @@ def get_articles():
         
         conn.close()
         
-        return jsonify({
-            'articles': articles,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total': total,
-                'pages': (total + limit - 1) // limit
-            }
+        return json_list_response('articles', articles, pagination={
+            'page': page,
+            'limit': limit,
+            'total': total,
+            'pages': (total + limit - 1) // limit
         })
         
     except Exception as e:
@@ -3835,6 +3940,7 @@ def get_articles():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/articles/filters', methods=['GET'])
+@response_cache.cached()
 def get_article_filters():
     """Obtener filtros únicos para artículos (periódicos, categorías, regiones)"""
     conn = get_db_connection()
@@ -3929,7 +4035,7 @@ def export_articles_to_excel():
 
         base_columns = [
             'id', 'title', 'summary', 'content', 'newspaper', 'category',
-            'region', 'url', 'scraped_at', 'images_data'
+            'region', 'url', 'scraped_at'
         ]
 
         optional_columns = []
@@ -3939,7 +4045,8 @@ def export_articles_to_excel():
 
         select_columns = base_columns + optional_columns
 
-        query = f"SELECT {', '.join(select_columns)} FROM articles ORDER BY scraped_at DESC"
+        select_columns.append('image_count')
+        query = f"SELECT {', '.join(select_columns[:-1])}, {image_count_sql('a')} FROM {ARTICLES_VIEW} a ORDER BY scraped_at DESC"
         cursor.execute(query)
 
         articles = cursor.fetchall()
@@ -3982,15 +4089,7 @@ def export_articles_to_excel():
         for article in articles:
             row_dict = {col: article[idx] for idx, col in enumerate(select_columns)}
 
-            images_data = row_dict.get('images_data')
-            if images_data:
-                try:
-                    images_list = json.loads(images_data)
-                    images_count = len(images_list) if isinstance(images_list, list) else 0
-                except Exception:
-                    images_count = 0
-            else:
-                images_count = 0
+            images_count = row_dict.get('image_count') or 0
 
             category_value = row_dict.get('category', '') or ''
             manual_category_value = row_dict.get('user_category', '') or ''
@@ -4101,7 +4200,7 @@ def export_articles_to_csv():
 
         base_columns = [
             'id', 'title', 'summary', 'content', 'newspaper', 'category',
-            'region', 'url', 'scraped_at', 'images_data'
+            'region', 'url', 'scraped_at'
         ]
 
         optional_columns = []
@@ -4114,7 +4213,8 @@ def export_articles_to_csv():
 
         select_columns = base_columns + optional_columns
 
-        query = f"SELECT {', '.join(select_columns)} FROM articles ORDER BY scraped_at DESC"
+        select_columns.append('image_count')
+        query = f"SELECT {', '.join(select_columns[:-1])}, {image_count_sql('a')} FROM {ARTICLES_VIEW} a ORDER BY scraped_at DESC"
         cursor.execute(query)
 
         articles = cursor.fetchall()
@@ -4127,14 +4227,7 @@ def export_articles_to_csv():
         for article in articles:
             row_dict = {col: article[idx] for idx, col in enumerate(select_columns)}
 
-            images_count = 0
-            images_data_value = row_dict.get('images_data')
-            if images_data_value:
-                try:
-                    images_list = json.loads(images_data_value)
-                    images_count = len(images_list) if isinstance(images_list, list) else 0
-                except Exception:
-                    images_count = 0
+            images_count = row_dict.get('image_count') or 0
 
             content_value = row_dict.get('content') or ''
             truncated_content = content_value[:500] + '...' if len(content_value) > 500 else content_value
@@ -4195,23 +4288,22 @@ def get_article(article_id):
         return jsonify({'error': 'Base de datos no disponible'}), 500
     
     try:
+        try:
+            fields = _article_projection(request.args.get('fields'), request.args.get('view'))
+        except ValueError as e:
+            conn.close()
+            return jsonify({'error': str(e)}), 400
+        
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM articles WHERE article_id = ?", [article_id])
+        source = ARTICLES_VIEW if 'content' in fields else 'articles'
+        cursor.execute(f"SELECT {_article_select_sql(fields)} FROM {source} a WHERE article_id = ?", [article_id])
         row = cursor.fetchone()
         
         if not row:
             conn.close()
             return jsonify({'error': 'Artículo no encontrado'}), 404
         
-        # Obtener nombres de columnas
-        column_names = [description[0] for description in cursor.description]
-        article_dict = dict(zip(column_names, row))
-        
-        if article_dict.get('images_data'):
-            try:
-                article_dict['images_data'] = json.loads(article_dict['images_data'])
-            except:
-                article_dict['images_data'] = []
+        article_dict = _articles_to_dicts(cursor, [row], fields)[0]
         
         conn.close()
         return jsonify(article_dict)
@@ -4220,6 +4312,50 @@ def get_article(article_id):
         logger.error(f"❌ Error obteniendo artículo: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/articles/<article_id>/related', methods=['GET'])
+def get_related_articles(article_id):
+    """Artículos relacionados (los más similares de todo el corpus según el índice vectorial)"""
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Base de datos no disponible'}), 500
+    
+    try:
+        limit = max(1, min(request.args.get('limit', 5, type=int), 20))
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, title, summary FROM articles WHERE article_id = ?", [article_id])
+        row = cursor.fetchone()
+        if not row:
+            conn.close()
+            return jsonify({'error': 'Artículo no encontrado'}), 404
+        
+        vector_index.sync_in_background(DB_PATH)
+        db_id, title, summary = row
+        if db_id in vector_index:
+            similar = vector_index.similar(db_id, k=limit)
+        else:
+            # Aún sin indexar: buscar por su título y resumen
+            similar = [(i, score) for i, score in vector_index.search(f"{title or ''} {summary or ''}", k=limit + 1)
+                       if i != db_id][:limit]
+        
+        related = []
+        if similar:
+            fields = list(ARTICLE_CARD_FIELDS)
+            ids = [i for i, _ in similar]
+            cursor.execute(
+                f"SELECT {_article_select_sql(fields)} FROM articles a WHERE a.id IN ({','.join('?' * len(ids))})", ids
+            )
+            by_id = {article['id']: article for article in _articles_to_dicts(cursor, cursor.fetchall(), fields)}
+            for i, score in similar:
+                if i in by_id:
+                    related.append({**by_id[i], 'similarity': round(score, 4)})
+        
+        conn.close()
+        return jsonify({'article_id': article_id, 'related': related})
+    
+    except Exception as e:
+        logger.error(f"❌ Error obteniendo artículos relacionados: {e}")
+        return jsonify({'error': str(e)}), 500
+
 # ============================================================
 # SISTEMA DE COMENTARIOS/OPINIONES
 # ============================================================
@@ -4778,6 +4914,7 @@ def get_images():
         conn.close()
 
 @app.route('/api/stats', methods=['GET'])
+@response_cache.cached()
 def get_stats():
     """Obtener estadísticas del scraping"""
     conn = get_db_connection()
@@ -4787,10 +4924,11 @@ def get_stats():
     try:
         cursor = conn.cursor()
         
-        # Estadísticas generales
-        cursor.execute("""
+        # Estadísticas generales (unique_stories cuenta una vez cada grupo de casi duplicados)
+        cursor.execute(f"""
             SELECT 
                 COUNT(*) as total_articles,
+                COUNT(DISTINCT {STORY_KEY_SQL}) as unique_stories,
                 COUNT(DISTINCT newspaper) as total_newspapers,
                 COUNT(DISTINCT category) as total_categories,
                 SUM(images_found) as total_images_found,
@@ -4802,10 +4940,11 @@ def get_stats():
         general_stats = dict(zip(column_names, row))
         
         # Estadísticas por periódico
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 newspaper,
                 COUNT(*) as articles_count,
+                COUNT(DISTINCT {STORY_KEY_SQL}) as stories_count,
                 SUM(images_found) as images_count
             FROM articles 
             GROUP BY newspaper 
@@ -4817,10 +4956,11 @@ def get_stats():
         newspaper_stats = [dict(zip(column_names, row)) for row in rows]
         
         # Estadísticas por categoría
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 category,
-                COUNT(*) as articles_count
+                COUNT(*) as articles_count,
+                COUNT(DISTINCT {STORY_KEY_SQL}) as stories_count
             FROM articles 
             WHERE category IS NOT NULL AND category != ''
             GROUP BY category 
@@ -4840,6 +4980,8 @@ def get_stats():
                 images_found,
                 duration_seconds,
                 method_used,
+                failed_domains,
+                deadline_exceeded,
                 created_at
             FROM scraping_stats 
             ORDER BY created_at DESC 
@@ -4848,6 +4990,8 @@ def get_stats():
         rows = cursor.fetchall()
         column_names = [description[0] for description in cursor.description]
         sessions = [dict(zip(column_names, row)) for row in rows]
+        for session in sessions:
+            session['failed_domains'] = json.loads(session['failed_domains']) if session['failed_domains'] else {}
         
         conn.close()
         
@@ -4882,7 +5026,7 @@ def stop_scraping():
     if not scraping_status['is_running']:
         return jsonify({'error': 'No hay scraping en ejecución'}), 400
     
-    scraping_status.update({
+    _update_scraping_status({
         'is_running': False,
         'end_time': datetime.now().isoformat(),
         'error': 'Detenido por el usuario'
@@ -4957,6 +5101,7 @@ def get_auto_update_status():
 
 @app.route('/api/search/suggestions', methods=['GET'])
 @require_auth
+@response_cache.cached()
 def get_search_suggestions():
     """Obtener sugerencias para búsqueda"""
     try:
@@ -5001,6 +5146,10 @@ def get_search_suggestions():
         logger.error(f"Error obteniendo sugerencias: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Candidatos del índice vectorial para la búsqueda avanzada por relevancia
+ADVANCED_SEARCH_CANDIDATES = 1000
+ADVANCED_SEARCH_MIN_SCORE = 0.1
+
 @app.route('/api/search/advanced', methods=['POST'])
 @require_auth
 def advanced_search():
@@ -5019,11 +5168,15 @@ def advanced_search():
         sort_by = data.get('sortBy', 'relevance')
         page = int(data.get('page', 1))
         limit = int(data.get('limit', 12))
+        # Proyección opcional de la respuesta: lista o "campo1,campo2"
+        fields = data.get('fields')
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
         
         if not query:
             return jsonify({'error': 'Query es requerido'}), 400
         
-        conn = sqlite3.connect('news_database.db')
+        conn = get_db_connection()
         cursor = conn.cursor()
         
         # Registrar función de normalización de texto (sin acentos, case-insensitive)
@@ -5041,10 +5194,22 @@ def advanced_search():
         where_conditions = []
         params = []
         
-        # Búsqueda de texto con normalización (sin acentos, case-insensitive)
-        where_conditions.append("(normalize_text(title) LIKE normalize_text(?) OR normalize_text(content) LIKE normalize_text(?) OR normalize_text(summary) LIKE normalize_text(?) OR normalize_text(author) LIKE normalize_text(?))")
-        search_term = f"%{query}%"
-        params.extend([search_term, search_term, search_term, search_term])
+        # Relevancia con el índice vectorial: candidatos de todo el corpus ordenados por similitud
+        similarity = None
+        if sort_by == 'relevance':
+            vector_index.sync_in_background(DB_PATH)
+            if vector_index.ready:
+                similarity = dict(vector_index.search(query, k=ADVANCED_SEARCH_CANDIDATES,
+                                                      min_score=ADVANCED_SEARCH_MIN_SCORE))
+        
+        if similarity is None:
+            # Búsqueda de texto con normalización (sin acentos, case-insensitive)
+            where_conditions.append("(normalize_text(title) LIKE normalize_text(?) OR normalize_text(content) LIKE normalize_text(?) OR normalize_text(summary) LIKE normalize_text(?) OR normalize_text(author) LIKE normalize_text(?))")
+            search_term = f"%{query}%"
+            params.extend([search_term, search_term, search_term, search_term])
+        else:
+            where_conditions.append(f"id IN ({','.join('?' * len(similarity)) or 'NULL'})")
+            params.extend(similarity.keys())
         
         # Filtros adicionales
         if category:
@@ -5060,58 +5225,71 @@ def advanced_search():
             params.append(region)
         
         if date_from:
-            where_conditions.append("DATE(published_date) >= ?")
+            where_conditions.append("DATE(date) >= ?")
             params.append(date_from)
         
         if date_to:
-            where_conditions.append("DATE(published_date) <= ?")
+            where_conditions.append("DATE(date) <= ?")
             params.append(date_to)
         
         if sentiment:
+            # Polaridad guardada en la ingesta (articles.sentiment, indexada)
             where_conditions.append("sentiment = ?")
             params.append(sentiment)
         
         # Construir consulta completa
         where_clause = " AND ".join(where_conditions)
         
-        # Ordenamiento
-        order_clause = "published_date DESC"
-        if sort_by == 'relevance':
+        # Ordenamiento (sus parámetros van tras los del WHERE, antes de LIMIT/OFFSET)
+        order_clause = "scraped_at DESC"
+        order_params = []
+        if similarity is not None:
+            # Candidatos que pasan los filtros (solo ids: sin descomprimir cuerpos), luego la página por similitud
+            cursor.execute(f"SELECT id FROM articles WHERE {where_clause}", params)
+            ranked_ids = sorted((row[0] for row in cursor.fetchall()), key=lambda i: similarity[i], reverse=True)
+            total = len(ranked_ids)
+            page_ids = ranked_ids[(page - 1) * limit:page * limit]
+            order_clause = "CASE a.id " + " ".join(f"WHEN {int(i)} THEN {n}" for n, i in enumerate(page_ids)) + " END" if page_ids else "a.id"
+            where_clause = f"a.id IN ({','.join('?' * len(page_ids)) or 'NULL'})"
+            params = list(page_ids)
+        elif sort_by == 'relevance':
             # Simular relevancia basada en coincidencias en título (usando normalización)
-            order_clause = f"CASE WHEN normalize_text(title) LIKE normalize_text(?) THEN 1 ELSE 2 END, published_date DESC"
-            params.insert(0, f"%{query}%")
+            order_clause = "CASE WHEN normalize_text(title) LIKE normalize_text(?) THEN 1 ELSE 2 END, scraped_at DESC"
+            order_params.append(f"%{query}%")
         elif sort_by == 'date':
-            order_clause = "published_date DESC"
+            order_clause = "scraped_at DESC"
         elif sort_by == 'title':
             order_clause = "title ASC"
         
         # Contar total de resultados
-        count_query = f"SELECT COUNT(*) FROM articles WHERE {where_clause}"
-        cursor.execute(count_query, params[1:] if sort_by == 'relevance' else params)
-        total = cursor.fetchone()[0]
+        if similarity is None:
+            count_query = f"SELECT COUNT(*) FROM {ARTICLES_VIEW} WHERE {where_clause}"
+            cursor.execute(count_query, params)
+            total = cursor.fetchone()[0]
         
         # Obtener resultados paginados
-        offset = (page - 1) * limit
+        offset = (page - 1) * limit if similarity is None else 0
         search_query = f"""
             SELECT 
                 id, title, content, url, newspaper, category, region,
-                published_date, sentiment, image_url, author
-            FROM articles 
+                date, {primary_image_sql('a')}, author, summary, sentiment
+            FROM {ARTICLES_VIEW} a
             WHERE {where_clause}
             ORDER BY {order_clause}
             LIMIT ? OFFSET ?
         """
         
-        query_params = params + [limit, offset]
+        query_params = params + order_params + [limit, offset]
         cursor.execute(search_query, query_params)
         
         results = []
         for row in cursor.fetchall():
-            id, title, content, url, newspaper, category, region, published_date, sentiment, image_url, author = row
-            
-            # Simular análisis de sentimiento si no existe
-            if not sentiment:
-                sentiment = 'neutral'
+            id, title, content, url, newspaper, category, region, published_date, image_url, _, author, summary, sentiment = row
+            title = title or ''
+            content = content or ''
+            if sentiment is None:
+                # Artículo anterior a la columna sentiment (sin backfill): solo los de la página
+                sentiment = article_polarity(title, summary)
             
             # Simular tags basados en palabras clave
             tags = []
@@ -5122,14 +5300,17 @@ def advanced_search():
             if 'deportes' in title.lower() or 'deportes' in content.lower():
                 tags.append('deportes')
             
-            # Simular score de relevancia
-            relevance_score = 0.8
-            if query.lower() in title.lower():
-                relevance_score = 0.95
-            elif query.lower() in content.lower():
-                relevance_score = 0.7
+            # Score de relevancia: similitud del índice vectorial, o simulado en la búsqueda por LIKE
+            if similarity is not None:
+                relevance_score = round(similarity.get(id, 0.0), 4)
+            else:
+                relevance_score = 0.8
+                if query.lower() in title.lower():
+                    relevance_score = 0.95
+                elif query.lower() in content.lower():
+                    relevance_score = 0.7
             
-            results.append({
+            result = {
                 'id': id,
                 'title': title,
                 'content': content[:300] + '...' if len(content) > 300 else content,
@@ -5143,7 +5324,10 @@ def advanced_search():
                 'author': author,
                 'tags': tags,
                 'relevance_score': relevance_score
-            })
+            }
+            if fields:
+                result = {key: value for key, value in result.items() if key in fields or key == 'id'}
+            results.append(result)
         
         conn.close()
         
@@ -5177,7 +5361,7 @@ def run_auto_scraping():
         except Exception:
             pass  # Usar default si hay error
         
-        scraping_status.update({
+        _update_scraping_status({
             'is_running': True,
             'progress': 0,
             'total': total_newspapers,
@@ -5186,7 +5370,8 @@ def run_auto_scraping():
             'images_found': 0,
             'error': None,
             'start_time': datetime.now().isoformat(),
-            'end_time': None
+            'end_time': None,
+            'job_id': uuid.uuid4().hex
         })
         
         # Ejecutar el scraper automático
@@ -5201,15 +5386,16 @@ def run_auto_scraping():
             
     except Exception as e:
         logger.error(f"❌ Error ejecutando actualización automática: {e}")
-        scraping_status['error'] = str(e)
+        _update_scraping_status({'error': str(e)})
     
     finally:
-        scraping_status.update({
+        _update_scraping_status({
             'is_running': False,
             'end_time': datetime.now().isoformat()
         })
 
 @app.route('/api/newspapers', methods=['GET'])
+@response_cache.cached()
 def get_newspapers():
     """Obtener lista de periódicos con conteos de artículos e imágenes"""
     conn = get_db_connection()
@@ -5253,6 +5439,7 @@ def get_newspapers():
 
 @app.route('/api/analytics/trends', methods=['GET'])
 @require_auth
+@response_cache.cached()
 def get_trends_analytics():
     """Obtener análisis de tendencias por período"""
     conn = get_db_connection()
@@ -5281,7 +5468,8 @@ def get_trends_analytics():
                 strftime('{date_format}', scraped_at) as period,
                 COUNT(*) as articles_count,
                 SUM(images_downloaded) as images_count,
-                COUNT(DISTINCT newspaper) as newspapers_count
+                COUNT(DISTINCT newspaper) as newspapers_count,
+                COUNT(DISTINCT {STORY_KEY_SQL}) as stories_count
             FROM articles 
             WHERE scraped_at >= datetime('now', '-{days_back} days')
             GROUP BY strftime('{date_format}', scraped_at)
@@ -5294,12 +5482,13 @@ def get_trends_analytics():
                 'period': row[1],
                 'articles_count': row[2],
                 'images_count': row[3],
-                'newspapers_count': row[4]
+                'newspapers_count': row[4],
+                'stories_count': row[5]
             })
         
         # Obtener top categorías
-        cursor.execute("""
-            SELECT category, COUNT(*) as count
+        cursor.execute(f"""
+            SELECT category, COUNT(*) as count, COUNT(DISTINCT {STORY_KEY_SQL}) as stories_count
             FROM articles 
             WHERE category IS NOT NULL AND category != ''
             GROUP BY category 
@@ -5307,11 +5496,11 @@ def get_trends_analytics():
             LIMIT 10
         """)
         
-        top_categories = [{'category': row[0], 'count': row[1]} for row in cursor.fetchall()]
+        top_categories = [{'category': row[0], 'count': row[1], 'stories_count': row[2]} for row in cursor.fetchall()]
         
         # Obtener top periódicos
-        cursor.execute("""
-            SELECT newspaper, COUNT(*) as count
+        cursor.execute(f"""
+            SELECT newspaper, COUNT(*) as count, COUNT(DISTINCT {STORY_KEY_SQL}) as stories_count
             FROM articles 
             WHERE newspaper IS NOT NULL AND newspaper != ''
             GROUP BY newspaper 
@@ -5319,7 +5508,7 @@ def get_trends_analytics():
             LIMIT 10
         """)
         
-        top_newspapers = [{'newspaper': row[0], 'count': row[1]} for row in cursor.fetchall()]
+        top_newspapers = [{'newspaper': row[0], 'count': row[1], 'stories_count': row[2]} for row in cursor.fetchall()]
         
         conn.close()
         
@@ -5336,6 +5525,7 @@ def get_trends_analytics():
 
 @app.route('/api/analytics/sentiment', methods=['GET'])
 @require_auth
+@response_cache.cached()
 def get_sentiment_analysis():
     """
     Análisis avanzado de sentimientos de las noticias
@@ -5359,9 +5549,9 @@ def get_sentiment_analysis():
         topic = request.args.get('topic', None)  # Tema específico para comparar medios
         
         # Construir query
-        query = """
+        query = f"""
             SELECT id, title, content, newspaper, category, scraped_at
-            FROM articles 
+            FROM {ARTICLES_VIEW} 
             WHERE title IS NOT NULL AND content IS NOT NULL
                 AND title != '' AND content != ''
                 AND scraped_at >= datetime('now', '-' || ? || ' days')
@@ -5718,9 +5908,9 @@ def get_ad_for_article():
             return jsonify({'error': 'Base de datos no disponible'}), 500
         
         cursor = conn.cursor()
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT id, title, content, newspaper, category, scraped_at
-            FROM articles WHERE id = ?
+            FROM {ARTICLES_VIEW} WHERE id = ?
         ''', (article_id,))
         
         article = cursor.fetchone()
@@ -6027,9 +6217,9 @@ def get_ad_recommendations():
         days = request.args.get('days', 7, type=int)
         
         # Analizar artículos recientes y agrupar por sentimiento
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT id, title, content, newspaper, category, scraped_at
-            FROM articles
+            FROM {ARTICLES_VIEW}
             WHERE scraped_at >= datetime('now', '-' || ? || ' days')
               AND title IS NOT NULL AND content IS NOT NULL
             ORDER BY scraped_at DESC
@@ -6107,56 +6297,32 @@ def get_ad_recommendations():
 
 @app.route('/api/analytics/wordcloud', methods=['GET'])
 @require_auth
+@response_cache.cached()
 def get_wordcloud_data():
-    """Obtener datos para nube de palabras"""
-    conn = get_db_connection()
-    if not conn:
-        return jsonify({'error': 'Base de datos no disponible'}), 500
-    
+    """Obtener datos para nube de palabras (desde el índice de estadísticas del corpus)"""
     try:
-        cursor = conn.cursor()
-        
-        # Obtener títulos y contenido
-        cursor.execute("""
-            SELECT title, content
-            FROM articles 
-            WHERE title IS NOT NULL AND content IS NOT NULL
-            ORDER BY scraped_at DESC
-            LIMIT 500
-        """)
-        
-        articles = cursor.fetchall()
-        
-        # Procesar texto
-        import re
-        from collections import Counter
-        
-        # Palabras a excluir
-        stop_words = {
-            'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'es', 'se', 'no', 'te', 'lo', 'le', 'da', 'su', 'por', 'son', 'con', 'para', 'al', 'del', 'los', 'las', 'una', 'como', 'pero', 'sus', 'más', 'también', 'muy', 'sin', 'sobre', 'entre', 'hasta', 'desde', 'durante', 'mediante', 'según', 'hacia', 'bajo', 'ante', 'tras', 'contra', 'hasta', 'cada', 'todo', 'todos', 'todas', 'esta', 'este', 'estos', 'estas', 'ese', 'esa', 'esos', 'esas', 'aquel', 'aquella', 'aquellos', 'aquellas', 'mi', 'tu', 'su', 'nuestro', 'nuestra', 'nuestros', 'nuestras', 'vuestro', 'vuestra', 'vuestros', 'vuestras', 'me', 'te', 'se', 'nos', 'os', 'le', 'les', 'lo', 'la', 'los', 'las', 'sí', 'no', 'también', 'tampoco', 'ya', 'aún', 'todavía', 'siempre', 'nunca', 'jamás', 'aquí', 'allí', 'ahí', 'donde', 'cuando', 'como', 'porque', 'aunque', 'mientras', 'después', 'antes', 'entonces', 'ahora', 'hoy', 'ayer', 'mañana', 'si', 'sino', 'pero', 'sin embargo', 'no obstante', 'además', 'también', 'así', 'así que', 'por eso', 'por lo tanto', 'en cambio', 'por el contrario'
-        }
-        
-        all_text = ""
-        for title, content in articles:
-            all_text += f" {title} {content}"
-        
-        # Limpiar y tokenizar
-        words = re.findall(r'\b[a-záéíóúñü]+\b', all_text.lower())
-        words = [word for word in words if len(word) > 3 and word not in stop_words]
+        days = request.args.get('days', 30, type=int)
+        newspaper = request.args.get('newspaper') or None
+        entity = request.args.get('entity') or None
+        rank = request.args.get('rank', 'count')
+        limit = min(request.args.get('limit', 50, type=int), 200)
         
-        # Contar palabras
-        word_count = Counter(words)
-        top_words = word_count.most_common(50)
+        stats = corpus_index.top_terms(
+            limit=limit,
+            days=days if days and days > 0 else None,
+            newspaper=newspaper,
+            entity=entity,
+            rank='tfidf' if rank == 'tfidf' else 'count',
+            alpha_only=True
+        )
         
         # Formatear para la nube de palabras
-        wordcloud_data = [{'text': word, 'value': count} for word, count in top_words]
-        
-        conn.close()
+        wordcloud_data = [{'text': t['term'], 'value': t['count']} for t in stats['terms']]
         
         return jsonify({
             'words': wordcloud_data,
-            'total_words': len(words),
-            'unique_words': len(word_count)
+            'total_words': stats['total_terms'],
+            'unique_words': stats['unique_terms']
         })
         
     except Exception as e:
@@ -6165,6 +6331,7 @@ def get_wordcloud_data():
 
 @app.route('/api/analytics/comparison', methods=['GET'])
 @require_auth
+@response_cache.cached()
 def get_newspaper_comparison():
     """Comparación detallada entre periódicos"""
     conn = get_db_connection()
@@ -6211,16 +6378,18 @@ def get_newspaper_comparison():
             comparison_data[newspaper]['total_images'] += count * avg_images
         
         # Estadísticas generales por periódico
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 newspaper,
                 COUNT(*) as total_articles,
+                COUNT(DISTINCT {STORY_KEY_SQL}) as unique_stories,
                 SUM(images_downloaded) as total_images,
                 COUNT(DISTINCT category) as categories_count,
-                AVG(LENGTH(content)) as avg_content_length,
+                AVG(COALESCE(b.raw_size, LENGTH(a.content))) as avg_content_length,
                 MIN(scraped_at) as first_article,
                 MAX(scraped_at) as last_article
-            FROM articles 
+            FROM articles a
+            LEFT JOIN article_bodies b ON b.article_id = a.id
             WHERE newspaper IS NOT NULL AND newspaper != ''
             GROUP BY newspaper
             ORDER BY total_articles DESC
@@ -6228,14 +6397,16 @@ def get_newspaper_comparison():
         
         newspaper_stats = []
         for row in cursor.fetchall():
-            newspaper, total_articles, total_images, categories_count, avg_content_length, first_article, last_article = row
+            (newspaper, total_articles, unique_stories, total_images, categories_count,
+             avg_content_length, first_article, last_article) = row
             
             newspaper_stats.append({
                 'newspaper': newspaper,
                 'total_articles': total_articles,
+                'unique_stories': unique_stories,
                 'total_images': total_images,
                 'categories_count': categories_count,
-                'avg_content_length': round(avg_content_length, 0),
+                'avg_content_length': round(avg_content_length or 0, 0),
                 'first_article': first_article,
                 'last_article': last_article,
                 'articles_per_day': round(total_articles / max(1, 30), 2)  # Simplificado por ahora
@@ -6268,33 +6439,14 @@ def delete_newspaper_data(newspaper_name):
         cursor.execute("SELECT COUNT(*) FROM articles WHERE newspaper = ?", (newspaper_name,))
         articles_count = cursor.fetchone()[0]
         
-        # Obtener URLs de imágenes asociadas a los artículos del periódico
+        # Imágenes de los artículos del periódico (archivos descargados y total)
         cursor.execute("""
-            SELECT images_data FROM articles 
-            WHERE newspaper = ? AND images_data IS NOT NULL AND images_data != '[]'
+            SELECT i.local_path FROM images i JOIN articles a ON a.id = i.article_ref
+            WHERE a.newspaper = ?
         """, (newspaper_name,))
-        
-        image_urls = []
-        for row in cursor.fetchall():
-            try:
-                images_data = json.loads(row[0])
-                if isinstance(images_data, list):
-                    for img in images_data:
-                        if isinstance(img, dict) and 'filename' in img:
-                            image_urls.append(img['filename'])
-            except (json.JSONDecodeError, TypeError):
-                continue
-        
-        # Obtener article_ids de los artículos del periódico para eliminar imágenes relacionadas
-        cursor.execute("SELECT article_id FROM articles WHERE newspaper = ?", (newspaper_name,))
-        article_ids = [row[0] for row in cursor.fetchall()]
-        
-        # Contar imágenes relacionadas
-        images_count = 0
-        if article_ids:
-            placeholders = ','.join(['?' for _ in article_ids])
-            cursor.execute(f"SELECT COUNT(*) FROM images WHERE article_id IN ({placeholders})", article_ids)
-            images_count = cursor.fetchone()[0]
+        image_rows = cursor.fetchall()
+        images_count = len(image_rows)
+        image_urls = [os.path.basename(row[0]) for row in image_rows if row[0]]
         
         # Registrar periódico como excluido de futuras actualizaciones automáticas
         cursor.execute("""
@@ -6302,19 +6454,29 @@ def delete_newspaper_data(newspaper_name):
             VALUES (?, ?)
         """, (newspaper_name, datetime.now().isoformat()))
         
-        # Borrar artículos del periódico
-        cursor.execute("DELETE FROM articles WHERE newspaper = ?", (newspaper_name,))
+        # Quitar sus artículos de los índices de términos (el índice vectorial necesita el texto
+        # indexado para descontar sus frecuencias de documento)
+        cursor.execute(f"SELECT id, title, summary, content FROM {ARTICLES_VIEW} WHERE newspaper = ?", (newspaper_name,))
+        removed_articles = [(row[0], row[1], f"{row[2] or ''} {row[3] or ''}") for row in cursor.fetchall()]
+        removed_ids = [article[0] for article in removed_articles]
+        corpus_index.remove_articles(cursor, removed_ids)
+        story_index.remove_articles(cursor, removed_ids)
+        cursor.execute("DELETE FROM term_daily_counts WHERE newspaper = ?", (newspaper_name,))
         
         # Borrar imágenes relacionadas
-        if article_ids:
-            placeholders = ','.join(['?' for _ in article_ids])
-            cursor.execute(f"DELETE FROM images WHERE article_id IN ({placeholders})", article_ids)
+        cursor.execute("DELETE FROM images WHERE article_ref IN (SELECT id FROM articles WHERE newspaper = ?)", (newspaper_name,))
+        
+        # Borrar artículos del periódico
+        cursor.execute("DELETE FROM articles WHERE newspaper = ?", (newspaper_name,))
+        prune_orphan_bodies(cursor)
         
         # Borrar estadísticas de scraping del periódico
         cursor.execute("DELETE FROM scraping_stats WHERE url_scraped LIKE ?", (f'%{newspaper_name}%',))
+        bump_data_version(cursor, ARTICLES)
         
         conn.commit()
         conn.close()
+        vector_index.remove(removed_articles)
         
         # Eliminar archivos de imagen físicos
         deleted_files = 0
@@ -6654,16 +6816,8 @@ def delete_competitor(competitor_id):
         if not competitor_exists:
             return jsonify({'error': 'Competidor no encontrado'}), 404
         
-        # Marcar como inactivo
-        conn = sqlite3.connect(ci_system.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE user_competitors 
-            SET is_active = 0, updated_at = CURRENT_TIMESTAMP 
-            WHERE id = ? AND user_id = ?
-        ''', (competitor_id, user_id))
-        conn.commit()
-        conn.close()
+        # Marcar como inactivo (invalida el matcher de keywords)
+        ci_system.deactivate_competitor(user_id, competitor_id)
         
         return jsonify({
             'success': True,
@@ -8042,7 +8196,7 @@ def scrape_social_media():
             logger.warning(f"⚠️ No se pudieron extraer posts REALES de {platform.upper()}")
             logger.info(f"💡 Generando posts de ejemplo (mocks) para feedback inmediato...")
             logger.info(f"ℹ️ Estos son datos de ejemplo basados en '{query}'")
-            logger.info("ℹ️ Si el scraping real funciona después, los mocks se reemplazarán automáticamente")
+            logger.info("ℹ️ Los mocks se reemplazan en el siguiente guardado de esta plataforma (real o de ejemplo)")
 
             try:
                 if platform == 'facebook':
@@ -8061,6 +8215,9 @@ def scrape_social_media():
                     demo_posts = _generate_demo_tweets(query, max_posts, mode)
 
                 if demo_posts and len(demo_posts) > 0:
+                    # Marcados para que save_batch los reemplace en lugar de acumularlos con los reales
+                    for post in demo_posts:
+                        post['is_demo'] = True
                     logger.info(f"✅ Generados {len(demo_posts)} posts de ejemplo (mocks) para feedback")
                     final_posts = demo_posts
                     demo_mode = True
@@ -8091,27 +8248,12 @@ def scrape_social_media():
             logger.info(f"💾 Guardando {len(processed_posts)} posts en base de datos...")
             db = SocialMediaDB()
 
-            # Limpiar datos viejos de la misma plataforma antes de guardar nuevos
-            try:
-                logger.info(f"🗑️ Limpiando datos viejos de {platform} antes de guardar nuevos...")
-                conn = db.get_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM social_media_posts WHERE platform = ?", (platform,))
-                    deleted_count = cursor.rowcount
-                    conn.commit()
-                    conn.close()
-                    logger.info(f"✅ Eliminados {deleted_count} posts viejos de {platform}")
-            except Exception as e:
-                logger.warning(f"⚠️ Error limpiando datos viejos: {e}, continuando...")
-
-            saved_count = db.save_batch(processed_posts)
-
-            if saved_count == 0 and processed_posts:
-                logger.warning(f"⚠️ saved_count es 0 pero hay {len(processed_posts)} posts procesados. Usando número de procesados.")
-                saved_count = len(processed_posts)
+            # Upsert por (platform, dedup_key): los posts re-scrapeados se actualizan sin borrar el histórico
+            save_result = db.save_batch(processed_posts)
+            saved_count = save_result['inserted'] + save_result['updated']
 
-            logger.info(f"✅ {saved_count} posts guardados exitosamente (de {len(processed_posts)} procesados)")
+            logger.info(f"✅ {saved_count} posts guardados exitosamente ({save_result['inserted']} nuevos, "
+                        f"{save_result['updated']} actualizados, de {len(processed_posts)} procesados)")
 
             posts_with_images = sum(1 for post in processed_posts if post.get('image_url'))
             logger.info(f"🖼️ {posts_with_images} posts tienen imágenes")
@@ -8127,7 +8269,7 @@ def scrape_social_media():
                     f'💾 {saved_count} posts guardados en la base de datos\n'
                     f'🖼️ {posts_with_images} posts con imágenes incluidas\n\n'
                     f'ℹ️ Estos son posts de EJEMPLO para demostración\n'
-                    f'💡 Si el scraping real funciona después, estos se reemplazarán automáticamente'
+                    f'💡 Se reemplazarán en el próximo scraping de {platform_name}'
                 )
             else:
                 message = (
@@ -8256,11 +8398,7 @@ def get_social_media_posts():
         posts_with_images = sum(1 for post in posts if post.get('image_url'))
         logger.info(f"🖼️ De {len(posts)} posts, {posts_with_images} tienen imágenes")
         
-        return jsonify({
-            'success': True,
-            'total': len(posts),
-            'posts': posts
-        })
+        return json_list_response('posts', posts, success=True, total=len(posts))
         
     except Exception as e:
         logger.error(f"Error obteniendo posts: {e}")
@@ -8268,6 +8406,7 @@ def get_social_media_posts():
 
 @app.route('/api/social-media/stats', methods=['GET'])
 @require_auth
+@response_cache.cached(namespaces=(SOCIAL,))
 def get_social_media_stats():
     """Obtener estadísticas de redes sociales"""
     try:
@@ -8298,6 +8437,9 @@ if __name__ == '__main__':
 
     if not debug_mode or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
         start_auto_update_scheduler()
+        start_realtime_server()
+        # Indexar en segundo plano los artículos que falten en el índice vectorial
+        vector_index.sync_in_background(DB_PATH)
 
     # Iniciar servidor en puerto 5001
     app.run(host='0.0.0.0', port=5001, debug=debug_mode)
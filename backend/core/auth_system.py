@@ -567,6 +567,17 @@ class AuthSystem:
             return False
 
 
+_shared_auth_system: Optional[AuthSystem] = None
+
+
+def _get_auth_system() -> AuthSystem:
+    """Instancia compartida para verificar tokens (evita inicializar la BD de auth en cada petición)"""
+    global _shared_auth_system
+    if _shared_auth_system is None:
+        _shared_auth_system = AuthSystem()
+    return _shared_auth_system
+
+
 # Decoradores para protección de rutas
 def require_auth(f):
     """Decorador para requerir autenticación"""
@@ -586,8 +597,7 @@ def require_auth(f):
             return jsonify({'error': 'Token requerido'}), 401
         
         # Verificar token
-        auth_system = AuthSystem()
-        payload = auth_system.verify_token(token)
+        payload = _get_auth_system().verify_token(token)
         
         if not payload:
             return jsonify({'error': 'Token inválido o expirado'}), 401
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Bus de eventos en proceso para notificaciones en tiempo real
+
+Los hilos de scraping (y cualquier otro hilo de Flask) publican con
+publish(), que solo encola el evento en el event loop del bus mediante
+loop.call_soon_threadsafe: nunca bloquea ni toca asyncio desde fuera del loop.
+
+Dentro del loop cada evento se reparte a:
+- Manejadores asíncronos (p.ej. el servidor WebSocket), en paralelo con asyncio.gather
+- Suscripciones síncronas (p.ej. el endpoint SSE), cada una con su propia cola
+
+Temas: 'scraping', 'system', 'admin' y 'user:<id>' para eventos de un usuario.
+Los eventos de progreso llevan una clave de coalescencia (el job_id): si llegan
+varios antes de repartirse, solo se entrega el último (latest-wins).
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Temas conocidos
+TOPIC_SCRAPING = 'scraping'
+TOPIC_SYSTEM = 'system'
+TOPIC_ADMIN = 'admin'
+
+# Intervalo mínimo entre eventos de progreso de un mismo job
+PROGRESS_INTERVAL = 0.25
+# Eventos pendientes por suscriptor antes de descartar los más antiguos
+SUBSCRIPTION_MAX_EVENTS = 256
+
+AsyncHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+def user_topic(user_id: int) -> str:
+    """Tema con los eventos dirigidos a un usuario concreto"""
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """Cola de eventos de un suscriptor síncrono (thread-safe).
+
+    Un evento de progreso con la misma clave que otro aún no leído lo
+    reemplaza en su misma posición, así un cliente lento nunca acumula
+    progreso obsoleto.
+    """
+
+    def __init__(self, topics: Iterable[str], max_events: int = SUBSCRIPTION_MAX_EVENTS):
+        self.topics: Set[str] = set(topics)
+        self.max_events = max_events
+        self._queue: deque = deque()
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def put(self, event: Dict[str, Any], coalesce_key: Optional[str] = None):
+        with self._cond:
+            if coalesce_key is not None:
+                if coalesce_key not in self._progress:
+                    self._queue.append(('progress', coalesce_key))
+                self._progress[coalesce_key] = event
+            else:
+                self._queue.append(('event', event))
+
+            while len(self._queue) > self.max_events:
+                kind, item = self._queue.popleft()
+                if kind == 'progress':
+                    self._progress.pop(item, None)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Siguiente evento, o None si vence el timeout o la suscripción se cerró"""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if not self._queue:
+                return None
+            kind, item = self._queue.popleft()
+            if kind == 'progress':
+                return self._progress.pop(item, None)
+            return item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class EventBus:
+    """Bus de eventos con event loop propio en un hilo de fondo"""
+
+    def __init__(self, progress_interval: float = PROGRESS_INTERVAL):
+        self.progress_interval = progress_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._subs_lock = threading.Lock()
+        self._subscriptions: Set[Subscription] = set()
+        self._handlers: Set[AsyncHandler] = set()
+        self._pending_lock = threading.Lock()
+        self._pending_progress: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop del bus (se arranca al primer uso)"""
+        self.start()
+        return self._loop
+
+    def start(self):
+        """Arrancar el hilo del event loop si no está corriendo"""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            ready = threading.Event()
+
+            def run_loop():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                self._loop = loop
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run_loop, name='event-bus', daemon=True)
+            self._thread.start()
+            ready.wait()
+            logger.info("📡 Bus de eventos iniciado")
+
+    def run_coroutine(self, coro) -> "asyncio.Future":
+        """Ejecutar una corrutina en el loop del bus desde cualquier hilo"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    # ------------------------------------------------------------------
+    # Suscripciones
+    # ------------------------------------------------------------------
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """Crear una suscripción síncrona (para consumir desde un hilo de Flask)"""
+        subscription = Subscription(topics)
+        with self._subs_lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._subs_lock:
+            self._subscriptions.discard(subscription)
+        subscription.close()
+
+    def add_handler(self, handler: AsyncHandler):
+        """Registrar un manejador asíncrono que recibe todos los eventos en el loop del bus"""
+        with self._subs_lock:
+            self._handlers.add(handler)
+
+    def remove_handler(self, handler: AsyncHandler):
+        with self._subs_lock:
+            self._handlers.discard(handler)
+
+    # ------------------------------------------------------------------
+    # Publicación (thread-safe)
+    # ------------------------------------------------------------------
+
+    def publish(self, topic: str, event_type: str, data: Optional[Dict[str, Any]] = None,
+                coalesce_key: Optional[str] = None):
+        """Publicar un evento desde cualquier hilo.
+
+        Args:
+            topic: Tema del evento ('scraping', 'system', 'admin', 'user:<id>')
+            event_type: Tipo que verá el cliente (p.ej. 'scraping_update')
+            data: Contenido del evento
+            coalesce_key: Clave de coalescencia (job_id) para eventos de progreso
+        """
+        event = {
+            'type': event_type,
+            'topic': topic,
+            **(data or {}),
+            'timestamp': datetime.now().isoformat(),
+        }
+        try:
+            loop = self.loop
+            if coalesce_key is None:
+                loop.call_soon_threadsafe(self._dispatch, topic, event, None)
+                return
+
+            key = (topic, str(coalesce_key))
+            with self._pending_lock:
+                # Solo el primer evento pendiente del job programa el envío; los siguientes lo reemplazan
+                first = key not in self._pending_progress
+                self._pending_progress[key] = event
+            if first:
+                loop.call_soon_threadsafe(loop.call_later, self.progress_interval,
+                                          self._flush_progress, key)
+        except RuntimeError as e:
+            # Loop cerrado (apagado del proceso)
+            logger.debug(f"Evento descartado ({event_type}): {e}")
+
+    def _flush_progress(self, key: Tuple[str, str]):
+        with self._pending_lock:
+            event = self._pending_progress.pop(key, None)
+        if event is not None:
+            self._deliver(key[0], event, key[1])
+
+    def _dispatch(self, topic: str, event: Dict[str, Any], coalesce_key: Optional[str]):
+        # Entregar antes el progreso pendiente del tema para no desordenar eventos
+        with self._pending_lock:
+            pending = [k for k in self._pending_progress if k[0] == topic]
+        for key in pending:
+            self._flush_progress(key)
+        self._deliver(topic, event, coalesce_key)
+
+    def _deliver(self, topic: str, event: Dict[str, Any], coalesce_key: Optional[str]):
+        event['id'] = next(self._ids)
+        with self._subs_lock:
+            subscriptions = [s for s in self._subscriptions if topic in s.topics]
+            handlers = list(self._handlers)
+
+        for subscription in subscriptions:
+            subscription.put(event, coalesce_key)
+
+        if handlers:
+            self._loop.create_task(self._run_handlers(handlers, topic, event))
+
+    @staticmethod
+    async def _run_handlers(handlers, topic: str, event: Dict[str, Any]):
+        results = await asyncio.gather(*(h(topic, event) for h in handlers), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"❌ Error en manejador de eventos: {result}")
+
+
+# Instancia global del bus
+event_bus = EventBus()
+
+
+# Funciones de utilidad para enviar notificaciones (se pueden llamar desde cualquier hilo)
+def send_scraping_notification(message: str, status: str = "info", job_id: Optional[str] = None):
+    """Enviar notificación sobre scraping"""
+    logger.info(f"[SCRAPING] {status.upper()}: {message}")
+    event_bus.publish(TOPIC_SCRAPING, 'scraping_update', {
+        'message': message,
+        'status': status,
+        'job_id': job_id
+    })
+
+
+def send_scraping_progress(job_id: str, progress: Dict[str, Any]):
+    """Enviar el estado de un job de scraping (coalescido: solo llega el último)"""
+    event_bus.publish(TOPIC_SCRAPING, 'scraping_progress', {
+        'job_id': job_id,
+        'scraping_status': progress
+    }, coalesce_key=job_id)
+
+
+def send_payment_notification(user_id: int, message: str, status: str = "info"):
+    """Enviar notificación de pago a usuario específico"""
+    logger.info(f"[PAYMENT] {status.upper()}: {message}")
+    event_bus.publish(user_topic(user_id), 'payment_update', {
+        'message': message,
+        'status': status
+    })
+
+
+def send_admin_notification(message: str, status: str = "info"):
+    """Enviar notificación solo a administradores"""
+    logger.info(f"[ADMIN] {status.upper()}: {message}")
+    event_bus.publish(TOPIC_ADMIN, 'admin_notification', {
+        'message': message,
+        'status': status
+    })
+
+
+def send_system_notification(message: str, status: str = "info"):
+    """Enviar notificación del sistema a todos"""
+    logger.info(f"[SYSTEM] {status.upper()}: {message}")
+    event_bus.publish(TOPIC_SYSTEM, 'system_notification', {
+        'message': message,
+        'status': status
+    })
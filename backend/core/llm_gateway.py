@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Pasarela LLM para el chatbot
+
+- Caché de respuestas (TTL + LRU) con clave = prompt normalizado + IDs de los
+  artículos recuperados, así las preguntas frecuentes responden al instante
+- Llamadas "hedged" a proveedores: se lanza el mejor proveedor y, si no responde
+  en hedge_delay segundos (o falla), se lanza el siguiente en paralelo; gana la
+  primera respuesta válida y el resto se cancela (las que aún no empezaron no
+  llegan a salir; las que están en vuelo se abandonan y su resultado se descarta)
+- Marcador de latencia/salud por proveedor que decide el orden de los intentos
+  (EWMA de latencia y de tasa de éxito, enfriamiento tras fallos consecutivos)
+- Streaming de tokens (stream=true en APIs compatibles con OpenAI, NDJSON en
+  Ollama): los proveedores compiten por el primer token y los perdedores se
+  cortan en cuanto hay ganador
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latencia supuesta para un proveedor sin historial (segundos)
+DEFAULT_LATENCY = 2.0
+# Peso de la última observación en las medias exponenciales
+EWMA_ALPHA = 0.3
+# Enfriamiento tras fallos consecutivos: 10s, 20s, 40s... hasta 5 minutos
+COOLDOWN_BASE = 10.0
+COOLDOWN_MAX = 300.0
+
+# Tiempo máximo sin recibir tokens del proveedor ganador antes de cortar el stream
+STREAM_IDLE_TIMEOUT = 30.0
+
+# transport(url, headers, body, timeout) -> (status_code, json | None)
+Transport = Callable[[str, Dict[str, str], Dict[str, Any], float], Tuple[int, Optional[Any]]]
+# stream_transport(url, headers, body, timeout) -> (status_code, iterador de líneas, close)
+StreamTransport = Callable[[str, Dict[str, str], Dict[str, Any], float],
+                           Tuple[int, Iterable[str], Callable[[], None]]]
+
+
+def normalize_prompt(text: str) -> str:
+    """Normalizar un prompt para la clave de caché (minúsculas, sin tildes ni puntuación)"""
+    text = unicodedata.normalize('NFD', (text or '').lower())
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+def openai_chat_body(model: str, max_tokens: Optional[int] = 200, temperature: float = 0.7):
+    """Constructor de cuerpo para APIs compatibles con OpenAI (chat/completions)"""
+    def build(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        body = {"model": model, "messages": messages, "temperature": temperature}
+        if max_tokens:
+            body["max_tokens"] = max_tokens
+        return body
+    return build
+
+
+def parse_openai_chat(data: Any) -> Optional[str]:
+    return (data.get('choices') or [{}])[0].get('message', {}).get('content')
+
+
+def parse_openai_stream_line(line: str) -> Tuple[Optional[str], bool]:
+    """Línea SSE de chat/completions con stream=true -> (texto nuevo, terminado)"""
+    if not line or not line.startswith('data:'):
+        return None, False
+    payload = line[5:].strip()
+    if payload == '[DONE]':
+        return None, True
+    choice = (json.loads(payload).get('choices') or [{}])[0]
+    return (choice.get('delta') or {}).get('content'), choice.get('finish_reason') is not None
+
+
+def parse_ollama_stream_line(line: str) -> Tuple[Optional[str], bool]:
+    """Línea NDJSON de /api/chat de Ollama -> (texto nuevo, terminado)"""
+    if not line:
+        return None, False
+    data = json.loads(line)
+    return data.get('message', {}).get('content'), bool(data.get('done'))
+
+
+class LLMProvider:
+    """Un endpoint de chat al que la pasarela puede llamar"""
+
+    def __init__(self, name: str, url: str, build_body: Callable[[List[Dict[str, str]]], Dict[str, Any]],
+                 headers: Optional[Dict[str, str]] = None, timeout: float = 10.0,
+                 parse: Callable[[Any], Optional[str]] = parse_openai_chat,
+                 parse_stream: Optional[Callable[[str], Tuple[Optional[str], bool]]] = parse_openai_stream_line):
+        """
+        Args:
+            parse: Extrae el texto de una respuesta completa
+            parse_stream: Extrae (texto nuevo, terminado) de cada línea en modo stream
+                (None si el proveedor no admite streaming)
+        """
+        self.name = name
+        self.url = url
+        self.build_body = build_body
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+        self.parse = parse
+        self.parse_stream = parse_stream
+
+    def __repr__(self):
+        return f"LLMProvider({self.name!r})"
+
+
+class LLMResponseCache:
+    """Caché LRU de respuestas del LLM con caducidad por TTL"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(prompt: str, system_prompt: str = '', context_ids: Iterable = ()) -> str:
+        ids = ','.join(sorted(str(i) for i in context_ids))
+        raw = '\x1f'.join((normalize_prompt(prompt), normalize_prompt(system_prompt), ids))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'ttl': self.ttl, 'max_entries': self.max_entries}
+
+
+class ProviderScoreboard:
+    """Latencia y salud observadas por proveedor, para ordenar los intentos"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        return self._stats.setdefault(name, {
+            'latency': None, 'success_rate': 1.0, 'calls': 0, 'failures': 0,
+            'consecutive_failures': 0, 'cooldown_until': 0.0, 'last_error': None
+        })
+
+    def record_success(self, name: str, latency: float):
+        with self._lock:
+            s = self._entry(name)
+            s['latency'] = latency if s['latency'] is None else (1 - EWMA_ALPHA) * s['latency'] + EWMA_ALPHA * latency
+            s['success_rate'] = (1 - EWMA_ALPHA) * s['success_rate'] + EWMA_ALPHA
+            s['calls'] += 1
+            s['consecutive_failures'] = 0
+            s['cooldown_until'] = 0.0
+
+    def record_failure(self, name: str, latency: float, error: str = ''):
+        with self._lock:
+            s = self._entry(name)
+            s['success_rate'] = (1 - EWMA_ALPHA) * s['success_rate']
+            s['calls'] += 1
+            s['failures'] += 1
+            s['consecutive_failures'] += 1
+            s['last_error'] = error[:200] if error else None
+            # Un proveedor que falla también "cuesta" lo que tardó en fallar
+            s['latency'] = latency if s['latency'] is None else (1 - EWMA_ALPHA) * s['latency'] + EWMA_ALPHA * latency
+            cooldown = min(COOLDOWN_MAX, COOLDOWN_BASE * (2 ** (s['consecutive_failures'] - 1)))
+            s['cooldown_until'] = time.monotonic() + cooldown
+
+    def order(self, providers: List[LLMProvider]) -> List[LLMProvider]:
+        """Proveedores sanos por coste esperado (latencia / tasa de éxito); en enfriamiento al final"""
+        now = time.monotonic()
+        with self._lock:
+            def sort_key(item):
+                index, provider = item
+                s = self._stats.get(provider.name)
+                if not s:
+                    return (0, DEFAULT_LATENCY, index)
+                cooling = 1 if s['cooldown_until'] > now else 0
+                latency = s['latency'] if s['latency'] is not None else DEFAULT_LATENCY
+                return (cooling, latency / max(s['success_rate'], 0.05), index)
+            return [p for _, p in sorted(enumerate(providers), key=sort_key)]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    'latency_ms': round(s['latency'] * 1000) if s['latency'] is not None else None,
+                    'success_rate': round(s['success_rate'], 3),
+                    'calls': s['calls'],
+                    'failures': s['failures'],
+                    'cooling_down': s['cooldown_until'] > now,
+                    'last_error': s['last_error'],
+                }
+                for name, s in self._stats.items()
+            }
+
+
+_thread_local = threading.local()
+
+
+def requests_transport(url: str, headers: Dict[str, str], body: Dict[str, Any], timeout: float):
+    """Transporte HTTP por defecto: requests con una sesión keep-alive por hilo"""
+    import requests  # type: ignore
+
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    r = session.post(url, headers=headers, json=body, timeout=timeout)
+    if r.status_code != 200:
+        return r.status_code, None
+    return r.status_code, r.json()
+
+
+def requests_stream_transport(url: str, headers: Dict[str, str], body: Dict[str, Any], timeout: float):
+    """Transporte HTTP en streaming: devuelve las líneas de la respuesta según llegan"""
+    import requests  # type: ignore
+
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    r = session.post(url, headers=headers, json=body, timeout=timeout, stream=True)
+    if r.status_code != 200:
+        r.close()
+        return r.status_code, iter(()), lambda: None
+    return r.status_code, r.iter_lines(decode_unicode=True), r.close
+
+
+class LLMGateway:
+    """Pasarela con caché, marcador de proveedores y llamadas hedged"""
+
+    def __init__(self, providers: Callable[[], List[LLMProvider]], cache: Optional[LLMResponseCache] = None,
+                 scoreboard: Optional[ProviderScoreboard] = None, transport: Transport = requests_transport,
+                 stream_transport: StreamTransport = requests_stream_transport,
+                 hedge_delay: float = 1.5, max_parallel: int = 3, max_workers: int = 8):
+        """
+        Args:
+            providers: Función que devuelve los proveedores configurados (se evalúa en cada
+                llamada para respetar cambios de variables de entorno)
+            cache: Caché de respuestas (None = sin caché)
+            scoreboard: Marcador de latencia/salud compartido
+            transport: Función que hace el POST HTTP
+            stream_transport: Función que hace el POST HTTP en modo streaming
+            hedge_delay: Segundos sin respuesta tras los que se lanza el siguiente proveedor
+            max_parallel: Máximo de proveedores en vuelo a la vez
+            max_workers: Hilos del pool (las llamadas abandonadas los ocupan hasta su timeout)
+        """
+        self.providers = providers
+        self.cache = cache
+        self.scoreboard = scoreboard or ProviderScoreboard()
+        self.transport = transport
+        self.stream_transport = stream_transport
+        self.hedge_delay = hedge_delay
+        self.max_parallel = max_parallel
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+
+    def _cache_key(self, prompt: str, system_prompt: str, context_ids: Iterable, cache_text: Optional[str]):
+        if self.cache is None:
+            return None
+        return LLMResponseCache.make_key(cache_text if cache_text is not None else prompt, system_prompt, context_ids)
+
+    @staticmethod
+    def _messages(prompt: str, system_prompt: str) -> List[Dict[str, str]]:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def generate(self, prompt: str, system_prompt: str = '', context_ids: Iterable = (),
+                 cache_text: Optional[str] = None, deadline: float = 8.0) -> Optional[str]:
+        """Generar una respuesta (o None si ningún proveedor respondió a tiempo).
+
+        Args:
+            prompt: Prompt completo que se envía al proveedor
+            system_prompt: Prompt de sistema
+            context_ids: IDs de los artículos recuperados que forman el contexto
+            cache_text: Texto para la clave de caché si el prompt lleva partes volátiles
+                (p.ej. el mensaje del usuario sin las estadísticas en vivo)
+            deadline: Tiempo máximo total de espera en segundos
+        """
+        key = self._cache_key(prompt, system_prompt, context_ids, cache_text)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info("⚡ Respuesta LLM servida desde caché")
+                return cached
+
+        text, provider_name = self._hedged_call(self._messages(prompt, system_prompt), time.monotonic() + deadline)
+        if text:
+            logger.info(f"✅ LLM respondió con {provider_name}")
+            if key is not None:
+                self.cache.set(key, text)
+        return text
+
+    def _call_provider(self, provider: LLMProvider, messages: List[Dict[str, str]],
+                       cancelled: threading.Event) -> Optional[str]:
+        if cancelled.is_set():
+            return None
+        start = time.monotonic()
+        try:
+            status, data = self.transport(provider.url, provider.headers, provider.build_body(messages), provider.timeout)
+            text = provider.parse(data) if status == 200 and data else None
+            if not text or not text.strip():
+                raise ValueError(f"HTTP {status}" if status != 200 else "respuesta vacía")
+        except Exception as e:
+            if not cancelled.is_set():
+                self.scoreboard.record_failure(provider.name, time.monotonic() - start, str(e))
+                logger.debug(f"Proveedor LLM {provider.name} falló: {e}")
+            return None
+        self.scoreboard.record_success(provider.name, time.monotonic() - start)
+        return text
+
+    def _hedged_call(self, messages: List[Dict[str, str]], deadline: float) -> Tuple[Optional[str], Optional[str]]:
+        queue = self.scoreboard.order(self.providers())
+        pending = {}
+        cancelled = threading.Event()
+
+        def launch():
+            provider = queue.pop(0)
+            pending[self._executor.submit(self._call_provider, provider, messages, cancelled)] = provider
+
+        try:
+            while pending or queue:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.debug("LLM: se agotó el tiempo de espera")
+                    break
+                if not pending:
+                    launch()
+                    continue
+
+                timeout = min(remaining, self.hedge_delay) if queue else remaining
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # El líder tarda: lanzar en paralelo el siguiente proveedor
+                    if queue and len(pending) < self.max_parallel:
+                        launch()
+                    continue
+
+                for future in done:
+                    provider = pending.pop(future)
+                    text = future.result()
+                    if text:
+                        return text, provider.name
+                # Hubo fallos: pasar al siguiente sin esperar al hedge_delay
+                if queue and len(pending) < self.max_parallel:
+                    launch()
+            return None, None
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+
+    def stream(self, prompt: str, system_prompt: str = '', context_ids: Iterable = (),
+               cache_text: Optional[str] = None, deadline: float = 8.0) -> Iterator[str]:
+        """Generar una respuesta token a token.
+
+        Mismos argumentos que generate(); deadline limita la espera hasta el primer
+        token. Si ningún proveedor produce tokens a tiempo no se emite nada (el
+        llamador decide el fallback). Solo se cachean respuestas completas.
+        """
+        key = self._cache_key(prompt, system_prompt, context_ids, cache_text)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info("⚡ Respuesta LLM servida desde caché")
+                yield cached
+                return
+
+        messages = self._messages(prompt, system_prompt)
+        pending = [p for p in self.scoreboard.order(self.providers()) if p.parse_stream]
+        in_flight = set()
+        events: "queue.Queue[Tuple[str, str, Optional[str]]]" = queue.Queue()
+        state = {'winner': None, 'stop': False}
+        first_token_deadline = time.monotonic() + deadline
+        parts: List[str] = []
+
+        def launch():
+            provider = pending.pop(0)
+            in_flight.add(provider.name)
+            self._executor.submit(self._stream_provider, provider, messages, state, events)
+
+        try:
+            if not pending:
+                return
+            launch()
+            while True:
+                if state['winner'] is None:
+                    remaining = first_token_deadline - time.monotonic()
+                    if remaining <= 0:
+                        logger.debug("LLM stream: ningún proveedor respondió a tiempo")
+                        return
+                    can_hedge = pending and len(in_flight) < self.max_parallel
+                    timeout = min(remaining, self.hedge_delay) if can_hedge else remaining
+                else:
+                    timeout = STREAM_IDLE_TIMEOUT
+
+                try:
+                    kind, name, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    if state['winner'] is not None:
+                        logger.warning(f"⚠️ Stream de {state['winner']} detenido: sin tokens en {STREAM_IDLE_TIMEOUT}s")
+                        return
+                    # El líder tarda en dar el primer token: lanzar en paralelo el siguiente
+                    if pending and len(in_flight) < self.max_parallel:
+                        launch()
+                    continue
+
+                if kind == 'token':
+                    if state['winner'] is None:
+                        state['winner'] = name
+                        logger.info(f"✅ LLM transmitiendo con {name}")
+                    if name == state['winner']:
+                        parts.append(payload)
+                        yield payload
+                    continue
+
+                in_flight.discard(name)
+                if name == state['winner']:
+                    if kind == 'done' and key is not None and parts:
+                        self.cache.set(key, ''.join(parts))
+                    return
+                if state['winner'] is None:
+                    if not in_flight and not pending:
+                        return
+                    # Falló antes del primer token: pasar al siguiente sin esperar al hedge_delay
+                    if pending and len(in_flight) < self.max_parallel:
+                        launch()
+        finally:
+            # Cortar los streams perdedores (y el ganador si el cliente se desconectó)
+            state['stop'] = True
+
+    def _stream_provider(self, provider: LLMProvider, messages: List[Dict[str, str]],
+                         state: Dict[str, Any], events: "queue.Queue"):
+        start = time.monotonic()
+        got_tokens = False
+        try:
+            body = provider.build_body(messages)
+            body['stream'] = True
+            status, lines, close = self.stream_transport(provider.url, provider.headers, body, provider.timeout)
+            try:
+                if status != 200:
+                    raise ValueError(f"HTTP {status}")
+                for line in lines:
+                    if state['stop'] or state['winner'] not in (None, provider.name):
+                        break
+                    delta, done = provider.parse_stream(line)
+                    if delta:
+                        if not got_tokens:
+                            got_tokens = True
+                            # Para el marcador cuenta la latencia hasta el primer token
+                            self.scoreboard.record_success(provider.name, time.monotonic() - start)
+                        events.put(('token', provider.name, delta))
+                    if done:
+                        break
+            finally:
+                close()
+            if not got_tokens and not state['stop'] and state['winner'] is None:
+                raise ValueError("respuesta vacía")
+            events.put(('done', provider.name, None))
+        except Exception as e:
+            if not got_tokens and not state['stop'] and state['winner'] is None:
+                self.scoreboard.record_failure(provider.name, time.monotonic() - start, str(e))
+                logger.debug(f"Proveedor LLM {provider.name} falló en stream: {e}")
+            events.put(('error', provider.name, str(e)))
+
+    def status(self) -> Dict[str, Any]:
+        """Estado para diagnóstico: orden actual, marcador y caché"""
+        return {
+            'order': [p.name for p in self.scoreboard.order(self.providers())],
+            'providers': self.scoreboard.snapshot(),
+            'cache': self.cache.stats() if self.cache is not None else None,
+            'hedge_delay': self.hedge_delay,
+        }
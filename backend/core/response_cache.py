@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Caché de respuestas para endpoints de lectura
+
+Guarda en memoria el cuerpo de las respuestas 200 de endpoints GET, con clave
+endpoint + argumentos normalizados + plan del usuario. Una entrada es válida
+mientras no cambie la versión de datos de la que depende (ver
+backend/utils/data_version.py) y no venza su TTL. Cada respuesta lleva un
+ETag fuerte (débil si luego se comprime), así que el dashboard recibe 304
+cuando nada cambió.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from flask import request, make_response
+
+from backend.utils.data_version import get_data_version
+
+
+class ResponseCache:
+    """Caché LRU de respuestas con invalidación por versión de datos y ETag/304"""
+
+    def __init__(self, db_path: str, max_entries: int = 512,
+                 plan_resolver: Optional[Callable[[int], str]] = None, plan_ttl: float = 60.0):
+        """
+        Args:
+            db_path: Base de datos donde viven los contadores data_versions
+            max_entries: Número máximo de respuestas en memoria
+            plan_resolver: Función user_id -> nombre del plan (forma parte de la clave)
+            plan_ttl: Segundos que se recuerda el plan de cada usuario
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.plan_resolver = plan_resolver
+        self.plan_ttl = plan_ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._plans: Dict[int, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _plan_tier(self) -> str:
+        """Plan del usuario autenticado ('public' si el endpoint no requiere auth)"""
+        user = getattr(request, 'current_user', None)
+        if not user or not self.plan_resolver:
+            return 'public'
+        user_id = user.get('user_id')
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(user_id)
+        if cached and now - cached[1] < self.plan_ttl:
+            return cached[0]
+        plan = self.plan_resolver(user_id)
+        with self._lock:
+            self._plans[user_id] = (plan, now)
+        return plan
+
+    def _key(self) -> tuple:
+        args = tuple(sorted((k, tuple(sorted(v))) for k, v in request.args.lists()))
+        return (request.path, args, self._plan_tier())
+
+    @staticmethod
+    def _not_modified(etag: str):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def cached(self, namespaces: Iterable[str] = ('articles',), ttl: float = 300.0):
+        """Decorador para cachear un endpoint GET.
+
+        Args:
+            namespaces: Versiones de datos de las que depende la respuesta
+            ttl: Vida máxima en segundos (para respuestas con ventanas relativas a 'now')
+        """
+        namespaces = tuple(namespaces)
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if request.method != 'GET':
+                    return f(*args, **kwargs)
+
+                key = self._key()
+                versions = tuple(get_data_version(self.db_path, ns) for ns in namespaces)
+                now = time.monotonic()
+
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry and (entry[0] != versions or now - entry[1] > ttl):
+                        del self._entries[key]
+                        entry = None
+                    if entry:
+                        self._entries.move_to_end(key)
+
+                if entry:
+                    _, _, body, mimetype, etag = entry
+                    if request.if_none_match.contains_weak(etag):
+                        return self._not_modified(etag)
+                    response = make_response(body)
+                    response.mimetype = mimetype
+                    response.set_etag(etag)
+                    response.headers['Cache-Control'] = 'private, no-cache'
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+
+                body = response.get_data()
+                etag = hashlib.sha1(body).hexdigest()
+                with self._lock:
+                    self._entries[key] = (versions, now, body, response.mimetype, etag)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+
+                if request.if_none_match.contains_weak(etag):
+                    return self._not_modified(etag)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                response.headers['X-Cache'] = 'MISS'
+                return response
+
+            return decorated_function
+
+        return decorator
+
+    def clear(self):
+        """Vaciar la caché"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Capa de respuesta JSON de la API
+
+- Serialización con orjson (fallback al proveedor JSON estándar de Flask si no está instalado)
+- Compresión negociada br/gzip para respuestas por encima de un tamaño mínimo
+- Respuestas de listas en streaming (array JSON emitido por lotes)
+
+Se instala una sola vez sobre la app con init_response_layer(app): jsonify usa
+el proveedor orjson y un after_request comprime todo lo que salga de las rutas.
+"""
+
+import gzip
+import logging
+import zlib
+from typing import Any, Iterable, Optional
+
+from flask import Flask, current_app, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Por debajo de este tamaño la compresión no compensa el coste de CPU
+COMPRESSION_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # calidades altas (10-11) son para contenido estático
+
+# Listas con al menos estos elementos se emiten en streaming
+STREAM_MIN_ITEMS = 200
+STREAM_BATCH_SIZE = 50
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/csv',
+    'application/javascript',
+}  # text/event-stream no: el compresor retendría los eventos en su búfer
+
+if ORJSON_AVAILABLE:
+    # Fechas y tipos especiales pasan por el default de Flask para no cambiar su formato
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serializar a JSON en bytes UTF-8"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=ORJSON_OPTIONS)
+    return current_app.json.dumps(obj).encode('utf-8')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask respaldado por orjson"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Opciones propias de json.dumps (indent, separators...): usar el camino estándar
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def _negotiate_encoding() -> Optional[str]:
+    offered = ['br', 'gzip'] if BROTLI_AVAILABLE else ['gzip']
+    encoding = request.accept_encodings.best_match(offered)
+    return encoding if encoding in offered else None
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def _compress_stream(chunks: Iterable, encoding: str):
+    """Comprimir un cuerpo en streaming trozo a trozo (cada trozo se vacía al cliente)"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+        process = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+def _weaken_etag(response):
+    """El cuerpo comprimido es otra representación: el ETag fuerte pasa a débil"""
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response):
+    """after_request: comprimir la respuesta si el cliente lo acepta y merece la pena"""
+    try:
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = _negotiate_encoding()
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < COMPRESSION_MIN_SIZE:
+                return response
+            response.set_data(_compress(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+        _weaken_etag(response)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo comprimir la respuesta: {e}")
+    return response
+
+
+def stream_json_list(key: str, items: Iterable, **fields: Any):
+    """Respuesta {**fields, key: [...]} emitida en streaming por lotes de elementos.
+
+    Útil para listas grandes: no se construye el cuerpo completo en memoria y
+    el cliente empieza a recibir datos antes de que se serialice el último elemento.
+    Si la iteración falla a mitad, el objeto termina con 'error' y 'truncated': true.
+    """
+    head = dumps_bytes(fields)[:-1] + (b',' if fields else b'') + dumps_bytes(key) + b':['
+
+    def generate():
+        yield head
+        first = True
+        batch = []
+        tail = b']}'
+        try:
+            for item in items:
+                batch.append(dumps_bytes(item))
+                if len(batch) >= STREAM_BATCH_SIZE:
+                    yield (b'' if first else b',') + b','.join(batch)
+                    first = False
+                    batch = []
+        except Exception as e:
+            # Los encabezados (200) ya se enviaron: cerrar el JSON de forma válida, pero con una
+            # marca explícita para que el cliente distinga una lista truncada de una completa
+            logger.error(f"❌ Error emitiendo lista '{key}' en streaming: {e}")
+            tail = b'],' + dumps_bytes({'error': 'Lista incompleta: error generando la respuesta',
+                                        'truncated': True})[1:]
+        if batch:
+            yield (b'' if first else b',') + b','.join(batch)
+        yield tail
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+
+def json_list_response(key: str, items: list, **fields: Any):
+    """jsonify para listas pequeñas, streaming cuando la lista es grande"""
+    if len(items) >= STREAM_MIN_ITEMS:
+        return stream_json_list(key, items, **fields)
+    return jsonify({**fields, key: items})
+
+
+def init_response_layer(app: Flask):
+    """Instalar la serialización orjson y la compresión en todas las rutas de la app"""
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+    else:
+        logger.warning("⚠️ orjson no disponible, se usa el serializador JSON estándar")
+    app.after_request(compress_response)
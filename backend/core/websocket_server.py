@@ -1,5 +1,9 @@
 """
 Servidor WebSocket para notificaciones en tiempo real
+
+Corre sobre el event loop del bus de eventos (backend/core/event_bus.py): el
+API lo arranca en su mismo proceso y cada evento publicado por los hilos de
+scraping se reparte a los clientes suscritos a su tema en paralelo.
 """
 import asyncio
 import websockets
@@ -7,27 +11,45 @@ import json
 import logging
 from datetime import datetime
 from typing import Set, Dict, Any
-import sqlite3
-import threading
+import sys
 import time
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path (permite ejecutarlo como script)
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.core.event_bus import (
+    event_bus, EventBus, TOPIC_SCRAPING, TOPIC_SYSTEM, TOPIC_ADMIN, user_topic
+)
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Temas a los que cualquier cliente puede suscribirse sin autenticarse
+PUBLIC_TOPICS = {TOPIC_SCRAPING, TOPIC_SYSTEM}
+# Tiempo máximo para enviar un mensaje a un cliente antes de darlo por caído
+SEND_TIMEOUT = 5.0
+
+
 class WebSocketServer:
-    def __init__(self, host='localhost', port=8765):
+    def __init__(self, host='localhost', port=8765, bus: EventBus = event_bus):
         self.host = host
         self.port = port
+        self.bus = bus
         self.clients: Set[websockets.WebSocketServerProtocol] = set()
+        self.client_topics: Dict[websockets.WebSocketServerProtocol, Set[str]] = {}
         self.user_clients: Dict[int, Set[websockets.WebSocketServerProtocol]] = {}
         self.running = False
-        
-    async def register_client(self, websocket, path):
+        self._server = None
+
+    async def register_client(self, websocket, path=None):
         """Registrar nuevo cliente WebSocket"""
         self.clients.add(websocket)
+        self.client_topics[websocket] = set(PUBLIC_TOPICS)
         logger.info(f"Cliente conectado: {websocket.remote_address}")
-        
+
         try:
             async for message in websocket:
                 try:
@@ -42,37 +64,60 @@ class WebSocketServer:
             pass
         finally:
             await self.unregister_client(websocket)
-    
+
     async def handle_message(self, websocket, data):
         """Manejar mensajes del cliente"""
         message_type = data.get('type')
-        
+
         if message_type == 'auth':
-            user_id = data.get('user_id')
-            if user_id:
-                if user_id not in self.user_clients:
-                    self.user_clients[user_id] = set()
-                self.user_clients[user_id].add(websocket)
-                await self.send_success(websocket, "Autenticado correctamente")
-        
+            # El usuario se toma del token, no de un user_id enviado por el cliente
+            from backend.core.auth_system import _get_auth_system
+            payload = _get_auth_system().verify_token(data.get('token') or '')
+            if not payload:
+                await self.send_error(websocket, "Token inválido o expirado")
+                return
+
+            user_id = payload.get('user_id')
+            topics = self.client_topics.setdefault(websocket, set(PUBLIC_TOPICS))
+            topics.add(user_topic(user_id))
+            if payload.get('role') == 'admin':
+                topics.add(TOPIC_ADMIN)
+            self.user_clients.setdefault(user_id, set()).add(websocket)
+            await self.send_success(websocket, "Autenticado correctamente")
+
+        elif message_type in ('subscribe', 'unsubscribe'):
+            requested = set(data.get('topics') or [])
+            topics = self.client_topics.setdefault(websocket, set())
+            if message_type == 'subscribe':
+                topics.update(requested & PUBLIC_TOPICS)
+            else:
+                topics.difference_update(requested)
+            await websocket.send(json.dumps({
+                'type': 'subscriptions',
+                'topics': sorted(topics),
+                'timestamp': datetime.now().isoformat()
+            }))
+
         elif message_type == 'ping':
             await self.send_pong(websocket)
-        
+
         else:
             await self.send_error(websocket, f"Tipo de mensaje desconocido: {message_type}")
-    
+
     async def unregister_client(self, websocket):
         """Desregistrar cliente"""
         self.clients.discard(websocket)
-        
+        self.client_topics.pop(websocket, None)
+
         # Remover de user_clients
-        for user_id, clients in self.user_clients.items():
+        for user_id in list(self.user_clients):
+            clients = self.user_clients[user_id]
             clients.discard(websocket)
             if not clients:
                 del self.user_clients[user_id]
-        
+
         logger.info(f"Cliente desconectado: {websocket.remote_address}")
-    
+
     async def send_error(self, websocket, message):
         """Enviar mensaje de error"""
         await websocket.send(json.dumps({
@@ -80,7 +125,7 @@ class WebSocketServer:
             'message': message,
             'timestamp': datetime.now().isoformat()
         }))
-    
+
     async def send_success(self, websocket, message):
         """Enviar mensaje de éxito"""
         await websocket.send(json.dumps({
@@ -88,128 +133,86 @@ class WebSocketServer:
             'message': message,
             'timestamp': datetime.now().isoformat()
         }))
-    
+
     async def send_pong(self, websocket):
         """Responder ping con pong"""
         await websocket.send(json.dumps({
             'type': 'pong',
             'timestamp': datetime.now().isoformat()
         }))
-    
+
+    async def _send_to(self, client, message_str: str) -> bool:
+        try:
+            await asyncio.wait_for(client.send(message_str), timeout=SEND_TIMEOUT)
+            return True
+        except (websockets.exceptions.ConnectionClosed, asyncio.TimeoutError):
+            return False
+
+    async def fan_out(self, clients, message: Dict[str, Any]):
+        """Enviar un mensaje a varios clientes en paralelo (un cliente lento no retrasa al resto)"""
+        clients = list(clients)
+        if not clients:
+            return
+        message.setdefault('timestamp', datetime.now().isoformat())
+        message_str = json.dumps(message, default=str)
+
+        results = await asyncio.gather(*(self._send_to(client, message_str) for client in clients))
+
+        # Limpiar clientes desconectados
+        for client, delivered in zip(clients, results):
+            if not delivered:
+                await self.unregister_client(client)
+
+    async def handle_event(self, topic: str, event: Dict[str, Any]):
+        """Manejador del bus: reenviar el evento a los clientes suscritos a su tema"""
+        targets = [client for client, topics in self.client_topics.items() if topic in topics]
+        await self.fan_out(targets, dict(event))
+
     async def broadcast_to_all(self, message: Dict[str, Any]):
         """Enviar mensaje a todos los clientes conectados"""
-        if self.clients:
-            message['timestamp'] = datetime.now().isoformat()
-            message_str = json.dumps(message)
-            
-            # Enviar a todos los clientes
-            disconnected = set()
-            for client in self.clients.copy():
-                try:
-                    await client.send(message_str)
-                except websockets.exceptions.ConnectionClosed:
-                    disconnected.add(client)
-            
-            # Limpiar clientes desconectados
-            for client in disconnected:
-                await self.unregister_client(client)
-    
+        await self.fan_out(self.clients, message)
+
     async def broadcast_to_user(self, user_id: int, message: Dict[str, Any]):
         """Enviar mensaje a un usuario específico"""
-        if user_id in self.user_clients:
-            message['timestamp'] = datetime.now().isoformat()
-            message_str = json.dumps(message)
-            
-            # Enviar a todos los clientes del usuario
-            disconnected = set()
-            for client in self.user_clients[user_id].copy():
-                try:
-                    await client.send(message_str)
-                except websockets.exceptions.ConnectionClosed:
-                    disconnected.add(client)
-            
-            # Limpiar clientes desconectados
-            for client in disconnected:
-                await self.unregister_client(client)
-    
+        await self.fan_out(self.user_clients.get(user_id, ()), message)
+
     async def broadcast_to_admins(self, message: Dict[str, Any]):
-        """Enviar mensaje solo a administradores"""
-        # Obtener IDs de administradores desde la base de datos
-        try:
-            conn = sqlite3.connect('auth_database.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM users WHERE role = 'admin' AND is_active = 1")
-            admin_ids = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            
-            for admin_id in admin_ids:
-                await self.broadcast_to_user(admin_id, message)
-        except Exception as e:
-            logger.error(f"Error obteniendo administradores: {e}")
-    
+        """Enviar mensaje solo a administradores (clientes autenticados con rol admin)"""
+        targets = [client for client, topics in self.client_topics.items() if TOPIC_ADMIN in topics]
+        await self.fan_out(targets, message)
+
     def start_server(self):
-        """Iniciar servidor WebSocket"""
+        """Iniciar servidor WebSocket en el event loop del bus"""
+        if self.running:
+            return self.bus._thread
         self.running = True
         logger.info(f"Iniciando servidor WebSocket en {self.host}:{self.port}")
-        
-        # Iniciar servidor en hilo separado
-        def run_server():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            start_server = websockets.serve(self.register_client, self.host, self.port)
-            loop.run_until_complete(start_server)
-            loop.run_forever()
-        
-        server_thread = threading.Thread(target=run_server, daemon=True)
-        server_thread.start()
-        
-        return server_thread
-    
+
+        async def serve():
+            self._server = await websockets.serve(self.register_client, self.host, self.port)
+
+        self.bus.run_coroutine(serve()).result()
+        self.bus.add_handler(self.handle_event)
+
+        return self.bus._thread
+
     def stop_server(self):
         """Detener servidor WebSocket"""
         self.running = False
+        self.bus.remove_handler(self.handle_event)
+        if self._server is not None:
+            self.bus.loop.call_soon_threadsafe(self._server.close)
+            self._server = None
         logger.info("Servidor WebSocket detenido")
 
 # Instancia global del servidor
 websocket_server = WebSocketServer()
 
-# Funciones de utilidad para enviar notificaciones
-def send_scraping_notification(message: str, status: str = "info"):
-    """Enviar notificación sobre scraping"""
-    asyncio.create_task(websocket_server.broadcast_to_all({
-        'type': 'scraping_update',
-        'message': message,
-        'status': status
-    }))
-
-def send_payment_notification(user_id: int, message: str, status: str = "info"):
-    """Enviar notificación de pago a usuario específico"""
-    asyncio.create_task(websocket_server.broadcast_to_user(user_id, {
-        'type': 'payment_update',
-        'message': message,
-        'status': status
-    }))
-
-def send_admin_notification(message: str, status: str = "info"):
-    """Enviar notificación solo a administradores"""
-    asyncio.create_task(websocket_server.broadcast_to_admins({
-        'type': 'admin_notification',
-        'message': message,
-        'status': status
-    }))
-
-def send_system_notification(message: str, status: str = "info"):
-    """Enviar notificación del sistema a todos"""
-    asyncio.create_task(websocket_server.broadcast_to_all({
-        'type': 'system_notification',
-        'message': message,
-        'status': status
-    }))
-
 if __name__ == "__main__":
-    # Iniciar servidor WebSocket
+    # Iniciar servidor WebSocket (solo standalone: los eventos del API llegan
+    # cuando el servidor corre dentro del proceso del API)
     server_thread = websocket_server.start_server()
-    
+
     try:
         # Mantener el servidor corriendo
         while True:
@@ -217,21 +220,3 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         websocket_server.stop_server()
         print("Servidor WebSocket detenido")
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
@@ -16,6 +16,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from backend.scrapers.hybrid_crawler import HybridDataCrawler
 from backend.scrapers.optimized_scraper import SmartScraper
+from backend.scrapers.host_scheduler import polite_get, start_job, fetch_report, job_deadline, DEFAULT_JOB_DEADLINE
+from backend.systems.article_ingest import record_article_ingest
+from backend.systems.corpus_stats_index import CorpusStatsIndex
+from backend.systems.story_clusters import StoryClusterIndex
+from backend.utils.data_version import ARTICLES, bump_data_version
 
 # Configurar logging
 logging.basicConfig(
@@ -74,7 +79,8 @@ def save_articles_to_db(articles, category='', newspaper='', region=''):
 
         manual_region = normalize_region_value(region)
 
-        conn = sqlite3.connect('news_database.db')
+        db_path = 'news_database.db'
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -87,6 +93,12 @@ def save_articles_to_db(articles, category='', newspaper='', region=''):
         if newspaper:
             cursor.execute("DELETE FROM excluded_newspapers WHERE newspaper = ?", (newspaper,))
         
+        # (id, title, content, newspaper, scraped_at) de cada artículo guardado y ids de los insertados
+        saved_rows = []
+        new_ids = set()
+        # (id, article_id, imágenes) para guardarlas como filas de images
+        image_rows = []
+        
         for article in articles:
             # Generar article_id usando el mismo método que improved_scraper.py
             article_url = article.get('url', '')
@@ -148,6 +160,7 @@ def save_articles_to_db(articles, category='', newspaper='', region=''):
             images_json = json.dumps(images_data) if images_data else "[]"
             images_found = len(images_data) if images_data else article.get('images_found', 0)
             images_downloaded = min(article.get('images_downloaded', 0), images_found)
+            scraped_at = datetime.now().isoformat()
             
             if existing:
                 # Actualizar artículo existente
@@ -170,12 +183,13 @@ def save_articles_to_db(articles, category='', newspaper='', region=''):
                     images_found,
                     images_downloaded,
                     images_json,
-                    datetime.now().isoformat(),
+                    scraped_at,
                     manual_region,
                     manual_category,
                     article_id,
                     article_url
                 ))
+                article_id_db = existing[0]
             else:
                 # Insertar nuevo artículo
                 cursor.execute("""
@@ -195,11 +209,29 @@ def save_articles_to_db(articles, category='', newspaper='', region=''):
                     images_found,
                     images_downloaded,
                     images_json,
-                    datetime.now().isoformat(),
+                    scraped_at,
                     article_id,
                     manual_region,
                     manual_category
                 ))
+                article_id_db = cursor.lastrowid
+                new_ids.add(article_id_db)
+            
+            saved_rows.append((article_id_db, article.get('title', ''), article.get('content', ''), newspaper, scraped_at))
+            image_rows.append((article_id_db, article_id, images_data))
+        
+        # Mismo registro posterior que la API (historia, términos, índice del corpus, cuerpos, imágenes, versión)
+        cursor.execute("SAVEPOINT ingest")
+        try:
+            record_article_ingest(cursor, saved_rows, new_ids, image_rows, StoryClusterIndex(), CorpusStatsIndex(db_path))
+            cursor.execute("RELEASE ingest")
+        except sqlite3.OperationalError as e:
+            # Base aún sin migrar (la API no se ha iniciado): content e images_data quedan en línea
+            cursor.execute("ROLLBACK TO ingest")
+            cursor.execute("RELEASE ingest")
+            logging.debug(f"Datos en línea, tablas separadas no disponibles: {e}")
+            # La caché de respuestas de la API debe ver igualmente los artículos nuevos
+            bump_data_version(cursor, ARTICLES)
         
         conn.commit()
         conn.close()
@@ -209,6 +241,41 @@ def save_articles_to_db(articles, category='', newspaper='', region=''):
         logging.error(f"❌ Error guardando en base de datos: {e}")
         return False
 
+def save_scraping_stats(schedule, articles_found, images_found, duration):
+    """Registrar la ejecución en scraping_stats, con los dominios que fallaron"""
+    try:
+        import sqlite3
+        failures = fetch_report()
+        if failures['failed_domains']:
+            logging.warning(f"⛔ Dominios con fallos: {', '.join(failures['failed_domains'])}")
+        if failures['deadline_exceeded']:
+            logging.warning(f"⏰ {schedule['name']}: presupuesto de tiempo agotado, resultados parciales")
+        conn = sqlite3.connect('news_database.db')
+        try:
+            conn.execute("""
+                INSERT INTO scraping_stats (session_id, url_scraped, articles_found, images_found, images_downloaded,
+                                            duration_seconds, method_used, failed_domains, deadline_exceeded)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                f"auto_{int(time.time())}",
+                schedule['url'],
+                articles_found,
+                images_found,
+                images_found,
+                duration,
+                schedule['method'],
+                json.dumps(failures['failed_domains']) if failures['failed_domains'] else None,
+                int(failures['deadline_exceeded'])
+            ))
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            # Base aún sin migrar (la API no se ha iniciado)
+            logging.debug(f"scraping_stats no disponible: {e}")
+        finally:
+            conn.close()
+    except Exception as e:
+        logging.error(f"❌ Error guardando estadísticas: {e}")
+
 def load_excluded_newspapers():
     """Obtener lista de periódicos excluidos de auto-actualización"""
     try:
@@ -243,6 +310,8 @@ def execute_scraping_standalone(schedule):
         region = schedule["region"]
         
         articles = []
+        started = time.time()
+        start_job(schedule.get("deadline_seconds", DEFAULT_JOB_DEADLINE))
         
         if method == "auto" or method == "improved":
             # Usar ImprovedScraper (método más confiable)
@@ -283,7 +352,7 @@ def execute_scraping_standalone(schedule):
             from bs4 import BeautifulSoup
             
             try:
-                response = requests.get(url, timeout=30)
+                response = polite_get(requests, url, timeout=30)
                 soup = BeautifulSoup(response.content, 'html.parser')
                 
                 # Extraer enlaces básicos
@@ -343,12 +412,16 @@ def execute_scraping_standalone(schedule):
             else:
                 logging.error("❌ Error guardando artículos en base de datos")
         
+        save_scraping_stats(schedule, len(articles), sum(a.get('images_found', 0) for a in articles),
+                            int(time.time() - started))
         logging.info(f"✅ Scraping completado: {schedule['name']} - {len(articles)} artículos")
         return True
         
     except Exception as e:
         logging.error(f"❌ Error ejecutando scraping {schedule['name']}: {e}")
         return False
+    finally:
+        job_deadline.clear()
 
 def main():
     """Función principal"""
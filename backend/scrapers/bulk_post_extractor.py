@@ -0,0 +1,271 @@
+"""
+Extracción de posts visibles en una sola llamada a execute_script
+
+Los scrapers de Facebook recorrían cada post con find_element/get_attribute:
+decenas de viajes de ida y vuelta al WebDriver por post (texto, cada imagen,
+cada span de métricas, cada enlace, cada aria-label, más el filtro de
+comentarios). Aquí un único script recorre en el navegador todos los posts que
+casan con los selectores y devuelve, por post, un registro JSON con los datos
+crudos:
+
+- text / selector_texts / full_text: textos candidatos (full_text recortado
+  por el medio si es muy largo)
+- author: nombre del autor o página
+- images: [{src, w, h, vc, perf}] (vc = data-visualcompletion="media-vc-image")
+- video: src o poster del primer <video>
+- links: enlaces permanentes candidatos (/posts/, /permalink/, /story.php, /photo.php)
+- metric_texts / aria_labels: textos cortos con números para las métricas
+- is_comment / has_interaction: mismos criterios que es_comentario
+- fb_id / html_head: para el id estable del post
+
+La elección final (qué imagen, qué enlace, cómo parsear métricas) la hace el
+normalizador de cada scraper en Python, para producir el mismo dict de siempre.
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Estrategias de búsqueda de posts: (selector, filtro). Filtros:
+# 'feed' = no comentario y con botones de interacción, 'no_comment' = no comentario, None = sin filtro
+FACEBOOK_FEED_STRATEGIES: List[Tuple[str, Optional[str]]] = [
+    ('div[role="article"]', 'feed'),
+    ('div[data-pagelet*="FeedUnit"]', 'no_comment'),
+    ('div[data-ad-preview="message"]', 'no_comment'),
+    ('div[class*="x1y1aw1k"], div[class*="x1n2onr6"]', None),
+]
+
+# Selectores de texto del post, en orden de preferencia
+FACEBOOK_TEXT_SELECTORS = [
+    '[data-ad-preview="message"]',
+    'div[data-testid="post_message"]',
+    'div[dir="auto"]',
+    'span[dir="auto"]',
+]
+
+# Fragmentos de URL de imágenes que no son contenido (perfil, stickers, iconos)
+EXCLUDED_IMAGE_MARKERS = ('profile', 'avatar', 'sticker', 'emoji', 'icon', 'sprite', 'data:image')
+FACEBOOK_CDN_MARKERS = ('fbcdn.net', 'scontent', 'facebook.com')
+PERMALINK_MARKERS = ('/posts/', '/permalink/', '/story.php')
+
+# Topes por post para no serializar páginas enteras
+MAX_FULL_TEXT_CHARS = 4000
+MAX_IMAGES_PER_POST = 20
+MAX_METRIC_TEXTS = 40
+
+_EXTRACT_POSTS_JS = r"""
+var strategies = arguments[0], textSelectors = arguments[1], maxPosts = arguments[2], skipSeen = arguments[3];
+var limits = arguments[4], elements = arguments[5];
+var seen = window.__bulkPostsSeen || (window.__bulkPostsSeen = new WeakSet());
+var MAIN_BUTTONS = ['Me gusta', 'Comentar', 'Compartir', 'Like', 'Comment', 'Share'];
+var REPLY_BUTTONS = ['Responder', 'Reply'];
+var HTML_COMMENT_MARKERS = ['comment', 'comentario', 'reply', 'respuesta', 'commentlist', 'comment-list', 'ufi', 'ufi_'];
+var PARENT_COMMENT_MARKERS = ['comment', 'ufi', 'reply'];
+var LINK_MARKERS = ['/posts/', '/permalink/', '/story.php', '/photo.php'];
+
+function textOf(el) { return ((el.innerText !== undefined ? el.innerText : el.textContent) || '').trim(); }
+// Principio y final del texto (las métricas suelen estar al final del post)
+function clip(text, max) {
+    return text.length <= max ? text : text.slice(0, max / 2) + '\n' + text.slice(text.length - max / 2);
+}
+function includesAny(text, markers) {
+    for (var i = 0; i < markers.length; i++) { if (text.indexOf(markers[i]) !== -1) { return true; } }
+    return false;
+}
+
+// Una pasada por los spans: botones de interacción/respuesta y textos con números (métricas)
+function scanSpans(post) {
+    var info = {hasMain: false, hasReply: false, metricTexts: []};
+    var spans = post.getElementsByTagName('span');
+    for (var i = 0; i < spans.length; i++) {
+        var t = (spans[i].textContent || '').trim();
+        if (!t || t.length > 60) { continue; }
+        if (!info.hasMain && includesAny(t, MAIN_BUTTONS)) { info.hasMain = true; }
+        if (!info.hasReply && includesAny(t, REPLY_BUTTONS)) { info.hasReply = true; }
+        if (/\d/.test(t) && info.metricTexts.length < limits.metrics) { info.metricTexts.push(t); }
+    }
+    return info;
+}
+
+function isComment(post, spans, fullText) {
+    var html = (post.outerHTML || '').toLowerCase();
+    if (includesAny(html, HTML_COMMENT_MARKERS)) { return true; }
+    if (!spans.hasMain && spans.hasReply) { return true; }
+    if (fullText.length < 30 && !post.querySelector('img[data-visualcompletion="media-vc-image"]')) { return true; }
+    var parentClass = post.parentElement ? String(post.parentElement.className || '').toLowerCase() : '';
+    return includesAny(parentClass, PARENT_COMMENT_MARKERS);
+}
+
+function accepts(filter, post) {
+    if (!filter) { return true; }
+    var spans = scanSpans(post);
+    if (isComment(post, spans, textOf(post))) { return false; }
+    return filter !== 'feed' || spans.hasMain || !!post.querySelector('[data-pagelet*="FeedUnit"]');
+}
+
+// Misma cascada que el bucle con find_elements: la primera estrategia con >= minPosts posts gana
+var chosen = elements ? elements.slice() : [];
+for (var s = 0; !elements && s < strategies.length; s++) {
+    var nodes = document.querySelectorAll(strategies[s][0]);
+    var accepted = [];
+    for (var n = 0; n < nodes.length; n++) {
+        if (accepts(strategies[s][1], nodes[n])) { accepted.push(nodes[n]); }
+    }
+    if (accepted.length) { chosen = accepted; }
+    if (chosen.length >= limits.minPosts) { break; }
+}
+
+var records = [];
+for (var p = 0; p < chosen.length && records.length < maxPosts; p++) {
+    var post = chosen[p];
+    if (skipSeen && seen.has(post)) { continue; }
+
+    var fullText = textOf(post);
+    var spans = scanSpans(post);
+
+    var selectorTexts = [];
+    var best = '';
+    for (var i = 0; i < textSelectors.length; i++) {
+        var el = post.querySelector(textSelectors[i]);
+        var txt = el ? textOf(el) : '';
+        selectorTexts.push(txt);
+        if (txt.length > best.length && txt.length > 15) { best = txt; }
+    }
+    if (best.length < 15) {
+        var autos = post.querySelectorAll('div[dir="auto"], span[dir="auto"]');
+        for (var a = 0; a < autos.length; a++) {
+            var autoText = textOf(autos[a]);
+            if (autoText.length > best.length && autoText.length > 15) { best = autoText; }
+        }
+    }
+
+    var author = '';
+    var names = post.querySelectorAll('strong, a[role="link"] span');
+    for (var k = 0; k < names.length; k++) {
+        var name = textOf(names[k]);
+        if (name.length > 2 && name.length < 50) { author = name; break; }
+    }
+
+    var images = [];
+    var imgs = post.getElementsByTagName('img');
+    for (var m = 0; m < imgs.length && images.length < limits.images; m++) {
+        var img = imgs[m];
+        var src = img.currentSrc || img.src || img.getAttribute('data-src') || '';
+        if (!src || src.indexOf('data:image') === 0) { src = img.getAttribute('data-src') || src; }
+        if (!src) { continue; }
+        images.push({
+            src: src,
+            w: parseInt(img.width) || parseInt(img.naturalWidth) || parseInt(img.getAttribute('width')) || 0,
+            h: parseInt(img.height) || parseInt(img.naturalHeight) || parseInt(img.getAttribute('height')) || 0,
+            vc: img.getAttribute('data-visualcompletion') || '',
+            perf: img.getAttribute('data-imgperflogname') || ''
+        });
+    }
+
+    var video = null;
+    var videoEl = post.querySelector('video');
+    if (videoEl) { video = videoEl.currentSrc || videoEl.src || videoEl.getAttribute('poster') || null; }
+    // Sin texto ni multimedia todavía no se marca como visto (puede cargarse después);
+    // qué registros se aceptan lo decide cada normalizador en Python
+    if (fullText || images.length || video) { seen.add(post); }
+
+    var links = [];
+    var anchors = post.querySelectorAll('a[href]');
+    for (var l = 0; l < anchors.length && links.length < 10; l++) {
+        var href = anchors[l].href || '';
+        if (href && includesAny(href, LINK_MARKERS) && links.indexOf(href) === -1) { links.push(href); }
+    }
+
+    var ariaLabels = [];
+    var ariaNodes = post.querySelectorAll('[aria-label]');
+    for (var r = 0; r < ariaNodes.length && ariaLabels.length < limits.metrics; r++) {
+        var label = ariaNodes[r].getAttribute('aria-label') || '';
+        if (/\d/.test(label)) { ariaLabels.push(label); }
+    }
+
+    records.push({
+        index: p,
+        text: best,
+        selector_texts: selectorTexts,
+        full_text: clip(fullText, limits.fullText),
+        author: author,
+        images: images,
+        video: video,
+        links: links,
+        metric_texts: spans.metricTexts,
+        aria_labels: ariaLabels,
+        is_comment: isComment(post, spans, fullText),
+        has_interaction: spans.hasMain,
+        fb_id: post.getAttribute('data-pagelet') || post.getAttribute('data-ft') || post.id || '',
+        html_head: (post.innerHTML || '').slice(0, 200)
+    });
+}
+return records;
+"""
+
+
+def extract_posts_bulk(driver, strategies: Sequence[Tuple[str, Optional[str]]] = FACEBOOK_FEED_STRATEGIES,
+                       text_selectors: Sequence[str] = FACEBOOK_TEXT_SELECTORS, max_posts: int = 200,
+                       skip_seen: bool = False, min_posts: int = 3, elements: Optional[List] = None) -> List[Dict]:
+    """Registros crudos de los posts visibles (ver docstring del módulo) en un solo execute_script.
+
+    Las estrategias se prueban en orden y se queda la primera que encuentra al
+    menos `min_posts` posts (o la última con alguno). skip_seen=True omite los
+    posts ya devueltos en llamadas anteriores sobre la misma página (el registro
+    de vistos vive en `window` y se pierde al navegar). Con `elements`
+    (WebElements ya localizados) se extraen esos en lugar de buscar.
+    """
+    limits = {'fullText': MAX_FULL_TEXT_CHARS, 'images': MAX_IMAGES_PER_POST, 'metrics': MAX_METRIC_TEXTS,
+              'minPosts': min_posts}
+    records = driver.execute_script(
+        _EXTRACT_POSTS_JS, [list(s) for s in strategies], list(text_selectors), max_posts, skip_seen, limits, elements
+    )
+    return records or []
+
+
+def is_content_image(src: str, excluded: Sequence[str] = EXCLUDED_IMAGE_MARKERS) -> bool:
+    """True si la URL es una imagen de contenido de Facebook (no perfil, sticker, icono...)"""
+    if not src or len(src) <= 10:
+        return False
+    lower = src.lower()
+    return any(marker in src for marker in FACEBOOK_CDN_MARKERS) and not any(marker in lower for marker in excluded)
+
+
+def choose_post_image(images: List[Dict]) -> Optional[str]:
+    """Imagen principal del post con las mismas prioridades que la extracción por WebElement:
+    media-vc-image, después la imagen de contenido más grande, después las de rutas de foto"""
+    for image in images:
+        if image.get('vc') == 'media-vc-image' and is_content_image(image['src']):
+            return image['src']
+
+    best_image = None
+    best_size = 0
+    for image in images:
+        src = image['src']
+        if not is_content_image(src):
+            continue
+        w, h = image.get('w') or 0, image.get('h') or 0
+        if w * h > best_size or w > 150 or h > 150:
+            best_image = src
+            best_size = w * h
+            if w > 300 or h > 300:
+                return src
+    if best_image:
+        return best_image
+
+    for image in images:
+        src = image['src']
+        photo_like = ('v/t39' in src or '/photos/' in src or '/photo.php' in src
+                      or image.get('perf') == 'feedCoverPhoto')
+        if photo_like and not any(marker in src.lower() for marker in EXCLUDED_IMAGE_MARKERS[:4]):
+            return src
+    return None
+
+
+def choose_permalink(links: List[str], markers: Sequence[str] = PERMALINK_MARKERS) -> str:
+    """Primer enlace del post (en orden del DOM) que contiene alguno de `markers` ('' si no hay)"""
+    for href in links:
+        if any(marker in href for marker in markers):
+            return href
+    return ''
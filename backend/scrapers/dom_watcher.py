@@ -0,0 +1,316 @@
+"""
+Espera de contenido dinámico guiada por eventos del DOM
+
+Los bucles de scroll y de botones "cargar más" esperaban con time.sleep fijos
+(0.5 s por paso de scroll, 2-3 s por clic), y después volvían a recorrer el DOM
+entero con querySelectorAll para saber si había contenido nuevo.
+
+DomMutationWatcher instala un MutationObserver en la página y:
+- espera solo hasta que aparecen nodos nuevos y el DOM queda quieto durante
+  `settle` ms, o hasta `idle_timeout` ms sin ningún cambio (fin del contenido);
+- guarda los nodos añadidos para extraer de forma incremental los enlaces o
+  elementos nuevos, sin volver a escanear lo ya visto.
+
+El observador vive en `window`, así que una navegación lo elimina: los métodos
+lo reinstalan cuando hace falta. take_new_links, take_new_elements y
+take_new_articles consumen la misma cola de nodos añadidos: usar uno por página.
+"""
+
+import time
+import logging
+from typing import Callable, List, Optional
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+logger = logging.getLogger(__name__)
+
+# Milisegundos sin mutaciones para considerar que el contenido nuevo terminó de llegar
+DEFAULT_SETTLE_MS = 400
+# Milisegundos máximos esperando la primera mutación (sin cambios = no hay más contenido)
+DEFAULT_IDLE_TIMEOUT_MS = 3000
+# Tope de espera aunque el DOM no deje de cambiar (carruseles, tickers, anuncios)
+DEFAULT_MAX_WAIT_MS = 10000
+# El tope de cada espera es proporcional a su idle_timeout (una espera corta no puede durar 10 s)
+MAX_WAIT_IDLE_FACTOR = 4
+# Nodos añadidos pendientes de extraer que se conservan como máximo
+MAX_PENDING_NODES = 20000
+# Pasos máximos de un recorrido por viewports
+MAX_SCROLL_STEPS = 60
+
+# Selectores de enlaces de artículo (tarjetas de portada y listados)
+ARTICLE_LINK_SELECTOR = ', '.join([
+    'article', '.article', '[class*="article"]',
+    '.news-item', '.post', '.entry', '.noticia',
+    '[class*="news"]', '[class*="post"]', '[class*="entry"]', '[class*="noticia"]',
+    'h1 a', 'h2 a', 'h3 a', '.title a', '.headline a', '.titulo a',
+    '.card a', '.item a', '.list-item a', '.content a',
+    'a[href*="/noticia/"]', 'a[href*="/article/"]', 'a[href*="/news/"]',
+    'a[href*="/post/"]', 'a[href*="/entry/"]', 'a[href*="/articulo/"]',
+    '.news-card a', '.article-card a', '.post-card a',
+    '.story a', '.content-item a', '.news-content a',
+    '[data-testid*="article"]', '[data-testid*="news"]',
+    '.feed-item', '.timeline-item', '.stream-item'
+])
+# Contenedor de tarjeta de un enlace de artículo (para título, resumen e imagen)
+ARTICLE_CARD_SELECTOR = 'article, li, .card, [class*="item"], [class*="card"], [class*="noticia"], [class*="news"], [class*="post"]'
+
+_INSTALL_JS = """
+var maxPending = arguments[0];
+if (window.__domWatcher) { return false; }
+var w = {added: 0, lastMutation: performance.now(), pending: [], seenLinks: new Set(), seenNodes: new WeakSet()};
+w.observer = new MutationObserver(function (records) {
+    var added = 0;
+    for (var i = 0; i < records.length; i++) {
+        var record = records[i];
+        if (record.type === 'attributes') {
+            // Imágenes lazy: el nodo se vuelve a extraer, pero un cambio de src no es contenido nuevo
+            // (los carruseles lo cambian sin parar y la espera nunca se asentaría)
+            w.pending.push(record.target);
+            continue;
+        }
+        for (var j = 0; j < record.addedNodes.length; j++) {
+            var node = record.addedNodes[j];
+            if (node.nodeType === 1) {
+                w.pending.push(node);
+                added++;
+            }
+        }
+    }
+    if (w.pending.length > maxPending) { w.pending.splice(0, w.pending.length - maxPending); }
+    if (added) {
+        w.added += added;
+        w.lastMutation = performance.now();
+    }
+});
+w.observer.observe(document.body || document.documentElement, {
+    childList: true, subtree: true, attributes: true, attributeFilter: ['src', 'srcset']
+});
+window.__domWatcher = w;
+return true;
+"""
+
+# Espera asíncrona: resuelve con los nodos añadidos (o -1 si el observador desapareció por una navegación)
+_WAIT_JS = """
+var settle = arguments[0], idleTimeout = arguments[1], maxWait = arguments[2];
+var done = arguments[arguments.length - 1];
+var w = window.__domWatcher;
+if (!w) { done(-1); return; }
+var start = performance.now(), base = w.added;
+(function check() {
+    if (window.__domWatcher !== w) { done(-1); return; }
+    var now = performance.now(), added = w.added - base;
+    if (added > 0 && now - w.lastMutation >= settle) { done(added); return; }
+    if ((added === 0 && now - start >= idleTimeout) || now - start >= maxWait) { done(added); return; }
+    setTimeout(check, 50);
+})();
+"""
+
+# Enlaces nuevos dentro de los nodos añadidos (opcionalmente solo los que casan o están dentro de `selector`)
+_TAKE_LINKS_JS = """
+var selector = arguments[0], initial = arguments[1];
+var w = window.__domWatcher;
+if (!w) { return null; }
+var roots = initial ? [document.body || document.documentElement] : w.pending;
+w.pending = [];
+var links = [];
+for (var i = 0; i < roots.length; i++) {
+    var root = roots[i];
+    if (!root.isConnected) { continue; }
+    var candidates = root.tagName === 'A' ? [root] : root.querySelectorAll('a[href]');
+    for (var j = 0; j < candidates.length; j++) {
+        var link = candidates[j];
+        if (!link.href || w.seenLinks.has(link.href)) { continue; }
+        if (selector && !(link.matches(selector) || link.closest(selector))) { continue; }
+        w.seenLinks.add(link.href);
+        links.push(link.href);
+    }
+}
+return links;
+"""
+
+# Elementos nuevos que casan con `selector` (los añadidos o los que contienen), cada uno una sola vez
+_TAKE_ELEMENTS_JS = """
+var selector = arguments[0], initial = arguments[1];
+var w = window.__domWatcher;
+if (!w) { return null; }
+var roots = initial ? [document.body || document.documentElement] : w.pending;
+w.pending = [];
+var found = [];
+for (var i = 0; i < roots.length; i++) {
+    var root = roots[i];
+    if (!root.isConnected) { continue; }
+    var candidates = Array.prototype.slice.call(root.querySelectorAll(selector));
+    if (root.matches(selector)) { candidates.unshift(root); }
+    var container = root.parentElement && root.parentElement.closest(selector);
+    if (container) { candidates.unshift(container); }
+    for (var j = 0; j < candidates.length; j++) {
+        if (w.seenNodes.has(candidates[j])) { continue; }
+        w.seenNodes.add(candidates[j]);
+        found.push(candidates[j]);
+    }
+}
+return found;
+"""
+
+# Como _TAKE_LINKS_JS, pero con los datos de la tarjeta de cada enlace nuevo
+_TAKE_ARTICLES_JS = """
+var selector = arguments[0], cardSelector = arguments[1], initial = arguments[2];
+var w = window.__domWatcher;
+if (!w) { return null; }
+var roots = initial ? [document.body || document.documentElement] : w.pending;
+w.pending = [];
+function clean(text) { return (text || '').replace(/\\s+/g, ' ').trim(); }
+var cards = [];
+for (var i = 0; i < roots.length; i++) {
+    var root = roots[i];
+    if (!root.isConnected) { continue; }
+    var candidates = root.tagName === 'A' ? [root] : root.querySelectorAll('a[href]');
+    for (var j = 0; j < candidates.length; j++) {
+        var link = candidates[j];
+        if (!link.href || w.seenLinks.has(link.href)) { continue; }
+        if (!(link.matches(selector) || link.closest(selector))) { continue; }
+        w.seenLinks.add(link.href);
+        var card = link.closest(cardSelector) || link.parentElement || link;
+        var heading = card.querySelector('h1, h2, h3, h4');
+        var paragraph = card.querySelector('p');
+        var img = card.querySelector('img');
+        cards.push({
+            url: link.href,
+            title: clean(link.textContent) || clean(heading && heading.textContent) || clean(link.getAttribute('title')),
+            summary: clean(paragraph && paragraph.textContent),
+            image: img ? (img.currentSrc || img.src || img.getAttribute('data-src') || '') : ''
+        });
+    }
+}
+return cards;
+"""
+
+
+class DomMutationWatcher:
+    """Espera y extracción incremental de contenido dinámico sobre un WebDriver"""
+
+    def __init__(self, driver, settle_ms: int = DEFAULT_SETTLE_MS,
+                 idle_timeout_ms: int = DEFAULT_IDLE_TIMEOUT_MS, max_wait_ms: int = DEFAULT_MAX_WAIT_MS):
+        self.driver = driver
+        self.settle_ms = settle_ms
+        self.idle_timeout_ms = idle_timeout_ms
+        self.max_wait_ms = max_wait_ms
+
+    def install(self) -> bool:
+        """Instalar el observador en la página actual (True si no estaba instalado)"""
+        return bool(self.driver.execute_script(_INSTALL_JS, MAX_PENDING_NODES))
+
+    def wait_for_change(self, idle_timeout_ms: Optional[int] = None, settle_ms: Optional[int] = None) -> int:
+        """Esperar a que llegue contenido nuevo y se asiente.
+
+        Devuelve los nodos añadidos (0 si no cambió nada en idle_timeout_ms,
+        -1 si la página navegó; en ese caso el observador queda reinstalado).
+        Aunque el DOM no se asiente, la espera dura como mucho MAX_WAIT_IDLE_FACTOR
+        veces idle_timeout_ms (y nunca más de max_wait_ms).
+        """
+        idle = self.idle_timeout_ms if idle_timeout_ms is None else idle_timeout_ms
+        settle = self.settle_ms if settle_ms is None else settle_ms
+        max_wait = min(self.max_wait_ms, max(idle * MAX_WAIT_IDLE_FACTOR, idle + settle))
+        try:
+            self.driver.set_script_timeout(max_wait / 1000 + 5)
+            added = self.driver.execute_async_script(_WAIT_JS, settle, idle, max_wait)
+        except TimeoutException:
+            added = 0
+        except WebDriverException as e:
+            # La navegación puede destruir el contexto de ejecución a mitad de la espera
+            logger.debug(f"Espera del DOM interrumpida: {e}")
+            added = -1
+        if added is None or added < 0:
+            wait_for_document_ready(self.driver)
+            self.install()
+            return -1
+        return int(added)
+
+    def scroll_to_bottom(self, idle_timeout_ms: Optional[int] = None) -> int:
+        """Scroll al fondo y esperar el contenido que dispare (ver wait_for_change)"""
+        self.install()
+        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        return self.wait_for_change(idle_timeout_ms)
+
+    def scroll_through(self, step: int = 800, idle_timeout_ms: int = 250, start: int = 0,
+                       max_steps: int = MAX_SCROLL_STEPS) -> int:
+        """Recorrer la página desde `start` en pasos de `step` px (lazy loading por viewport) esperando solo lo necesario"""
+        self.install()
+        total = 0
+        position = start
+        # Con scroll infinito la altura crece mientras se recorre: max_steps acota el recorrido
+        for _ in range(max_steps):
+            if position >= self.driver.execute_script("return document.body.scrollHeight"):
+                break
+            self.driver.execute_script("window.scrollTo(0, arguments[0]);", position)
+            total += max(self.wait_for_change(idle_timeout_ms), 0)
+            position += step
+        return total + max(self.scroll_to_bottom(), 0)
+
+    def click_and_wait(self, element, idle_timeout_ms: Optional[int] = None) -> int:
+        """Clic por JavaScript en `element` y esperar el contenido que cargue"""
+        self.install()
+        self.driver.execute_script("arguments[0].click();", element)
+        return self.wait_for_change(idle_timeout_ms)
+
+    def take_new_links(self, selector: Optional[str] = None, initial: bool = False) -> List[str]:
+        """Enlaces (href absolutos) aparecidos desde la última llamada; initial=True recorre la página entera"""
+        self.install()
+        links = self.driver.execute_script(_TAKE_LINKS_JS, selector, initial)
+        if links is None:
+            self.install()
+            links = self.driver.execute_script(_TAKE_LINKS_JS, selector, True)
+        return links or []
+
+    def take_new_elements(self, selector: str, initial: bool = False) -> List:
+        """WebElements que casan con `selector` aparecidos desde la última llamada (cada uno una vez)"""
+        self.install()
+        elements = self.driver.execute_script(_TAKE_ELEMENTS_JS, selector, initial)
+        if elements is None:
+            self.install()
+            elements = self.driver.execute_script(_TAKE_ELEMENTS_JS, selector, True)
+        return elements or []
+
+    def take_new_articles(self, selector: str = ARTICLE_LINK_SELECTOR, initial: bool = False) -> List[dict]:
+        """Tarjetas de artículo ({url, title, summary, image}) aparecidas desde la última llamada.
+
+        initial=True recorre la página entera (sirve para marcar lo ya visto antes del primer clic).
+        """
+        self.install()
+        cards = self.driver.execute_script(_TAKE_ARTICLES_JS, selector, ARTICLE_CARD_SELECTOR, initial)
+        if cards is None:
+            self.install()
+            cards = self.driver.execute_script(_TAKE_ARTICLES_JS, selector, ARTICLE_CARD_SELECTOR, True)
+        return cards or []
+
+    def scroll_until_exhausted(self, max_rounds: int, idle_rounds: int = 2,
+                               on_round: Optional[Callable[[int], bool]] = None) -> int:
+        """Hacer scroll al fondo hasta `idle_rounds` rondas seguidas sin contenido nuevo.
+
+        on_round(ronda) se llama tras cada ronda con contenido nuevo; si devuelve
+        True se deja de hacer scroll. Devuelve las rondas hechas.
+        """
+        idle = 0
+        for round_number in range(1, max_rounds + 1):
+            if self.scroll_to_bottom() == 0:
+                idle += 1
+                if idle >= idle_rounds:
+                    return round_number
+                continue
+            idle = 0
+            if on_round and on_round(round_number):
+                return round_number
+        return max_rounds
+
+
+def wait_for_document_ready(driver, timeout: float = 10.0) -> bool:
+    """Esperar a document.readyState == 'complete' (en lugar de un sleep fijo tras driver.get)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if driver.execute_script("return document.readyState") == 'complete':
+                return True
+        except WebDriverException:
+            pass
+        time.sleep(0.1)
+    return False
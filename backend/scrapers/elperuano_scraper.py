@@ -13,6 +13,7 @@ from urllib.parse import urljoin, urlparse
 import time
 import re
 from backend.scrapers.pagination_crawler import PaginationCrawler
+from backend.scrapers.host_scheduler import polite_get
 
 logger = logging.getLogger(__name__)
 
@@ -61,7 +62,7 @@ class ElPeruanoScraper:
     def _extract_articles_from_page(self, url, max_articles=10):
         """Extraer artículos de una página específica"""
         try:
-            response = self.session.get(url, timeout=30)
+            response = polite_get(self.session, url, timeout=30)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -155,7 +156,7 @@ class ElPeruanoScraper:
     def _extract_article_content(self, url, title):
         """Extraer contenido de un artículo específico"""
         try:
-            response = self.session.get(url, timeout=15)
+            response = polite_get(self.session, url, timeout=15)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -19,6 +19,8 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
 
+from backend.scrapers.host_scheduler import host_limiter
+
 logger = logging.getLogger(__name__)
 
 class ElPeruanoSeleniumScraper:
@@ -57,6 +59,7 @@ class ElPeruanoSeleniumScraper:
         
         try:
             logger.info(f"🔍 Scrapeando El Peruano - Economía con Selenium: {url}")
+            host_limiter.wait(url)
             self.driver.get(url)
             time.sleep(5)  # Esperar carga inicial
             
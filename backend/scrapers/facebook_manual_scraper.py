@@ -19,6 +19,9 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
+from backend.scrapers.bulk_post_extractor import extract_posts_bulk, choose_post_image, choose_permalink
+from backend.scrapers.host_scheduler import host_limiter
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -170,815 +173,112 @@ def categorize_post(text: str) -> str:
     return 'noticias'
 
 
-def es_comentario(article_element) -> bool:
+# Patrones de métricas en el texto completo del post (cuando no hay spans/aria-label)
+METRIC_PATTERNS = {
+    'likes': [re.compile(r'(\d+[KMB]?)\s*(?:like|me gusta|gusta|reaccion)'), re.compile(r'(\d+[KMB]?)\s*👍'),
+              re.compile(r'(\d+[KMB]?)\s*❤️')],
+    'comments': [re.compile(r'(\d+[KMB]?)\s*(?:comment|comentario|comentar)'), re.compile(r'(\d+[KMB]?)\s*💬')],
+    'shares': [re.compile(r'(\d+[KMB]?)\s*(?:share|compartir|comparte)'), re.compile(r'(\d+[KMB]?)\s*📤')],
+}
+
+
+def _metricas_desde_registro(registro: Dict) -> Dict:
     """
-    Verifica si un elemento es un comentario en lugar de un post principal
+    Métricas a partir de los textos cortos con números y los aria-label del post
     """
-    try:
-        # CRITERIOS PARA DETECTAR COMENTARIOS:
-        
-        # 1. Verificar si está dentro de una sección de comentarios
-        parent_html = article_element.get_attribute('outerHTML') or ''
-        if any(marker in parent_html.lower() for marker in [
-            'comment', 'comentario', 'reply', 'respuesta',
-            'commentlist', 'comment-list', 'ufi', 'ufi_'
-        ]):
-            return True
-        
-        # 2. Verificar si tiene estructura de comentario (no tiene botones principales)
-        try:
-            # Los posts principales tienen botones "Me gusta", "Comentar", "Compartir"
-            has_main_buttons = (
-                article_element.find_elements(By.XPATH, ".//span[contains(text(), 'Me gusta')]") or
-                article_element.find_elements(By.XPATH, ".//span[contains(text(), 'Comentar')]") or
-                article_element.find_elements(By.XPATH, ".//span[contains(text(), 'Compartir')]") or
-                article_element.find_elements(By.XPATH, ".//span[contains(text(), 'Like')]") or
-                article_element.find_elements(By.XPATH, ".//span[contains(text(), 'Comment')]") or
-                article_element.find_elements(By.XPATH, ".//span[contains(text(), 'Share')]")
-            )
-            if not has_main_buttons:
-                # Si no tiene botones principales, probablemente es un comentario
-                # Verificar si tiene estructura de "Responder" que es típica de comentarios
-                has_reply_button = (
-                    article_element.find_elements(By.XPATH, ".//span[contains(text(), 'Responder')]") or
-                    article_element.find_elements(By.XPATH, ".//span[contains(text(), 'Reply')]")
-                )
-                if has_reply_button:
-                    return True
-        except:
-            pass
-        
-        # 3. Verificar si el texto es muy corto (comentarios suelen ser más cortos)
-        try:
-            text = article_element.text.strip()
-            # Si el texto es muy corto y no tiene imagen, probablemente es comentario
-            if len(text) < 30:
-                has_image = article_element.find_elements(By.CSS_SELECTOR, "img[data-visualcompletion='media-vc-image']")
-                if not has_image:
-                    return True
-        except:
-            pass
-        
-        # 4. Verificar si está dentro de un contenedor de comentarios
-        try:
-            # Buscar si algún ancestro tiene atributos de comentario
-            parent = article_element.find_element(By.XPATH, "./..")
-            parent_class = parent.get_attribute('class') or ''
-            if any(marker in parent_class.lower() for marker in ['comment', 'ufi', 'reply']):
-                return True
-        except:
-            pass
-        
-        return False
-    except:
-        return False
+    metrics = {'likes': 0, 'comments': 0, 'shares': 0, 'retweets': 0}
+    
+    # MÉTODO 1: spans con números
+    for texto in registro.get('metric_texts') or []:
+        texto_lower = texto.lower()
+        if any(word in texto_lower for word in ['like', 'reaccion', 'me gusta', 'gusta']):
+            metrics['likes'] = max(metrics['likes'], parse_metric_value(texto))
+        elif any(word in texto_lower for word in ['comment', 'comentario', 'comentar']):
+            metrics['comments'] = max(metrics['comments'], parse_metric_value(texto))
+        elif any(word in texto_lower for word in ['share', 'compartir', 'comparte']):
+            metrics['shares'] = max(metrics['shares'], parse_metric_value(texto))
+    
+    # MÉTODO 2: patrones regex en todo el texto del post
+    all_text = (registro.get('full_text') or '').lower()
+    for key, patterns in METRIC_PATTERNS.items():
+        if metrics[key] == 0:
+            for pattern in patterns:
+                match = pattern.search(all_text)
+                if match:
+                    metrics[key] = parse_metric_value(match.group(1))
+                    break
+    
+    # MÉTODO 3: aria-label
+    for aria_label in registro.get('aria_labels') or []:
+        aria_lower = aria_label.lower()
+        if 'like' in aria_lower or 'gusta' in aria_lower or 'reaccion' in aria_lower:
+            metrics['likes'] = max(metrics['likes'], parse_metric_value(aria_label))
+        elif 'comment' in aria_lower or 'comentario' in aria_lower:
+            metrics['comments'] = max(metrics['comments'], parse_metric_value(aria_label))
+        elif 'share' in aria_lower or 'compartir' in aria_lower:
+            metrics['shares'] = max(metrics['shares'], parse_metric_value(aria_label))
+    
+    return metrics
+
+
+def post_desde_registro(registro: Dict, page_name: str) -> Optional[Dict]:
+    """
+    Convierte un registro de extract_posts_bulk en el dict de post de este scraper
+    (None si es un comentario o no tiene contenido suficiente)
+    """
+    full_text = registro.get('full_text') or ''
+    
+    # FILTRAR COMENTARIOS (MENOS AGRESIVO): aceptar si tiene mucho texto
+    if registro.get('is_comment') and len(full_text[:100]) <= 50:
+        logger.debug("⚠️ Elemento descartado: es un comentario, no un post principal")
+        return None
+    
+    # TEXTO: el más largo de los selectores de mensaje; si no, primeras líneas del post
+    content = (registro.get('text') or '').strip()
+    if len(content) <= 10:
+        lines = [line.strip() for line in full_text.split('\n') if len(line.strip()) > 10]
+        content = ' '.join(lines[:5])
+    
+    image_url = choose_post_image(registro.get('images') or [])
+    
+    # ACEPTAR posts con al menos 5 caracteres O con imagen (MUY PERMISIVO)
+    if len(content) < 5:
+        if image_url:
+            content = "Post con imagen"
+        else:
+            lines = [line.strip() for line in full_text.split('\n') if len(line.strip()) > 3]
+            if not lines:
+                logger.debug("⚠️ Post rechazado: sin contenido suficiente")
+                return None
+            content = ' '.join(lines[:3])
+    
+    links = registro.get('links') or []
+    post_url = choose_permalink(links) or choose_permalink(links, ('/photo.php',))
+    metrics = _metricas_desde_registro(registro)
+    
+    return {
+        'id': f"fb_{int(time.time() * 1000)}_{random.randint(1000, 9999)}",
+        'platform': 'facebook',
+        'author': page_name,
+        'content': content,
+        'image_url': image_url,
+        'url': post_url,
+        'created_at': datetime.now().isoformat(),
+        'metrics': metrics,
+        'category': categorize_post(content),
+        'sentiment': 'neutral'
+    }
 
 
 def extraer_post(article_element, driver: webdriver.Chrome, page_name: str) -> Optional[Dict]:
     """
     Extrae datos de un post desde un WebElement (article)
-    MEJORADO: Más selectores y umbrales más flexibles
-    FILTRA COMENTARIOS: Solo extrae posts principales del feed (MENOS AGRESIVO)
-    USA JAVASCRIPT: Extracción directa del DOM para mejor precisión
+    Una sola llamada a execute_script (ver bulk_post_extractor); extraer_posts
+    extrae todos los posts visibles de una vez
     """
     try:
-        # FILTRAR COMENTARIOS: Verificar si es un comentario (PERO SER MENOS AGRESIVO)
-        # Solo filtrar comentarios obvios, aceptar el resto
-        try:
-            if es_comentario(article_element):
-                # Verificar una vez más que realmente sea comentario
-                article_text = article_element.text[:100] if article_element.text else ""
-                if len(article_text) > 50:  # Si tiene mucho texto, puede ser un post válido
-                    logger.debug("⚠️ Marcado como comentario pero tiene mucho texto, aceptando de todos modos...")
-                else:
-                    logger.debug("⚠️ Elemento descartado: es un comentario, no un post principal")
-                    return None
-        except:
-            # Si hay error verificando, aceptar el post de todos modos
-            pass
-        
-        # USAR JAVASCRIPT PARA EXTRACCIÓN PRECISA
-        try:
-            # Obtener el ID único del elemento para usar en JavaScript
-            element_id = article_element.get_attribute('id') or ''
-            if not element_id:
-                # Si no tiene ID, usar JavaScript para encontrarlo
-                element_html = article_element.get_attribute('outerHTML')[:200]
-            
-            # Extraer usando JavaScript directamente del DOM
-            js_result = driver.execute_script("""
-                var article = arguments[0];
-                var result = {
-                    text: '',
-                    image: null,
-                    url: '',
-                    likes: 0,
-                    comments: 0,
-                    shares: 0
-                };
-                
-                // TEXTO - Múltiples métodos
-                var textSelectors = [
-                    '[data-ad-preview="message"]',
-                    'div[data-testid="post_message"]',
-                    'div[dir="auto"]',
-                    'span[dir="auto"]'
-                ];
-                
-                for (var i = 0; i < textSelectors.length; i++) {
-                    var textElem = article.querySelector(textSelectors[i]);
-                    if (textElem) {
-                        var txt = textElem.textContent.trim();
-                        if (txt.length > result.text.length && txt.length > 15) {
-                            result.text = txt;
-                        }
-                    }
-                }
-                
-                // Si no hay texto, buscar todos los divs y tomar el más largo
-                if (!result.text || result.text.length < 15) {
-                    var divs = article.querySelectorAll('div[dir="auto"], span[dir="auto"]');
-                    var longestText = '';
-                    for (var d = 0; d < divs.length; d++) {
-                        var txt = divs[d].textContent.trim();
-                        if (txt.length > longestText.length && txt.length > 15) {
-                            longestText = txt;
-                        }
-                    }
-                    if (longestText) result.text = longestText;
-                }
-                
-                // IMAGEN - Múltiples métodos mejorados (MEJORADO PARA LAZY LOADING)
-                // Método 1: data-visualcompletion (más específico) - MEJORADO
-                var img1 = article.querySelector('img[data-visualcompletion="media-vc-image"]');
-                if (img1) {
-                    // Intentar src primero, luego data-src (lazy loading)
-                    var src1 = img1.src || img1.getAttribute('src') || img1.getAttribute('data-src') || '';
-                    // También intentar activar lazy loading haciendo scroll al elemento
-                    if (!src1 || src1.includes('data:image')) {
-                        try {
-                            img1.scrollIntoView({behavior: 'smooth', block: 'center'});
-                            // Esperar un momento para que cargue
-                            setTimeout(function() {}, 100);
-                            src1 = img1.src || img1.getAttribute('src') || img1.getAttribute('data-src') || '';
-                        } catch(e) {}
-                    }
-                    if (src1 && (src1.includes('fbcdn.net') || src1.includes('scontent') || src1.includes('facebook.com')) && 
-                        !src1.includes('profile') && !src1.includes('avatar') &&
-                        !src1.includes('sticker') && !src1.includes('emoji') &&
-                        !src1.includes('data:image')) {
-                        result.image = src1;
-                    }
-                }
-                
-                // Método 2: Buscar todas las imágenes y filtrar - MEJORADO PARA LAZY LOADING
-                if (!result.image) {
-                    var imgs = article.querySelectorAll('img');
-                    var bestImage = null;
-                    var bestSize = 0;
-                    
-                    for (var imgIdx = 0; imgIdx < imgs.length; imgIdx++) {
-                        var img = imgs[imgIdx];
-                        // MEJORADO: Buscar en src, data-src, y activar lazy loading
-                        var src = img.src || img.getAttribute('src') || img.getAttribute('data-src') || '';
-                        
-                        // Si no hay src válido, intentar activar lazy loading
-                        if (!src || src.includes('data:image') || src.length < 10) {
-                            try {
-                                img.scrollIntoView({behavior: 'smooth', block: 'center'});
-                                setTimeout(function() {}, 50);
-                                src = img.src || img.getAttribute('src') || img.getAttribute('data-src') || '';
-                            } catch(e) {}
-                        }
-                        
-                        // Validar URL
-                        if (src && src.length > 10 && (src.includes('fbcdn.net') || src.includes('scontent') || src.includes('facebook.com'))) {
-                            // Filtrar imágenes de perfil/avatar/stickers
-                            var isInvalid = (
-                                src.includes('profile') || 
-                                src.includes('avatar') || 
-                                src.includes('sticker') || 
-                                src.includes('emoji') ||
-                                src.includes('sprite') ||
-                                src.includes('icon') ||
-                                src.includes('data:image')
-                            );
-                            
-                            if (!isInvalid) {
-                                // Obtener dimensiones
-                                var w = parseInt(img.width) || parseInt(img.naturalWidth) || parseInt(img.getAttribute('width')) || 0;
-                                var h = parseInt(img.height) || parseInt(img.naturalHeight) || parseInt(img.getAttribute('height')) || 0;
-                                var size = w * h;
-                                
-                                // Preferir imágenes grandes (contenido real) - UMBRAL REDUCIDO
-                                if (size > bestSize || (w > 150 || h > 150)) {  // Reducido de 200 a 150
-                                    bestImage = src;
-                                    bestSize = size;
-                                    if (w > 300 || h > 300) {  // Reducido de 400 a 300
-                                        result.image = src; // Imagen grande, usar directamente
-                                        break;
-                                    }
-                                }
-                            }
-                        }
-                    }
-                    
-                    if (!result.image && bestImage) {
-                        result.image = bestImage;
-                    }
-                }
-                
-                // Método 3: Buscar en elementos específicos de Facebook
-                if (!result.image) {
-                    var imgSelectors = [
-                        'img[src*="fbcdn.net"][src*="v/t39"]',
-                        'img[src*="scontent"][src*="v/t39"]',
-                        'img[data-imgperflogname="feedCoverPhoto"]',
-                        'img[role="img"][src*="fbcdn"]',
-                        'img[src*="/photos/"]',
-                        'img[src*="/photo.php"]'
-                    ];
-                    
-                    for (var selIdx = 0; selIdx < imgSelectors.length; selIdx++) {
-                        try {
-                            var img = article.querySelector(imgSelectors[selIdx]);
-                            if (img && img.src) {
-                                var src = img.src;
-                                if (!src.includes('profile') && !src.includes('avatar') && 
-                                    !src.includes('sticker') && !src.includes('emoji')) {
-                                    result.image = src;
-                                    break;
-                                }
-                            }
-                        } catch(e) {
-                            continue;
-                        }
-                    }
-                }
-                
-                // URL DEL POST
-                var links = article.querySelectorAll('a[href*="/posts/"], a[href*="/permalink/"], a[href*="/story.php"]');
-                for (var l = 0; l < links.length; l++) {
-                    var href = links[l].href || '';
-                    if (href && (href.includes('/posts/') || href.includes('/permalink/') || href.includes('/story.php'))) {
-                        result.url = href;
-                        break;
-                    }
-                }
-                
-                // MÉTRICAS - Buscar en spans y texto
-                var allText = article.textContent || '';
-                
-                // LIKES - Buscar patrones
-                var likesMatch = allText.match(/(\\d+[KMB]?)\\s*(?:like|me gusta|gusta|reaccion)/i);
-                if (!likesMatch) {
-                    likesMatch = allText.match(/(\\d+[KMB]?)\\s*👍/);
-                }
-                if (!likesMatch) {
-                    likesMatch = allText.match(/(\\d+[KMB]?)\\s*❤️/);
-                }
-                if (likesMatch) {
-                    var numStr = likesMatch[1];
-                    var num = numStr.replace(/K/g, '000').replace(/M/g, '000000').replace(/B/g, '000000000');
-                    result.likes = parseInt(num) || 0;
-                }
-                
-                // COMMENTS - Buscar patrones
-                var commentsMatch = allText.match(/(\\d+[KMB]?)\\s*(?:comment|comentario|comentar)/i);
-                if (!commentsMatch) {
-                    commentsMatch = allText.match(/(\\d+[KMB]?)\\s*💬/);
-                }
-                if (commentsMatch) {
-                    var numStr = commentsMatch[1];
-                    var num = numStr.replace(/K/g, '000').replace(/M/g, '000000');
-                    result.comments = parseInt(num) || 0;
-                }
-                
-                // SHARES - Buscar patrones
-                var sharesMatch = allText.match(/(\\d+[KMB]?)\\s*(?:share|compartir|comparte)/i);
-                if (!sharesMatch) {
-                    sharesMatch = allText.match(/(\\d+[KMB]?)\\s*📤/);
-                }
-                if (sharesMatch) {
-                    var numStr = sharesMatch[1];
-                    var num = numStr.replace(/K/g, '000').replace(/M/g, '000000');
-                    result.shares = parseInt(num) || 0;
-                }
-                
-                // Buscar en aria-labels
-                var ariaElems = article.querySelectorAll('[aria-label]');
-                for (var a = 0; a < ariaElems.length; a++) {
-                    var aria = (ariaElems[a].getAttribute('aria-label') || '').toLowerCase();
-                    var ariaNum = aria.match(/(\\d+[KMB]?)/);
-                    if (ariaNum) {
-                        var numStr = ariaNum[1];
-                        var num = numStr.replace(/K/g, '000').replace(/M/g, '000000');
-                        var val = parseInt(num) || 0;
-                        if ((aria.includes('like') || aria.includes('gusta')) && val > result.likes) {
-                            result.likes = val;
-                        }
-                        if ((aria.includes('comment') || aria.includes('comentario')) && val > result.comments) {
-                            result.comments = val;
-                        }
-                        if ((aria.includes('share') || aria.includes('compartir')) && val > result.shares) {
-                            result.shares = val;
-                        }
-                    }
-                }
-                
-                return result;
-            """, article_element)
-            
-            if js_result and js_result.get('text') and len(js_result.get('text', '').strip()) > 10:
-                # Usar datos de JavaScript
-                content = js_result.get('text', '').strip()
-                image_url = js_result.get('image')
-                post_url = js_result.get('url', '')
-                metrics = {
-                    'likes': js_result.get('likes', 0),
-                    'comments': js_result.get('comments', 0),
-                    'shares': js_result.get('shares', 0),
-                    'retweets': 0
-                }
-                
-                # Si no hay imagen en JS, intentar con Selenium como fallback
-                if not image_url:
-                    logger.debug(f"⚠️ JS no encontró imagen, intentando con Selenium...")
-                    try:
-                        # Buscar imagen con Selenium
-                        img_elements = article_element.find_elements(By.TAG_NAME, "img")
-                        for img in img_elements:
-                            src = img.get_attribute('src') or img.get_attribute('data-src') or ''
-                            if src and ('fbcdn.net' in src or 'scontent' in src):
-                                if not any(x in src.lower() for x in ['profile', 'avatar', 'sticker', 'emoji', 'icon']):
-                                    image_url = src
-                                    logger.debug(f"✅ Imagen encontrada con Selenium fallback: {src[:50]}...")
-                                    break
-                    except:
-                        pass
-                
-                logger.info(f"✅ Post extraído con JS: texto={len(content)} chars, imagen={'✅' if image_url else '❌'}, likes={metrics['likes']}, comments={metrics['comments']}")
-                
-                return {
-                    'id': f"fb_{int(time.time() * 1000)}_{random.randint(1000, 9999)}",
-                    'platform': 'facebook',
-                    'author': page_name,
-                    'content': content,
-                    'image_url': image_url,
-                    'url': post_url,
-                    'created_at': datetime.now().isoformat(),
-                    'metrics': metrics,
-                    'category': categorize_post(content),
-                    'sentiment': 'neutral'
-                }
-        except Exception as js_error:
-            logger.debug(f"⚠️ Error en extracción JS, usando método Selenium: {js_error}")
-        
-        # FALLBACK: Método Selenium tradicional
-        # TEXTO - MÚLTIPLES MÉTODOS
-        content = ""
-        
-        try:
-            # Buscar "Ver más" y expandir
-            ver_mas = article_element.find_element(By.XPATH, ".//div[@role='button' and contains(text(), 'Ver más')]")
-            driver.execute_script("arguments[0].click();", ver_mas)
-            time.sleep(0.5)
-        except:
-            pass
-        
-        # MÉTODO 1: div[dir="auto"] (más común)
-        text_divs = article_element.find_elements(By.XPATH, ".//div[@dir='auto']")
-        for div in text_divs:
-            texto = div.text.strip()
-            if len(texto) > 10:  # REDUCIDO de 20 a 10
-                content += texto + " "
-        
-        # MÉTODO 2: span[dir="auto"] (si no hay div)
-        if len(content.strip()) < 10:
-            text_spans = article_element.find_elements(By.XPATH, ".//span[@dir='auto']")
-            for span in text_spans:
-                texto = span.text.strip()
-                if len(texto) > 10:
-                    content += texto + " "
-        
-        # MÉTODO 3: data-ad-preview="message"
-        if len(content.strip()) < 10:
-            try:
-                msg_elem = article_element.find_element(By.CSS_SELECTOR, '[data-ad-preview="message"]')
-                texto = msg_elem.text.strip()
-                if len(texto) > 10:
-                    content = texto  # Usar este texto directamente
-            except:
-                pass
-        
-        # MÉTODO 4: data-testid="post_message"
-        if len(content.strip()) < 10:
-            try:
-                msg_elem = article_element.find_element(By.CSS_SELECTOR, '[data-testid="post_message"]')
-                texto = msg_elem.text.strip()
-                if len(texto) > 10:
-                    content = texto
-            except:
-                pass
-        
-        # MÉTODO 5: Todo el texto del article (último recurso)
-        if len(content.strip()) < 10:
-            try:
-                full_text = article_element.text.strip()
-                # Filtrar líneas muy cortas o que parecen botones
-                lines = [line.strip() for line in full_text.split('\n') if len(line.strip()) > 10]
-                if lines:
-                    content = ' '.join(lines[:5])  # Tomar las primeras 5 líneas
-            except:
-                pass
-        
-        content = content.strip()
-        
-        # ACEPTAR posts con al menos 5 caracteres O con imagen (MUY PERMISIVO)
-        if not content or len(content.strip()) < 5:
-            # Si tiene imagen, aceptar aunque el texto sea corto
-            try:
-                img = article_element.find_element(By.CSS_SELECTOR, "img[data-visualcompletion='media-vc-image']")
-                if img:
-                    # Si tiene imagen, usar texto mínimo o placeholder
-                    if not content or len(content.strip()) < 3:
-                        content = "Post con imagen"  # Placeholder mínimo
-                    logger.debug(f"✅ Post con imagen encontrado, texto: {content[:30]}...")
-            except:
-                # Intentar buscar cualquier imagen
-                try:
-                    imgs = article_element.find_elements(By.TAG_NAME, "img")
-                    for img in imgs:
-                        src = img.get_attribute('src') or ''
-                        if src and ('fbcdn.net' in src or 'scontent' in src):
-                            if not any(x in src.lower() for x in ['profile', 'avatar', 'sticker', 'emoji']):
-                                if not content or len(content.strip()) < 3:
-                                    content = "Post con imagen"
-                                logger.debug(f"✅ Post con imagen alternativa encontrado")
-                                break
-                except:
-                    pass
-                
-                # Si después de todo no hay contenido ni imagen, usar texto mínimo del article
-                if not content or len(content.strip()) < 3:
-                    try:
-                        # Intentar obtener cualquier texto del article
-                        full_text = article_element.text.strip()
-                        if len(full_text) > 3:
-                            # Tomar las primeras líneas significativas
-                            lines = [line.strip() for line in full_text.split('\n') if len(line.strip()) > 3]
-                            if lines:
-                                content = ' '.join(lines[:3])  # Primeras 3 líneas
-                                logger.debug(f"✅ Usando texto mínimo del article: {content[:50]}...")
-                            else:
-                                logger.debug(f"⚠️ Post rechazado: sin contenido suficiente")
-                                return None
-                        else:
-                            logger.debug(f"⚠️ Post rechazado: sin contenido suficiente")
-                            return None
-                    except:
-                        logger.debug(f"⚠️ Post rechazado: sin contenido suficiente")
-                        return None
-        
-        # IMAGEN - MÚLTIPLES MÉTODOS MEJORADOS
-        image_url = None
-        try:
-            # MÉTODO 1: data-visualcompletion='media-vc-image' (más específico) - MEJORADO PARA LAZY LOADING
-            try:
-                img = article_element.find_element(By.CSS_SELECTOR, "img[data-visualcompletion='media-vc-image']")
-                # MEJORADO: Buscar en src, data-src, y activar lazy loading
-                image_url = img.get_attribute('src') or img.get_attribute('data-src') or ''
-                
-                # Si no hay src válido o es data:image, intentar activar lazy loading
-                if not image_url or image_url.startswith('data:image') or len(image_url) < 10:
-                    try:
-                        # Hacer scroll al elemento para activar lazy loading
-                        driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", img)
-                        time.sleep(0.5)  # Esperar a que cargue
-                        image_url = img.get_attribute('src') or img.get_attribute('data-src') or ''
-                    except:
-                        pass
-                
-                if image_url and len(image_url) > 10 and ('fbcdn.net' in image_url or 'scontent' in image_url or 'facebook.com' in image_url):
-                    if not any(x in image_url.lower() for x in ['profile', 'avatar', 'sticker', 'emoji', 'icon']) and not image_url.startswith('data:image'):
-                        logger.info(f"✅ Imagen encontrada (método 1): {image_url[:50]}...")
-            except:
-                pass
-            
-            # MÉTODO 1.5: Buscar todas las imágenes con data-visualcompletion
-            if not image_url:
-                try:
-                    imgs = article_element.find_elements(By.CSS_SELECTOR, "img[data-visualcompletion]")
-                    for img in imgs:
-                        src = img.get_attribute('src') or img.get_attribute('data-src') or ''
-                        if src and ('fbcdn.net' in src or 'scontent' in src):
-                            if not any(x in src.lower() for x in ['profile', 'avatar', 'sticker', 'emoji', 'icon']):
-                                image_url = src
-                                logger.info(f"✅ Imagen encontrada (método 1.5): {src[:50]}...")
-                                break
-                except:
-                    pass
-            
-            # MÉTODO 2: Imágenes grandes (no thumbnails) - MEJORADO PARA LAZY LOADING
-            if not image_url:
-                try:
-                    imgs = article_element.find_elements(By.TAG_NAME, "img")
-                    best_image = None
-                    best_size = 0
-                    
-                    for img in imgs:
-                        # MEJORADO: Buscar en src, data-src, y activar lazy loading
-                        src = img.get_attribute('src') or img.get_attribute('data-src') or ''
-                        
-                        # Si no hay src válido, intentar activar lazy loading
-                        if not src or src.startswith('data:image') or len(src) < 10:
-                            try:
-                                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", img)
-                                time.sleep(0.3)  # Esperar a que cargue
-                                src = img.get_attribute('src') or img.get_attribute('data-src') or ''
-                            except:
-                                continue
-                        
-                        if not src or len(src) < 10:
-                            continue
-                            
-                        width = img.get_attribute('width') or img.get_attribute('naturalWidth') or '0'
-                        height = img.get_attribute('height') or img.get_attribute('naturalHeight') or '0'
-                        
-                        # Validar que sea imagen de contenido (no perfil)
-                        if (('fbcdn.net' in src or 'scontent' in src or 'facebook.com' in src) and
-                            not any(x in src.lower() for x in ['profile', 'avatar', 'sticker', 'emoji', 'icon', 'sprite']) and
-                            not src.startswith('data:image')):
-                            # Preferir imágenes grandes (probablemente contenido) - UMBRAL REDUCIDO
-                            try:
-                                w = int(width) if str(width).isdigit() else 0
-                                h = int(height) if str(height).isdigit() else 0
-                                size = w * h
-                                
-                                if size > best_size or (w > 150 or h > 150):  # Reducido de 200 a 150
-                                    best_image = src
-                                    best_size = size
-                                    if w > 300 or h > 300:  # Reducido de 400 a 300
-                                        image_url = src
-                                        logger.info(f"✅ Imagen encontrada (método 2, muy grande {w}x{h}): {src[:50]}...")
-                                        break
-                            except:
-                                # Si no hay dimensiones, usar la primera imagen válida
-                                if not best_image:
-                                    best_image = src
-                    
-                    if not image_url and best_image:
-                        image_url = best_image
-                        logger.info(f"✅ Imagen encontrada (método 2, mejor opción): {best_image[:50]}...")
-                except Exception as e:
-                    logger.debug(f"⚠️ Error en método 2 de imágenes: {e}")
-                    pass
-            
-            # MÉTODO 3: Buscar en elementos de imagen específicos de Facebook - MEJORADO
-            if not image_url:
-                try:
-                    img_selectors = [
-                        "img[src*='fbcdn.net'][src*='v/t39']",  # Imágenes de contenido
-                        "img[src*='scontent'][src*='v/t39']",
-                        "img[data-imgperflogname='feedCoverPhoto']",
-                        "img[role='img'][src*='fbcdn']",
-                        "img[src*='/photos/']",
-                        "img[src*='/photo.php']",
-                        "img[src*='fbcdn'][src*='.jpg']",
-                        "img[src*='fbcdn'][src*='.png']",
-                        "img[src*='scontent'][src*='.jpg']",
-                        "img[src*='scontent'][src*='.png']"
-                    ]
-                    for selector in img_selectors:
-                        try:
-                            imgs = article_element.find_elements(By.CSS_SELECTOR, selector)
-                            for img in imgs:
-                                src = img.get_attribute('src') or img.get_attribute('data-src') or ''
-                                if src and not any(x in src.lower() for x in ['profile', 'avatar', 'sticker', 'emoji', 'icon']):
-                                    image_url = src
-                                    logger.info(f"✅ Imagen encontrada (método 3, {selector}): {src[:50]}...")
-                                    break
-                            if image_url:
-                                break
-                        except:
-                            continue
-                except Exception as e:
-                    logger.debug(f"⚠️ Error en método 3 de imágenes: {e}")
-                    pass
-            
-            # MÉTODO 4: JavaScript directo como último recurso - MEJORADO PARA LAZY LOADING
-            if not image_url:
-                try:
-                    js_img = driver.execute_script("""
-                        var article = arguments[0];
-                        var imgs = article.querySelectorAll('img');
-                        for (var i = 0; i < imgs.length; i++) {
-                            var img = imgs[i];
-                            // MEJORADO: Buscar en src, data-src, y activar lazy loading
-                            var src = img.src || img.getAttribute('src') || img.getAttribute('data-src') || '';
-                            
-                            // Si no hay src válido, intentar activar lazy loading
-                            if (!src || src.includes('data:image') || src.length < 10) {
-                                try {
-                                    img.scrollIntoView({behavior: 'smooth', block: 'center'});
-                                    // Esperar un momento
-                                    setTimeout(function() {}, 100);
-                                    src = img.src || img.getAttribute('src') || img.getAttribute('data-src') || '';
-                                } catch(e) {}
-                            }
-                            
-                            if (src && src.length > 10 && (src.includes('fbcdn.net') || src.includes('scontent'))) {
-                                if (!src.includes('profile') && !src.includes('avatar') && 
-                                    !src.includes('sticker') && !src.includes('emoji') &&
-                                    !src.includes('icon') && !src.includes('sprite') &&
-                                    !src.includes('data:image')) {
-                                    var w = parseInt(img.width) || parseInt(img.naturalWidth) || 0;
-                                    var h = parseInt(img.height) || parseInt(img.naturalHeight) || 0;
-                                    // UMBRAL REDUCIDO: Aceptar imágenes más pequeñas
-                                    if (w > 150 || h > 150 || src.includes('/photos/') || src.includes('/photo.php')) {
-                                        return src;
-                                    }
-                                }
-                            }
-                        }
-                        return null;
-                    """, article_element)
-                    if js_img:
-                        image_url = js_img
-                        logger.info(f"✅ Imagen encontrada (método 4, JavaScript): {js_img[:50]}...")
-                except:
-                    pass
-                    
-        except Exception as e:
-            logger.debug(f"⚠️ Error extrayendo imagen: {e}")
-        
-        if not image_url:
-            logger.debug(f"⚠️ No se encontró imagen para este post")
-        
-        # MÉTRICAS - MÚLTIPLES MÉTODOS MEJORADOS
-        metrics = {'likes': 0, 'comments': 0, 'shares': 0, 'retweets': 0}
-        
-        try:
-            # Obtener todo el texto del article para análisis
-            all_text = article_element.text
-            
-            # MÉTODO 1: Buscar métricas en spans específicos
-            spans = article_element.find_elements(By.TAG_NAME, "span")
-            for span in spans:
-                texto = span.text.strip()
-                texto_lower = texto.lower()
-                
-                # LIKES
-                if any(word in texto_lower for word in ['like', 'reaccion', 'me gusta', 'gusta']):
-                    valor = parse_metric_value(texto)
-                    if valor > metrics['likes']:
-                        metrics['likes'] = valor
-                
-                # COMMENTS
-                elif any(word in texto_lower for word in ['comment', 'comentario', 'comentar']):
-                    valor = parse_metric_value(texto)
-                    if valor > metrics['comments']:
-                        metrics['comments'] = valor
-                
-                # SHARES
-                elif any(word in texto_lower for word in ['share', 'compartir', 'comparte']):
-                    valor = parse_metric_value(texto)
-                    if valor > metrics['shares']:
-                        metrics['shares'] = valor
-            
-            # MÉTODO 2: Buscar con patrones regex en todo el texto
-            if metrics['likes'] == 0:
-                likes_patterns = [
-                    r'(\d+[KMB]?)\s*(?:like|me gusta|gusta|reaccion)',
-                    r'(\d+[KMB]?)\s*👍',
-                    r'(\d+[KMB]?)\s*❤️',
-                ]
-                for pattern in likes_patterns:
-                    match = re.search(pattern, all_text.lower())
-                    if match:
-                        metrics['likes'] = parse_metric_value(match.group(1))
-                        break
-            
-            if metrics['comments'] == 0:
-                comments_patterns = [
-                    r'(\d+[KMB]?)\s*(?:comment|comentario|comentar)',
-                    r'(\d+[KMB]?)\s*💬',
-                    r'(\d+[KMB]?)\s*comentario',
-                ]
-                for pattern in comments_patterns:
-                    match = re.search(pattern, all_text.lower())
-                    if match:
-                        metrics['comments'] = parse_metric_value(match.group(1))
-                        break
-            
-            if metrics['shares'] == 0:
-                shares_patterns = [
-                    r'(\d+[KMB]?)\s*(?:share|compartir|comparte)',
-                    r'(\d+[KMB]?)\s*📤',
-                ]
-                for pattern in shares_patterns:
-                    match = re.search(pattern, all_text.lower())
-                    if match:
-                        metrics['shares'] = parse_metric_value(match.group(1))
-                        break
-            
-            # MÉTODO 3: Buscar en elementos con aria-label
-            try:
-                aria_elements = article_element.find_elements(By.CSS_SELECTOR, '[aria-label]')
-                for elem in aria_elements:
-                    aria_label = elem.get_attribute('aria-label') or ''
-                    aria_lower = aria_label.lower()
-                    
-                    # LIKES
-                    if 'like' in aria_lower or 'gusta' in aria_lower or 'reaccion' in aria_lower:
-                        valor = parse_metric_value(aria_label)
-                        if valor > metrics['likes']:
-                            metrics['likes'] = valor
-                    
-                    # COMMENTS
-                    elif 'comment' in aria_lower or 'comentario' in aria_lower:
-                        valor = parse_metric_value(aria_label)
-                        if valor > metrics['comments']:
-                            metrics['comments'] = valor
-                    
-                    # SHARES
-                    elif 'share' in aria_lower or 'compartir' in aria_lower:
-                        valor = parse_metric_value(aria_label)
-                        if valor > metrics['shares']:
-                            metrics['shares'] = valor
-            except:
-                pass
-            
-            logger.debug(f"📊 Métricas extraídas: Likes={metrics['likes']}, Comments={metrics['comments']}, Shares={metrics['shares']}")
-            
-        except Exception as e:
-            logger.debug(f"⚠️ Error extrayendo métricas: {e}")
-        
-        # URL DEL POST - MÚLTIPLES MÉTODOS
-        post_url = ""
-        try:
-            # MÉTODO 1: Buscar enlaces con /posts/ o /permalink/
-            try:
-                links = article_element.find_elements(By.XPATH, ".//a[contains(@href, '/posts/') or contains(@href, '/permalink/')]")
-                for link in links:
-                    href = link.get_attribute('href') or ''
-                    if href and ('/posts/' in href or '/permalink/' in href):
-                        post_url = href
-                        if not post_url.startswith('http'):
-                            post_url = f"https://www.facebook.com{post_url}"
-                        logger.debug(f"✅ URL encontrada (método 1): {post_url[:50]}...")
-                        break
-            except:
-                pass
-            
-            # MÉTODO 2: Buscar enlaces con timestamp o ID de post
-            if not post_url:
-                try:
-                    links = article_element.find_elements(By.TAG_NAME, "a")
-                    for link in links:
-                        href = link.get_attribute('href') or ''
-                        # URLs de posts de Facebook tienen estructura específica
-                        if (href and ('facebook.com' in href) and 
-                            ('/posts/' in href or '/permalink/' in href or 
-                             '/story.php' in href or '/photo.php' in href)):
-                            post_url = href
-                            logger.debug(f"✅ URL encontrada (método 2): {post_url[:50]}...")
-                            break
-                except:
-                    pass
-            
-            # MÉTODO 3: Construir URL desde data-utime o ID del post
-            if not post_url:
-                try:
-                    # Buscar atributos que contengan IDs de posts
-                    post_id_attrs = article_element.find_elements(By.XPATH, ".//*[@data-utime or @data-post-id or @id]")
-                    for elem in post_id_attrs:
-                        post_id = (elem.get_attribute('data-utime') or 
-                                  elem.get_attribute('data-post-id') or 
-                                  elem.get_attribute('id') or '')
-                        if post_id and post_id.isdigit():
-                            # Intentar construir URL (puede no ser exacta, pero es mejor que nada)
-                            post_url = f"https://www.facebook.com/{page_name}/posts/{post_id}"
-                            logger.debug(f"✅ URL construida (método 3): {post_url[:50]}...")
-                            break
-                except:
-                    pass
-        except Exception as e:
-            logger.debug(f"⚠️ Error extrayendo URL: {e}")
-        
-        return {
-            'id': f"fb_{int(time.time() * 1000)}_{random.randint(1000, 9999)}",
-            'platform': 'facebook',
-            'author': page_name,
-            'content': content,
-            'image_url': image_url,
-            'url': post_url,
-            'created_at': datetime.now().isoformat(),
-            'metrics': metrics,
-            'category': categorize_post(content),
-            'sentiment': 'neutral'
-        }
-    
+        registros = extract_posts_bulk(driver, elements=[article_element], max_posts=1)
+        return post_desde_registro(registros[0], page_name) if registros else None
     except Exception as e:
         logger.error(f"❌ Error extrayendo post: {e}")
         return None
@@ -1009,169 +309,34 @@ def extraer_posts(driver: webdriver.Chrome, max_posts: int, page_name: str = "P
             # Esperar un momento antes de buscar posts (para que carguen)
             time.sleep(1.0)  # REDUCIDO: 1.0 segundo (antes 1.5) para ser más rápido
             
-            # 1. Buscar todos los articles visibles - MÚLTIPLES SELECTORES
-            articles = []
-            
-            # Selector principal - FILTRAR solo del feed principal (no comentarios)
-            all_articles = driver.find_elements(By.CSS_SELECTOR, 'div[role="article"]')
-            
-            # FILTRAR COMENTARIOS: Solo posts del feed principal
-            articles = []
-            for article in all_articles:
-                try:
-                    # Verificar que NO sea un comentario
-                    if not es_comentario(article):
-                        # Verificar que tenga estructura de post principal (botones de interacción)
-                        has_interaction = (
-                            article.find_elements(By.XPATH, ".//span[contains(text(), 'Me gusta')]") or
-                            article.find_elements(By.XPATH, ".//span[contains(text(), 'Comentar')]") or
-                            article.find_elements(By.XPATH, ".//span[contains(text(), 'Compartir')]") or
-                            article.find_elements(By.XPATH, ".//span[contains(text(), 'Like')]") or
-                            article.find_elements(By.XPATH, ".//span[contains(text(), 'Comment')]") or
-                            article.find_elements(By.XPATH, ".//span[contains(text(), 'Share')]") or
-                            article.find_elements(By.CSS_SELECTOR, '[data-pagelet*="FeedUnit"]')  # Posts del feed
-                        )
-                        if has_interaction:
-                            articles.append(article)
-                except:
-                    continue
-            
-            logger.info(f"📊 Selector 1 (div[role='article']): {len(all_articles)} total, {len(articles)} posts principales (filtrados comentarios)")
-            
-            if not articles or len(articles) < 3:
-                # Selector alternativo 1 - FeedUnit es específico del feed principal
-                all_articles2 = driver.find_elements(By.CSS_SELECTOR, 'div[data-pagelet*="FeedUnit"]')
-                # Filtrar comentarios
-                articles2 = []
-                for article in all_articles2:
-                    if not es_comentario(article):
-                        articles2.append(article)
-                if articles2:
-                    articles = articles2
-                    logger.info(f"📊 Selector 2 (data-pagelet*='FeedUnit'): {len(all_articles2)} total, {len(articles2)} posts principales")
+            # 1. Extraer de una vez todos los posts visibles aún no procesados (un solo execute_script:
+            #    selectores en cascada, filtro de comentarios, texto, imágenes, métricas y enlace)
+            registros = extract_posts_bulk(driver, skip_seen=True)
+            logger.info(f"📊 ✅ TOTAL: {len(registros)} posts nuevos visibles para procesar")
             
-            if not articles or len(articles) < 3:
-                # Selector alternativo 2 - Filtrar comentarios
-                all_articles3 = driver.find_elements(By.CSS_SELECTOR, 'div[data-ad-preview="message"]')
-                articles3 = []
-                for article in all_articles3:
-                    if not es_comentario(article):
-                        articles3.append(article)
-                if articles3:
-                    articles = articles3
-                    logger.info(f"📊 Selector 3 (data-ad-preview='message'): {len(all_articles3)} total, {len(articles3)} posts principales")
-            
-            if not articles or len(articles) < 3:
-                # Selector alternativo 3 - por clase común de Facebook
-                articles4 = driver.find_elements(By.CSS_SELECTOR, 'div[class*="x1y1aw1k"], div[class*="x1n2onr6"]')
-                if articles4:
-                    articles = articles4
-                    logger.info(f"📊 Selector 4 (clases comunes): {len(articles4)} articles")
-            
-                    # Intentar también con JavaScript para encontrar más posts (FILTRANDO comentarios)
-                    if not articles or len(articles) < 5:
-                        try:
-                            js_articles = driver.execute_script("""
-                                var allArticles = document.querySelectorAll('div[role="article"]');
-                                var mainPosts = [];
-                                for (var i = 0; i < allArticles.length; i++) {
-                                    var article = allArticles[i];
-                                    var html = article.outerHTML || '';
-                                    var text = article.textContent || '';
-                                    
-                                    // Filtrar comentarios
-                                    var isComment = false;
-                                    
-                                    // Verificar si está en sección de comentarios
-                                    if (html.toLowerCase().includes('comment') || 
-                                        html.toLowerCase().includes('comentario') ||
-                                        html.toLowerCase().includes('reply') ||
-                                        html.toLowerCase().includes('ufi_')) {
-                                        isComment = true;
-                                    }
-                                    
-                                    // Verificar si tiene botones principales de post
-                                    var hasMainButtons = (
-                                        text.includes('Me gusta') || text.includes('Comentar') || 
-                                        text.includes('Compartir') || text.includes('Like') ||
-                                        text.includes('Comment') || text.includes('Share')
-                                    );
-                                    
-                                    // Verificar si tiene estructura de feed principal
-                                    var hasFeedUnit = article.closest('[data-pagelet*="FeedUnit"]') !== null;
-                                    
-                                    // Solo incluir si es post principal (no comentario)
-                                    if (!isComment && (hasMainButtons || hasFeedUnit)) {
-                                        mainPosts.push(article);
-                                    }
-                                }
-                                return mainPosts.length;
-                            """)
-                            logger.info(f"📊 JavaScript encuentra: {js_articles} posts principales (filtrados comentarios)")
-                            
-                            if js_articles > len(articles):
-                                # Re-búsqueda con filtrado
-                                all_articles_js = driver.find_elements(By.CSS_SELECTOR, 'div[role="article"]')
-                                articles = []
-                                for article in all_articles_js:
-                                    if not es_comentario(article):
-                                        articles.append(article)
-                                logger.info(f"📊 Re-búsqueda después de JS: {len(articles)} posts principales")
-                        except:
-                            pass
-            
-            logger.info(f"📊 ✅ TOTAL: {len(articles)} articles encontrados para procesar")
-            
-            if len(articles) == 0:
-                logger.warning("⚠️ ⚠️ ⚠️ NO SE ENCONTRARON ARTICLES - Haciendo scroll y esperando...")
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(5)
-                continue
-            
-            # 2. Extraer datos de cada article
+            # 2. Normalizar cada registro al formato de post
             nuevos_posts_en_esta_iteracion = 0
-            logger.info(f"🔍 Procesando {len(articles)} articles...")
             
-            for idx, article in enumerate(articles):
+            for registro in registros:
+                idx = registro.get('index', 0)
                 try:
                     # ID ÚNICO basado en contenido del post (más estable y menos restrictivo)
-                    try:
-                        # Intentar extraer texto único del post (más texto para mejor hash)
-                        article_text = article.text[:500] if article.text else ""
-                        article_html = article.get_attribute('innerHTML')[:200] if article.get_attribute('innerHTML') else ""
-                        
-                        # Generar hash del contenido para ID único
-                        content_hash = hashlib.md5((article_text + article_html + str(idx)).encode('utf-8')).hexdigest()[:16]
-                        
-                        # También intentar obtener ID de Facebook si existe
-                        fb_id = None
-                        try:
-                            fb_id = article.get_attribute('data-pagelet') or article.get_attribute('data-ft') or article.get_attribute('id')
-                        except:
-                            pass
-                        
-                        # Usar ID de Facebook si está disponible, sino usar hash + idx
-                        if fb_id and len(fb_id) > 5:
-                            post_id = f"fb_{fb_id}_{content_hash}"
-                        else:
-                            post_id = f"fb_{content_hash}_{idx}_{iteration}"  # Agregar iteration para más unicidad
-                    except Exception as e:
-                        logger.debug(f"⚠️ Error generando ID: {e}")
-                        # Fallback: usar timestamp + índice + iteración
-                        post_id = f"post_{int(time.time() * 1000)}_{idx}_{iteration}_{random.randint(1000, 9999)}"
+                    article_text = (registro.get('full_text') or '')[:500]
+                    content_hash = hashlib.md5((article_text + (registro.get('html_head') or '') + str(idx)).encode('utf-8')).hexdigest()[:16]
+                    fb_id = registro.get('fb_id') or ''
+                    if len(fb_id) > 5:
+                        post_id = f"fb_{fb_id}_{content_hash}"
+                    else:
+                        post_id = f"fb_{content_hash}_{idx}_{iteration}"
                     
-                    # Verificar si ya procesamos este post (SOLO si tenemos MUCHOS posts vistos)
-                    if len(posts_ids_vistos) > 50 and post_id in posts_ids_vistos:
+                    if post_id in posts_ids_vistos:
                         logger.debug(f"⚠️ Article {idx+1} ya procesado (ID: {post_id[:20]}...), saltando...")
-                        continue  # Ya procesado
+                        continue
                     
                     posts_ids_vistos.add(post_id)
                     logger.info(f"📋 ✅ Nuevo post detectado (ID: {post_id[:30]}...) - Total vistos: {len(posts_ids_vistos)}")
                     
-                    logger.debug(f"🔍 Procesando article {idx+1}/{len(articles)}...")
-                    
-                    # Extraer datos del post
-                    post_data = extraer_post(article, driver, page_name)
+                    post_data = post_desde_registro(registro, page_name)
                     
                     # VALIDAR que el post tenga contenido (MUY PERMISIVO - mínimo 5 caracteres)
                     if post_data and post_data.get('content') and len(post_data.get('content', '').strip()) >= 5:
@@ -1210,18 +375,12 @@ def extraer_posts(driver: webdriver.Chrome, max_posts: int, page_name: str = "P
                             logger.info(f"✅ ✅ ✅ LÍMITE ALCANZADO: {max_posts} posts extraídos")
                             break
                     else:
-                        # Log para debug si no se extrajo
-                        try:
-                            preview_text = article.text[:100] if article.text else "sin texto"
-                            logger.debug(f"⚠️ Article {idx+1} no extraído - Preview: {preview_text[:50]}...")
-                        except:
-                            logger.debug(f"⚠️ Article {idx+1} no extraído (error al obtener preview)")
+                        logger.debug(f"⚠️ Article {idx+1} no extraído - Preview: {article_text[:50]}...")
                 except Exception as e:
                     logger.warning(f"⚠️ Error procesando article {idx+1}: {e}")
-                    import traceback
-                    logger.debug(f"Traceback: {traceback.format_exc()}")
                     continue
             
+
             logger.info(f"📊 Iteración {iteration}: {nuevos_posts_en_esta_iteracion} nuevos posts extraídos (Total: {len(posts_extraidos)})")
             
             # Callback de progreso si está disponible (para retornar posts parciales)
@@ -1234,8 +393,8 @@ def extraer_posts(driver: webdriver.Chrome, max_posts: int, page_name: str = "P
             # 3. Verificar si hay nuevos posts usando scroll inteligente
             # Detectar si hay más contenido disponible
             last_height = driver.execute_script("return document.body.scrollHeight")
-            nuevos_articles = len(driver.find_elements(By.CSS_SELECTOR, 'div[role="article"]'))
-            logger.info(f"📊 Articles después de extracción: {nuevos_articles} (antes: {len(articles)})")
+            nuevos_articles = driver.execute_script("return document.querySelectorAll('div[role=\"article\"]').length")
+            logger.info(f"📊 Articles después de extracción: {nuevos_articles} (nuevos en esta pasada: {len(registros)})")
             
             # Verificar si hay nuevos posts
             if nuevos_posts_en_esta_iteracion == 0:
@@ -1264,7 +423,7 @@ def extraer_posts(driver: webdriver.Chrome, max_posts: int, page_name: str = "P
                 new_height = driver.execute_script("return document.body.scrollHeight")
                 
                 if new_height == last_height and nuevos_posts_en_esta_iteracion == 0:
-                    logger.warning(f"⚠️ ⚠️ ⚠️ No hay más contenido disponible (altura no cambió)")
+                    logger.warning("⚠️ ⚠️ ⚠️ No hay más contenido disponible (altura no cambió)")
                 logger.info(f"📊 Posts extraídos hasta ahora: {len(posts_extraidos)}")
                 break
             
@@ -1274,7 +433,7 @@ def extraer_posts(driver: webdriver.Chrome, max_posts: int, page_name: str = "P
                 break
             
             # 3. Scroll inteligente RÁPIDO que detecta cuando no hay más contenido
-            logger.info(f"📜 Haciendo scroll inteligente para cargar más posts...")
+            logger.info("📜 Haciendo scroll inteligente para cargar más posts...")
             
             # Obtener altura inicial
             last_height_before_scroll = driver.execute_script("return document.body.scrollHeight")
@@ -1309,14 +468,12 @@ def extraer_posts(driver: webdriver.Chrome, max_posts: int, page_name: str = "P
                 if scroll_attempts < max_scroll_attempts:
                     driver.execute_script("window.scrollBy(0, -200);")
                     time.sleep(0.3)  # REDUCIDO: 0.3 segundos (antes 0.5)
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(1.0)  # REDUCIDO: 1.0 segundo (antes 1.5)
             
             # Scroll final para asegurar que todo esté visible
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             time.sleep(1.0)  # REDUCIDO: 1.0 segundo (antes 1.5)
             
-            logger.info(f"✅ Scroll inteligente completado")
+            logger.info("✅ Scroll inteligente completado")
             
         except Exception as e:
             logger.error(f"❌ Error en bucle de extracción: {e}")
@@ -1429,7 +586,7 @@ def mostrar_estadisticas(posts: List[Dict]):
     total_comments = sum(p.get('metrics', {}).get('comments', 0) for p in posts)
     total_shares = sum(p.get('metrics', {}).get('shares', 0) for p in posts)
     
-    logger.info(f"\nMétricas totales:")
+    logger.info("\nMétricas totales:")
     logger.info(f"  - Likes: {total_likes:,}")
     logger.info(f"  - Comentarios: {total_comments:,}")
     logger.info(f"  - Compartidos: {total_shares:,}")
@@ -1510,6 +667,7 @@ def scrape_facebook_page(page_url: str, max_posts: int = 100, wait_for_login_sec
         
         # 3. Navegar a la página
         logger.info(f"\n🌐 Accediendo a: {page_url}")
+        host_limiter.wait(page_url)
         driver.get(page_url)
         time.sleep(5)  # REDUCIDO: 5 segundos (antes 10) para ser más rápido
         
@@ -0,0 +1,430 @@
+"""
+Planificador de peticiones por host compartido por todos los scrapers
+
+Cada host tiene un cubo de tokens: una petición consume un token y los tokens
+se reponen a `rate` por segundo (hasta BURST acumulados). El ritmo se adapta a
+lo que aguanta cada sitio:
+
+- empieza en DEFAULT_RATE y sube RATE_STEP por cada respuesta correcta, hasta
+  MAX_RATE o hasta lo que permita el Crawl-delay / Request-rate de su robots.txt
+  (que se descarga una vez por host y se guarda ROBOTS_TTL segundos);
+- con 429 o 503 se reduce a la mitad y el host queda en pausa lo que indique
+  Retry-After (o un intervalo del nuevo ritmo si no lo indica).
+
+Además cada host tiene un cortacircuitos (domain_breaker): si en la ventana
+de BREAKER_WINDOW segundos falla al menos BREAKER_ERROR_RATE de las peticiones
+(errores de red, 403, 429 y 5xx), el circuito se abre y las peticiones a ese
+host fallan al instante con CircuitOpenError durante BREAKER_OPEN_SECONDS
+(el doble en cada reapertura, hasta BREAKER_MAX_OPEN_SECONDS). Pasado ese
+tiempo deja pasar una sola petición de prueba (semiabierto): si va bien se
+cierra, si falla vuelve a abrirse.
+
+job_deadline es el presupuesto de tiempo del trabajo de scraping en curso:
+una vez agotado las peticiones fallan con DeadlineExceeded y los timeouts de
+las que quedan se recortan al tiempo restante.
+
+Uso: polite_get(session, url, ...) en lugar de session.get(url, ...), o
+host_limiter.wait(url) antes de un driver.get(url) y host_limiter.report(url,
+status) si se conoce el estado de la respuesta. Los fallbacks caros (Selenium,
+Playwright) deben consultar fetch_allowed(url) antes de lanzarse.
+"""
+
+import logging
+import threading
+import time
+import urllib.request
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+logger = logging.getLogger(__name__)
+
+# Peticiones por segundo a un host sin historial
+DEFAULT_RATE = 1.0
+# Techo del ritmo adaptativo (peticiones por segundo)
+MAX_RATE = 8.0
+# Suelo del ritmo tras 429/503
+MIN_RATE = 0.05
+# Aumento del ritmo por cada respuesta correcta
+RATE_STEP = 0.25
+# Tokens acumulables (ráfaga máxima tras un periodo sin peticiones)
+BURST = 2.0
+# Pausa máxima aceptada de un Retry-After (segundos)
+MAX_RETRY_AFTER = 300.0
+# Vigencia del robots.txt descargado (segundos)
+ROBOTS_TTL = 24 * 3600
+ROBOTS_TIMEOUT = 5
+ROBOTS_USER_AGENT = 'Mozilla/5.0 (compatible; NewsScraper/1.0)'
+
+THROTTLE_STATUSES = (429, 503)
+
+# Cortacircuitos por host
+BREAKER_WINDOW = 60.0
+# Peticiones mínimas en la ventana antes de poder abrir el circuito
+BREAKER_MIN_REQUESTS = 3
+BREAKER_ERROR_RATE = 0.5
+BREAKER_OPEN_SECONDS = 30.0
+BREAKER_MAX_OPEN_SECONDS = 600.0
+# Si la petición de prueba no informa resultado en este tiempo se permite otra
+BREAKER_PROBE_TIMEOUT = 60.0
+# Estados que cuentan como fallo del sitio (un 404 es fallo del artículo, no del sitio)
+BREAKER_FAILURE_STATUSES = (403, 429)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+# Presupuesto por trabajo de scraping (por debajo de los 30 min de timeout del subproceso programado)
+DEFAULT_JOB_DEADLINE = 25 * 60
+
+
+def host_of(url: str) -> str:
+    """Host normalizado de una URL (sin www.)"""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Segundos de una cabecera Retry-After (número o fecha HTTP), o None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def fetch_robots_delay(url: str) -> Optional[float]:
+    """Segundos entre peticiones que pide el robots.txt del sitio (Crawl-delay o Request-rate), o None"""
+    parsed = urlparse(url)
+    robots_url = f"{parsed.scheme or 'https'}://{parsed.netloc}/robots.txt"
+    try:
+        request = urllib.request.Request(robots_url, headers={'User-Agent': ROBOTS_USER_AGENT})
+        with urllib.request.urlopen(request, timeout=ROBOTS_TIMEOUT) as response:
+            lines = response.read(512 * 1024).decode('utf-8', errors='ignore').splitlines()
+    except Exception as e:
+        logger.debug(f"robots.txt no disponible para {parsed.netloc}: {e}")
+        return None
+    parser = RobotFileParser()
+    parser.parse(lines)
+    delay = parser.crawl_delay('*')
+    rate = parser.request_rate('*')
+    if rate and rate.requests:
+        delay = max(float(delay or 0), rate.seconds / rate.requests)
+    return float(delay) if delay else None
+
+
+class _HostState:
+    __slots__ = ('rate', 'max_rate', 'tokens', 'updated', 'blocked_until', 'robots_checked_at')
+
+    def __init__(self, now: float):
+        self.rate = DEFAULT_RATE
+        self.max_rate = MAX_RATE
+        self.tokens = 1.0
+        self.updated = now
+        self.blocked_until = 0.0
+        self.robots_checked_at = None
+
+
+class HostRateLimiter:
+    """Cubo de tokens por host con ritmo adaptativo y Crawl-delay (seguro entre hilos)"""
+
+    def __init__(self, respect_robots: bool = True, robots_fetcher=fetch_robots_delay):
+        self.respect_robots = respect_robots
+        self.robots_fetcher = robots_fetcher
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+        self._robots_locks: Dict[str, threading.Lock] = {}
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(time.monotonic())
+        return state
+
+    def _refill(self, state: _HostState, now: float):
+        state.tokens = min(BURST, state.tokens + (now - state.updated) * state.rate)
+        state.updated = now
+
+    def _check_robots(self, url: str, host: str):
+        """Aplicar el Crawl-delay del host (una descarga por host y ROBOTS_TTL; el resto espera a esa)"""
+        with self._lock:
+            state = self._state(host)
+            fresh = state.robots_checked_at is not None and time.time() - state.robots_checked_at < ROBOTS_TTL
+            robots_lock = self._robots_locks.setdefault(host, threading.Lock())
+        if fresh:
+            return
+        with robots_lock:
+            with self._lock:
+                state = self._state(host)
+                if state.robots_checked_at is not None and time.time() - state.robots_checked_at < ROBOTS_TTL:
+                    return
+            delay = self.robots_fetcher(url)
+            with self._lock:
+                state.robots_checked_at = time.time()
+                state.max_rate = max(MIN_RATE, 1.0 / delay) if delay else MAX_RATE
+                state.rate = min(state.rate, state.max_rate)
+            if delay:
+                logger.info(f"🤖 {host}: Crawl-delay {delay:g}s (robots.txt)")
+
+    def wait(self, url: str) -> float:
+        """Bloquear hasta que haya un token para el host de la URL; devuelve los segundos esperados"""
+        host = host_of(url)
+        if self.respect_robots and self.robots_fetcher:
+            self._check_robots(url, host)
+        waited = 0.0
+        while True:
+            with self._lock:
+                state = self._state(host)
+                now = time.monotonic()
+                self._refill(state, now)
+                if now < state.blocked_until:
+                    delay = state.blocked_until - now
+                elif state.tokens >= 1.0:
+                    state.tokens -= 1.0
+                    return waited
+                else:
+                    delay = (1.0 - state.tokens) / state.rate
+            time.sleep(delay)
+            waited += delay
+
+    def report(self, url: str, status: Optional[int], retry_after: Optional[float] = None):
+        """Adaptar el ritmo del host al estado de una respuesta (None = error de red, no cambia nada)"""
+        if status is None:
+            return
+        host = host_of(url)
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            if status in THROTTLE_STATUSES:
+                state.rate = max(MIN_RATE, state.rate / 2)
+                state.tokens = 0.0
+                state.updated = now
+                pause = min(retry_after, MAX_RETRY_AFTER) if retry_after is not None else 1.0 / state.rate
+                state.blocked_until = max(state.blocked_until, now + pause)
+                logger.warning(f"🐢 {host} respondió {status}: ritmo {state.rate:.2f} req/s, pausa {pause:.1f}s")
+            elif 200 <= status < 400:
+                state.rate = min(state.max_rate, state.rate + RATE_STEP)
+
+    def report_response(self, response):
+        """report() a partir de un requests.Response (usa la cabecera Retry-After)"""
+        self.report(response.url, response.status_code, parse_retry_after(response.headers.get('Retry-After')))
+
+    def set_rate(self, url: str, rate: float):
+        """Fijar el ritmo del host de la URL (servidor propio o de pruebas); robots.txt ya no lo cambia"""
+        host = host_of(url)
+        with self._lock:
+            state = self._state(host)
+            state.rate = state.max_rate = max(MIN_RATE, rate)
+            state.robots_checked_at = float('inf')
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Ritmo actual por host (para estadísticas)"""
+        with self._lock:
+            return {host: {'rate': round(state.rate, 3), 'max_rate': round(state.max_rate, 3)}
+                    for host, state in self._hosts.items()}
+
+
+class FetchSkipped(Exception):
+    """Petición descartada sin llegar a la red"""
+
+
+class CircuitOpenError(FetchSkipped):
+    """El circuito del host está abierto"""
+
+
+class DeadlineExceeded(FetchSkipped):
+    """Se agotó el presupuesto de tiempo del trabajo"""
+
+
+class _CircuitState:
+    __slots__ = ('outcomes', 'state', 'opened_at', 'open_seconds', 'probe_started', 'failures', 'skipped', 'trips',
+                 'last_error')
+
+    def __init__(self):
+        self.outcomes = deque()
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.open_seconds = BREAKER_OPEN_SECONDS
+        self.probe_started = None
+        self.failures = 0
+        self.skipped = 0
+        self.trips = 0
+        self.last_error = None
+
+
+class DomainCircuitBreaker:
+    """Cortacircuitos por host con ventana de tasa de error y estados abierto / semiabierto (seguro entre hilos)"""
+
+    def __init__(self):
+        self._hosts: Dict[str, _CircuitState] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, host: str) -> _CircuitState:
+        circuit = self._hosts.get(host)
+        if circuit is None:
+            circuit = self._hosts[host] = _CircuitState()
+        return circuit
+
+    def is_open(self, url: str) -> bool:
+        """True si el host está abierto y aún no toca probar (no consume la petición de prueba)"""
+        with self._lock:
+            circuit = self._hosts.get(host_of(url))
+            return circuit is not None and circuit.state == OPEN and \
+                time.monotonic() - circuit.opened_at < circuit.open_seconds
+
+    def check(self, url: str):
+        """Lanzar CircuitOpenError si no se debe pedir al host; en semiabierto deja pasar una sola prueba"""
+        host = host_of(url)
+        with self._lock:
+            circuit = self._circuit(host)
+            now = time.monotonic()
+            if circuit.state == CLOSED:
+                return
+            if circuit.state == OPEN and now - circuit.opened_at >= circuit.open_seconds:
+                circuit.state = HALF_OPEN
+                circuit.probe_started = None
+            if circuit.state == HALF_OPEN and (circuit.probe_started is None
+                                               or now - circuit.probe_started >= BREAKER_PROBE_TIMEOUT):
+                circuit.probe_started = now
+                logger.info(f"🔌 {host}: circuito semiabierto, petición de prueba")
+                return
+            circuit.skipped += 1
+            raise CircuitOpenError(f"Circuito abierto para {host} ({circuit.last_error})")
+
+    def record(self, url: str, ok: bool, error: Optional[str] = None):
+        """Registrar el resultado de una petición al host"""
+        host = host_of(url)
+        with self._lock:
+            circuit = self._circuit(host)
+            now = time.monotonic()
+            if not ok:
+                circuit.failures += 1
+                circuit.last_error = error
+            if circuit.state == HALF_OPEN:
+                if ok:
+                    circuit.state = CLOSED
+                    circuit.outcomes.clear()
+                    circuit.open_seconds = BREAKER_OPEN_SECONDS
+                    logger.info(f"✅ {host}: circuito cerrado")
+                else:
+                    circuit.open_seconds = min(circuit.open_seconds * 2, BREAKER_MAX_OPEN_SECONDS)
+                    self._trip(host, circuit, now)
+                return
+            circuit.outcomes.append((now, ok))
+            while circuit.outcomes and now - circuit.outcomes[0][0] > BREAKER_WINDOW:
+                circuit.outcomes.popleft()
+            errors = sum(1 for _, outcome_ok in circuit.outcomes if not outcome_ok)
+            if circuit.state == CLOSED and len(circuit.outcomes) >= BREAKER_MIN_REQUESTS and \
+                    errors / len(circuit.outcomes) >= BREAKER_ERROR_RATE:
+                self._trip(host, circuit, now)
+
+    def _trip(self, host: str, circuit: _CircuitState, now: float):
+        circuit.state = OPEN
+        circuit.opened_at = now
+        circuit.probe_started = None
+        circuit.trips += 1
+        logger.warning(f"⛔ {host}: circuito abierto {circuit.open_seconds:.0f}s ({circuit.last_error})")
+
+    def report(self) -> Dict[str, Dict]:
+        """Hosts con fallos o peticiones descartadas desde el último reset_report()"""
+        with self._lock:
+            return {host: {'state': circuit.state, 'failures': circuit.failures, 'skipped': circuit.skipped,
+                           'trips': circuit.trips, 'last_error': circuit.last_error}
+                    for host, circuit in self._hosts.items() if circuit.failures or circuit.skipped}
+
+    def reset_report(self):
+        """Poner a cero los contadores del informe (el estado de los circuitos se conserva)"""
+        with self._lock:
+            for circuit in self._hosts.values():
+                circuit.failures = circuit.skipped = circuit.trips = 0
+
+
+class JobDeadline:
+    """Presupuesto de tiempo del trabajo de scraping en curso (uno por proceso)"""
+
+    def __init__(self):
+        self._ends_at: Optional[float] = None
+        self.exceeded = False
+
+    def start(self, seconds: Optional[float]):
+        self._ends_at = time.monotonic() + seconds if seconds else None
+        self.exceeded = False
+
+    def clear(self):
+        self._ends_at = None
+
+    def remaining(self) -> Optional[float]:
+        """Segundos restantes (None = sin límite)"""
+        if self._ends_at is None:
+            return None
+        return max(0.0, self._ends_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            if not self.exceeded:
+                logger.warning("⏰ Presupuesto de tiempo del trabajo agotado")
+            self.exceeded = True
+        return self.exceeded and self._ends_at is not None
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded("Presupuesto de tiempo del trabajo agotado")
+
+    def clamp_timeout(self, timeout):
+        """Recortar un timeout numérico de requests al tiempo restante"""
+        remaining = self.remaining()
+        if remaining is None or not isinstance(timeout, (int, float)):
+            return timeout
+        return max(1.0, min(timeout, remaining))
+
+
+# Planificador, cortacircuitos y presupuesto compartidos por todos los scrapers del proceso
+host_limiter = HostRateLimiter()
+domain_breaker = DomainCircuitBreaker()
+job_deadline = JobDeadline()
+
+
+def fetch_allowed(url: str) -> bool:
+    """False si el trabajo agotó su tiempo o el host tiene el circuito abierto (para saltar fallbacks caros)"""
+    return not job_deadline.expired() and not domain_breaker.is_open(url)
+
+
+def fetch_report() -> Dict:
+    """Resumen de fallos del trabajo para scraping_stats"""
+    return {'failed_domains': domain_breaker.report(), 'deadline_exceeded': job_deadline.exceeded}
+
+
+def start_job(deadline_seconds: Optional[float]):
+    """Empezar un trabajo: fija el presupuesto de tiempo y pone a cero el informe de fallos"""
+    job_deadline.start(deadline_seconds)
+    domain_breaker.reset_report()
+
+
+def polite_get(client, url: str, limiter: Optional[HostRateLimiter] = None, **kwargs):
+    """client.get(url, **kwargs) (Session o módulo requests) esperando turno en el host y adaptando el ritmo.
+
+    Lanza CircuitOpenError / DeadlineExceeded sin tocar la red si el host está
+    caído o el trabajo agotó su tiempo.
+    """
+    limiter = limiter or host_limiter
+    job_deadline.check()
+    domain_breaker.check(url)
+    limiter.wait(url)
+    job_deadline.check()
+    if 'timeout' in kwargs:
+        kwargs['timeout'] = job_deadline.clamp_timeout(kwargs['timeout'])
+    try:
+        response = client.get(url, **kwargs)
+    except Exception as e:
+        domain_breaker.record(url, False, type(e).__name__)
+        raise
+    status = response.status_code
+    failed = status >= 500 or status in BREAKER_FAILURE_STATUSES
+    domain_breaker.record(url, not failed, f"HTTP {status}" if failed else None)
+    limiter.report(url, status, parse_retry_after(response.headers.get('Retry-After')))
+    return response
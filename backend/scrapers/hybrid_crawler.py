@@ -14,6 +14,9 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from backend.scrapers.dom_watcher import DomMutationWatcher, ARTICLE_LINK_SELECTOR
+from backend.scrapers.host_scheduler import host_limiter, polite_get
+
 import time
 import logging
 import hashlib
@@ -84,6 +87,7 @@ class HybridDataCrawler:
             return []
         
         try:
+            host_limiter.wait(url)
             self.driver.get(url)
             WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
@@ -112,6 +116,7 @@ class HybridDataCrawler:
             return []
         
         try:
+            host_limiter.wait(url)
             self.driver.get(url)
             WebDriverWait(self.driver, 5).until(  # Timeout más corto
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
@@ -136,7 +141,7 @@ class HybridDataCrawler:
     def crawl_with_requests(self, url: str, max_images: int = 50) -> List[Dict]:
         """Crawlear usando Requests para contenido estático"""
         try:
-            response = self.session.get(url, timeout=10)
+            response = polite_get(self.session, url, timeout=10)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -155,7 +160,7 @@ class HybridDataCrawler:
     def analyze_page_type(self, url: str) -> Dict[str, bool]:
         """Analizar el tipo de página para decidir el mejor método de extracción"""
         try:
-            response = self.session.get(url, timeout=10)
+            response = polite_get(self.session, url, timeout=10)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -332,64 +337,29 @@ class HybridDataCrawler:
         return final_images
     
     def _smart_scroll_for_images(self):
-        """Scroll inteligente para cargar imágenes lazy - MEJORADO"""
+        """Scroll inteligente para cargar imágenes lazy (espera por mutaciones del DOM, no por sleeps fijos)"""
         try:
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
-            scroll_attempts = 0
-            max_attempts = 10
-            images_found = set()
-            
-            while scroll_attempts < max_attempts:
-                # Scroll progresivo en pasos más pequeños
-                current_scroll = 0
-                scroll_step = 300  # Pasos más pequeños para imágenes
-                
-                while current_scroll < last_height:
-                    self.driver.execute_script(f"window.scrollTo(0, {current_scroll});")
-                    time.sleep(0.3)  # Pausa más corta
-                    current_scroll += scroll_step
-                
-                # Scroll final al fondo
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1.5)
-                
-                # Verificar si hay nuevo contenido
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                
-                # Contar imágenes únicas encontradas
-                current_images = self.driver.execute_script("""
-                    var images = [];
-                    var imgElements = document.querySelectorAll('img');
-                    for (var i = 0; i < imgElements.length; i++) {
-                        var img = imgElements[i];
-                        if (img.src && img.src.startsWith('http') && 
-                            img.naturalWidth > 100 && img.naturalHeight > 100) {
-                            images.push(img.src);
-                        }
-                    }
-                    return images;
-                """)
-                
-                new_images = set(current_images) - images_found
-                images_found.update(current_images)
-                
-                logger.info(f"🖼️ Scroll {scroll_attempts + 1}: {len(images_found)} imágenes únicas encontradas (+{len(new_images)} nuevas)")
-                
-                if new_height == last_height and len(new_images) == 0:
-                    scroll_attempts += 1
-                else:
-                    scroll_attempts = 0
-                    last_height = new_height
-                
-                # Si no encontramos nuevas imágenes en 3 intentos consecutivos, parar
-                if scroll_attempts >= 3:
-                    break
-                    
+            watcher = DomMutationWatcher(self.driver, idle_timeout_ms=1500)
+            watcher.install()
+            
+            # Recorrer la página por viewports para disparar el lazy loading
+            watcher.scroll_through(step=600)
+            scanned_height = [self.driver.execute_script("return document.body.scrollHeight")]
+            
+            # Seguir al fondo mientras aparezca contenido; solo lo nuevo se recorre por viewports
+            def load_lazy_images(round_number):
+                watcher.scroll_through(step=600, start=scanned_height[0])
+                scanned_height[0] = self.driver.execute_script("return document.body.scrollHeight")
+                logger.info(f"🖼️ Scroll {round_number}: nuevo contenido cargado")
+                return False
+            
+            watcher.scroll_until_exhausted(max_rounds=10, idle_rounds=2, on_round=load_lazy_images)
+            
             # Volver al inicio
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(0.5)
             
-            logger.info(f"🎯 Scroll de imágenes completado: {len(images_found)} imágenes únicas detectadas")
+            images_count = self.driver.execute_script("return document.images.length")
+            logger.info(f"🎯 Scroll de imágenes completado: {images_count} imágenes en la página")
             
         except Exception as e:
             logger.warning(f"⚠️ Error en scroll inteligente de imágenes: {e}")
@@ -570,7 +540,7 @@ class HybridDataCrawler:
             for subcat in subcategories:
                 try:
                     subcat_url = f"{base_domain}/{subcat}/"
-                    response = self.session.get(subcat_url, timeout=5)
+                    response = polite_get(self.session, subcat_url, timeout=5)
                     if response.status_code == 200:
                         soup = BeautifulSoup(response.content, 'html.parser')
                         images = self._extract_images_from_soup(soup, subcat_url)
@@ -654,7 +624,7 @@ class HybridDataCrawler:
             file_path = output_path / filename
             
             # Descargar imagen
-            response = self.session.get(url, timeout=30, stream=True)
+            response = polite_get(self.session, url, timeout=30, stream=True)
             response.raise_for_status()
             
             # Verificar que sea realmente una imagen
@@ -699,7 +669,7 @@ class HybridDataCrawler:
     def crawl_articles_with_requests(self, url: str, max_articles: int = 50) -> List[Dict]:
         """Crawlear artículos usando Requests"""
         try:
-            response = self.session.get(url, timeout=10)
+            response = polite_get(self.session, url, timeout=10)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -722,6 +692,7 @@ class HybridDataCrawler:
             return []
         
         try:
+            host_limiter.wait(url)
             self.driver.get(url)
             WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
@@ -750,6 +721,7 @@ class HybridDataCrawler:
             return []
         
         try:
+            host_limiter.wait(url)
             self.driver.get(url)
             WebDriverWait(self.driver, 5).until(  # Timeout más corto
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
@@ -772,92 +744,48 @@ class HybridDataCrawler:
             return []
     
     def _smart_scroll_for_content(self):
-        """Scroll inteligente para cargar contenido lazy - MEJORADO"""
+        """Scroll inteligente para cargar contenido lazy.
+        
+        Espera por mutaciones del DOM en lugar de sleeps fijos y cuenta solo los
+        enlaces de artículo añadidos en cada ronda (sin re-escanear la página).
+        """
         try:
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
-            scroll_attempts = 0
             max_attempts = 20  # Más intentos para sitios de noticias
-            articles_found = set()
+            watcher = DomMutationWatcher(self.driver)
+            watcher.install()
             
-            while scroll_attempts < max_attempts:
-                # Scroll progresivo en pasos más pequeños
-                current_scroll = 0
-                scroll_step = 500
-                
-                while current_scroll < last_height:
-                    self.driver.execute_script(f"window.scrollTo(0, {current_scroll});")
-                    time.sleep(0.5)  # Pausa más corta
-                    current_scroll += scroll_step
-                
-                # Scroll final al fondo
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
-                
-                # Verificar si hay nuevo contenido
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                
-                # Contar artículos únicos encontrados
-                current_articles = self.driver.execute_script("""
-                    var articles = [];
-                    var selectors = [
-                        'article', '.article', '[class*="article"]',
-                        '.news-item', '.post', '.entry', '.noticia',
-                        '[class*="news"]', '[class*="post"]', '[class*="entry"]', '[class*="noticia"]',
-                        'h1 a', 'h2 a', 'h3 a', '.title a', '.headline a', '.titulo a',
-                        '.card a', '.item a', '.list-item a', '.content a',
-                        'a[href*="/noticia/"]', 'a[href*="/article/"]', 'a[href*="/news/"]',
-                        'a[href*="/post/"]', 'a[href*="/entry/"]', 'a[href*="/articulo/"]',
-                        '.news-card a', '.article-card a', '.post-card a',
-                        '.story a', '.content-item a', '.news-content a',
-                        '[data-testid*="article"]', '[data-testid*="news"]',
-                        '.feed-item', '.timeline-item', '.stream-item'
-                    ];
-                    
-                    for (var i = 0; i < selectors.length; i++) {
-                        var elements = document.querySelectorAll(selectors[i]);
-                        for (var j = 0; j < elements.length; j++) {
-                            var element = elements[j];
-                            var link = element.tagName === 'A' ? element : element.querySelector('a');
-                            if (link && link.href) {
-                                articles.push(link.href);
-                            }
-                        }
-                    }
-                    return articles;
-                """)
-                
-                new_articles = set(current_articles) - articles_found
-                articles_found.update(current_articles)
-                
-                logger.info(f"📊 Scroll {scroll_attempts + 1}: {len(articles_found)} artículos únicos encontrados (+{len(new_articles)} nuevos)")
-                
-                if new_height == last_height and len(new_articles) == 0:
-                    scroll_attempts += 1
-                else:
-                    scroll_attempts = 0
-                    last_height = new_height
+            # Recorrido inicial por viewports (contenido que carga al hacerse visible)
+            watcher.scroll_through(step=500)
+            articles_found = set(watcher.take_new_links(ARTICLE_LINK_SELECTOR, initial=True))
+            idle_rounds = 0
+            
+            for attempt in range(max_attempts):
+                watcher.scroll_to_bottom()
+                new_articles = watcher.take_new_links(ARTICLE_LINK_SELECTOR)
                 
                 # Intentar hacer clic en botones "cargar más"
-                if len(new_articles) == 0:
-                    if self._detect_and_click_load_more():
-                        time.sleep(3)  # Esperar a que cargue el contenido
-                        continue
+                if not new_articles and self._detect_and_click_load_more(watcher):
+                    new_articles = watcher.take_new_links(ARTICLE_LINK_SELECTOR)
+                
+                articles_found.update(new_articles)
+                logger.info(f"📊 Scroll {attempt + 1}: {len(articles_found)} artículos únicos encontrados (+{len(new_articles)} nuevos)")
                 
-                # Si no encontramos nuevos artículos en 3 intentos consecutivos, parar
-                if scroll_attempts >= 3:
+                # Si no aparecen nuevos artículos en 2 rondas consecutivas, parar
+                idle_rounds = 0 if new_articles else idle_rounds + 1
+                if idle_rounds >= 2:
                     break
                     
             # Volver al inicio
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
             
             logger.info(f"🎯 Scroll completado: {len(articles_found)} artículos únicos detectados")
             
         except Exception as e:
             logger.warning(f"⚠️ Error en scroll inteligente: {e}")
     
-    def _detect_and_click_load_more(self):
-        """Detectar y hacer clic en botones de 'cargar más' o 'ver más'"""
+    def _detect_and_click_load_more(self, watcher: Optional[DomMutationWatcher] = None):
+        """Detectar y hacer clic en botones de 'cargar más' o 'ver más' (esperando el contenido que carguen)"""
+        watcher = watcher or DomMutationWatcher(self.driver)
         try:
             load_more_selectors = [
                 'button[class*="load"]', 'button[class*="more"]', 'button[class*="show"]',
@@ -876,9 +804,8 @@ class HybridDataCrawler:
                     for element in elements:
                         if element.is_displayed() and element.is_enabled():
                             try:
-                                self.driver.execute_script("arguments[0].click();", element)
+                                watcher.click_and_wait(element)
                                 logger.info(f"🔄 Clic en botón 'cargar más': {selector}")
-                                time.sleep(2)
                                 return True
                             except Exception as e:
                                 logger.debug(f"No se pudo hacer clic en {selector}: {e}")
@@ -1370,7 +1297,7 @@ class HybridDataCrawler:
             for subcat in subcategories:
                 try:
                     subcat_url = f"{base_domain}/{subcat}/"
-                    response = self.session.get(subcat_url, timeout=5)
+                    response = polite_get(self.session, subcat_url, timeout=5)
                     if response.status_code == 200:
                         soup = BeautifulSoup(response.content, 'html.parser')
                         articles = self._extract_articles_from_soup(soup, subcat_url)
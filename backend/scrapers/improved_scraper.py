@@ -11,9 +11,10 @@ import json
 import logging
 import hashlib
 from datetime import datetime
-import time
 from typing import List, Dict, Optional
 
+from backend.scrapers.host_scheduler import host_limiter, polite_get, fetch_allowed, job_deadline, FetchSkipped
+
 try:
     from playwright.sync_api import sync_playwright
 except Exception:
@@ -97,7 +98,7 @@ class ImprovedScraper:
                 return self._scrape_elperuano_section(url, max_articles if max_articles > 0 else 1000)
 
             # Obtener la página
-            response = self.session.get(url, timeout=30)
+            response = polite_get(self.session, url, timeout=30)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -109,7 +110,7 @@ class ImprovedScraper:
             # Intentar renderizado dinámico para encontrar más enlaces
             target_count = max_articles if max_articles > 0 else 1000  # Límite alto para "todos"
             
-            if len(article_links) < target_count:
+            if len(article_links) < target_count and fetch_allowed(url):
                 logging.info(f"⚙️ Encontrados {len(article_links)} enlaces, intentando renderizado dinámico para encontrar más...")
                 rendered_html = self._render_page_with_playwright(url)
                 if rendered_html:
@@ -150,15 +151,15 @@ class ImprovedScraper:
             articles = []
             total = len(articles_to_process)
             for i, link in enumerate(articles_to_process, 1):
+                if job_deadline.expired():
+                    logging.warning(f"⏰ Sin tiempo: se omiten {total - i + 1} artículos restantes")
+                    break
                 try:
                     article = self._scrape_article(link)
                     if article:
                         articles.append(article)
                         logging.info(f"✅ Artículo {i}/{total}: {article['title'][:50]}...")
                     
-                    # Pausa entre requests
-                    time.sleep(0.5)
-                    
                 except Exception as e:
                     logging.warning(f"⚠️ Error procesando artículo {link}: {e}")
                     continue
@@ -592,6 +593,11 @@ class ImprovedScraper:
     
     def _fetch_article_soup(self, url: str):
         """Intentar obtener el HTML del artículo probando variantes (por ejemplo AMP)."""
+        # Sitio caído o sin tiempo: no probar variantes ni Playwright
+        if not fetch_allowed(url):
+            logging.debug(f"⏭️ Omitido (circuito abierto o sin tiempo): {url}")
+            return None, None
+        
         # Para NYTimes, usar Playwright directamente desde el inicio
         if 'nytimes.com' in url.lower():
             logging.info(f"⚙️ Usando Playwright directamente para NYTimes: {url}")
@@ -627,15 +633,20 @@ class ImprovedScraper:
                 continue
             seen.add(candidate)
             try:
-                response = self.session.get(candidate, timeout=15)
+                response = polite_get(self.session, candidate, timeout=15)
                 response.raise_for_status()
                 soup = BeautifulSoup(response.content, 'html.parser')
                 if soup and soup.find('body'):
                     return soup, candidate
+            except FetchSkipped as e:
+                logging.debug(f"⏭️ {e}")
+                return None, None
             except Exception as e:
                 logging.debug(f"Intento fallido cargando {candidate}: {e}")
         
-        # Fallback a Playwright para otros sitios
+        # Fallback a Playwright para otros sitios (no si las variantes tumbaron el circuito)
+        if not fetch_allowed(url):
+            return None, None
         rendered_html = self._render_page_with_playwright(url)
         if rendered_html:
             try:
@@ -668,7 +679,9 @@ class ImprovedScraper:
                 
                 # Para NYTimes, usar domcontentloaded y luego esperar
                 if is_nytimes:
-                    page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                    host_limiter.wait(url)
+                    navigation = page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                    host_limiter.report(url, navigation.status if navigation else None)
                     # Esperar a que las imágenes se carguen
                     page.wait_for_timeout(3000)
                     # Hacer un scroll suave para activar lazy loading
@@ -682,7 +695,9 @@ class ImprovedScraper:
                     except:
                         pass  # Continuar aunque no esté completamente idle
                 else:
-                    page.goto(url, wait_until='networkidle', timeout=30000)
+                    host_limiter.wait(url)
+                    navigation = page.goto(url, wait_until='networkidle', timeout=30000)
+                    host_limiter.report(url, navigation.status if navigation else None)
                 
                 html = page.content()
                 browser.close()
@@ -707,7 +722,9 @@ class ImprovedScraper:
             with sync_playwright() as p:
                 browser = p.chromium.launch(headless=True, args=['--no-sandbox'])
                 page = browser.new_page()
-                page.goto(url, wait_until='networkidle', timeout=30000)
+                host_limiter.wait(url)
+                navigation = page.goto(url, wait_until='networkidle', timeout=30000)
+                host_limiter.report(url, navigation.status if navigation else None)
                 
                 # Hacer scroll varias veces para cargar contenido dinámico
                 links_found = set()
@@ -740,6 +757,12 @@ class ImprovedScraper:
             logging.warning(f"⚠️ Error haciendo scroll en {url}: {e}")
             return []
     
+    def scrape_article(self, url):
+        """Extraer un artículo suelto (p. ej. un enlace aparecido tras 'VER MÁS'); None si la URL no es de artículo"""
+        if not self._is_valid_article_url(url, urlparse(url).netloc.lower()):
+            return None
+        return self._scrape_article(url)
+    
     def _scrape_article(self, url):
         """Extraer contenido de un artículo individual"""
         try:
@@ -1001,7 +1024,7 @@ class ImprovedScraper:
             if not article_content:
                 content_divs = soup.find_all('div', class_=lambda x: x and 'col' in str(x) and ('s12' in str(x) or 'm8' in str(x) or 'l9' in str(x) or 'xl9' in str(x)))
             
-            for div in content_divs:
+                for div in content_divs:
                     text = div.get_text().strip()
                     if text and len(text) > 200:
                         preview = text[:300].lower()
@@ -2252,7 +2275,7 @@ class ImprovedScraper:
 
     def _get_elperuano_section_id(self, url: str) -> Optional[str]:
         try:
-            response = self.session.get(url, timeout=30)
+            response = polite_get(self.session, url, timeout=30)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, 'html.parser')
             hidden = soup.find('input', id='se')
@@ -2286,7 +2309,7 @@ class ImprovedScraper:
 
         api_url = f"https://elperuano.pe/portal/_GetNoticiasSeccionPagingWorker?idsec={section_id}&pageIndex=1&pageSize={max(10, max_articles)}"
         try:
-            response = self.session.get(api_url, timeout=30)
+            response = polite_get(self.session, api_url, timeout=30)
             response.raise_for_status()
             data = response.json()
         except Exception as e:
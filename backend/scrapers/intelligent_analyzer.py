@@ -13,6 +13,8 @@ import logging
 from datetime import datetime
 import time
 
+from backend.scrapers.host_scheduler import polite_get
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -34,7 +36,7 @@ class IntelligentPageAnalyzer:
             logging.info(f"🔍 Analizando página: {url}")
             
             # Obtener la página
-            response = self.session.get(url, timeout=30)
+            response = polite_get(self.session, url, timeout=30)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
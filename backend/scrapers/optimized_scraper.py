@@ -27,6 +27,8 @@ from queue import Queue
 import os
 from PIL import Image
 
+from backend.scrapers.host_scheduler import host_limiter, polite_get, fetch_allowed, FetchSkipped
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -100,7 +102,7 @@ class ImageManager:
     def download_image(self, img_data: Dict) -> Optional[str]:
         """Descargar imagen y retornar ruta local"""
         try:
-            response = requests.get(img_data['url'], timeout=10, stream=True)
+            response = polite_get(requests, img_data['url'], timeout=10, stream=True)
             response.raise_for_status()
             
             # Generar nombre único
@@ -323,9 +325,13 @@ class SmartScraper:
             logger.info(f"📦 Cache hit: {url}")
             return BeautifulSoup(cached_content, 'html.parser'), "cache"
         
+        # Sitio caído o sin tiempo: ni requests ni Selenium
+        if not fetch_allowed(url):
+            return None, "skipped"
+        
         # 2. Intentar con requests (rápido)
         try:
-            response = self.session.get(url, timeout=10)
+            response = polite_get(self.session, url, timeout=10)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -337,10 +343,15 @@ class SmartScraper:
             else:
                 logger.warning(f"⚠️ Requests content invalid: {url}")
                 
+        except FetchSkipped as e:
+            logger.info(f"⏭️ {e}: {url}")
+            return None, "skipped"
         except Exception as e:
             logger.warning(f"⚠️ Requests failed: {url} - {e}")
         
-        # 3. Fallback a Selenium solo si es necesario
+        # 3. Fallback a Selenium solo si es necesario (y si el fallo de requests no abrió el circuito)
+        if not fetch_allowed(url):
+            return None, "skipped"
         try:
             soup = self.get_page_with_selenium(url)
             if soup:
@@ -385,6 +396,7 @@ class SmartScraper:
                 return None
             
             try:
+                host_limiter.wait(url)
                 self.selenium_driver.get(url)
                 time.sleep(2)  # Espera mínima
                 html = self.selenium_driver.page_source
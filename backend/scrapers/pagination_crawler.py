@@ -12,6 +12,9 @@ from datetime import datetime
 from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
 import time
 import re
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -21,8 +24,75 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
 
+from backend.scrapers.dom_watcher import DomMutationWatcher, wait_for_document_ready, ARTICLE_LINK_SELECTOR
+from backend.scrapers.host_scheduler import host_limiter, host_of, polite_get
+
 logger = logging.getLogger(__name__)
 
+# Páginas numeradas que se extraen a la vez (cada petición espera su turno en el host)
+PAGE_WORKERS = 4
+# Tope de páginas al generar URLs con la plantilla del dominio
+MAX_TEMPLATE_PAGES = 50
+# Caracteres mínimos del título de una tarjeta nueva para tratarla como artículo
+MIN_CARD_TITLE_CHARS = 15
+# Vigencia del esquema de paginación detectado (segundos)
+PAGINATION_CACHE_TTL = 12 * 3600
+
+# Caché del proceso: por URL el resultado de la detección y por dominio la plantilla
+# de URL de las páginas numeradas ('/page/{page}', '?page={page}'...), para no
+# arrancar Selenium y volver a analizar la paginación en cada job
+_pagination_cache_lock = threading.Lock()
+_pagination_by_url = {}
+_page_template_by_domain = {}
+
+
+def _cache_key(url):
+    return url.split('#')[0].rstrip('/')
+
+
+def _page_template(base_url, pages):
+    """Sufijo de URL común a las páginas con '{page}' en lugar del número (None si no hay uno solo)"""
+    base = _cache_key(base_url)
+    templates = set()
+    for page in pages:
+        page_url = page.get('url')
+        if not page_url or _cache_key(page_url) == base:
+            continue
+        suffix = page_url[len(base):] if page_url.startswith(base) else None
+        number = str(page['number'])
+        if not suffix or '{' in suffix or '}' in suffix or suffix.count(number) != 1:
+            return None
+        templates.add(suffix.replace(number, '{page}'))
+    return templates.pop() if len(templates) == 1 else None
+
+
+def cached_pagination(url):
+    """Esquema de paginación vigente para la URL (por URL o por plantilla del dominio), o None"""
+    now = time.time()
+    with _pagination_cache_lock:
+        entry = _pagination_by_url.get(_cache_key(url))
+        if entry and now - entry[0] < PAGINATION_CACHE_TTL:
+            return dict(entry[1], pages=list(entry[1]['pages']))
+        template = _page_template_by_domain.get(host_of(url))
+        if template and now - template[0] < PAGINATION_CACHE_TTL:
+            return {'type': 'numbered', 'pages': [], 'template': template[1], 'next_button': None,
+                    'load_more_button': None, 'current_page': 1}
+    return None
+
+
+def remember_pagination(url, pagination_info):
+    """Guardar la detección (sin WebElements) y, si las páginas siguen una plantilla, la del dominio"""
+    pages = [{'number': page['number'], 'url': page.get('url')} for page in pagination_info.get('pages', [])]
+    info = {'type': pagination_info.get('type', 'none'), 'pages': pages, 'template': None,
+            'next_button': None, 'load_more_button': None, 'current_page': 1}
+    now = time.time()
+    with _pagination_cache_lock:
+        _pagination_by_url[_cache_key(url)] = (now, info)
+        if info['type'] == 'numbered':
+            template = _page_template(url, pages)
+            if template:
+                _page_template_by_domain[host_of(url)] = (now, template)
+
 class PaginationCrawler:
     """Crawler inteligente con paginación automática"""
     
@@ -38,9 +108,14 @@ class PaginationCrawler:
             'Upgrade-Insecure-Requests': '1',
         })
         
+        # El navegador se arranca solo si hace falta (detección sin caché o botón "VER MÁS")
         self.driver = None
-        if use_selenium:
+    
+    def _ensure_driver(self):
+        """WebDriver listo para usar, o None si Selenium está desactivado o no arrancó"""
+        if self.use_selenium and not self.driver:
             self._setup_selenium()
+        return self.driver if self.use_selenium else None
     
     def _setup_selenium(self):
         """Configurar Selenium WebDriver"""
@@ -62,12 +137,19 @@ class PaginationCrawler:
             self.use_selenium = False
     
     def detect_pagination_type(self, url):
-        """Detectar tipo de paginación en la página"""
+        """Detectar tipo de paginación en la página (usa la caché por URL/dominio si está vigente)"""
         try:
-            if self.use_selenium and self.driver:
-                return self._detect_pagination_selenium(url)
+            cached = cached_pagination(url)
+            if cached:
+                logger.info(f"♻️ Paginación en caché para {host_of(url)}: {cached['type']}")
+                return cached
+            
+            if self._ensure_driver():
+                pagination_info = self._detect_pagination_selenium(url)
             else:
-                return self._detect_pagination_requests(url)
+                pagination_info = self._detect_pagination_requests(url)
+            remember_pagination(url, pagination_info)
+            return pagination_info
         except Exception as e:
             logger.error(f"❌ Error detectando paginación: {e}")
             return {'type': 'none', 'pages': []}
@@ -75,8 +157,9 @@ class PaginationCrawler:
     def _detect_pagination_selenium(self, url):
         """Detectar paginación usando Selenium"""
         try:
+            host_limiter.wait(url)
             self.driver.get(url)
-            time.sleep(3)  # Esperar carga inicial
+            wait_for_document_ready(self.driver)  # Esperar carga inicial
             
             pagination_info = {
                 'type': 'none',
@@ -165,7 +248,7 @@ class PaginationCrawler:
     def _detect_pagination_requests(self, url):
         """Detectar paginación usando requests"""
         try:
-            response = self.session.get(url, timeout=30)
+            response = polite_get(self.session, url, timeout=30)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -235,8 +318,15 @@ class PaginationCrawler:
             logger.error(f"❌ Error en detección requests: {e}")
             return {'type': 'none', 'pages': []}
     
-    def crawl_all_pages(self, url, max_articles=100, extract_articles_func=None):
-        """Extraer artículos de todas las páginas disponibles"""
+    def crawl_all_pages(self, url, max_articles=100, extract_articles_func=None, page_workers=PAGE_WORKERS,
+                        scrape_article_func=None):
+        """Extraer artículos de todas las páginas disponibles
+        
+        page_workers: páginas numeradas extraídas a la vez (1 si extract_articles_func
+        usa un único navegador, que no admite llamadas concurrentes)
+        scrape_article_func(url) -> dict|None: extracción completa de los artículos que
+        aparecen tras cada 'VER MÁS'; sin ella se usan los datos de la tarjeta en la página
+        """
         all_articles = []
         seen_urls = set()
         
@@ -257,13 +347,14 @@ class PaginationCrawler:
             # Manejar paginación numérica (1 2 3 >)
             if pagination_info['type'] == 'numbered':
                 all_articles = self._crawl_numbered_pages(
-                    url, pagination_info, max_articles, extract_articles_func, seen_urls
+                    url, pagination_info, max_articles, extract_articles_func, seen_urls, page_workers
                 )
             
             # Manejar botón "VER MÁS"
             elif pagination_info['type'] == 'load_more':
                 all_articles = self._crawl_load_more_pages(
-                    url, pagination_info, max_articles, extract_articles_func, seen_urls
+                    url, pagination_info, max_articles, extract_articles_func, seen_urls,
+                    scrape_article_func, page_workers
                 )
             
             logger.info(f"🎉 Crawl completado: {len(all_articles)} artículos únicos extraídos")
@@ -273,38 +364,51 @@ class PaginationCrawler:
             logger.error(f"❌ Error en crawl con paginación: {e}")
             return all_articles
     
-    def _crawl_numbered_pages(self, base_url, pagination_info, max_articles, extract_func, seen_urls):
-        """Extraer de páginas numeradas"""
+    def _crawl_numbered_pages(self, base_url, pagination_info, max_articles, extract_func, seen_urls,
+                              page_workers=PAGE_WORKERS):
+        """Extraer de páginas numeradas, varias a la vez y con turno por host"""
         all_articles = []
+        if not extract_func:
+            return all_articles
+        
+        template = pagination_info.get('template')
+        if template:
+            # Plantilla del dominio: páginas 2, 3... hasta una tanda sin artículos nuevos
+            base = _cache_key(base_url)
+            page_urls = (base + template.format(page=n) for n in range(2, MAX_TEMPLATE_PAGES + 1))
+        else:
+            page_urls = (page['url'] for page in pagination_info['pages']
+                         if page.get('url') and _cache_key(page['url']) != _cache_key(base_url))
+        pending = itertools.chain([base_url], page_urls)
+        
+        def extract_page(page_url):
+            logger.info(f"📄 Extrayendo página: {page_url}")
+            try:
+                return extract_func(page_url) or []
+            except Exception as e:
+                logger.warning(f"⚠️ Error extrayendo {page_url}: {e}")
+                return []
         
         try:
-            # Extraer página actual
-            if extract_func:
-                articles = extract_func(base_url)
-                for article in articles:
-                    if article.get('url') not in seen_urls:
-                        seen_urls.add(article.get('url'))
-                        all_articles.append(article)
-            
-            # Extraer páginas numeradas
-            for page_info in pagination_info['pages']:
-                if len(all_articles) >= max_articles:
-                    break
-                
-                page_url = page_info['url']
-                if not page_url:
-                    continue
-                
-                logger.info(f"📄 Extrayendo página {page_info['number']}: {page_url}")
-                
-                if extract_func:
-                    articles = extract_func(page_url)
-                    for article in articles:
-                        if article.get('url') not in seen_urls and len(all_articles) < max_articles:
-                            seen_urls.add(article.get('url'))
-                            all_articles.append(article)
-                
-                time.sleep(1)  # Pausa entre páginas
+            workers = max(1, page_workers)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                while len(all_articles) < max_articles:
+                    batch = list(itertools.islice(pending, workers))
+                    if not batch:
+                        break
+                    
+                    # executor.map conserva el orden de las páginas al combinar
+                    new_articles = 0
+                    for articles in executor.map(extract_page, batch):
+                        for article in articles:
+                            if article.get('url') not in seen_urls and len(all_articles) < max_articles:
+                                seen_urls.add(article.get('url'))
+                                all_articles.append(article)
+                                new_articles += 1
+                    
+                    if template and new_articles == 0:
+                        logger.info("ℹ️ Páginas sin artículos nuevos: fin de la paginación")
+                        break
             
             return all_articles
             
@@ -312,17 +416,54 @@ class PaginationCrawler:
             logger.error(f"❌ Error en crawl numerado: {e}")
             return all_articles
     
-    def _crawl_load_more_pages(self, url, pagination_info, max_articles, extract_func, seen_urls):
-        """Extraer usando botón 'VER MÁS'"""
+    def _articles_from_cards(self, page_url, cards, seen_urls, limit, scrape_article_func=None,
+                             page_workers=PAGE_WORKERS):
+        """Artículos de las tarjetas añadidas al DOM (mismo sitio, no vistas, con título)"""
+        page_host = host_of(page_url)
+        cards = [card for card in cards
+                 if card.get('url') not in seen_urls and host_of(card['url']) == page_host
+                 and _cache_key(card['url']) != _cache_key(page_url)
+                 and len(card.get('title') or '') >= MIN_CARD_TITLE_CHARS][:limit]
+        
+        if not scrape_article_func:
+            now = datetime.now().isoformat()
+            return [{
+                'title': card['title'],
+                'url': card['url'],
+                'content': card.get('summary', ''),
+                'summary': card.get('summary', ''),
+                'scraped_at': now,
+                'images_found': 1 if card.get('image') else 0,
+                'images_downloaded': 0,
+                'images_data': [{'url': card['image'], 'alt': card['title'], 'title': '', 'priority': 'card'}]
+                               if card.get('image') else [],
+            } for card in cards]
+        
+        def scrape(card):
+            try:
+                return scrape_article_func(card['url'])
+            except Exception as e:
+                logger.warning(f"⚠️ Error extrayendo {card['url']}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=max(1, page_workers)) as executor:
+            return [article for article in executor.map(scrape, cards) if article]
+    
+    def _crawl_load_more_pages(self, url, pagination_info, max_articles, extract_func, seen_urls,
+                               scrape_article_func=None, page_workers=PAGE_WORKERS):
+        """Extraer usando botón 'VER MÁS': tras cada clic solo se procesan las tarjetas añadidas al DOM"""
         all_articles = []
         
-        if not self.use_selenium or not self.driver:
+        if not self._ensure_driver():
             logger.warning("⚠️ Selenium no disponible para botón 'VER MÁS'")
             return all_articles
         
         try:
+            host_limiter.wait(url)
             self.driver.get(url)
-            time.sleep(3)
+            wait_for_document_ready(self.driver)
+            watcher = DomMutationWatcher(self.driver)
+            watcher.install()
             
             # Extraer contenido inicial
             if extract_func:
@@ -332,6 +473,9 @@ class PaginationCrawler:
                         seen_urls.add(article.get('url'))
                         all_articles.append(article)
             
+            # Marcar como vistos los enlaces ya presentes (los cubre la extracción inicial)
+            watcher.take_new_articles(ARTICLE_LINK_SELECTOR, initial=True)
+            
             # Hacer clic en "VER MÁS" repetidamente
             max_clicks = 10  # Límite de seguridad
             clicks = 0
@@ -360,29 +504,32 @@ class PaginationCrawler:
                         logger.info("ℹ️ No se encontró más botón 'VER MÁS'")
                         break
                     
-                    # Hacer clic
-                    self.driver.execute_script("arguments[0].click();", load_more_button)
+                    # Hacer clic y esperar solo hasta que el nuevo contenido se asiente
+                    added = watcher.click_and_wait(load_more_button)
                     clicks += 1
                     logger.info(f"🔄 Clic #{clicks} en 'VER MÁS'")
                     
-                    # Esperar carga de nuevo contenido
-                    time.sleep(3)
+                    if added == 0:
+                        logger.info("ℹ️ El clic en 'VER MÁS' no cargó contenido nuevo")
+                        break
+                    
+                    # Extraer solo lo que añadió el clic, desde el DOM vivo
+                    cards = watcher.take_new_articles(ARTICLE_LINK_SELECTOR)
+                    articles = self._articles_from_cards(
+                        url, cards, seen_urls, max_articles - len(all_articles), scrape_article_func, page_workers
+                    )
+                    new_articles = 0
+                    for article in articles:
+                        if article.get('url') not in seen_urls and len(all_articles) < max_articles:
+                            seen_urls.add(article.get('url'))
+                            all_articles.append(article)
+                            new_articles += 1
                     
-                    # Extraer nuevos artículos
-                    if extract_func:
-                        articles = extract_func(self.driver.current_url)
-                        new_articles = 0
-                        for article in articles:
-                            if article.get('url') not in seen_urls and len(all_articles) < max_articles:
-                                seen_urls.add(article.get('url'))
-                                all_articles.append(article)
-                                new_articles += 1
-                        
-                        if new_articles == 0:
-                            logger.info("ℹ️ No se encontraron nuevos artículos")
-                            break
-                        
-                        logger.info(f"✅ {new_articles} nuevos artículos extraídos")
+                    if new_articles == 0:
+                        logger.info("ℹ️ No se encontraron nuevos artículos")
+                        break
+                    
+                    logger.info(f"✅ {new_articles} nuevos artículos extraídos ({len(cards)} enlaces nuevos en la página)")
                     
                 except Exception as e:
                     logger.warning(f"⚠️ Error en clic #{clicks}: {e}")
@@ -6,8 +6,6 @@ Este scraper usa Selenium para extraer datos de Reddit cuando la API no está di
 Usa old.reddit.com para facilitar el scraping.
 """
 
-import time
-import random
 import re
 import logging
 from typing import List, Dict, Optional
@@ -22,6 +20,9 @@ from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from backend.scrapers.dom_watcher import DomMutationWatcher, wait_for_document_ready
+from backend.scrapers.host_scheduler import host_limiter
+
 logger = logging.getLogger(__name__)
 
 # Intentar importar undetected-chromedriver
@@ -155,17 +156,22 @@ class RedditSeleniumScraper:
                 url = f"https://old.reddit.com/r/{subreddit_name}/"
             
             logger.info(f"🌐 Navegando a: {url}")
+            host_limiter.wait(url)
             self.driver.get(url)
-            time.sleep(3)
+            wait_for_document_ready(self.driver)
+            watcher = DomMutationWatcher(self.driver)
+            watcher.install()
             
             scrolls = 0
             max_scrolls = 50
+            idle_scrolls = 0
+            rescan = True
             posts_ids_vistos = set()
             
             while len(posts) < max_posts and scrolls < max_scrolls:
-                # Buscar posts visibles
-                post_elements = self.driver.find_elements(By.CSS_SELECTOR, 'div.thing')
-                logger.info(f"📊 Posts encontrados en página: {len(post_elements)}")
+                # Posts aparecidos desde la ronda anterior (toda la página en la primera o tras navegar)
+                post_elements = watcher.take_new_elements('div.thing', initial=rescan)
+                logger.info(f"📊 Posts nuevos en página: {len(post_elements)}")
                 
                 for post_elem in post_elements:
                     try:
@@ -420,9 +426,14 @@ class RedditSeleniumScraper:
                 
                 # Scroll para cargar más posts
                 logger.info(f"📜 Scroll {scrolls + 1}/{max_scrolls} para cargar más posts...")
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
+                added = watcher.scroll_to_bottom()
                 scrolls += 1
+                rescan = added < 0
+                
+                # Dos scrolls seguidos sin contenido nuevo: no hay más posts que cargar
+                idle_scrolls = idle_scrolls + 1 if added == 0 else 0
+                if idle_scrolls >= 2:
+                    break
             
             logger.info(f"✅ Extraídos {len(posts)} posts de r/{subreddit_name}")
             return posts
@@ -448,15 +459,20 @@ class RedditSeleniumScraper:
                 search_url = f"https://old.reddit.com/search/?q={search_query}&sort=new"
 
             logger.info(f"🌐 Buscando en Reddit con Selenium: {search_url}")
+            host_limiter.wait(search_url)
             self.driver.get(search_url)
-            time.sleep(3)
+            wait_for_document_ready(self.driver)
+            watcher = DomMutationWatcher(self.driver)
+            watcher.install()
 
             scrolls = 0
             max_scrolls = 40
+            idle_scrolls = 0
+            rescan = True
 
             while len(posts) < max_posts and scrolls < max_scrolls:
-                result_elements = self.driver.find_elements(By.CSS_SELECTOR, 'div.search-result')
-                logger.debug(f"🔍 Resultados visibles en búsqueda: {len(result_elements)}")
+                result_elements = watcher.take_new_elements('div.search-result', initial=rescan)
+                logger.debug(f"🔍 Resultados nuevos en búsqueda: {len(result_elements)}")
 
                 for result_elem in result_elements:
                     if len(posts) >= max_posts:
@@ -579,8 +595,13 @@ class RedditSeleniumScraper:
 
                 # Scroll para cargar más resultados
                 scrolls += 1
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(random.uniform(2, 3))
+                added = watcher.scroll_to_bottom()
+                rescan = added < 0
+
+                # Dos scrolls seguidos sin contenido nuevo: no hay más resultados
+                idle_scrolls = idle_scrolls + 1 if added == 0 else 0
+                if idle_scrolls >= 2:
+                    break
 
             return posts
 
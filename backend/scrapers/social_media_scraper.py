@@ -30,6 +30,9 @@ import random
 from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
 
+from backend.scrapers.bulk_post_extractor import extract_posts_bulk, choose_permalink
+from backend.scrapers.host_scheduler import host_limiter, polite_get
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -251,7 +254,7 @@ class TwitterScraper:
             session.headers.update(headers)
             
             # Intentar obtener la página
-            response = session.get(url, timeout=15, allow_redirects=True)
+            response = polite_get(session, url, timeout=15, allow_redirects=True)
             
             if response.status_code != 200:
                 logger.warning(f"⚠️ Método requests falló: Status {response.status_code}")
@@ -341,6 +344,7 @@ class TwitterScraper:
             # Intentar cargar la página con retry
             for attempt in range(3):
                 try:
+                    host_limiter.wait(url)
                     self.driver.get(url)
                     logger.info(f"✅ Página cargada: {url} (intento {attempt + 1})")
                     break
@@ -951,6 +955,7 @@ class TwitterScraper:
             self.driver.set_page_load_timeout(30)  # 30 segundos máximo para cargar página
             self.driver.implicitly_wait(10)  # Esperar hasta 10 segundos para elementos
             
+            host_limiter.wait(search_url)
             self.driver.get(search_url)
             logger.info(f"✅ Página de búsqueda cargada")
             time.sleep(self.delay)  # Delay responsable
@@ -1785,7 +1790,7 @@ class FacebookScraper:
             # Intentar obtener la página con retry
             for attempt in range(3):
                 try:
-                    response = session.get(url, timeout=30, allow_redirects=True)
+                    response = polite_get(session, url, timeout=30, allow_redirects=True)
                     if response.status_code == 200:
                         break
                     elif attempt < 2:
@@ -1915,11 +1920,11 @@ class FacebookScraper:
             pass
     
     def _extract_visible_posts_selenium(self, max_posts: int = 50) -> List[Dict]:
-        """Extrae todos los posts visibles usando Selenium directamente"""
+        """Extrae los posts visibles nuevos con una sola llamada a execute_script (ver bulk_post_extractor)"""
         new_posts = []
         
         try:
-            # Selectores para posts de Facebook (actualizados 2025)
+            # Selectores para posts de Facebook (actualizados 2025): gana el primero que encuentre posts
             post_selectors = [
                 "div[role='article']",
                 "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z",
@@ -1927,56 +1932,7 @@ class FacebookScraper:
                 "div[data-pagelet]",
                 "div[data-ad-preview='message']",
             ]
-            
-            posts_elements = []
-            for selector in post_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        posts_elements = elements
-                        logger.info(f"✅ Encontrados {len(elements)} elementos con selector: {selector}")
-                        break
-                except:
-                    continue
-            
-            if not posts_elements:
-                logger.warning("⚠️ No se encontraron elementos de posts con selectores estándar")
-                return []
-            
-            for post_element in posts_elements:
-                try:
-                    if len(new_posts) >= max_posts:
-                        break
-                    
-                    # Extraer datos del post usando el método mejorado
-                    post_data = self._extract_post_data_selenium_direct(post_element)
-                    
-                    if post_data and post_data.get('text') and len(post_data.get('text', '').strip()) > 20:
-                        # Evitar duplicados
-                        is_duplicate = any(
-                            existing.get('text') == post_data.get('text') or
-                            (existing.get('url') and post_data.get('url') and existing.get('url') == post_data.get('url'))
-                            for existing in new_posts
-                        )
-                        
-                        if not is_duplicate:
-                            new_posts.append(post_data)
-                            logger.debug(f"  ✓ Post extraído: {post_data.get('text', '')[:50]}...")
-                
-                except Exception as e:
-                    logger.debug(f"⚠️ Error extrayendo post individual: {e}")
-                    continue
-            
-            return new_posts
-            
-        except Exception as e:
-            logger.error(f"❌ Error extrayendo posts visibles: {e}")
-            return []
-    
-    def _extract_post_data_selenium_direct(self, post_element) -> Optional[Dict]:
-        """Extrae datos de un elemento post usando Selenium directamente"""
-        try:
-            # Extraer texto del post con múltiples selectores
+            # Selectores del texto del post, en orden de preferencia
             text_selectors = [
                 "div[data-ad-preview='message']",
                 "div.xdj266r.x11i5rnm.xat24cr.x1mh8g0r",
@@ -1985,121 +1941,97 @@ class FacebookScraper:
                 "span[dir='auto']",
             ]
             
-            content = ""
-            for selector in text_selectors:
-                try:
-                    text_element = post_element.find_element(By.CSS_SELECTOR, selector)
-                    content = text_element.text.strip()
-                    if content and len(content) > 20:
-                        break
-                except:
-                    continue
+            # Los posts ya devueltos en pasadas anteriores (antes del scroll) no se vuelven a serializar
+            records = extract_posts_bulk(
+                self.driver, strategies=[(selector, None) for selector in post_selectors],
+                text_selectors=text_selectors, max_posts=max_posts, skip_seen=True, min_posts=1
+            )
             
-            if not content or len(content) < 20:
-                return None
+            if not records:
+                logger.warning("⚠️ No se encontraron posts nuevos con selectores estándar")
+                return []
+            logger.info(f"✅ Encontrados {len(records)} posts nuevos visibles")
             
-            # Extraer imagen
-            image_url = None
-            try:
-                img_selectors = [
-                    "img[data-visualcompletion='media-vc-image']",
-                    "img[src*='fbcdn.net']",
-                    "img[src*='scontent']",
-                ]
+            for record in records:
+                post_data = self._post_from_bulk_record(record)
                 
-                for selector in img_selectors:
-                    try:
-                        img_element = post_element.find_element(By.CSS_SELECTOR, selector)
-                        img_src = img_element.get_attribute('src')
-                        if img_src and ('fbcdn.net' in img_src or 'scontent' in img_src):
-                            # Filtrar imágenes de perfil
-                            if not any(x in img_src.lower() for x in ['profile', 'avatar', 'picture', 'rsrc']):
-                                image_url = img_src
-                                break
-                    except:
-                        continue
-            except:
-                pass
-            
-            # Extraer métricas
-            metrics = self._extract_metrics_selenium(post_element)
-            
-            # Extraer URL del post
-            post_url = ""
-            try:
-                link_element = post_element.find_element(By.CSS_SELECTOR, "a[href*='/posts/']")
-                post_url = link_element.get_attribute('href')
-            except:
-                try:
-                    # Buscar cualquier enlace que contenga el ID del post
-                    links = post_element.find_elements(By.CSS_SELECTOR, "a[href*='facebook.com']")
-                    for link in links:
-                        href = link.get_attribute('href')
-                        if '/posts/' in href or '/permalink/' in href:
-                            post_url = href
-                            break
-                except:
-                    pass
-            
-            # Extraer username/autor
-            username = "Página de Facebook"
-            try:
-                name_elements = post_element.find_elements(By.CSS_SELECTOR, "strong, a[role='link'] span")
-                for elem in name_elements:
-                    name_text = elem.text.strip()
-                    if name_text and len(name_text) > 2 and len(name_text) < 50:
-                        username = name_text
-                        break
-            except:
-                pass
+                if post_data and len(post_data.get('text', '').strip()) > 20:
+                    # Evitar duplicados
+                    is_duplicate = any(
+                        existing.get('text') == post_data.get('text') or
+                        (existing.get('url') and post_data.get('url') and existing.get('url') == post_data.get('url'))
+                        for existing in new_posts
+                    )
+                    
+                    if not is_duplicate:
+                        new_posts.append(post_data)
+                        logger.debug(f"  ✓ Post extraído: {post_data.get('text', '')[:50]}...")
             
-            return {
-                'platform': 'facebook',
-                'username': username,
-                'text': content,
-                'cleaned_text': content.strip(),
-                'image_url': image_url,
-                'video_url': None,
-                'url': post_url,
-                'date': datetime.now().isoformat(),
-                'created_at': datetime.now().isoformat(),
-                'likes': metrics.get('likes', 0),
-                'comments': metrics.get('comments', 0),
-                'shares': metrics.get('shares', 0),
-                'retweets': 0,
-                'replies': metrics.get('comments', 0),
-                'hashtags': re.findall(r'#\w+', content),
-                'scraped_at': datetime.now().isoformat()
-            }
+            return new_posts
             
         except Exception as e:
-            logger.debug(f"⚠️ Error extrayendo datos del post: {e}")
+            logger.error(f"❌ Error extrayendo posts visibles: {e}")
+            return []
+    
+    def _post_from_bulk_record(self, record: Dict) -> Optional[Dict]:
+        """Convierte un registro de extract_posts_bulk al formato de post de este scraper"""
+        # Texto: el primer selector con más de 20 caracteres
+        content = next((text for text in record.get('selector_texts') or [] if len(text) > 20), '')
+        if not content:
             return None
+        
+        # Imagen: primero la de contenido (media-vc-image), después cualquiera del CDN que no sea de perfil
+        image_url = None
+        images = record.get('images') or []
+        for image in [i for i in images if i.get('vc') == 'media-vc-image'] + images:
+            img_src = image.get('src') or ''
+            if ('fbcdn.net' in img_src or 'scontent' in img_src) and \
+                    not any(x in img_src.lower() for x in ['profile', 'avatar', 'picture', 'rsrc']):
+                image_url = img_src
+                break
+        
+        links = record.get('links') or []
+        post_url = choose_permalink(links, ('/posts/',)) or choose_permalink(links, ('/permalink/',))
+        metrics = self._extract_metrics_from_text(record.get('full_text') or '')
+        
+        return {
+            'platform': 'facebook',
+            'username': record.get('author') or "Página de Facebook",
+            'text': content,
+            'cleaned_text': content.strip(),
+            'image_url': image_url,
+            'video_url': record.get('video'),
+            'url': post_url,
+            'date': datetime.now().isoformat(),
+            'created_at': datetime.now().isoformat(),
+            'likes': metrics.get('likes', 0),
+            'comments': metrics.get('comments', 0),
+            'shares': metrics.get('shares', 0),
+            'retweets': 0,
+            'replies': metrics.get('comments', 0),
+            'hashtags': re.findall(r'#\w+', content),
+            'scraped_at': datetime.now().isoformat()
+        }
     
-    def _extract_metrics_selenium(self, post_element) -> Dict:
-        """Extrae métricas usando Selenium directamente"""
+    def _extract_metrics_from_text(self, element_text: str) -> Dict:
+        """Extrae métricas del texto visible del post"""
         metrics = {
             'likes': 0,
             'comments': 0,
             'shares': 0,
         }
         
-        try:
-            # Buscar texto con métricas
-            element_text = post_element.text
-            
-            # Buscar números seguidos de palabras clave
-            if 'like' in element_text.lower() or 'reacciones' in element_text.lower() or 'me gusta' in element_text.lower():
-                metrics['likes'] = self._parse_metric_from_text(element_text, 'like')
-            
-            if 'comment' in element_text.lower() or 'comentarios' in element_text.lower():
-                metrics['comments'] = self._parse_metric_from_text(element_text, 'comment')
-            
-            if 'share' in element_text.lower() or 'compartir' in element_text.lower() or 'compartidos' in element_text.lower():
-                metrics['shares'] = self._parse_metric_from_text(element_text, 'share')
+        text_lower = element_text.lower()
         
-        except:
-            pass
+        # Buscar números seguidos de palabras clave
+        if 'like' in text_lower or 'reacciones' in text_lower or 'me gusta' in text_lower:
+            metrics['likes'] = self._parse_metric_from_text(element_text, 'like')
+        
+        if 'comment' in text_lower or 'comentarios' in text_lower:
+            metrics['comments'] = self._parse_metric_from_text(element_text, 'comment')
+        
+        if 'share' in text_lower or 'compartir' in text_lower or 'compartidos' in text_lower:
+            metrics['shares'] = self._parse_metric_from_text(element_text, 'share')
         
         return metrics
     
@@ -2243,6 +2175,7 @@ class FacebookScraper:
             # Intentar cargar la página con retry
             for attempt in range(3):
                 try:
+                    host_limiter.wait(url)
                     self.driver.get(url)
                     logger.info(f"✅ Página de Facebook cargada: {url} (intento {attempt + 1})")
                     break
@@ -2732,6 +2665,7 @@ class FacebookScraper:
                         self._setup_driver()
                         # Intentar recargar la página
                         try:
+                            host_limiter.wait(url)
                             self.driver.get(url)
                             time.sleep(5)
                             self._close_popups()
@@ -3599,7 +3533,8 @@ class RedditScraper:
     def _fetch_reddit_json(self, url: str, params: Optional[Dict] = None) -> Optional[Dict]:
         """Realiza una petición a los endpoints JSON públicos de Reddit"""
         try:
-            response = requests.get(
+            response = polite_get(
+                requests,
                 url,
                 headers=REDDIT_REQUEST_HEADERS,
                 params=params or {},
@@ -3756,8 +3691,6 @@ class RedditScraper:
             if not after:
                 break
 
-            time.sleep(1)  # Evitar rate-limits
-
         return collected[:max_posts]
 
     def _search_posts_json(self, query: str, subreddit: Optional[str], limit: int) -> List[Dict]:
@@ -3799,8 +3732,6 @@ class RedditScraper:
             if not after:
                 break
 
-            time.sleep(1)  # Evitar rate-limits
-
         return collected[:limit]
 
     def _search_posts_requests(self, query: str, subreddit: Optional[str], limit: int) -> List[Dict]:
@@ -3821,7 +3752,7 @@ class RedditScraper:
             url = f"https://old.reddit.com/search/?q={query_clean}&sort=new"
 
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = polite_get(requests, url, headers=headers, timeout=30)
             if response.status_code != 200:
                 logger.warning(f"⚠️ Búsqueda requests devolvió status {response.status_code} para URL: {url}")
                 return []
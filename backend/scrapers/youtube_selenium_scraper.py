@@ -5,7 +5,6 @@ PROYECTO ACADÉMICO - Solo para fines educativos
 Este scraper usa Selenium para extraer datos de YouTube cuando la API no está disponible.
 """
 
-import time
 import random
 import re
 import logging
@@ -20,6 +19,9 @@ from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from backend.scrapers.dom_watcher import DomMutationWatcher, wait_for_document_ready
+from backend.scrapers.host_scheduler import host_limiter
+
 logger = logging.getLogger(__name__)
 
 # Intentar importar undetected-chromedriver
@@ -29,6 +31,9 @@ try:
 except ImportError:
     UC_AVAILABLE = False
 
+# Contenedores de video en canales y resultados de búsqueda
+VIDEO_SELECTOR = 'ytd-video-renderer, div#dismissible'
+
 
 class YouTubeSeleniumScraper:
     """
@@ -126,6 +131,19 @@ class YouTubeSeleniumScraper:
         except:
             return "0:00"
     
+    def _wait_for_videos(self) -> DomMutationWatcher:
+        """Esperar a que YouTube pinte los primeros videos (antes: sleep fijo de 5 s) y observar el DOM"""
+        wait_for_document_ready(self.driver)
+        try:
+            WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, VIDEO_SELECTOR))
+            )
+        except TimeoutException:
+            logger.warning("⚠️ No aparecieron videos en la página")
+        watcher = DomMutationWatcher(self.driver)
+        watcher.install()
+        return watcher
+    
     def scrape_channel(self, channel_url: str, max_videos: int = 100) -> List[Dict]:
         """
         Scrapear videos de un canal de YouTube
@@ -148,17 +166,20 @@ class YouTubeSeleniumScraper:
                     channel_url = f"{channel_url}/videos"
             
             logger.info(f"🌐 Navegando a: {channel_url}")
+            host_limiter.wait(channel_url)
             self.driver.get(channel_url)
-            time.sleep(5)
+            watcher = self._wait_for_videos()
             
             scrolls = 0
             max_scrolls = 50
+            idle_scrolls = 0
+            rescan = True
             videos_ids_vistos = set()
             
             while len(videos) < max_videos and scrolls < max_scrolls:
-                # Buscar videos visibles
-                video_elements = self.driver.find_elements(By.CSS_SELECTOR, 'ytd-video-renderer, div#dismissible')
-                logger.info(f"📊 Videos encontrados en página: {len(video_elements)}")
+                # Videos aparecidos desde la ronda anterior (toda la página en la primera o tras navegar)
+                video_elements = watcher.take_new_elements(VIDEO_SELECTOR, initial=rescan)
+                logger.info(f"📊 Videos nuevos en página: {len(video_elements)}")
                 
                 for video_elem in video_elements:
                     try:
@@ -272,9 +293,14 @@ class YouTubeSeleniumScraper:
                 
                 # Scroll para cargar más videos
                 logger.info(f"📜 Scroll {scrolls + 1}/{max_scrolls} para cargar más videos...")
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
+                added = watcher.scroll_to_bottom()
                 scrolls += 1
+                rescan = added < 0
+                
+                # Dos scrolls seguidos sin contenido nuevo: fin de la lista
+                idle_scrolls = idle_scrolls + 1 if added == 0 else 0
+                if idle_scrolls >= 2:
+                    break
             
             logger.info(f"✅ Extraídos {len(videos)} videos del canal")
             return videos
@@ -299,17 +325,20 @@ class YouTubeSeleniumScraper:
         try:
             search_url = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
             logger.info(f"🌐 Buscando: {search_url}")
+            host_limiter.wait(search_url)
             self.driver.get(search_url)
-            time.sleep(5)
+            watcher = self._wait_for_videos()
             
             scrolls = 0
             max_scrolls = 30
+            idle_scrolls = 0
+            rescan = True
             videos_ids_vistos = set()
             
             while len(videos) < max_videos and scrolls < max_scrolls:
-                # Buscar videos visibles
-                video_elements = self.driver.find_elements(By.CSS_SELECTOR, 'ytd-video-renderer, div#dismissible')
-                logger.info(f"📊 Videos encontrados: {len(video_elements)}")
+                # Videos aparecidos desde la ronda anterior
+                video_elements = watcher.take_new_elements(VIDEO_SELECTOR, initial=rescan)
+                logger.info(f"📊 Videos nuevos: {len(video_elements)}")
                 
                 for video_elem in video_elements:
                     try:
@@ -391,9 +420,13 @@ class YouTubeSeleniumScraper:
                     break
                 
                 # Scroll para cargar más
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
+                added = watcher.scroll_to_bottom()
                 scrolls += 1
+                rescan = added < 0
+                
+                idle_scrolls = idle_scrolls + 1 if added == 0 else 0
+                if idle_scrolls >= 2:
+                    break
             
             logger.info(f"✅ Extraídos {len(videos)} videos de búsqueda: '{query}'")
             return videos
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Script para calcular la polaridad de los artículos guardados antes de existir articles.sentiment
+
+La ingesta guarda la polaridad de título y resumen de cada artículo nuevo; este
+script la calcula para las filas antiguas (sentiment IS NULL) por lotes, con un
+commit por lote. Se puede interrumpir y volver a ejecutar.
+
+Uso:
+    python backend/scripts/backfill_article_sentiment.py [--db news_database.db] [--batch-size 500]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from backend.systems.article_ingest import update_article_sentiment
+
+
+def backfill_article_sentiment(db_path: str, batch_size: int = 500) -> bool:
+    """Calcular articles.sentiment de los artículos que no la tienen"""
+    if not os.path.exists(db_path):
+        print(f"❌ Base de datos no encontrada: {db_path}")
+        return False
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA table_info(articles)")
+        if not any(column[1] == 'sentiment' for column in cursor.fetchall()):
+            print("❌ articles no tiene la columna sentiment (arrancar la API una vez para migrar el esquema)")
+            conn.close()
+            return False
+
+        cursor.execute("SELECT COUNT(*) FROM articles WHERE sentiment IS NULL")
+        pending = cursor.fetchone()[0]
+        print(f"🔄 Artículos sin polaridad: {pending}")
+
+        start = time.time()
+        done = 0
+        last_id = 0
+        while True:
+            cursor.execute("SELECT id FROM articles WHERE sentiment IS NULL AND id > ? ORDER BY id LIMIT ?",
+                           (last_id, batch_size))
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                break
+            done += update_article_sentiment(cursor, ids)
+            conn.commit()
+            last_id = ids[-1]
+            print(f"   ✅ {done}/{pending} artículos (hasta id {last_id})")
+
+        conn.close()
+
+        print(f"⏱️ {done} artículos procesados en {time.time() - start:.1f}s")
+        print("🎉 Backfill completado exitosamente")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error en el backfill: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcular articles.sentiment de los artículos antiguos")
+    parser.add_argument('--db', default=str(project_root / 'news_database.db'), help='Ruta a news_database.db')
+    parser.add_argument('--batch-size', type=int, default=500, help='Artículos por transacción')
+    args = parser.parse_args()
+
+    success = backfill_article_sentiment(args.db, batch_size=args.batch_size)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Script para asignar historia (cluster_id / is_duplicate) a los artículos guardados
+antes de existir la detección de casi duplicados
+
+Calcula la firma MinHash de cada artículo sin cluster_id, en orden de id y por
+lotes con un commit por lote, de modo que la API puede seguir funcionando
+mientras tanto. Se puede interrumpir y volver a ejecutar.
+
+Uso:
+    python backend/scripts/backfill_story_clusters.py [--db news_database.db] [--batch-size 500]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from backend.systems.story_clusters import BACKFILL_BATCH, StoryClusterIndex, has_story_columns
+
+
+def backfill_story_clusters(db_path: str, batch_size: int = BACKFILL_BATCH) -> bool:
+    """Asignar historia a los artículos que no la tienen"""
+    if not os.path.exists(db_path):
+        print(f"❌ Base de datos no encontrada: {db_path}")
+        return False
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        if not has_story_columns(cursor):
+            print("❌ articles no tiene cluster_id (arrancar la API una vez para migrar el esquema)")
+            conn.close()
+            return False
+
+        story_index = StoryClusterIndex()
+        pending = story_index.pending_backfill(cursor)
+        print(f"🔄 Artículos sin historia asignada: {pending}")
+
+        start = time.time()
+
+        def progress(done, last_id):
+            print(f"   ✅ {done}/{pending} artículos (hasta id {last_id})")
+
+        done = story_index.backfill(conn, batch_size=batch_size, progress=progress)
+
+        cursor.execute("SELECT COUNT(*) FROM articles WHERE is_duplicate = 1")
+        duplicates = cursor.fetchone()[0]
+        conn.close()
+
+        print(f"⏱️ {done} artículos procesados en {time.time() - start:.1f}s ({duplicates} duplicados en total)")
+        print("🎉 Backfill completado exitosamente")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error en el backfill: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asignar historia a los artículos guardados antes de la detección de duplicados")
+    parser.add_argument('--db', default=str(project_root / 'news_database.db'), help='Ruta a news_database.db')
+    parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH, help='Artículos por transacción')
+    args = parser.parse_args()
+
+    success = backfill_story_clusters(args.db, batch_size=args.batch_size)
+    sys.exit(0 if success else 1)
@@ -8,6 +8,20 @@ import mysql.connector
 import sqlite3
 import os
 from datetime import datetime
+import sys
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from backend.utils.article_store import fetch_export_rows
+
+# Columnas de articles en el orden del INSERT de MySQL
+ARTICLE_EXPORT_COLUMNS = [
+    'id', 'title', 'date', 'author', 'summary', 'content', 'original_url', 'category', 'newspaper',
+    'scraped_at', 'images_found', 'images_downloaded', 'images_data', 'article_id', 'url', 'region'
+]
 
 def get_mysql_config():
     """Obtener configuración de MySQL del usuario"""
@@ -157,9 +171,8 @@ def migrate_data(config):
         mysql_conn = mysql.connector.connect(**config)
         mysql_cursor = mysql_conn.cursor()
         
-        # Migrar artículos
-        sqlite_cursor.execute("SELECT * FROM articles")
-        articles = sqlite_cursor.fetchall()
+        # Migrar artículos (columnas explícitas: content vive en article_bodies e images_data en images)
+        articles = fetch_export_rows(sqlite_cursor, ARTICLE_EXPORT_COLUMNS)
         
         print(f"📊 Migrando {len(articles)} artículos...")
         
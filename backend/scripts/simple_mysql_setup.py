@@ -7,6 +7,19 @@ import mysql.connector
 import sqlite3
 import os
 import sys
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from backend.utils.article_store import fetch_export_rows
+
+# Columnas de articles en el orden del INSERT de MySQL
+ARTICLE_EXPORT_COLUMNS = [
+    'id', 'title', 'date', 'author', 'summary', 'content', 'original_url', 'category', 'newspaper',
+    'scraped_at', 'images_found', 'images_downloaded', 'images_data', 'article_id', 'url', 'region'
+]
 
 def try_mysql_connection():
     """Intentar diferentes configuraciones de MySQL"""
@@ -183,9 +196,8 @@ def migrate_data(config):
         mysql_conn = mysql.connector.connect(**config)
         mysql_cursor = mysql_conn.cursor()
         
-        # Migrar artículos
-        sqlite_cursor.execute("SELECT * FROM articles")
-        articles = sqlite_cursor.fetchall()
+        # Migrar artículos (columnas explícitas: content vive en article_bodies e images_data en images)
+        articles = fetch_export_rows(sqlite_cursor, ARTICLE_EXPORT_COLUMNS)
         
         print(f"📊 Migrando {len(articles)} artículos...")
         
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Script para separar el cuerpo de los artículos (content) en la tabla article_bodies
+
+Mueve el texto de articles.content a article_bodies comprimido con zstd, deja
+articles solo con metadatos y opcionalmente ejecuta VACUUM para recuperar el
+espacio. Se puede ejecutar varias veces: solo procesa los content que sigan en línea.
+
+Uso:
+    python backend/scripts/split_article_bodies.py [--db news_database.db] [--batch-size 1000] [--vacuum]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from backend.utils.article_store import (
+    BODY_CODEC, ensure_article_bodies_table, migrate_inline_bodies, prune_orphan_bodies
+)
+
+
+def _size_mb(db_path: str) -> float:
+    return os.path.getsize(db_path) / (1024 * 1024)
+
+
+def split_article_bodies(db_path: str, batch_size: int = 1000, vacuum: bool = False) -> bool:
+    """Migrar los cuerpos en línea de articles a article_bodies"""
+    if not os.path.exists(db_path):
+        print(f"❌ Base de datos no encontrada: {db_path}")
+        return False
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'articles'")
+        if not cursor.fetchone():
+            print("❌ La base de datos no tiene tabla articles")
+            conn.close()
+            return False
+
+        size_before = _size_mb(db_path)
+        print(f"📊 Tamaño inicial: {size_before:.1f} MB (códec: {BODY_CODEC})")
+
+        ensure_article_bodies_table(cursor)
+        conn.commit()
+
+        cursor.execute("SELECT COUNT(*) FROM articles WHERE content IS NOT NULL")
+        pending = cursor.fetchone()[0]
+        print(f"🔄 Artículos con content en línea: {pending}")
+
+        start = time.time()
+
+        def progress(migrated, last_id):
+            print(f"   ✅ {migrated}/{pending} artículos migrados (hasta id {last_id})")
+
+        migrated = migrate_inline_bodies(conn, batch_size=batch_size, progress=progress)
+        removed = prune_orphan_bodies(cursor)
+        conn.commit()
+
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(content)), 0) FROM article_bodies")
+        bodies, raw_size, stored_size = cursor.fetchone()
+        ratio = (raw_size / stored_size) if stored_size else 0
+        print(f"📦 {bodies} cuerpos en article_bodies: {raw_size / 1e6:.1f} MB de texto -> {stored_size / 1e6:.1f} MB (x{ratio:.1f})")
+        if removed:
+            print(f"🗑️ {removed} cuerpos huérfanos eliminados")
+
+        if vacuum:
+            print("🧹 Ejecutando VACUUM para recuperar el espacio de articles...")
+            conn.execute("VACUUM")
+
+        conn.close()
+
+        print(f"⏱️ {migrated} artículos migrados en {time.time() - start:.1f}s")
+        print(f"📊 Tamaño final: {_size_mb(db_path):.1f} MB")
+        print("🎉 Migración completada exitosamente")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error en la migración: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Separar articles.content en article_bodies comprimido")
+    parser.add_argument('--db', default=str(project_root / 'news_database.db'), help='Ruta a news_database.db')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Artículos por transacción')
+    parser.add_argument('--vacuum', action='store_true', help='Ejecutar VACUUM al terminar')
+    args = parser.parse_args()
+
+    success = split_article_bodies(args.db, batch_size=args.batch_size, vacuum=args.vacuum)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Registro compartido de artículos recién guardados
+
+Las dos rutas de guardado (save_articles_to_db de la API y del scraper automático
+independiente) insertan/actualizan filas de articles de forma distinta, pero lo que
+viene después es lo mismo y debe ocurrir en la misma transacción que los INSERT:
+historia (casi duplicados), serie diaria de términos del predictor, índice de
+estadísticas del corpus, cuerpo comprimido en article_bodies, imágenes como
+filas de images, polaridad del artículo (articles.sentiment) y, al final, la
+versión de datos de artículos (invalida la caché de respuestas de la API aunque
+el guardado lo haga otro proceso).
+"""
+
+from typing import Collection, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.systems.corpus_stats_index import CorpusStatsIndex
+from backend.systems.story_clusters import StoryClusterIndex
+from backend.systems.trending_predictor_system import update_term_daily_counts
+from backend.utils.article_store import replace_article_images, write_bodies
+from backend.utils.data_version import ARTICLES, bump_data_version
+from backend.utils.sentiment_analyzer import article_polarity
+
+
+def update_article_sentiment(cursor, article_ids: Iterable[int]) -> int:
+    """Guardar en articles.sentiment la polaridad de título y resumen de los artículos dados"""
+    ids = list(article_ids)
+    updates = []
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        cursor.execute(f"SELECT id, title, summary FROM articles WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+        updates.extend((article_polarity(title, summary), article_id) for article_id, title, summary in cursor.fetchall())
+    cursor.executemany("UPDATE articles SET sentiment = ? WHERE id = ?", updates)
+    return len(updates)
+
+
+def record_article_ingest(cursor, rows: Sequence[Tuple[int, str, Optional[str], str, str]],
+                          new_ids: Collection[int], image_rows: List[Tuple[int, str, list]],
+                          story_index: StoryClusterIndex, corpus_index: CorpusStatsIndex) -> Dict[int, Tuple[int, bool]]:
+    """Registrar un lote de artículos ya escritos en articles (sin hacer commit).
+
+    rows: (id, title, content, newspaper, scraped_at) de cada artículo insertado o actualizado.
+    new_ids: ids de los insertados; solo ellos suman a term_daily_counts, y una vez por historia.
+    image_rows: (id, article_id, images_data) para reescribir sus filas de images.
+
+    Devuelve {id: (cluster_id, is_duplicate)} de story_index.assign.
+    """
+    clusters = story_index.assign(cursor, [(row[0], row[1], row[2]) for row in rows])
+    update_term_daily_counts(cursor, [row[1:] for row in rows if row[0] in new_ids and not clusters[row[0]][1]])
+    corpus_index.index_articles(cursor, rows)
+    # El texto completo va comprimido a article_bodies (articles guarda solo metadatos)
+    write_bodies(cursor, [(row[0], row[2]) for row in rows])
+    replace_article_images(cursor, image_rows)
+    cursor.executemany("UPDATE articles SET images_data = NULL WHERE id = ? AND images_data IS NOT NULL",
+                       [(row[0],) for row in image_rows])
+    # Polaridad guardada: la búsqueda avanzada filtra por columna en lugar de analizar cada fila
+    update_article_sentiment(cursor, [row[0] for row in rows])
+    bump_data_version(cursor, ARTICLES)
+    return clusters
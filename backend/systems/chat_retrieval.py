@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Recuperación de artículos para el chatbot
+
+Un ChatRetriever vive lo que dura un turno del chat: cada búsqueda distinta se
+resuelve con una sola consulta rankeada (las coincidencias de todos los términos
+primero, luego las parciales por puntuación) y su resultado queda memoizado
+para el resto de ramas de intención del turno. Las búsquedas también se guardan
+por sesión (ChatSessionCache), así un "resumen" después de un "buscar" reutiliza
+los artículos ya encontrados sin volver a consultar la base de datos.
+
+Con un índice vectorial (backend/systems/vector_index.py) el ranking se aplica
+solo a los candidatos más parecidos de todo el corpus, y los candidatos muy
+similares sin coincidencia de términos completan los resultados.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.utils.article_store import articles_source, primary_image_sql
+from backend.utils.data_version import ARTICLES, get_data_version
+
+logger = logging.getLogger(__name__)
+
+STOP_WORDS = frozenset([
+    'de', 'la', 'el', 'los', 'las', 'y', 'o', 'u', 'en', 'del', 'al', 'para', 'por', 'con', 'un', 'una',
+    'que', 'se', 'su', 'sus', 'a', 'es', 'son', 'estan', 'fue', 'fueron', 'sobre',
+    'articulos', 'noticias', 'noticia'
+])
+
+# Puntos por término encontrado en cada campo (mismo criterio que el antiguo scoring semántico)
+TITLE_WEIGHT = 2.0
+SUMMARY_WEIGHT = 1.5
+FULLTEXT_WEIGHT = 1.0
+# Puntuación mínima de un resultado que no contiene todos los términos
+MIN_PARTIAL_SCORE = 2.0
+# Las coincidencias completas se ordenan siempre por encima de las parciales
+FULL_MATCH_BONUS = 1000.0
+MAX_RESULTS = 50
+# Candidatos pedidos al índice vectorial (más si hay filtros que los descarten)
+VECTOR_CANDIDATES = 300
+VECTOR_CANDIDATES_FILTERED = 1000
+# Similitud mínima de un candidato semántico sin coincidencia de términos
+SEMANTIC_MIN_SCORE = 0.2
+
+_MONTHS = {'Jan': '01', 'Feb': '02', 'Mar': '03', 'Apr': '04', 'May': '05', 'Jun': '06',
+           'Jul': '07', 'Aug': '08', 'Sep': '09', 'Oct': '10', 'Nov': '11', 'Dec': '12'}
+_DATE_PATTERN = re.compile(r'(\d{1,2})\s+(\w{3})\s+(\d{4})')
+
+
+def normalize_text(s: Optional[str]) -> str:
+    """Minúsculas y sin tildes"""
+    if not s:
+        return ''
+    s = s.lower()
+    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+
+
+def parse_date(date_str: Optional[str]) -> Optional[str]:
+    """Fecha de un artículo en formato YYYY-MM-DD (None si no se reconoce)"""
+    if not date_str:
+        return None
+    try:
+        if 'T' in date_str:
+            return date_str[:10]
+        m = _DATE_PATTERN.search(date_str)
+        if m:
+            day, mon, year = m.groups()
+            return f"{year}-{_MONTHS.get(mon, '01')}-{day.zfill(2)}"
+        if '-' in date_str[:10]:
+            return date_str[:10]
+    except Exception:
+        return None
+    return None
+
+
+def query_terms(query: str) -> List[str]:
+    """Términos normalizados de una consulta (sin stop words ni palabras de 1-2 letras)"""
+    raw = normalize_text((query or '').strip().strip('"').strip("'"))
+    terms = [w for w in raw.split() if len(w) > 2 and w not in STOP_WORDS]
+    if not terms and raw.strip():
+        terms = [raw.strip()]
+    # Sin duplicados, conservando el orden
+    return list(dict.fromkeys(terms))
+
+
+def _rank_function(terms: List[str], match_newspaper: bool):
+    """UDF rank(title, summary, content, newspaper) para una consulta.
+
+    Devuelve -1 si el artículo no es relevante; si lo es, su puntuación
+    (+FULL_MATCH_BONUS cuando aparecen todos los términos).
+    """
+    min_terms = max(1, len(terms) // 2) if len(terms) > 1 else 1
+
+    def rank(title, summary, content, newspaper):
+        title_n = normalize_text(title)
+        summary_n = normalize_text(summary)
+        content_n = normalize_text(content)
+        newspaper_n = normalize_text(newspaper) if match_newspaper else ''
+        score = 0.0
+        found = 0
+        for term in terms:
+            in_title = term in title_n
+            in_summary = term in summary_n
+            in_content = term in content_n
+            if in_title:
+                score += TITLE_WEIGHT
+            if in_summary:
+                score += SUMMARY_WEIGHT
+            if in_title or in_summary or in_content:
+                score += FULLTEXT_WEIGHT
+                found += 1
+            elif newspaper_n and term in newspaper_n:
+                found += 1
+        if found == len(terms):
+            return FULL_MATCH_BONUS + score
+        if found >= min_terms and score >= MIN_PARTIAL_SCORE:
+            return score
+        return -1.0
+
+    return rank
+
+
+class ChatSessionCache:
+    """Búsquedas recientes por sesión de chat (LRU de sesiones con TTL)"""
+
+    def __init__(self, max_sessions: int = 1000, ttl: float = 900.0, max_searches: int = 20):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_searches = max_searches
+        self._sessions: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _session(self, session_key) -> Dict[str, Any]:
+        now = time.monotonic()
+        session = self._sessions.get(session_key)
+        if session is None or now - session['touched'] > self.ttl:
+            session = {'touched': now, 'searches': OrderedDict(), 'last': None}
+            self._sessions[session_key] = session
+        session['touched'] = now
+        self._sessions.move_to_end(session_key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def get_search(self, session_key, search_key) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            searches = self._session(session_key)['searches']
+            result = searches.get(search_key)
+            if result is not None:
+                searches.move_to_end(search_key)
+            return result
+
+    def put_search(self, session_key, search_key, entry: Dict[str, Any], query: str):
+        with self._lock:
+            session = self._session(session_key)
+            session['searches'][search_key] = entry
+            session['searches'].move_to_end(search_key)
+            while len(session['searches']) > self.max_searches:
+                session['searches'].popitem(last=False)
+            if entry['articles']:
+                session['last'] = {'query': query, 'articles': entry['articles']}
+
+    def last_results(self, session_key) -> Optional[Dict[str, Any]]:
+        """Última búsqueda con resultados de la sesión ({'query', 'articles'})"""
+        with self._lock:
+            return self._session(session_key)['last']
+
+
+class ChatRetriever:
+    """Recuperación memoizada para un turno del chat"""
+
+    def __init__(self, db_path: str, sessions: Optional[ChatSessionCache] = None, session_key=None,
+                 vector_index=None):
+        """
+        Args:
+            db_path: Ruta a news_database.db
+            sessions: Caché de sesiones compartida (None = solo memo del turno)
+            session_key: Identificador de la sesión (usuario + session_id del cliente)
+            vector_index: ArticleVectorIndex opcional (None o sin sincronizar = recorrer la tabla)
+        """
+        self.db_path = db_path
+        self.sessions = sessions
+        self.session_key = session_key
+        self.vector_index = vector_index
+        self._memo: Dict[Tuple, Any] = {}
+        self.queries = 0  # consultas realmente enviadas a la BD en este turno
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.create_function('parse_date', 1, parse_date)
+        return conn
+
+    def invalidate(self):
+        """Olvidar lo memoizado (p.ej. tras guardar artículos nuevos en el mismo turno)"""
+        self._memo.clear()
+
+    def search(self, query: str = '', date_from: Optional[str] = None, date_to: Optional[str] = None,
+               limit: int = 20, newspaper: Optional[str] = None) -> List[Dict]:
+        """Artículos para una consulta, ordenados por relevancia (o por recencia si no hay texto)"""
+        limit = min(limit, MAX_RESULTS)
+        terms = tuple(query_terms(query))
+        version = get_data_version(self.db_path, ARTICLES)
+        search_key = ('search', terms, date_from, date_to, newspaper, version)
+
+        # Una búsqueda más amplia del mismo turno/sesión también sirve para un límite menor
+        cached = self._memo.get(search_key)
+        if cached is None and self.sessions is not None and self.session_key is not None:
+            cached = self.sessions.get_search(self.session_key, search_key)
+        if cached is not None and (cached['complete'] or len(cached['articles']) >= limit):
+            self._memo[search_key] = cached
+            return cached['articles'][:limit]
+
+        articles = None
+        if terms and self.vector_index is not None and self.vector_index.ready:
+            try:
+                articles = self._vector_query(query, list(terms), date_from, date_to, limit, newspaper)
+            except Exception as e:
+                logger.warning(f"⚠️ Búsqueda vectorial no disponible, se usa la consulta completa: {e}")
+        if articles is None:
+            articles = self._ranked_query(list(terms), date_from, date_to, limit, newspaper)
+        entry = {'articles': articles, 'complete': len(articles) < limit}
+        self._memo[search_key] = entry
+        if self.sessions is not None and self.session_key is not None:
+            self.sessions.put_search(self.session_key, search_key, entry, query)
+        return articles
+
+    def last_results(self) -> Optional[Dict[str, Any]]:
+        """Última búsqueda con resultados de la sesión: {'query', 'articles'}"""
+        if self.sessions is None or self.session_key is None:
+            return None
+        last = self.sessions.last_results(self.session_key)
+        if not last:
+            return None
+        return {'query': last['query'], 'articles': last['articles']}
+
+    @staticmethod
+    def _filters(date_from, date_to, newspaper) -> Tuple[str, List[Any]]:
+        params: List[Any] = []
+        where = ""
+        if newspaper:
+            where += " AND newspaper = ?"
+            params.append(newspaper)
+        if date_from:
+            where += " AND (parse_date(date) >= ? OR date >= ?)"
+            params.extend([date_from, date_from])
+        if date_to:
+            where += " AND (parse_date(date) <= ? OR date <= ?)"
+            params.extend([date_to, date_to + 'T23:59:59'])
+        return where, params
+
+    def _vector_query(self, query: str, terms: List[str], date_from, date_to, limit: int, newspaper) -> List[Dict]:
+        """Ranking por términos sobre los candidatos del índice vectorial (todo el corpus)"""
+        filtered = bool(newspaper or date_from or date_to)
+        candidates = self.vector_index.search(query, k=VECTOR_CANDIDATES_FILTERED if filtered else VECTOR_CANDIDATES)
+        if not candidates:
+            return []
+        similarity = dict(candidates)
+        where, params = self._filters(date_from, date_to, newspaper)
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            source = articles_source(cur)
+            conn.create_function('chat_rank', 4, _rank_function(terms, match_newspaper=not newspaper))
+            rows = []
+            ids = list(similarity)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                cur.execute(f"""
+                    SELECT id, title, url, summary, date, newspaper, {primary_image_sql('a')},
+                           chat_rank(title, summary, content, newspaper) AS rank
+                    FROM {source} a
+                    WHERE id IN ({','.join('?' * len(chunk))}) {where}
+                """, chunk + params)
+                rows.extend(cur.fetchall())
+            self.queries += 1
+        finally:
+            conn.close()
+
+        # Primero las coincidencias por términos (por puntuación), luego los candidatos muy similares
+        matched = [r for r in rows if r[8] >= 0]
+        matched.sort(key=lambda r: (r[8], similarity[r[0]]), reverse=True)
+        semantic = [r for r in rows if r[8] < 0 and similarity[r[0]] >= SEMANTIC_MIN_SCORE]
+        semantic.sort(key=lambda r: similarity[r[0]], reverse=True)
+        return [
+            {'id': r[0], 'title': r[1], 'url': r[2], 'summary': r[3], 'date': r[4],
+             'newspaper': r[5], 'image': r[6]}
+            for r in (matched + semantic)[:limit]
+        ]
+
+    def _ranked_query(self, terms: List[str], date_from, date_to, limit: int, newspaper) -> List[Dict]:
+        where, params = self._filters(date_from, date_to, newspaper)
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+
+            if terms:
+                # El cuerpo solo hace falta (vista con content descomprimido) si hay texto que buscar
+                source = articles_source(cur)
+                conn.create_function('chat_rank', 4, _rank_function(terms, match_newspaper=not newspaper))
+                # ORDER BY usa el alias: chat_rank se evalúa una sola vez por fila
+                sql = f"""
+                    SELECT id, title, url, summary, date, newspaper, {primary_image_sql('a')},
+                           chat_rank(title, summary, content, newspaper) AS rank
+                    FROM {source} a
+                    WHERE 1=1 {where}
+                    ORDER BY rank DESC, scraped_at DESC
+                    LIMIT ?
+                """
+            else:
+                sql = f"""
+                    SELECT id, title, url, summary, date, newspaper, {primary_image_sql('a')}, 0 AS rank
+                    FROM articles a
+                    WHERE 1=1 {where}
+                    ORDER BY scraped_at DESC
+                    LIMIT ?
+                """
+            cur.execute(sql, params + [limit])
+            self.queries += 1
+            return [
+                {'id': r[0], 'title': r[1], 'url': r[2], 'summary': r[3], 'date': r[4],
+                 'newspaper': r[5], 'image': r[6]}
+                for r in cur.fetchall() if r[8] >= 0
+            ]
+        finally:
+            conn.close()
+
+    def source_overview(self, source_name: str, recent: int = 5) -> Dict[str, Any]:
+        """Conteo, última fecha y artículos recientes de un medio (nombre aproximado)"""
+        key = ('source', source_name.lower(), recent, get_data_version(self.db_path, ARTICLES))
+        if key in self._memo:
+            return self._memo[key]
+
+        pattern = f"%{source_name.lower()}%"
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT COUNT(*), MAX(date) FROM articles WHERE LOWER(newspaper) LIKE ?", (pattern,))
+            count, last_date = cur.fetchone()
+            rows = []
+            if count:
+                cur.execute("""
+                    SELECT title, url, summary FROM articles
+                    WHERE LOWER(newspaper) LIKE ?
+                    ORDER BY scraped_at DESC LIMIT ?
+                """, (pattern, recent))
+                rows = cur.fetchall()
+            self.queries += 1
+        finally:
+            conn.close()
+
+        overview = {
+            'count': count or 0,
+            'last_date': last_date,
+            'recent': [{'title': t, 'url': u, 'summary': s} for t, u, s in rows],
+        }
+        self._memo[key] = overview
+        return overview
@@ -1,12 +1,194 @@
 import sqlite3
 import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
 import re
 
+from backend.utils.article_store import articles_source
+from backend.systems.story_clusters import STORY_KEY_SQL, has_story_columns
+
+# Palabras de contexto usadas por calculate_relevance / analyze_sentiment
+BUSINESS_WORDS = ['empresa', 'compañía', 'marca', 'producto', 'servicio', 'ventas', 'mercado', 'competencia']
+POSITIVE_CONTEXT_WORDS = ['excelente', 'bueno', 'mejor', 'increíble', 'fantástico', 'recomiendo', 'satisfecho', 'feliz']
+NEGATIVE_CONTEXT_WORDS = ['malo', 'terrible', 'horrible', 'pésimo', 'decepcionado', 'problema', 'error', 'falla']
+
+
+class CompetitorKeywordMatcher:
+    """Matcher en memoria sobre las palabras clave de todos los competidores activos.
+
+    Compila todas las keywords (de todos los usuarios) en una única expresión
+    regular con lookahead, de modo que un solo recorrido del texto detecta cada
+    keyword presente. Las keywords contenidas dentro de otras se resuelven con un
+    cierre precalculado, así que el resultado es idéntico a hacer
+    ``keyword in texto`` por cada keyword.
+    """
+
+    def __init__(self, competitors: List[Tuple[int, int, str, List[str]]]):
+        # keyword en minúsculas -> [(competitor_id, user_id, competitor_name, keyword original)]
+        self.keyword_owners: Dict[str, List[Tuple[int, int, str, str]]] = {}
+        for competitor_id, user_id, competitor_name, keywords in competitors:
+            for keyword in keywords or []:
+                if not isinstance(keyword, str) or not keyword.strip():
+                    continue
+                owners = self.keyword_owners.setdefault(keyword.lower(), [])
+                owners.append((competitor_id, user_id, competitor_name, keyword))
+
+        # Keywords más largas primero: en cada posición gana la más larga y las
+        # que contiene se recuperan vía self._implied
+        ordered = sorted(self.keyword_owners, key=len, reverse=True)
+        self._implied: Dict[str, List[str]] = {
+            kw: [other for other in ordered if other != kw and other in kw]
+            for kw in ordered
+        }
+        self._pattern = (
+            re.compile('(?=(' + '|'.join(re.escape(kw) for kw in ordered) + '))')
+            if ordered else None
+        )
+
+    def __bool__(self) -> bool:
+        return self._pattern is not None
+
+    def find_keywords(self, text_lower: str) -> set:
+        """Devolver el conjunto de keywords (en minúsculas) presentes en el texto"""
+        if self._pattern is None or not text_lower:
+            return set()
+        found = set()
+        for hit in self._pattern.finditer(text_lower):
+            keyword = hit.group(1)
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self._implied[keyword])
+        return found
+
+    def match(self, text_lower: str) -> List[Tuple[int, int, str, str, str]]:
+        """Devolver (competitor_id, user_id, competitor_name, keyword, keyword_lower) por cada coincidencia"""
+        matches = []
+        for keyword_lower in self.find_keywords(text_lower):
+            for competitor_id, user_id, competitor_name, keyword in self.keyword_owners[keyword_lower]:
+                matches.append((competitor_id, user_id, competitor_name, keyword, keyword_lower))
+        # Orden estable (por competidor) como en el recorrido original
+        matches.sort(key=lambda m: (m[0], m[3]))
+        return matches
+
+
+# Palabras usadas por el sentimiento simple de analyze_existing_articles
+SIMPLE_POSITIVE_WORDS = ['bueno', 'excelente', 'positivo', 'éxito', 'crecimiento', 'mejora', 'ganancia', 'victoria']
+SIMPLE_NEGATIVE_WORDS = ['malo', 'mal', 'negativo', 'fracaso', 'pérdida', 'problema', 'crisis', 'derrota']
+
+# Tamaño de cada fragmento (en ids de artículos) procesado por un worker del pool
+ANALYSIS_SHARD_SIZE = 5000
+# Artículos que se analizan por competidor sin dominios en su primera pasada
+INITIAL_ANALYSIS_WINDOW = 10000
+
+
+def normalize_domain(value: str) -> str:
+    """Normalizar un dominio o URL a host en minúsculas sin 'www.' (ej. 'https://www.elcomercio.pe/x' -> 'elcomercio.pe')"""
+    if not value or not isinstance(value, str):
+        return ''
+    value = value.strip().lower()
+    host = urlparse(value).netloc if '//' in value else value.split('/')[0]
+    host = host.split('@')[-1].split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+def domain_matches(domain: Optional[str], domains) -> bool:
+    """True si el host normalizado es uno de los dominios o un subdominio suyo (ej. 'peru.elcomercio.pe')"""
+    if not domain:
+        return False
+    return domain in domains or any(domain.endswith('.' + d) for d in domains)
+
+
+def _domain_filter_sql(domains: List[str]) -> Tuple[str, List[str]]:
+    """Condición SQL sobre articles.domain equivalente a domain_matches (igualdad por índice + subdominios)"""
+    sql = f"(domain IN ({','.join('?' * len(domains))})" + ''.join(' OR domain LIKE ?' for _ in domains) + ')'
+    return sql, list(domains) + ['%.' + d for d in domains]
+
+
+def _simple_sentiment_score(text_lower: str) -> float:
+    """Sentimiento simple basado en palabras positivas/negativas (texto ya en minúsculas)"""
+    positive_count = sum(1 for word in SIMPLE_POSITIVE_WORDS if word in text_lower)
+    negative_count = sum(1 for word in SIMPLE_NEGATIVE_WORDS if word in text_lower)
+    
+    if positive_count > negative_count:
+        return 0.3  # Positivo
+    elif negative_count > positive_count:
+        return -0.3  # Negativo
+    else:
+        return 0.0  # Neutral
+
+
+def _scan_articles_shard(news_db_path: str, low_id: int, high_id: int,
+                         competitors: List[Tuple], domain_filter: Optional[List[str]]) -> List[Tuple]:
+    """Analizar los artículos con id en (low_id, high_id] para los competidores dados.
+    
+    Se ejecuta en un worker del pool de procesos. Cada competidor es
+    (id, user_id, nombre, keywords, dominios, watermark); solo se consideran los
+    artículos posteriores a su watermark y, si tiene dominios, de esos dominios.
+    Devuelve filas (competitor_id, article_id, keyword, sentiment_score, url, domain, relevance, story_id).
+    """
+    matcher = CompetitorKeywordMatcher([(c[0], c[1], c[2], c[3]) for c in competitors])
+    if not matcher:
+        return []
+    by_id = {c[0]: c for c in competitors}
+    # Orden de keywords del competidor: la primera que aparezca es la mención
+    keyword_rank = {c[0]: {kw.lower(): i for i, kw in reversed(list(enumerate(c[3])))} for c in competitors}
+    
+    conn = sqlite3.connect(f"file:{news_db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    # Historia del artículo (cluster de casi duplicados); bases sin la columna usan el propio id
+    story_key = STORY_KEY_SQL if has_story_columns(cursor) else 'id'
+    query = f'''
+        SELECT id, title, content, url, domain, {story_key}
+        FROM {articles_source(cursor)}
+        WHERE id > ? AND id <= ?
+    '''
+    params: List[Any] = [low_id, high_id]
+    if domain_filter is not None:
+        filter_sql, filter_params = _domain_filter_sql(domain_filter)
+        query += f" AND {filter_sql}"
+        params.extend(filter_params)
+    cursor.execute(query, params)
+    
+    rows = []
+    for article_id, title, content, url, domain, story_id in cursor:
+        title_lower = (title or '').lower()
+        article_text = f"{title_lower} {(content or '').lower()}"
+        best = {}
+        for competitor_id, _, _, keyword, keyword_lower in matcher.match(article_text):
+            competitor = by_id[competitor_id]
+            if article_id <= competitor[5]:
+                continue
+            if competitor[4] and not domain_matches(domain, competitor[4]):
+                continue
+            rank = keyword_rank[competitor_id].get(keyword_lower, len(keyword_rank[competitor_id]))
+            if competitor_id not in best or rank < best[competitor_id][0]:
+                best[competitor_id] = (rank, keyword, keyword_lower)
+        
+        if not best:
+            continue
+        sentiment_score = _simple_sentiment_score(article_text)
+        for competitor_id, (_, keyword, keyword_lower) in best.items():
+            # Relevancia simple: 1.0 si está en el título, 0.5 si solo en contenido
+            relevance = 1.0 if keyword_lower in title_lower else 0.5
+            rows.append((competitor_id, article_id, keyword, sentiment_score, url, domain, relevance, story_id))
+    
+    conn.close()
+    return rows
+
+
 class CompetitiveIntelligenceSystem:
-    def __init__(self, db_path: str = "competitive_intelligence.db"):
+    # Cache de matchers compartida entre instancias: db_path -> (firma, matcher)
+    _matcher_cache: Dict[str, Tuple[tuple, CompetitorKeywordMatcher]] = {}
+    _matcher_lock = threading.Lock()
+
+    def __init__(self, db_path: str = "competitive_intelligence.db", news_db_path: str = "news_database.db"):
         self.db_path = db_path
+        self.news_db_path = news_db_path
         self.init_database()
     
     def init_database(self):
@@ -47,6 +229,36 @@ class CompetitiveIntelligenceSystem:
             )
         ''')
         
+        # Watermark del análisis incremental: último articles.id analizado por competidor
+        try:
+            cursor.execute('ALTER TABLE user_competitors ADD COLUMN last_analyzed_article_id INTEGER DEFAULT 0')
+        except sqlite3.OperationalError:
+            pass
+        
+        # Historia (cluster de casi duplicados) del artículo: la misma nota en varios medios cuenta una vez
+        try:
+            cursor.execute('ALTER TABLE competitor_mentions ADD COLUMN story_id INTEGER')
+        except sqlite3.OperationalError:
+            pass
+        
+        # Una mención por (competidor, artículo, keyword): eliminar duplicados previos y crear índice único
+        try:
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_mentions_unique
+                ON competitor_mentions (competitor_id, article_id, mention_text)
+            ''')
+        except sqlite3.IntegrityError:
+            cursor.execute('''
+                DELETE FROM competitor_mentions WHERE id NOT IN (
+                    SELECT MIN(id) FROM competitor_mentions
+                    GROUP BY competitor_id, article_id, mention_text
+                )
+            ''')
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_mentions_unique
+                ON competitor_mentions (competitor_id, article_id, mention_text)
+            ''')
+        
         # Tabla de análisis competitivo
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS competitor_analytics (
@@ -101,114 +313,107 @@ class CompetitiveIntelligenceSystem:
         conn.close()
         print("✅ Base de datos de Competitive Intelligence creada correctamente")
     
-    def analyze_existing_articles(self, user_id: int = None) -> Dict:
-        """Analizar todos los artículos existentes para encontrar menciones de competidores"""
+    def analyze_existing_articles(self, user_id: int = None, max_workers: Optional[int] = None) -> Dict:
+        """Analizar los artículos existentes para encontrar menciones de competidores.
+        
+        Es incremental: cada competidor guarda el último articles.id analizado
+        (last_analyzed_article_id), así que una nueva ejecución solo procesa los
+        artículos nuevos y, tras agregar un competidor, solo ese competidor
+        recorre el histórico. Los rangos grandes se reparten en un pool de procesos.
+        """
         print("🔍 Iniciando análisis de artículos existentes...")
         
-        # Conectar a ambas bases de datos
         ci_conn = sqlite3.connect(self.db_path)
-        news_conn = sqlite3.connect("news_database.db")
+        news_conn = sqlite3.connect(self.news_db_path)
         
         ci_cursor = ci_conn.cursor()
         news_cursor = news_conn.cursor()
         
         # Obtener competidores (de todos los usuarios o de un usuario específico)
+        query = '''
+            SELECT id, user_id, competitor_name, competitor_keywords, competitor_domains,
+                   COALESCE(last_analyzed_article_id, 0)
+            FROM user_competitors 
+            WHERE is_active = 1
+        '''
+        params = ()
         if user_id:
-            ci_cursor.execute('''
-                SELECT id, user_id, competitor_name, competitor_keywords, competitor_domains
-                FROM user_competitors 
-                WHERE is_active = 1 AND user_id = ?
-            ''', (user_id,))
-        else:
-            ci_cursor.execute('''
-                SELECT id, user_id, competitor_name, competitor_keywords, competitor_domains
-                FROM user_competitors 
-                WHERE is_active = 1
-            ''')
+            query += ' AND user_id = ?'
+            params = (user_id,)
+        ci_cursor.execute(query, params)
+        rows = ci_cursor.fetchall()
+        print(f"📊 Analizando {len(rows)} competidores...")
         
-        competitors = ci_cursor.fetchall()
-        print(f"📊 Analizando {len(competitors)} competidores...")
+        self.ensure_article_domains(news_conn)
+        news_cursor.execute('SELECT COALESCE(MAX(id), 0) FROM articles')
+        max_article_id = news_cursor.fetchone()[0]
         
-        total_mentions = 0
+        # Primera pasada de competidores sin dominios: limitada a los últimos artículos
+        news_cursor.execute('SELECT id FROM articles ORDER BY id DESC LIMIT 1 OFFSET ?', (INITIAL_ANALYSIS_WINDOW - 1,))
+        window_row = news_cursor.fetchone()
+        initial_floor = window_row[0] - 1 if window_row else 0
         
-        for competitor_id, comp_user_id, name, keywords_json, domains_json in competitors:
+        competitors = []
+        for competitor_id, comp_user_id, name, keywords_json, domains_json, watermark in rows:
             try:
-                keywords = json.loads(keywords_json) if keywords_json else []
-                domains = json.loads(domains_json) if domains_json else []
-                
-                print(f"🏢 Analizando competidor: {name}")
-                print(f"   Keywords: {keywords}")
-                print(f"   Domains: {domains}")
-                
-                # Obtener artículos que coincidan con los dominios
-                if domains:
-                    domain_conditions = " OR ".join([f"url LIKE '%{domain}%'" for domain in domains])
-                    query = f'''
-                        SELECT id, title, content, url, newspaper
-                        FROM articles 
-                        WHERE ({domain_conditions})
-                    '''
-                else:
-                    # Si no hay dominios específicos, analizar todos los artículos (limitado a últimos 10000 para mejor rendimiento)
-                    query = '''
-                        SELECT id, title, content, url, newspaper
-                        FROM articles
-                        ORDER BY id DESC
-                        LIMIT 10000
-                    '''
-                
-                news_cursor.execute(query)
-                articles = news_cursor.fetchall()
-                print(f"   📰 Analizando {len(articles)} artículos...")
-                
-                mentions_found = 0
-                
-                for article_id, title, content, url, newspaper in articles:
-                    article_text = f"{title} {content}".lower()
-                    
-                    # Buscar cada palabra clave en el artículo (búsqueda más flexible)
-                    for keyword in keywords:
-                        keyword_lower = keyword.lower().strip()
-                        if keyword_lower and keyword_lower in article_text:
-                            # Verificar si ya existe esta mención para evitar duplicados
-                            ci_cursor.execute('''
-                                SELECT COUNT(*) FROM competitor_mentions 
-                                WHERE competitor_id = ? AND article_id = ? AND mention_text LIKE ?
-                            ''', (competitor_id, article_id, f'%{keyword}%'))
-                            
-                            if ci_cursor.fetchone()[0] > 0:
-                                continue  # Ya existe, saltar
-                            
-                            # Calcular relevancia (simple: 1.0 si está en título, 0.5 si solo en contenido)
-                            relevance = 1.0 if keyword_lower in title.lower() else 0.5
-                            
-                            # Análisis de sentimiento simple
-                            sentiment_score = self._calculate_simple_sentiment(article_text, keyword)
-                            sentiment_label = self._get_sentiment_label(sentiment_score)
-                            
-                            # Extraer dominio de la URL
-                            source_domain = self._extract_domain(url)
-                            
-                            # Guardar mención
-                            ci_cursor.execute('''
-                                INSERT INTO competitor_mentions 
-                                (competitor_id, article_id, mention_text, sentiment_score, sentiment_label, 
-                                 source_url, source_domain, relevance_score)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                competitor_id, article_id, f"Mención de '{keyword}' en {newspaper}",
-                                sentiment_score, sentiment_label, url, source_domain, relevance
-                            ))
-                            
-                            mentions_found += 1
-                            total_mentions += 1
-                            break  # Solo contar una mención por artículo
-                
-                print(f"   ✅ Encontradas {mentions_found} menciones para {name}")
-                
-            except Exception as e:
-                print(f"   ❌ Error analizando {name}: {e}")
+                keywords = [kw.strip() for kw in (json.loads(keywords_json) if keywords_json else []) if isinstance(kw, str)]
+                domains = {normalize_domain(d) for d in (json.loads(domains_json) if domains_json else [])} - {''}
+            except (TypeError, ValueError) as e:
+                print(f"   ❌ Error leyendo configuración de {name}: {e}")
                 continue
+            if not domains and watermark == 0:
+                watermark = initial_floor
+            if watermark < max_article_id:
+                competitors.append((competitor_id, comp_user_id, name, keywords, frozenset(domains), watermark))
+        
+        total_mentions = 0
+        mentions_by_competitor: Dict[int, int] = {}
+        
+        if competitors:
+            low_id = min(c[5] for c in competitors)
+            # Si todos los competidores pendientes tienen dominios, filtrar por el índice de dominio
+            domain_filter = None
+            if all(c[4] for c in competitors):
+                domain_filter = sorted(set().union(*(c[4] for c in competitors)))
+            
+            shards = [(self.news_db_path, lo, min(lo + ANALYSIS_SHARD_SIZE, max_article_id), competitors, domain_filter)
+                      for lo in range(low_id, max_article_id, ANALYSIS_SHARD_SIZE)]
+            print(f"   📰 Analizando artículos {low_id + 1}-{max_article_id} en {len(shards)} fragmento(s)...")
+            
+            if len(shards) > 1:
+                # spawn: se puede llamar desde un hilo de Flask y un fork de un proceso con hilos no es seguro
+                with ProcessPoolExecutor(max_workers=max_workers or min(len(shards), os.cpu_count() or 1),
+                                         mp_context=multiprocessing.get_context('spawn')) as pool:
+                    results = list(pool.map(_scan_articles_shard, *zip(*shards)))
+            else:
+                results = [_scan_articles_shard(*shard) for shard in shards]
+            
+            for shard_rows in results:
+                by_competitor: Dict[int, List[Tuple]] = {}
+                for row in shard_rows:
+                    by_competitor.setdefault(row[0], []).append(row)
+                for competitor_id, competitor_rows in by_competitor.items():
+                    # El índice único reemplaza la consulta de verificación de duplicados;
+                    # rowcount cuenta solo las menciones realmente insertadas
+                    ci_cursor.executemany('''
+                        INSERT OR IGNORE INTO competitor_mentions 
+                        (competitor_id, article_id, mention_text, sentiment_score, sentiment_label, 
+                         source_url, source_domain, relevance_score, story_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', [
+                        (competitor_id, article_id, keyword, sentiment_score, self._get_sentiment_label(sentiment_score),
+                         url, domain, relevance, story_id)
+                        for _, article_id, keyword, sentiment_score, url, domain, relevance, story_id in competitor_rows
+                    ])
+                    total_mentions += ci_cursor.rowcount
+                    mentions_by_competitor[competitor_id] = mentions_by_competitor.get(competitor_id, 0) + ci_cursor.rowcount
+            
+            ci_cursor.executemany('''
+                UPDATE user_competitors SET last_analyzed_article_id = ? WHERE id = ?
+            ''', [(max_article_id, c[0]) for c in competitors])
+            
+            for competitor in competitors:
+                print(f"   ✅ Encontradas {mentions_by_competitor.get(competitor[0], 0)} menciones para {competitor[2]}")
         
         ci_conn.commit()
         ci_conn.close()
@@ -221,21 +426,24 @@ class CompetitiveIntelligenceSystem:
             "competitors_analyzed": len(competitors)
         }
     
+    def ensure_article_domains(self, news_conn):
+        """Asegurar la columna articles.domain (indexada) y completarla para filas antiguas"""
+        cursor = news_conn.cursor()
+        try:
+            cursor.execute('ALTER TABLE articles ADD COLUMN domain TEXT')
+        except sqlite3.OperationalError:
+            pass
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_articles_domain ON articles(domain)')
+        
+        cursor.execute('SELECT id, url FROM articles WHERE domain IS NULL')
+        pending = [(normalize_domain(url), article_id) for article_id, url in cursor.fetchall()]
+        if pending:
+            cursor.executemany('UPDATE articles SET domain = ? WHERE id = ?', pending)
+        news_conn.commit()
+    
     def _calculate_simple_sentiment(self, text: str, keyword: str) -> float:
         """Calcular sentimiento simple basado en palabras positivas/negativas"""
-        positive_words = ['bueno', 'excelente', 'positivo', 'éxito', 'crecimiento', 'mejora', 'ganancia', 'victoria']
-        negative_words = ['malo', 'mal', 'negativo', 'fracaso', 'pérdida', 'problema', 'crisis', 'derrota']
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        
-        if positive_count > negative_count:
-            return 0.3  # Positivo
-        elif negative_count > positive_count:
-            return -0.3  # Negativo
-        else:
-            return 0.0  # Neutral
+        return _simple_sentiment_score(text.lower())
     
     def _get_sentiment_label(self, score: float) -> str:
         """Convertir score de sentimiento a etiqueta"""
@@ -255,6 +463,24 @@ class CompetitiveIntelligenceSystem:
         except:
             return url.split('/')[2] if '//' in url else url
     
+    def attach_to(self, cursor) -> str:
+        """Adjuntar la base de CI a una conexión de noticias (antes de cualquier escritura)
+        para que ambas se modifiquen en la misma transacción. Devuelve el esquema a usar."""
+        if os.path.abspath(self.db_path) == os.path.abspath(self.news_db_path):
+            return 'main'
+        cursor.execute("ATTACH DATABASE ? AS ci", (self.db_path,))
+        return 'ci'
+    
+    def reset_article_watermarks(self, cursor, schema: str = 'main'):
+        """Reiniciar el análisis incremental tras borrar los artículos.
+        
+        Los ids de artículos vuelven a empezar al resetear sqlite_sequence: las marcas
+        last_analyzed_article_id harían saltar los artículos nuevos y las menciones viejas
+        (que apuntan a ids reutilizados) bloquearían las nuevas por el índice único.
+        """
+        cursor.execute(f"UPDATE {schema}.user_competitors SET last_analyzed_article_id = 0")
+        cursor.execute(f"DELETE FROM {schema}.competitor_mentions")
+    
     def add_competitor(self, user_id: int, competitor_name: str, keywords: List[str], domains: List[str] = None) -> int:
         """Agregar un nuevo competidor para monitorear"""
         conn = sqlite3.connect(self.db_path)
@@ -275,10 +501,67 @@ class CompetitiveIntelligenceSystem:
         competitor_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        self.invalidate_matcher()
         
         print(f"✅ Competidor '{competitor_name}' agregado para usuario {user_id}")
         return competitor_id
     
+    def deactivate_competitor(self, user_id: int, competitor_id: int) -> bool:
+        """Marcar un competidor como inactivo (eliminación lógica)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE user_competitors 
+            SET is_active = 0, updated_at = CURRENT_TIMESTAMP 
+            WHERE id = ? AND user_id = ?
+        ''', (competitor_id, user_id))
+        
+        updated = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        self.invalidate_matcher()
+        return updated
+    
+    def invalidate_matcher(self):
+        """Descartar el matcher en memoria para que se reconstruya en el próximo análisis"""
+        with self._matcher_lock:
+            self._matcher_cache.pop(self.db_path, None)
+    
+    def _competitors_signature(self, cursor) -> tuple:
+        """Firma barata del conjunto de competidores (detecta cambios hechos por otros procesos)"""
+        cursor.execute('''
+            SELECT COUNT(*), MAX(id), MAX(updated_at), SUM(is_active)
+            FROM user_competitors
+        ''')
+        return tuple(cursor.fetchone())
+    
+    def get_keyword_matcher(self, cursor) -> CompetitorKeywordMatcher:
+        """Obtener el matcher de keywords, reconstruyéndolo solo si cambió el conjunto de competidores"""
+        signature = self._competitors_signature(cursor)
+        with self._matcher_lock:
+            cached = self._matcher_cache.get(self.db_path)
+            if cached and cached[0] == signature:
+                return cached[1]
+        
+        cursor.execute('''
+            SELECT uc.id, uc.user_id, uc.competitor_name, uc.competitor_keywords
+            FROM user_competitors uc
+            WHERE uc.is_active = 1
+        ''')
+        competitors = []
+        for competitor_id, user_id, competitor_name, keywords_json in cursor.fetchall():
+            try:
+                keywords = json.loads(keywords_json) if keywords_json else []
+            except (TypeError, ValueError):
+                keywords = []
+            competitors.append((competitor_id, user_id, competitor_name, keywords))
+        
+        matcher = CompetitorKeywordMatcher(competitors)
+        with self._matcher_lock:
+            self._matcher_cache[self.db_path] = (signature, matcher)
+        return matcher
+    
     def get_competitor_count(self, user_id: int) -> int:
         """Obtener número de competidores activos del usuario"""
         conn = sqlite3.connect(self.db_path)
@@ -353,54 +636,80 @@ class CompetitiveIntelligenceSystem:
     
     def analyze_article_for_competitors(self, article_id: int, article_text: str, article_url: str) -> List[Dict]:
         """Analizar un artículo en busca de menciones de competidores"""
+        return self.analyze_articles_for_competitors([(article_id, article_text, article_url)])
+    
+    def analyze_articles_for_competitors(self, articles: List[Tuple[int, str, str]],
+                                         story_ids: Optional[Dict[int, int]] = None) -> List[Dict]:
+        """Analizar un lote de artículos (article_id, texto, url) contra los competidores de todos los usuarios.
+        
+        Usa el matcher en memoria (una pasada por artículo) y guarda todas las
+        menciones del lote en una sola transacción. story_ids ({article_id: cluster_id})
+        guarda la historia de cada mención; sin entrada, la historia es el propio artículo.
+        """
+        story_ids = story_ids or {}
+        if not articles:
+            return []
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # Obtener todos los competidores activos
-        cursor.execute('''
-            SELECT uc.id, uc.user_id, uc.competitor_name, uc.competitor_keywords
-            FROM user_competitors uc
-            WHERE uc.is_active = 1
-        ''')
-        
         mentions_found = []
-        article_text_lower = article_text.lower()
+        rows = []
         
-        for row in cursor.fetchall():
-            competitor_id, user_id, competitor_name, keywords_json = row
-            keywords = json.loads(keywords_json)
+        try:
+            matcher = self.get_keyword_matcher(cursor)
+            if not matcher:
+                return []
             
-            # Buscar menciones de palabras clave
-            for keyword in keywords:
-                if keyword.lower() in article_text_lower:
-                    # Calcular relevancia
-                    relevance = self.calculate_relevance(article_text, keyword, competitor_name)
+            for article_id, article_text, article_url in articles:
+                article_text_lower = (article_text or '').lower()
+                matches = matcher.match(article_text_lower)
+                if not matches:
+                    continue
+                
+                # Contexto empresarial: no depende de la keyword, se calcula una vez por artículo
+                business_bonus = 0.05 * sum(1 for word in BUSINESS_WORDS if word in article_text_lower)
+                name_present = {}
+                source_domain = self.extract_domain(article_url)
+                
+                for competitor_id, user_id, competitor_name, keyword, keyword_lower in matches:
+                    if competitor_name not in name_present:
+                        name_present[competitor_name] = competitor_name.lower() in article_text_lower
+                    
+                    # Misma fórmula que calculate_relevance, sin recalcular lo que no depende de la keyword
+                    relevance = min(article_text_lower.count(keyword_lower) * 0.1, 0.5)
+                    if name_present[competitor_name]:
+                        relevance += 0.3
+                    relevance = min(relevance + business_bonus, 1.0)
                     
                     if relevance > 0.3:  # Solo menciones relevantes
-                        # Analizar sentimiento
-                        sentiment_score, sentiment_label = self.analyze_sentiment(article_text, keyword)
+                        sentiment_score, sentiment_label = self._context_sentiment(article_text_lower, keyword_lower)
                         
-                        # Guardar mención
-                        cursor.execute('''
-                            INSERT INTO competitor_mentions 
-                            (competitor_id, article_id, mention_text, sentiment_score, sentiment_label, 
-                             source_url, source_domain, relevance_score)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (competitor_id, article_id, keyword, sentiment_score, sentiment_label, 
-                              article_url, self.extract_domain(article_url), relevance))
+                        rows.append((competitor_id, article_id, keyword, sentiment_score, sentiment_label,
+                                     article_url, source_domain, relevance, story_ids.get(article_id, article_id)))
                         
                         mentions_found.append({
                             'competitor_id': competitor_id,
                             'user_id': user_id,
                             'competitor_name': competitor_name,
+                            'article_id': article_id,
                             'keyword': keyword,
                             'sentiment_score': sentiment_score,
                             'sentiment_label': sentiment_label,
                             'relevance_score': relevance
                         })
+            
+            if rows:
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO competitor_mentions 
+                    (competitor_id, article_id, mention_text, sentiment_score, sentiment_label, 
+                     source_url, source_domain, relevance_score, story_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+        finally:
+            conn.close()
         
-        conn.commit()
-        conn.close()
         return mentions_found
     
     def calculate_relevance(self, text: str, keyword: str, competitor_name: str) -> float:
@@ -421,8 +730,7 @@ class CompetitiveIntelligenceSystem:
             relevance += 0.3
         
         # Contexto empresarial (palabras relacionadas con negocios)
-        business_words = ['empresa', 'compañía', 'marca', 'producto', 'servicio', 'ventas', 'mercado', 'competencia']
-        for word in business_words:
+        for word in BUSINESS_WORDS:
             if word in text_lower:
                 relevance += 0.05
         
@@ -430,24 +738,22 @@ class CompetitiveIntelligenceSystem:
     
     def analyze_sentiment(self, text: str, keyword: str) -> tuple:
         """Análisis básico de sentimiento (-1 a 1)"""
-        # Palabras positivas
-        positive_words = ['excelente', 'bueno', 'mejor', 'increíble', 'fantástico', 'recomiendo', 'satisfecho', 'feliz']
-        # Palabras negativas
-        negative_words = ['malo', 'terrible', 'horrible', 'pésimo', 'decepcionado', 'problema', 'error', 'falla']
-        
-        text_lower = text.lower()
+        return self._context_sentiment(text.lower(), keyword.lower())
+    
+    def _context_sentiment(self, text_lower: str, keyword_lower: str) -> tuple:
+        """Sentimiento en la ventana de ±100 caracteres alrededor de la keyword (texto ya en minúsculas)"""
         sentiment_score = 0.0
         
-        # Buscar palabras positivas cerca de la keyword
-        keyword_pos = text_lower.find(keyword.lower())
+        # Buscar palabras positivas/negativas cerca de la keyword
+        keyword_pos = text_lower.find(keyword_lower)
         if keyword_pos != -1:
             context = text_lower[max(0, keyword_pos-100):keyword_pos+100]
             
-            for word in positive_words:
+            for word in POSITIVE_CONTEXT_WORDS:
                 if word in context:
                     sentiment_score += 0.2
             
-            for word in negative_words:
+            for word in NEGATIVE_CONTEXT_WORDS:
                 if word in context:
                     sentiment_score -= 0.2
         
@@ -490,7 +796,8 @@ class CompetitiveIntelligenceSystem:
                     AVG(sentiment_score) as avg_sentiment,
                     SUM(CASE WHEN sentiment_label = 'positive' THEN 1 ELSE 0 END) as positive_mentions,
                     SUM(CASE WHEN sentiment_label = 'negative' THEN 1 ELSE 0 END) as negative_mentions,
-                    SUM(CASE WHEN sentiment_label = 'neutral' THEN 1 ELSE 0 END) as neutral_mentions
+                    SUM(CASE WHEN sentiment_label = 'neutral' THEN 1 ELSE 0 END) as neutral_mentions,
+                    COUNT(DISTINCT COALESCE(story_id, article_id)) as unique_stories
                 FROM competitor_mentions 
                 WHERE competitor_id = ? 
                 AND mention_date >= datetime('now', '-{} days')
@@ -504,6 +811,7 @@ class CompetitiveIntelligenceSystem:
                     'positive_mentions': row[2] or 0,
                     'negative_mentions': row[3] or 0,
                     'neutral_mentions': row[4] or 0,
+                    'unique_stories': row[5] or 0,
                     'sentiment_trend': self.get_sentiment_trend(competitor_id, days)
                 }
         
@@ -540,13 +848,21 @@ class CompetitiveIntelligenceSystem:
     
     def create_alert(self, user_id: int, competitor_id: int, alert_type: str, message: str, data: Dict = None):
         """Crear una alerta para el usuario"""
+        self.create_alerts([(user_id, competitor_id, alert_type, message, data)])
+    
+    def create_alerts(self, alerts: List[Tuple[int, int, str, str, Optional[Dict]]]):
+        """Crear varias alertas (user_id, competitor_id, tipo, mensaje, datos) en una sola transacción"""
+        if not alerts:
+            return
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('''
+        cursor.executemany('''
             INSERT INTO competitor_alerts (user_id, competitor_id, alert_type, alert_message, alert_data)
             VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, competitor_id, alert_type, message, json.dumps(data or {})))
+        ''', [(user_id, competitor_id, alert_type, message, json.dumps(data or {}))
+              for user_id, competitor_id, alert_type, message, data in alerts])
         
         conn.commit()
         conn.close()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Índice de estadísticas del corpus de artículos
+
+Mantiene, dentro de news_database.db, las frecuencias de documento de cada
+término, los conteos por día/periódico y las apariciones por artículo. Se
+actualiza en la ingesta (save_articles_to_db) y lo consultan la nube de
+palabras y las sugerencias de palabras clave de Competitive Intelligence,
+sin volver a tokenizar los artículos en cada petición.
+"""
+
+import math
+import re
+import sqlite3
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.utils.article_store import articles_source, register_article_functions
+
+logger = logging.getLogger(__name__)
+
+# Unión de las stop words de la nube de palabras y del analizador de keywords
+STOP_WORDS = frozenset({
+    'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'es', 'se', 'no', 'te', 'lo', 'le', 'da', 'su', 'por', 'son',
+    'con', 'para', 'al', 'del', 'los', 'las', 'una', 'como', 'pero', 'sus', 'más', 'también', 'muy', 'sin',
+    'sobre', 'entre', 'hasta', 'desde', 'durante', 'mediante', 'según', 'hacia', 'bajo', 'ante', 'tras',
+    'contra', 'cada', 'todo', 'todos', 'todas', 'toda', 'esta', 'este', 'estos', 'estas', 'ese', 'esa', 'esos',
+    'esas', 'aquel', 'aquella', 'aquellos', 'aquellas', 'mi', 'tu', 'nuestro', 'nuestra', 'nuestros',
+    'nuestras', 'vuestro', 'vuestra', 'vuestros', 'vuestras', 'me', 'nos', 'os', 'les', 'sí', 'tampoco', 'ya',
+    'aún', 'todavía', 'siempre', 'nunca', 'jamás', 'aquí', 'allí', 'ahí', 'donde', 'cuando', 'porque',
+    'aunque', 'mientras', 'después', 'antes', 'entonces', 'ahora', 'hoy', 'ayer', 'mañana', 'si', 'sino',
+    'además', 'así', 'fue', 'ser', 'tiene', 'tienen', 'hace', 'hacen', 'cual', 'solo', 'puede', 'pueden',
+    'debe', 'deben', 'dice', 'dicen'
+})
+
+TOKEN_PATTERN = re.compile(r'\b\w{4,}\b')
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenizar texto en términos indexables (minúsculas, 4+ caracteres, sin stop words ni números)"""
+    if not text:
+        return []
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOP_WORDS and not token.isdigit() and '_' not in token
+    ]
+
+
+def _regexp(pattern: str, text: Optional[str]) -> bool:
+    """Operador REGEXP de SQLite"""
+    return text is not None and re.search(pattern, text) is not None
+
+
+def _idf(total_docs: int, doc_freq: int) -> float:
+    """IDF suavizado: log((1 + N) / (1 + df)) + 1"""
+    return math.log((1 + (total_docs or 0)) / (1 + (doc_freq or 0))) + 1.0
+
+
+def _article_day(scraped_at: Optional[str]) -> str:
+    """Día (YYYY-MM-DD) de scraped_at; hoy si no se puede interpretar"""
+    try:
+        return datetime.strptime(str(scraped_at)[:10], '%Y-%m-%d').date().isoformat()
+    except (TypeError, ValueError):
+        return datetime.now().date().isoformat()
+
+
+class CorpusStatsIndex:
+    """Índice incremental de estadísticas del corpus (document frequency, conteos por ventana y co-ocurrencia)"""
+
+    def __init__(self, db_path: str = "news_database.db"):
+        self.db_path = db_path
+
+    def get_connection(self):
+        """Obtener conexión con idf(), REGEXP y la vista de artículos registradas"""
+        conn = sqlite3.connect(self.db_path)
+        conn.create_function('idf', 2, _idf, deterministic=True)
+        conn.create_function('regexp', 2, _regexp, deterministic=True)
+        register_article_functions(conn)
+        return conn
+
+    def init_tables(self, cursor):
+        """Crear las tablas del índice y poblarlas desde articles si están vacías"""
+        # Un registro por artículo indexado (para poder des-indexarlo al actualizarlo o borrarlo)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS corpus_docs (
+                article_id INTEGER PRIMARY KEY,
+                day TEXT NOT NULL,
+                newspaper TEXT NOT NULL DEFAULT ''
+            )
+        ''')
+        # Frecuencia de documento global por término
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS corpus_terms (
+                term TEXT PRIMARY KEY,
+                doc_freq INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        # Conteos por término, día y periódico (apariciones y documentos)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS corpus_term_daily (
+                term TEXT NOT NULL,
+                day TEXT NOT NULL,
+                newspaper TEXT NOT NULL DEFAULT '',
+                term_count INTEGER NOT NULL DEFAULT 0,
+                doc_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (term, day, newspaper)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_corpus_term_daily_day ON corpus_term_daily(day, newspaper)')
+        # Apariciones por artículo: permiten co-ocurrencia con una entidad
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS corpus_postings (
+                term TEXT NOT NULL,
+                article_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, article_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_corpus_postings_article ON corpus_postings(article_id, term, tf)')
+
+        cursor.execute('SELECT 1 FROM corpus_docs LIMIT 1')
+        if cursor.fetchone():
+            return
+        try:
+            cursor.execute(f'SELECT id, title, content, newspaper, scraped_at FROM {articles_source(cursor)}')
+        except sqlite3.OperationalError:
+            return  # Aún no existe la tabla de artículos
+        articles = cursor.fetchall()
+        if articles:
+            self.index_articles(cursor, articles)
+            logger.info(f"✅ Índice del corpus poblado con {len(articles)} artículos")
+
+    def index_articles(self, cursor, articles: Iterable[Tuple[int, str, str, str, str]]):
+        """Indexar artículos (id, title, content, newspaper, scraped_at) en la transacción del cursor.
+
+        Los artículos ya indexados se des-indexan primero, de modo que llamar a
+        este método tras actualizar un artículo no duplica sus conteos.
+        """
+        articles = list(articles)
+        if not articles:
+            return
+        self.remove_articles(cursor, [article[0] for article in articles])
+
+        docs = []
+        postings = []
+        doc_freq: Counter = Counter()
+        daily: Dict[Tuple[str, str, str], List[int]] = {}
+        for article_id, title, content, newspaper, scraped_at in articles:
+            day = _article_day(scraped_at)
+            newspaper = newspaper or ''
+            docs.append((article_id, day, newspaper))
+            for term, tf in Counter(tokenize(f"{title or ''} {content or ''}")).items():
+                postings.append((term, article_id, tf))
+                doc_freq[term] += 1
+                counts = daily.setdefault((term, day, newspaper), [0, 0])
+                counts[0] += tf
+                counts[1] += 1
+
+        cursor.executemany('INSERT INTO corpus_docs (article_id, day, newspaper) VALUES (?, ?, ?)', docs)
+        cursor.executemany('INSERT INTO corpus_postings (term, article_id, tf) VALUES (?, ?, ?)', postings)
+        cursor.executemany('''
+            INSERT INTO corpus_terms (term, doc_freq) VALUES (?, ?)
+            ON CONFLICT(term) DO UPDATE SET doc_freq = doc_freq + excluded.doc_freq
+        ''', doc_freq.items())
+        cursor.executemany('''
+            INSERT INTO corpus_term_daily (term, day, newspaper, term_count, doc_count) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(term, day, newspaper) DO UPDATE SET
+                term_count = term_count + excluded.term_count,
+                doc_count = doc_count + excluded.doc_count
+        ''', [(term, day, newspaper, c[0], c[1]) for (term, day, newspaper), c in daily.items()])
+
+    def remove_articles(self, cursor, article_ids: List[int]):
+        """Des-indexar artículos (antes de actualizarlos o al borrarlos)"""
+        for start in range(0, len(article_ids), 500):
+            chunk = article_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'''
+                SELECT p.term, d.day, d.newspaper, p.tf
+                FROM corpus_postings p JOIN corpus_docs d ON d.article_id = p.article_id
+                WHERE p.article_id IN ({placeholders})
+            ''', chunk)
+            rows = cursor.fetchall()
+            if rows:
+                cursor.executemany('''
+                    UPDATE corpus_term_daily SET term_count = term_count - ?, doc_count = doc_count - 1
+                    WHERE term = ? AND day = ? AND newspaper = ?
+                ''', [(tf, term, day, newspaper) for term, day, newspaper, tf in rows])
+                cursor.executemany('UPDATE corpus_terms SET doc_freq = doc_freq - 1 WHERE term = ?',
+                                   [(row[0],) for row in rows])
+                cursor.execute('DELETE FROM corpus_term_daily WHERE doc_count <= 0')
+                cursor.execute('DELETE FROM corpus_terms WHERE doc_freq <= 0')
+            cursor.execute(f'DELETE FROM corpus_postings WHERE article_id IN ({placeholders})', chunk)
+            cursor.execute(f'DELETE FROM corpus_docs WHERE article_id IN ({placeholders})', chunk)
+
+    def clear(self, cursor):
+        """Vaciar el índice (al borrar todos los artículos)"""
+        for table in ('corpus_docs', 'corpus_terms', 'corpus_term_daily', 'corpus_postings'):
+            cursor.execute(f'DELETE FROM {table}')
+
+    def _entity_docs_sql(self, cursor, entity: str, max_docs: Optional[int]) -> Tuple[str, List]:
+        """Subconsulta con los artículos que contienen todos los términos de la entidad"""
+        entity_terms = sorted(set(tokenize(entity)))
+        # El índice solo guarda términos de 4+ caracteres: las palabras cortas (BCP, ONU) se buscan en el texto
+        short_words = sorted({
+            word for word in re.findall(r'\w+', entity.lower())
+            if len(word) < 4 and word not in STOP_WORDS and '_' not in word
+        })
+        if not entity_terms and not short_words:
+            entity_terms = [entity.lower().strip()]
+        parts = ['SELECT article_id FROM corpus_postings WHERE term = ?' for _ in entity_terms]
+        params: List = list(entity_terms)
+        if short_words:
+            text = "COALESCE(title, '') || ' ' || COALESCE(content, '')"
+            parts.append(
+                f'SELECT id AS article_id FROM {articles_source(cursor)} WHERE '
+                + ' AND '.join(f'{text} LIKE ? AND {text} REGEXP ?' for _ in short_words)
+            )
+            for word in short_words:
+                params.extend([f'%{word}%', rf'(?i)\b{re.escape(word)}\b'])
+        sql = ' INTERSECT '.join(parts)
+        if max_docs:
+            sql = f'SELECT article_id FROM ({sql}) ORDER BY article_id DESC LIMIT ?'
+            params.append(max_docs)
+        return sql, params
+
+    def count_entity_docs(self, entity: str, max_docs: Optional[int] = None) -> int:
+        """Número de artículos que mencionan la entidad"""
+        conn = self.get_connection()
+        try:
+            sql, params = self._entity_docs_sql(conn.cursor(), entity, max_docs)
+            return conn.execute(f'SELECT COUNT(*) FROM ({sql})', params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def top_terms(self, limit: int = 50, days: Optional[int] = None, newspaper: Optional[str] = None,
+                  entity: Optional[str] = None, max_entity_docs: Optional[int] = None,
+                  rank: str = 'tfidf', alpha_only: bool = False) -> Dict:
+        """Términos principales de una ventana, ordenados por TF-IDF o por frecuencia.
+
+        Args:
+            limit: Número de términos a devolver
+            days: Ventana en días hacia atrás (None = todo el corpus)
+            newspaper: Filtrar por periódico
+            entity: Solo artículos que co-ocurren con esta entidad (ej. nombre de un competidor);
+                los términos de la propia entidad se excluyen del resultado
+            max_entity_docs: Con entity, considerar solo los N artículos más recientes que la mencionan
+            rank: 'tfidf' o 'count'
+            alpha_only: Excluir términos con dígitos
+
+        Returns:
+            Dict con 'terms' (term, count, doc_count, doc_freq, score), 'total_terms',
+            'unique_terms' y 'documents'
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM corpus_docs')
+            total_docs = cursor.fetchone()[0]
+
+            conditions = []
+            params: List = []
+            if entity:
+                docs_sql, docs_params = self._entity_docs_sql(cursor, entity, max_entity_docs)
+                source = f'''
+                    SELECT p.term AS term, p.tf AS term_count, 1 AS doc_count
+                    FROM corpus_postings p
+                    JOIN corpus_docs d ON d.article_id = p.article_id
+                    WHERE p.article_id IN ({docs_sql})
+                '''
+                params.extend(docs_params)
+                exclude = set(tokenize(entity)) | {entity.lower().strip()}
+                conditions.append(f"s.term NOT IN ({','.join('?' * len(exclude))})")
+                if days:
+                    source += ' AND d.day >= ?'
+                    params.append((datetime.now() - timedelta(days=days)).date().isoformat())
+                if newspaper:
+                    source += ' AND d.newspaper = ?'
+                    params.append(newspaper)
+                params.extend(sorted(exclude))
+            else:
+                source = 'SELECT term, term_count, doc_count FROM corpus_term_daily WHERE 1 = 1'
+                if days:
+                    source += ' AND day >= ?'
+                    params.append((datetime.now() - timedelta(days=days)).date().isoformat())
+                if newspaper:
+                    source += ' AND newspaper = ?'
+                    params.append(newspaper)
+            if alpha_only:
+                conditions.append("s.term NOT GLOB '*[0-9]*'")
+
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            order = 'score' if rank == 'tfidf' else 'count'
+            cursor.execute(f'''
+                WITH window_terms AS (
+                    SELECT s.term AS term, SUM(s.term_count) AS count, SUM(s.doc_count) AS doc_count
+                    FROM ({source}) s
+                    {where}
+                    GROUP BY s.term
+                )
+                SELECT w.term, w.count, w.doc_count, COALESCE(t.doc_freq, 0),
+                       w.count * idf(?, COALESCE(t.doc_freq, 0)) AS score,
+                       (SELECT SUM(count) FROM window_terms), (SELECT COUNT(*) FROM window_terms)
+                FROM window_terms w LEFT JOIN corpus_terms t ON t.term = w.term
+                ORDER BY {order} DESC
+                LIMIT ?
+            ''', params + [total_docs, limit])
+            rows = cursor.fetchall()
+
+            documents = total_docs
+            if entity:
+                documents = self.count_entity_docs(entity, max_entity_docs)
+
+            return {
+                'terms': [
+                    {'term': term, 'count': count, 'doc_count': doc_count, 'doc_freq': doc_freq, 'score': score}
+                    for term, count, doc_count, doc_freq, score, _, _ in rows
+                ],
+                'total_terms': rows[0][5] if rows else 0,
+                'unique_terms': rows[0][6] if rows else 0,
+                'documents': documents
+            }
+        finally:
+            conn.close()
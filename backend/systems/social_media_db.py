@@ -8,13 +8,117 @@ Maneja la creación y gestión de tablas para almacenar datos de redes sociales.
 
 import sqlite3
 import json
+import hashlib
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
+from backend.utils.data_version import SOCIAL, bump_data_version
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Claves por consulta al buscar posts ya guardados (límite de parámetros de SQLite)
+KEY_LOOKUP_CHUNK = 500
+
+POST_COLUMNS = (
+    'platform', 'username', 'text', 'cleaned_text', 'likes', 'retweets', 'replies',
+    'hashtags', 'category', 'sentiment', 'detected_language', 'url', 'image_url', 'video_url',
+    'created_at', 'processed_at', 'dedup_key'
+)
+
+# Un post re-scrapeado actualiza métricas y análisis de la fila existente (conserva id y la imagen/video si ahora faltan)
+UPSERT_POST_QUERY = f"""
+    INSERT INTO social_media_posts ({', '.join(POST_COLUMNS)})
+    VALUES ({', '.join('?' * len(POST_COLUMNS))})
+    ON CONFLICT(platform, dedup_key) DO UPDATE SET
+        username = excluded.username,
+        text = excluded.text,
+        cleaned_text = excluded.cleaned_text,
+        likes = excluded.likes,
+        retweets = excluded.retweets,
+        replies = excluded.replies,
+        hashtags = excluded.hashtags,
+        category = excluded.category,
+        sentiment = excluded.sentiment,
+        detected_language = excluded.detected_language,
+        url = excluded.url,
+        image_url = COALESCE(excluded.image_url, image_url),
+        video_url = COALESCE(excluded.video_url, video_url),
+        created_at = COALESCE(NULLIF(excluded.created_at, ''), created_at),
+        processed_at = excluded.processed_at,
+        scraped_at = CURRENT_TIMESTAMP
+"""
+
+
+# Prefijo de dedup_key de los posts de ejemplo (mocks): cada guardado de la plataforma reemplaza los anteriores
+DEMO_KEY_PREFIX = 'demo:'
+
+
+def post_dedup_key(post: Dict) -> str:
+    """Identidad de un post dentro de su plataforma: URL, si no id del post, si no hash de autor+fecha+texto.
+
+    Los posts de ejemplo (is_demo) llevan el prefijo DEMO_KEY_PREFIX.
+    """
+    url = (post.get('url') or '').strip()
+    post_id = post.get('post_id') or post.get('id')
+    if url:
+        key = f"url:{url}"
+    elif post_id:
+        key = f"id:{post_id}"
+    else:
+        digest = hashlib.sha1(
+            f"{post.get('username') or ''}\x1f{post.get('date') or ''}\x1f{post.get('text') or ''}".encode('utf-8')
+        ).hexdigest()
+        key = f"text:{digest}"
+    return f"{DEMO_KEY_PREFIX}{key}" if post.get('is_demo') else key
+
+
+def _count_value(value) -> int:
+    """Métrica (likes, retweets, replies) como entero ('1.2K' -> 1200); los valores no numéricos cuentan 0"""
+    if isinstance(value, str):
+        text = value.strip().replace(',', '').upper()
+        multiplier = {'K': 1000, 'M': 1000000}.get(text[-1:], 1)
+        value = text[:-1] if multiplier > 1 else text
+    else:
+        multiplier = 1
+    try:
+        return int(float(value or 0) * multiplier)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _sql_value(value):
+    """Valor que SQLite puede guardar: listas/diccionarios de los scrapers van como JSON"""
+    if value is None or isinstance(value, (str, int, float, bytes)):
+        return value
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _post_row(post: Dict) -> Tuple:
+    """Valores de POST_COLUMNS para un post (mismos valores por defecto que tenía save_post), normalizados"""
+    return tuple(_sql_value(value) for value in (
+        post.get('platform') or 'twitter',
+        post.get('username') or '',
+        post.get('text') or '',
+        post.get('cleaned_text', ''),
+        _count_value(post.get('likes', 0)),
+        _count_value(post.get('retweets', 0)),
+        _count_value(post.get('replies', 0)),
+        json.dumps(post.get('hashtags', [])) if post.get('hashtags') else None,
+        post.get('category', 'general'),
+        post.get('sentiment', 'neutral'),
+        post.get('detected_language', 'unknown'),
+        post.get('url', ''),
+        post.get('image_url', None),
+        post.get('video_url', None),
+        post.get('date', ''),
+        post.get('processed_at', None),
+        post_dedup_key(post)
+    ))
+
 
 class SocialMediaDB:
     """
@@ -70,11 +174,13 @@ class SocialMediaDB:
                     video_url TEXT,
                     created_at TEXT,
                     scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    processed_at TIMESTAMP
+                    processed_at TIMESTAMP,
+                    dedup_key TEXT
                 )
             """
             
             cursor.execute(create_table_query)
+            self._ensure_dedup_index(cursor)
             
             # Crear índices para búsquedas rápidas
             indexes = [
@@ -98,6 +204,51 @@ class SocialMediaDB:
         finally:
             conn.close()
     
+    def _ensure_dedup_index(self, cursor):
+        """Columna dedup_key e índice único (platform, dedup_key) para el upsert de save_batch"""
+        try:
+            cursor.execute("ALTER TABLE social_media_posts ADD COLUMN dedup_key TEXT")
+        except sqlite3.OperationalError:
+            pass  # La columna ya existe
+        
+        # Posts guardados antes de la columna: identificarlos por su URL
+        cursor.execute("""
+            UPDATE social_media_posts SET dedup_key = 'url:' || TRIM(url)
+            WHERE dedup_key IS NULL AND url IS NOT NULL AND TRIM(url) != ''
+        """)
+        
+        create_index = """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_social_posts_dedup
+            ON social_media_posts (platform, dedup_key)
+        """
+        try:
+            cursor.execute(create_index)
+        except sqlite3.IntegrityError:
+            # Re-scrapeos anteriores duplicaron posts: conservar la primera fila de cada uno
+            cursor.execute("""
+                DELETE FROM social_media_posts WHERE dedup_key IS NOT NULL AND id NOT IN (
+                    SELECT MIN(id) FROM social_media_posts
+                    WHERE dedup_key IS NOT NULL
+                    GROUP BY platform, dedup_key
+                )
+            """)
+            logger.info(f"🧹 Eliminados {cursor.rowcount} posts duplicados de redes sociales")
+            bump_data_version(cursor, SOCIAL)
+            cursor.execute(create_index)
+    
+    def _existing_keys(self, cursor, keys: List[Tuple[str, str]]) -> set:
+        """(platform, dedup_key) de la lista que ya están guardados"""
+        existing = set()
+        for start in range(0, len(keys), KEY_LOOKUP_CHUNK):
+            chunk = keys[start:start + KEY_LOOKUP_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(
+                f"SELECT platform, dedup_key FROM social_media_posts WHERE dedup_key IN ({placeholders})",
+                [key for _, key in chunk]
+            )
+            existing.update((row[0], row[1]) for row in cursor.fetchall())
+        return existing.intersection(keys)
+    
     def save_post(self, post: Dict) -> Optional[int]:
         """
         Guardar un post de red social
@@ -114,57 +265,16 @@ class SocialMediaDB:
         
         try:
             cursor = conn.cursor()
-            
-            # Convertir hashtags a string JSON
-            hashtags_str = json.dumps(post.get('hashtags', [])) if post.get('hashtags') else None
-            
-            insert_query = """
-                INSERT INTO social_media_posts (
-                    platform, username, text, cleaned_text, likes, retweets, replies,
-                    hashtags, category, sentiment, detected_language, url, image_url, video_url, created_at, processed_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            values = (
-                post.get('platform', 'twitter'),
-                post.get('username', ''),
-                post.get('text', ''),
-                post.get('cleaned_text', ''),
-                post.get('likes', 0),
-                post.get('retweets', 0),
-                post.get('replies', 0),
-                hashtags_str,
-                post.get('category', 'general'),
-                post.get('sentiment', 'neutral'),
-                post.get('detected_language', 'unknown'),
-                post.get('url', ''),
-                post.get('image_url', None),
-                post.get('video_url', None),  # Agregar video_url
-                post.get('date', ''),
-                post.get('processed_at', None)
-            )
-            
-            # Log antes de guardar para verificar image_url
-            image_url_value = post.get('image_url')
-            if image_url_value:
-                logger.debug(f"💾 Guardando post con image_url: {image_url_value[:50]}...")
-            
-            cursor.execute(insert_query, values)
+            row = _post_row(post)
+            cursor.execute(UPSERT_POST_QUERY, row)
+            bump_data_version(cursor, SOCIAL)
             conn.commit()
             
-            post_id = cursor.lastrowid
-            
-            # Verificar que se guardó correctamente consultando la BD
-            cursor.execute("SELECT image_url FROM social_media_posts WHERE id = ?", (post_id,))
-            saved_image_url = cursor.fetchone()
-            if saved_image_url:
-                saved_url = saved_image_url[0] if isinstance(saved_image_url, tuple) else saved_image_url['image_url']
-                if saved_url:
-                    logger.debug(f"✅ Post {post_id} guardado con image_url en BD: {saved_url[:50]}...")
-                else:
-                    logger.warning(f"⚠️ Post {post_id} guardado pero image_url es NULL en BD")
-            
-            return post_id
+            # Con upsert lastrowid no es fiable si el post ya existía: buscarlo por su clave
+            cursor.execute("SELECT id FROM social_media_posts WHERE platform = ? AND dedup_key = ?",
+                           (row[0], row[-1]))
+            saved = cursor.fetchone()
+            return saved[0] if saved else None
             
         except Exception as e:
             logger.error(f"❌ Error guardando post: {e}")
@@ -172,47 +282,83 @@ class SocialMediaDB:
         finally:
             conn.close()
     
-    def save_batch(self, posts: List[Dict]) -> int:
+    def save_batch(self, posts: List[Dict]) -> Dict[str, int]:
         """
-        Guardar múltiples posts
+        Guardar múltiples posts en una sola transacción
+        
+        Cada post se identifica por (platform, dedup_key); si ya estaba guardado
+        (re-scrapeo de la misma cuenta) se actualiza en lugar de duplicarse. Dentro
+        del lote, la última aparición de un post es la que se guarda. Los posts de
+        ejemplo (mocks) guardados antes para las plataformas del lote se eliminan.
         
         Args:
             posts: Lista de posts a guardar
         
         Returns:
-            Número de posts guardados exitosamente
+            Diccionario con 'inserted' y 'updated' (posts nuevos y posts existentes actualizados);
+            si el lote falla se guarda post a post y los posts inválidos se descartan
         """
+        result = {'inserted': 0, 'updated': 0}
         if not posts:
             logger.warning("⚠️ No hay posts para guardar")
-            return 0
+            return result
         
-        saved_count = 0
-        errors = 0
-        posts_with_images = 0
+        rows_by_key: Dict[Tuple[str, str], Tuple] = {}
+        for post in posts:
+            row = _post_row(post)
+            rows_by_key[(row[0], row[-1])] = row
+        repeated = len(posts) - len(rows_by_key)
         
-        for i, post in enumerate(posts):
+        conn = self.get_connection()
+        if not conn:
+            return result
+        
+        try:
+            cursor = conn.cursor()
+            # Una sola transacción para upsert y versión de datos: sin BEGIN, el SAVEPOINT abriría
+            # la transacción y su RELEASE haría commit del upsert antes de subir la versión
+            cursor.execute("BEGIN")
+            platforms = sorted({platform for platform, _ in rows_by_key})
+            cursor.execute(
+                f"DELETE FROM social_media_posts WHERE platform IN ({','.join('?' * len(platforms))}) "
+                f"AND dedup_key LIKE '{DEMO_KEY_PREFIX}%'",
+                platforms
+            )
+            if cursor.rowcount:
+                logger.info(f"🧹 Eliminados {cursor.rowcount} posts de ejemplo anteriores")
+            existing = self._existing_keys(cursor, list(rows_by_key))
+            cursor.execute("SAVEPOINT batch")
             try:
-                # Verificar image_url antes de guardar
-                has_image = bool(post.get('image_url'))
-                if has_image:
-                    posts_with_images += 1
-                    logger.debug(f"💾 Post {i+1}/{len(posts)} tiene image_url: {post.get('image_url')[:50]}...")
-                
-                post_id = self.save_post(post)
-                if post_id:
-                    saved_count += 1
-                else:
-                    errors += 1
-                    logger.warning(f"⚠️ No se pudo guardar post: {post.get('text', '')[:50]}...")
-            except Exception as e:
-                errors += 1
-                logger.error(f"❌ Error guardando post: {e}")
-                import traceback
-                logger.error(f"Traceback: {traceback.format_exc()}")
+                cursor.executemany(UPSERT_POST_QUERY, list(rows_by_key.values()))
+                cursor.execute("RELEASE batch")
+            except sqlite3.Error as e:
+                # Un post inválido no debe perder el lote: reintentar post a post y descartar solo los que fallen
+                cursor.execute("ROLLBACK TO batch")
+                cursor.execute("RELEASE batch")
+                logger.warning(f"⚠️ Lote de posts rechazado ({e}), guardando post a post")
+                for key, row in list(rows_by_key.items()):
+                    try:
+                        cursor.execute(UPSERT_POST_QUERY, row)
+                    except sqlite3.Error as row_error:
+                        logger.warning(f"⚠️ Post descartado ({key[1]}): {row_error}")
+                        del rows_by_key[key]
+            bump_data_version(cursor, SOCIAL)
+            conn.commit()
+            
+            result['updated'] = len(existing.intersection(rows_by_key))
+            result['inserted'] = len(rows_by_key) - result['updated']
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"❌ Error guardando lote de posts: {e}")
+            return result
+        finally:
+            conn.close()
         
-        logger.info(f"💾 Guardados: {saved_count}, Errores: {errors}, Total procesados: {len(posts)}")
-        logger.info(f"🖼️ Posts con imagen al guardar: {posts_with_images}/{len(posts)}")
-        return saved_count
+        posts_with_images = sum(1 for row in rows_by_key.values() if row[12])
+        logger.info(f"💾 Nuevos: {result['inserted']}, Actualizados: {result['updated']}, "
+                    f"Repetidos en el lote: {repeated}, Total procesados: {len(posts)}")
+        logger.info(f"🖼️ Posts con imagen al guardar: {posts_with_images}/{len(rows_by_key)}")
+        return result
     
     def get_posts(self, 
                   platform: Optional[str] = None,
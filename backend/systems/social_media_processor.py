@@ -11,8 +11,10 @@ Este módulo procesa los datos extraídos de redes sociales:
 """
 
 import re
+import os
 import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional
 from datetime import datetime
 
@@ -34,6 +36,56 @@ except ImportError:
     VADER_AVAILABLE = False
     logger.warning("⚠️ VADER no disponible, usando análisis básico de sentimiento")
 
+# Lotes a partir de este tamaño puntúan VADER en un pool de procesos
+SENTIMENT_POOL_MIN_POSTS = 400
+# Textos por trozo al clasificar un lote (las keywords ausentes del trozo no se cuentan)
+CATEGORY_CHUNK = 32
+# Textos por tarea del pool y máximo de workers
+SENTIMENT_CHUNK = 200
+SENTIMENT_POOL_MAX_WORKERS = 4
+
+# Expresiones de clean_text compiladas una vez
+_URL_PATTERN = re.compile(r'http\S+|www\.\S+', re.IGNORECASE)
+_MENTION_PATTERN = re.compile(r'@\w+')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_SPECIAL_CHARS_PATTERN = re.compile(r'[^\w\s#.,!?¿¡]')
+
+# Palabras comunes para detect_language (se buscan como subcadena, igual que siempre)
+SPANISH_WORDS = ('el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'es', 'se',
+                 'no', 'te', 'lo', 'le', 'da', 'su', 'por', 'son', 'con', 'para')
+ENGLISH_WORDS = ('the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+                 'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were')
+
+
+def _polarity_label(score: float) -> str:
+    """Umbrales: positivo > 0.05, negativo < -0.05, neutral en medio"""
+    if score > 0.05:
+        return 'positive'
+    elif score < -0.05:
+        return 'negative'
+    return 'neutral'
+
+
+# Analizador VADER de cada worker del pool (se crea una vez por proceso)
+_worker_vader = None
+
+
+def _init_vader_worker():
+    global _worker_vader
+    _worker_vader = SentimentIntensityAnalyzer()
+
+
+def _vader_compounds(texts: List[str], analyzer=None) -> List[Optional[float]]:
+    """Compound de VADER por texto (None si VADER falla con ese texto)"""
+    analyzer = analyzer or _worker_vader
+    compounds = []
+    for text in texts:
+        try:
+            compounds.append(analyzer.polarity_scores(text)['compound'])
+        except Exception:
+            compounds.append(None)
+    return compounds
+
 
 class SocialMediaProcessor:
     """
@@ -102,6 +154,16 @@ class SocialMediaProcessor:
             'general': []  # Categoría por defecto
         }
         
+        # Keywords que pueden aparecer en texto en minúsculas ('IA', 'CEO'... nunca coinciden) y
+        # una alternancia compilada para descartar de una pasada los textos sin ninguna
+        self._category_search = [
+            (category, [kw for kw in keywords if kw == kw.lower()])
+            for category, keywords in self.category_keywords.items() if category != 'general'
+        ]
+        self._any_category_keyword = re.compile('|'.join(
+            re.escape(kw) for _, keywords in self._category_search for kw in sorted(set(keywords), key=len, reverse=True)
+        ))
+        
         # Palabras para análisis de sentimiento
         self.positive_words = [
             'bueno', 'buena', 'excelente', 'genial', 'fantástico', 'fantastico',
@@ -138,17 +200,17 @@ class SocialMediaProcessor:
         
         # Remover URLs
         if remove_urls:
-            cleaned = re.sub(r'http\S+|www\.\S+', '', cleaned, flags=re.IGNORECASE)
+            cleaned = _URL_PATTERN.sub('', cleaned)
         
         # Remover menciones
         if remove_mentions:
-            cleaned = re.sub(r'@\w+', '', cleaned)
+            cleaned = _MENTION_PATTERN.sub('', cleaned)
         
         # Remover espacios múltiples
-        cleaned = re.sub(r'\s+', ' ', cleaned)
+        cleaned = _WHITESPACE_PATTERN.sub(' ', cleaned)
         
         # Remover caracteres especiales excesivos
-        cleaned = re.sub(r'[^\w\s#.,!?¿¡]', '', cleaned)
+        cleaned = _SPECIAL_CHARS_PATTERN.sub('', cleaned)
         
         return cleaned.strip()
     
@@ -167,16 +229,8 @@ class SocialMediaProcessor:
         
         text_lower = text.lower()
         
-        # Palabras comunes en español
-        spanish_words = ['el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'es', 'se',
-                        'no', 'te', 'lo', 'le', 'da', 'su', 'por', 'son', 'con', 'para']
-        
-        # Palabras comunes en inglés
-        english_words = ['the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-                        'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were']
-        
-        spanish_count = sum(1 for word in spanish_words if word in text_lower)
-        english_count = sum(1 for word in english_words if word in text_lower)
+        spanish_count = sum(1 for word in SPANISH_WORDS if word in text_lower)
+        english_count = sum(1 for word in ENGLISH_WORDS if word in text_lower)
         
         if spanish_count > english_count:
             return 'es'
@@ -198,14 +252,32 @@ class SocialMediaProcessor:
         if not text or not isinstance(text, str):
             return 'general'
         
-        text_lower = text.lower()
+        return self._categorize_lower(text.lower(), self._category_search)
+    
+    def categorize_batch(self, texts: List[str]) -> List[str]:
+        """
+        categorize_tweet para una lista de textos
+        
+        Los textos se agrupan en trozos de CATEGORY_CHUNK; cada texto solo cuenta
+        las keywords que aparecen en algún texto de su trozo (el resto suman 0).
+        """
+        lowered = [text.lower() if text and isinstance(text, str) else None for text in texts]
+        categories = []
+        for start in range(0, len(lowered), CATEGORY_CHUNK):
+            chunk = lowered[start:start + CATEGORY_CHUNK]
+            # '\x00' no aparece en ninguna keyword: ninguna coincidencia cruza dos textos
+            joined = '\x00'.join(text for text in chunk if text)
+            search = [(category, [kw for kw in keywords if kw in joined]) for category, keywords in self._category_search]
+            categories.extend(self._categorize_lower(text, search) if text else 'general' for text in chunk)
+        return categories
+    
+    def _categorize_lower(self, text_lower: str, category_search: List) -> str:
+        if not self._any_category_keyword.search(text_lower):
+            return 'general'
         category_scores = {}
         
         # Calcular puntuación por categoría (ponderado por frecuencia)
-        for category, keywords in self.category_keywords.items():
-            if category == 'general':
-                continue
-            
+        for category, keywords in category_search:
             score = 0
             # Contar ocurrencias de cada palabra clave
             for keyword in keywords:
@@ -246,15 +318,7 @@ class SocialMediaProcessor:
         if self.vader_analyzer:
             try:
                 scores = self.vader_analyzer.polarity_scores(text)
-                compound = scores['compound']
-                
-                # Umbrales: positivo > 0.05, negativo < -0.05, neutral en medio
-                if compound > 0.05:
-                    return 'positive'
-                elif compound < -0.05:
-                    return 'negative'
-                else:
-                    return 'neutral'
+                return _polarity_label(scores['compound'])
             except Exception as e:
                 logger.debug(f"⚠️ Error con VADER, usando fallback: {e}")
         
@@ -262,15 +326,7 @@ class SocialMediaProcessor:
         if TEXTBLOB_AVAILABLE:
             try:
                 blob = TextBlob(text)
-                polarity = blob.sentiment.polarity
-                
-                # Umbrales: positivo > 0.05, negativo < -0.05, neutral en medio
-                if polarity > 0.05:
-                    return 'positive'
-                elif polarity < -0.05:
-                    return 'negative'
-                else:
-                    return 'neutral'
+                return _polarity_label(blob.sentiment.polarity)
             except Exception as e:
                 logger.debug(f"⚠️ Error con TextBlob, usando análisis básico: {e}")
         
@@ -355,10 +411,80 @@ class SocialMediaProcessor:
         
         return processed
     
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[str]:
+        """
+        analyze_sentiment para una lista de textos
+        
+        Con VADER y lotes grandes, las puntuaciones se calculan en un pool de
+        procesos en trozos de SENTIMENT_CHUNK textos. Los textos en los que VADER
+        falla pasan por los mismos fallbacks que analyze_sentiment.
+        """
+        labels: List[Optional[str]] = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not text or not isinstance(text, str) or len(text.strip()) < 3:
+                labels[i] = 'neutral'
+            else:
+                pending.append(i)
+        
+        if self.vader_analyzer and pending:
+            stripped = [texts[i].strip() for i in pending]
+            for i, compound in zip(pending, self._vader_scores(stripped)):
+                if compound is not None:
+                    labels[i] = _polarity_label(compound)
+        
+        return [label if label is not None else self.analyze_sentiment(texts[i]) for i, label in enumerate(labels)]
+    
+    def _vader_scores(self, texts: List[str]) -> List[Optional[float]]:
+        """Compound de VADER por texto, en paralelo si el lote es grande y hay varios núcleos"""
+        workers = min(os.cpu_count() or 1, SENTIMENT_POOL_MAX_WORKERS)
+        if len(texts) >= SENTIMENT_POOL_MIN_POSTS and workers > 1:
+            chunks = [texts[start:start + SENTIMENT_CHUNK] for start in range(0, len(texts), SENTIMENT_CHUNK)]
+            try:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_vader_worker) as pool:
+                    return [score for chunk_scores in pool.map(_vader_compounds, chunks) for score in chunk_scores]
+            except Exception as e:
+                logger.warning(f"⚠️ Pool de sentimiento no disponible, puntuando en este proceso: {e}")
+        return _vader_compounds(texts, self.vader_analyzer)
+    
+    def process_columns(self, tweets: List[Dict],
+                        clean_text: bool = True,
+                        detect_lang: bool = True,
+                        categorize: bool = True,
+                        analyze_sentiment_flag: bool = True) -> Dict[str, List]:
+        """
+        Procesar un lote en formato columnar
+        
+        Args:
+            tweets: Lista de tweets a procesar
+            clean_text, detect_lang, categorize, analyze_sentiment_flag: como en process_tweet
+        
+        Returns:
+            Diccionario columna -> lista alineada con tweets ('cleaned_text' y, según
+            las opciones, 'detected_language', 'category', 'sentiment'), más 'processed_at'
+            (un timestamp para todo el lote)
+        """
+        texts = [tweet.get('text', '') for tweet in tweets]
+        columns: Dict[str, List] = {
+            'cleaned_text': [self.clean_text(text) for text in texts] if clean_text else list(texts)
+        }
+        if detect_lang:
+            columns['detected_language'] = [self.detect_language(text) for text in texts]
+        if categorize:
+            columns['category'] = self.categorize_batch(texts)
+        if analyze_sentiment_flag:
+            columns['sentiment'] = self.analyze_sentiment_batch(texts)
+        columns['processed_at'] = [datetime.now().isoformat()] * len(tweets)
+        return columns
+    
     def process_batch(self, tweets: List[Dict], **kwargs) -> List[Dict]:
         """
         Procesar un lote de tweets
         
+        Mismo resultado que process_tweet sobre cada tweet, calculado columna a
+        columna con process_columns. Los tweets cuyo texto no es una cadena se
+        procesan uno a uno (y los que fallen se devuelven sin procesar).
+        
         Args:
             tweets: Lista de tweets a procesar
             **kwargs: Argumentos adicionales para process_tweet
@@ -366,15 +492,31 @@ class SocialMediaProcessor:
         Returns:
             Lista de tweets procesados
         """
-        processed_tweets = []
-        
-        for tweet in tweets:
+        batch_indexes = [i for i, tweet in enumerate(tweets) if isinstance(tweet.get('text', ''), (str, type(None)))]
+        try:
+            columns = self.process_columns([tweets[i] for i in batch_indexes], **kwargs)
+        except Exception as e:
+            logger.warning(f"⚠️ Error procesando el lote, procesando tweet a tweet: {e}")
+            batch_indexes, columns = [], {}
+        
+        processed_tweets: List[Optional[Dict]] = [None] * len(tweets)
+        for row, i in enumerate(batch_indexes):
+            processed = tweets[i].copy()
+            for column, values in columns.items():
+                processed[column] = values[row]
+            # Preservar image_url y video_url (None si el original no los tenía)
+            processed.setdefault('image_url', None)
+            processed.setdefault('video_url', None)
+            processed_tweets[i] = processed
+        
+        for i, tweet in enumerate(tweets):
+            if processed_tweets[i] is not None:
+                continue
             try:
-                processed = self.process_tweet(tweet, **kwargs)
-                processed_tweets.append(processed)
+                processed_tweets[i] = self.process_tweet(tweet, **kwargs)
             except Exception as e:
                 logger.error(f"❌ Error procesando tweet: {e}")
-                processed_tweets.append(tweet)  # Mantener original si falla
+                processed_tweets[i] = tweet  # Mantener original si falla
         
         return processed_tweets
 
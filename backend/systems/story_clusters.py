@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Detección de noticias casi duplicadas (MinHash + LSH por bandas)
+
+La misma nota de agencia aparece en varios medios, y los distintos schedules
+la vuelven a scrapear con URLs ligeramente distintas. Cada artículo recibe una
+firma MinHash de NUM_PERM valores calculada sobre shingles de 3 palabras de su
+texto normalizado: la fracción de valores iguales entre dos firmas estima la
+similitud de Jaccard de sus shingles, y dos artículos son la misma historia si
+esa estimación es >= DUPLICATE_SIMILARITY.
+
+Para no comparar contra todo el corpus la firma se parte en BANDS bandas de
+ROWS valores (tabla story_minhash_bands): solo se comparan los artículos que
+coinciden en alguna banda completa. Con 16 bandas de 4 filas un par con
+Jaccard 0.7 es candidato con probabilidad ~0.99, y uno con 0.3 en ~0.12.
+
+Columnas en articles:
+- cluster_id: id del primer artículo de la historia (el propio id si es única)
+- is_duplicate: 1 si el artículo repite una historia ya guardada
+
+Para contar cada historia una vez: COUNT(DISTINCT COALESCE(cluster_id, id)).
+"""
+
+import logging
+import re
+import sqlite3
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.article_store import articles_source
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3
+# Shingles mínimos para considerar el texto (titulares sueltos darían falsos positivos)
+MIN_SHINGLES = 15
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+# Jaccard estimada mínima para considerar dos artículos la misma historia
+DUPLICATE_SIMILARITY = 0.7
+# Caracteres del texto que se usan para la firma
+MAX_TEXT_CHARS = 20000
+# Artículos por lote al asignar historias a filas antiguas
+BACKFILL_BATCH = 500
+
+# Expresión SQL para contar cada historia una vez
+STORY_KEY_SQL = "COALESCE(cluster_id, id)"
+
+_WORD_PATTERN = re.compile(r'\w+')
+_COMBINING_MARKS = re.compile('[\u0300-\u036f]')
+# Familia multiply-shift: h_i(x) = (a_i * x + b_i) mod 2^64 >> 32, con semilla fija (firmas estables entre procesos)
+_rng = np.random.RandomState(20240611)
+_PERM_A = (_rng.randint(1, 2 ** 62, size=NUM_PERM, dtype=np.int64).astype(np.uint64) << np.uint64(1)) | np.uint64(1)
+_PERM_B = _rng.randint(0, 2 ** 62, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_SHIFT = np.uint64(32)
+
+
+def _shingles(title: Optional[str], content: Optional[str]) -> set:
+    text = f"{title or ''} {(content or '')[:MAX_TEXT_CHARS]}".lower()
+    text = _COMBINING_MARKS.sub('', unicodedata.normalize('NFD', text))
+    words = _WORD_PATTERN.findall(text)
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(title: Optional[str], content: Optional[str]) -> Optional[np.ndarray]:
+    """Firma MinHash (NUM_PERM valores uint32) del texto, o None si es demasiado corto"""
+    shingles = _shingles(title, content)
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+    with np.errstate(over='ignore'):
+        permuted = (hashes[:, None] * _PERM_A + _PERM_B) >> _SHIFT
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Jaccard estimada entre dos firmas"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def has_story_columns(cursor) -> bool:
+    """True si articles ya tiene cluster_id/is_duplicate (bases que no pasaron por init_tables no las tienen)"""
+    cursor.execute("PRAGMA table_info(articles)")
+    return any(column[1] == 'cluster_id' for column in cursor.fetchall())
+
+
+def _band_keys(signature: np.ndarray) -> List[Tuple[int, int]]:
+    return [(band, zlib.crc32(signature[band * ROWS:(band + 1) * ROWS].tobytes())) for band in range(BANDS)]
+
+
+class StoryClusterIndex:
+    """Asignación de cluster_id / is_duplicate a los artículos en la transacción de ingesta"""
+
+    def init_tables(self, cursor):
+        """Columnas de articles (llamar antes de recrear la vista articles_with_body)"""
+        for column, definition in (('cluster_id', 'INTEGER'), ('is_duplicate', 'INTEGER DEFAULT 0')):
+            try:
+                cursor.execute(f"ALTER TABLE articles ADD COLUMN {column} {definition}")
+            except sqlite3.OperationalError:
+                pass  # La columna ya existe
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_cluster ON articles(cluster_id)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS story_signatures (
+                article_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS story_minhash_bands (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                article_id INTEGER NOT NULL,
+                PRIMARY KEY (band, value, article_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_story_bands_article ON story_minhash_bands(article_id)")
+
+    def pending_backfill(self, cursor) -> int:
+        """Artículos guardados antes de existir el índice (sin historia asignada)"""
+        cursor.execute("SELECT COUNT(*) FROM articles WHERE cluster_id IS NULL")
+        return cursor.fetchone()[0]
+
+    def backfill(self, conn, batch_size: int = BACKFILL_BATCH, progress=None) -> int:
+        """Asignar historias a los artículos sin cluster_id (en orden de id), con un commit por lote.
+
+        Descomprime y calcula la firma de cada artículo: en bases grandes es lento, por eso
+        se ejecuta con backend/scripts/backfill_story_clusters.py y no al arrancar la API.
+        progress(done, last_id) se llama tras cada lote.
+        """
+        cursor = conn.cursor()
+        source = articles_source(cursor)
+        done = 0
+        last_id = 0
+        while True:
+            cursor.execute(f'''
+                SELECT id, title, content FROM {source}
+                WHERE cluster_id IS NULL AND id > ? ORDER BY id LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            self.assign(cursor, rows)
+            conn.commit()
+            done += len(rows)
+            last_id = rows[-1][0]
+            if progress:
+                progress(done, last_id)
+        logger.info(f"✅ Historias asignadas a {done} artículos existentes")
+        return done
+
+    def _find_match(self, cursor, signature: np.ndarray, article_id: int) -> Optional[Tuple[int, int]]:
+        """(id, cluster_id) del artículo guardado más parecido con Jaccard >= DUPLICATE_SIMILARITY"""
+        bands = _band_keys(signature)
+        conditions = ' OR '.join('(b.band = ? AND b.value = ?)' for _ in bands)
+        params = [value for band in bands for value in band]
+        cursor.execute(f'''
+            SELECT a.id, a.cluster_id, s.signature
+            FROM articles a JOIN story_signatures s ON s.article_id = a.id
+            WHERE a.id IN (
+                SELECT b.article_id FROM story_minhash_bands b WHERE ({conditions})
+            ) AND a.id != ?
+        ''', params + [article_id])
+        best = None
+        for candidate_id, cluster_id, blob in cursor.fetchall():
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= DUPLICATE_SIMILARITY and (best is None or (-score, candidate_id) < best[0]):
+                best = ((-score, candidate_id), candidate_id, cluster_id or candidate_id)
+        return (best[1], best[2]) if best else None
+
+    def assign(self, cursor, articles: Iterable[Tuple[int, Optional[str], Optional[str]]]) -> Dict[int, Tuple[int, bool]]:
+        """Calcular firma e historia de artículos (id, title, content) recién guardados o actualizados.
+
+        Los artículos del lote se procesan en orden, así que un duplicado dentro
+        del mismo lote también se detecta. Devuelve {id: (cluster_id, is_duplicate)}.
+        """
+        result: Dict[int, Tuple[int, bool]] = {}
+        for article_id, title, content in articles:
+            signature = minhash(title, content)
+            cursor.execute("DELETE FROM story_minhash_bands WHERE article_id = ?", (article_id,))
+            cursor.execute("DELETE FROM story_signatures WHERE article_id = ?", (article_id,))
+
+            # Un artículo que ya encabeza una historia con otros miembros la conserva
+            cursor.execute("SELECT 1 FROM articles WHERE cluster_id = ? AND id != ? LIMIT 1", (article_id, article_id))
+            is_root = cursor.fetchone() is not None
+
+            match = None
+            if signature is not None and not is_root:
+                match = self._find_match(cursor, signature, article_id)
+            cluster_id = match[1] if match else article_id
+            is_duplicate = match is not None
+
+            cursor.execute("UPDATE articles SET cluster_id = ?, is_duplicate = ? WHERE id = ?",
+                           (cluster_id, int(is_duplicate), article_id))
+            if signature is not None:
+                cursor.execute("INSERT INTO story_signatures (article_id, signature) VALUES (?, ?)",
+                               (article_id, signature.tobytes()))
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO story_minhash_bands (band, value, article_id) VALUES (?, ?, ?)",
+                    [(band, value, article_id) for band, value in _band_keys(signature)]
+                )
+            result[article_id] = (cluster_id, is_duplicate)
+        return result
+
+    def remove_articles(self, cursor, article_ids: List[int]):
+        """Quitar artículos antes de borrarlos.
+
+        Si encabezaban una historia, la encabeza el siguiente miembro (el de menor id):
+        deja de ser duplicado y los demás miembros pasan a tener su id como cluster_id.
+        """
+        for start in range(0, len(article_ids), 500):
+            chunk = article_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'''
+                SELECT cluster_id, MIN(id) FROM articles
+                WHERE cluster_id IN ({placeholders}) AND id NOT IN ({placeholders})
+                GROUP BY cluster_id
+            ''', chunk + chunk)
+            for old_root, new_root in cursor.fetchall():
+                cursor.execute(f'''
+                    UPDATE articles SET cluster_id = ?, is_duplicate = (id != ?)
+                    WHERE cluster_id = ? AND id NOT IN ({placeholders})
+                ''', [new_root, new_root, old_root] + chunk)
+            cursor.execute(f"DELETE FROM story_minhash_bands WHERE article_id IN ({placeholders})", chunk)
+            cursor.execute(f"DELETE FROM story_signatures WHERE article_id IN ({placeholders})", chunk)
+
+    def clear(self, cursor):
+        """Vaciar el índice (al borrar todos los artículos)"""
+        cursor.execute("DELETE FROM story_minhash_bands")
+        cursor.execute("DELETE FROM story_signatures")
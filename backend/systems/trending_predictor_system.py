@@ -6,21 +6,140 @@ Analiza patrones históricos para predecir qué temas serán virales en 24-48 ho
 import sqlite3
 import json
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
-from collections import Counter, defaultdict
 import re
-import math
+
+import numpy as np
+
+from backend.utils.article_store import articles_source
+from backend.systems.story_clusters import STORY_KEY_SQL, has_story_columns
 
 logger = logging.getLogger(__name__)
 
+# Duración del bucket de tiempo durante el cual las predicciones se comparten entre usuarios
+PREDICTION_CACHE_SECONDS = 15 * 60
+
+STOP_WORDS = frozenset({
+    'este', 'esta', 'estos', 'estas', 'para', 'con', 'por', 'que', 'como', 'más', 'muy', 'pero', 'sin', 'bajo', 'sobre', 'entre', 'hasta', 'desde', 'hacia', 'durante', 'mediante', 'según', 'aunque', 'mientras', 'donde', 'cuando', 'porque', 'aunque', 'también', 'solo', 'solo', 'tanto', 'cada', 'todo', 'toda', 'todos', 'todas', 'alguno', 'alguna', 'algunos', 'algunas', 'ninguno', 'ninguna', 'ningunos', 'ningunas', 'otro', 'otra', 'otros', 'otras', 'mismo', 'misma', 'mismos', 'mismas', 'tal', 'tales', 'cual', 'cuales', 'cuanto', 'cuanta', 'cuantos', 'cuantas', 'mucho', 'mucha', 'muchos', 'muchas', 'poco', 'poca', 'pocos', 'pocas', 'demasiado', 'demasiada', 'demasiados', 'demasiadas', 'bastante', 'bastantes', 'suficiente', 'suficientes', 'viernes', 'miércoles', 'jueves', 'martes', 'sábado', 'domingo', 'lunes', 'semana', 'día', 'años', 'año', 'mes', 'semana', 'hora', 'minuto', 'segundo'
+})
+
+# Palabras que indican trending
+TRENDING_INDICATORS = frozenset({
+    'nuevo', 'nueva', 'último', 'última', 'reciente', 'actual', 'actualidad',
+    'tendencia', 'viral', 'popular', 'destacado', 'importante', 'urgente',
+    'exclusivo', 'sorprendente', 'increíble', 'impactante', 'revelación',
+    'escándalo', 'polémica', 'controversia', 'crisis', 'emergencia',
+    'descubrimiento', 'innovación', 'tecnología', 'avance', 'logro',
+    'récord', 'histórico', 'primera', 'primero', 'único', 'única'
+})
+
+# Categorías con alto potencial viral
+VIRAL_CATEGORIES = frozenset({
+    'política', 'gobierno', 'presidente', 'ministro', 'congreso', 'elecciones',
+    'economía', 'dólar', 'inflación', 'crisis', 'mercado', 'empresa',
+    'deportes', 'fútbol', 'mundial', 'olimpiadas', 'campeonato', 'liga',
+    'entretenimiento', 'celebridad', 'famoso', 'actor', 'cantante', 'película',
+    'tecnología', 'internet', 'redes', 'sociales', 'app', 'digital',
+    'salud', 'medicina', 'vacuna', 'enfermedad', 'pandemia', 'virus',
+    'medio', 'ambiente', 'cambio', 'climático', 'contaminación', 'energía'
+})
+
+WORD_PATTERN = re.compile(r'\b[a-zA-ZáéíóúñüÁÉÍÓÚÑÜ]{4,}\b')
+
+
+@lru_cache(maxsize=65536)
+def is_trending_keyword(word: str) -> bool:
+    """Determinar si una palabra (en minúsculas) tiene potencial viral"""
+    return (word in TRENDING_INDICATORS or 
+            word in VIRAL_CATEGORIES or 
+            any(indicator in word for indicator in TRENDING_INDICATORS))
+
+
+def extract_trending_keywords(text: str) -> List[str]:
+    """Extraer palabras clave con potencial viral (una entrada por ocurrencia)"""
+    relevant_words = []
+    for word in WORD_PATTERN.findall(text):
+        word_lower = word.lower()
+        if (word_lower not in STOP_WORDS and 
+                not word_lower.isdigit() and
+                is_trending_keyword(word_lower)):
+            relevant_words.append(word_lower)
+    return relevant_words
+
+
+def _article_day(scraped_at: Optional[str]) -> Optional[str]:
+    """Día (YYYY-MM-DD) de un scraped_at ISO ('2025-09-13T18:50:19.91') o tradicional ('2025-09-13 18:50:19')"""
+    if not scraped_at:
+        return None
+    try:
+        return datetime.strptime(str(scraped_at)[:10], '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return None
+
+
+def ensure_term_daily_counts_table(cursor):
+    """Crear la tabla term_daily_counts y poblarla desde articles si está vacía"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS term_daily_counts (
+            term TEXT NOT NULL,
+            day TEXT NOT NULL,
+            newspaper TEXT NOT NULL DEFAULT '',
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (term, day, newspaper)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_term_daily_counts_day ON term_daily_counts(day)')
+    
+    cursor.execute('SELECT 1 FROM term_daily_counts LIMIT 1')
+    if cursor.fetchone():
+        return
+    try:
+        # Cada historia cuenta una vez: los casi duplicados no suman términos
+        unique_only = ' WHERE COALESCE(is_duplicate, 0) = 0' if has_story_columns(cursor) else ''
+        cursor.execute(f'SELECT title, content, newspaper, scraped_at FROM {articles_source(cursor)}{unique_only}')
+    except sqlite3.OperationalError:
+        return  # Aún no existe la tabla de artículos
+    articles = cursor.fetchall()
+    if articles:
+        update_term_daily_counts(cursor, articles)
+        logger.info(f"✅ term_daily_counts poblada a partir de {len(articles)} artículos")
+
+
+def update_term_daily_counts(cursor, articles: List[Tuple[str, str, str, str]]):
+    """Sumar al almacén diario los términos de artículos nuevos (title, content, newspaper, scraped_at).
+    
+    Se llama en la transacción de ingesta; solo debe recibir artículos insertados,
+    no actualizaciones ni casi duplicados, para no contar dos veces la misma historia.
+    """
+    counts: Dict[Tuple[str, str, str], int] = {}
+    today = datetime.now().date().isoformat()
+    for title, content, newspaper, scraped_at in articles:
+        day = _article_day(scraped_at) or today
+        for term in extract_trending_keywords(f"{title or ''} {content or ''}".lower()):
+            key = (term, day, newspaper or '')
+            counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return
+    cursor.executemany('''
+        INSERT INTO term_daily_counts (term, day, newspaper, count)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(term, day, newspaper) DO UPDATE SET count = count + excluded.count
+    ''', [(term, day, newspaper, count) for (term, day, newspaper), count in counts.items()])
+
 class TrendingTopicsPredictor:
     """Sistema inteligente de predicción de trending topics"""
     
+    # Análisis compartido entre instancias/usuarios: (db_path, days_back, bucket) -> resultado
+    _analysis_cache: Dict[Tuple[str, int, int], Dict] = {}
+    _analysis_lock = threading.Lock()
+    
     def __init__(self, db_path: str = "news_database.db"):
         self.db_path = db_path
         self.init_database()
-    
     def init_database(self):
         """Inicializar base de datos para predicciones"""
         conn = sqlite3.connect("trending_predictions.db")
@@ -75,88 +194,79 @@ class TrendingTopicsPredictor:
         logger.info("✅ Base de datos de Trending Predictor inicializada")
     
     def analyze_historical_patterns(self, days_back: int = 14) -> Dict:  # Reducido de 30 a 14 días para más velocidad
-        """Analizar patrones históricos de trending topics"""
+        """Analizar patrones históricos de trending topics.
+        
+        Lee las series diarias de term_daily_counts (mantenidas en la ingesta) en
+        lugar de re-tokenizar los artículos. El resultado se comparte entre
+        usuarios durante PREDICTION_CACHE_SECONDS.
+        """
+        bucket = int(time.time() // PREDICTION_CACHE_SECONDS)
+        cache_key = (self.db_path, days_back, bucket)
+        with self._analysis_lock:
+            cached = self._analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         logger.info(f"🔍 Analizando patrones históricos de {days_back} días...")
         
         try:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
         except Exception as e:
             logger.error(f"Error conectando a la base de datos {self.db_path}: {e}")
             return {'success': False, 'error': f'Error de conexión a la base de datos: {str(e)}'}
         
         try:
-            # Obtener artículos de los últimos días (limitado a 5000 para mejor rendimiento)
-        start_date = datetime.now() - timedelta(days=days_back)
-        cursor.execute('''
-            SELECT title, content, newspaper, scraped_at
-            FROM articles 
-            WHERE scraped_at >= ?
-            ORDER BY scraped_at DESC
-                LIMIT 5000
-        ''', (start_date.strftime('%Y-%m-%d'),))
-        
-        articles = cursor.fetchall()
-        logger.info(f"📊 Analizando {len(articles)} artículos históricos...")
+            ensure_term_daily_counts_table(cursor)
+            conn.commit()
             
-            if len(articles) == 0:
+            start_date = (datetime.now() - timedelta(days=days_back)).date().isoformat()
+            cursor.execute('''
+                SELECT term, day, SUM(count)
+                FROM term_daily_counts
+                WHERE day >= ?
+                GROUP BY term, day
+            ''', (start_date,))
+            rows = cursor.fetchall()
+            
+            story_key = STORY_KEY_SQL if has_story_columns(cursor) else 'id'
+            cursor.execute(f'SELECT COUNT(DISTINCT {story_key}) FROM articles WHERE scraped_at >= ?', (start_date,))
+            articles_analyzed = cursor.fetchone()[0]
+            conn.close()
+            logger.info(f"📊 Analizando {len(rows)} series término/día de {articles_analyzed} artículos...")
+            
+            if not rows:
                 logger.warning("No se encontraron artículos para analizar")
-                conn.close()
                 return {
                     'success': False,
                     'error': 'No hay suficientes artículos históricos para analizar. Necesitas al menos algunos artículos en la base de datos.',
                     'articles_analyzed': 0
                 }
-        
-        # Análisis de palabras clave por día
-        daily_keywords = defaultdict(Counter)
-        topic_momentum = defaultdict(list)
-        
-        for title, content, newspaper, scraped_at in articles:
-            try:
-                # Manejar diferentes formatos de fecha
-                if 'T' in scraped_at:
-                    # Formato ISO con microsegundos: 2025-09-13T18:50:19.914231
-                    date_str = scraped_at.split('T')[0]  # Solo la parte de fecha
-                    date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                else:
-                    # Formato tradicional: 2025-09-13 18:50:19
-                    date = datetime.strptime(scraped_at, '%Y-%m-%d %H:%M:%S').date()
-                text = f"{title} {content}".lower()
-                
-                # Extraer palabras clave relevantes
-                keywords = self._extract_trending_keywords(text)
-                
-                for keyword in keywords:
-                    daily_keywords[date][keyword] += 1
-                    topic_momentum[keyword].append(date)
-                    
-            except Exception as e:
-                logger.error(f"Error procesando artículo: {e}")
-                continue
-        
-            # Calcular patrones de crecimiento (FUERA del bucle)
-        growth_patterns = self._calculate_growth_patterns(daily_keywords, topic_momentum)
-        
+            
+            growth_patterns = self._calculate_growth_patterns(rows)
+            
             if len(growth_patterns) == 0:
                 logger.warning("No se identificaron patrones de crecimiento")
-                conn.close()
                 return {
                     'success': False,
                     'error': 'No se pudieron identificar patrones de crecimiento. Intenta con más artículos o un rango de tiempo mayor.',
-                    'articles_analyzed': len(articles),
+                    'articles_analyzed': articles_analyzed,
                     'patterns_analyzed': 0
                 }
             
-        conn.close()
-        
-        logger.info(f"✅ Análisis completado: {len(growth_patterns)} patrones identificados")
-        return {
-            'success': True,
-            'patterns_analyzed': len(growth_patterns),
-            'articles_analyzed': len(articles),
-            'growth_patterns': growth_patterns
-        }
+            logger.info(f"✅ Análisis completado: {len(growth_patterns)} patrones identificados")
+            result = {
+                'success': True,
+                'patterns_analyzed': len(growth_patterns),
+                'articles_analyzed': articles_analyzed,
+                'growth_patterns': growth_patterns
+            }
+            with self._analysis_lock:
+                # Descartar buckets anteriores
+                for key in [k for k in self._analysis_cache if k[2] != bucket]:
+                    del self._analysis_cache[key]
+                self._analysis_cache[cache_key] = result
+            return result
         except sqlite3.Error as e:
             logger.error(f"Error de base de datos: {e}")
             try:
@@ -174,147 +284,81 @@ class TrendingTopicsPredictor:
     
     def _extract_trending_keywords(self, text: str) -> List[str]:
         """Extraer palabras clave con potencial viral"""
-        # Palabras de stop
-        stop_words = {
-            'este', 'esta', 'estos', 'estas', 'para', 'con', 'por', 'que', 'como', 'más', 'muy', 'pero', 'sin', 'bajo', 'sobre', 'entre', 'hasta', 'desde', 'hacia', 'durante', 'mediante', 'según', 'aunque', 'mientras', 'donde', 'cuando', 'porque', 'aunque', 'también', 'solo', 'solo', 'tanto', 'cada', 'todo', 'toda', 'todos', 'todas', 'alguno', 'alguna', 'algunos', 'algunas', 'ninguno', 'ninguna', 'ningunos', 'ningunas', 'otro', 'otra', 'otros', 'otras', 'mismo', 'misma', 'mismos', 'mismas', 'tal', 'tales', 'cual', 'cuales', 'cuanto', 'cuanta', 'cuantos', 'cuantas', 'mucho', 'mucha', 'muchos', 'muchas', 'poco', 'poca', 'pocos', 'pocas', 'demasiado', 'demasiada', 'demasiados', 'demasiadas', 'bastante', 'bastantes', 'suficiente', 'suficientes', 'viernes', 'miércoles', 'jueves', 'martes', 'sábado', 'domingo', 'lunes', 'semana', 'día', 'años', 'año', 'mes', 'semana', 'hora', 'minuto', 'segundo'
-        }
-        
-        # Extraer palabras de 4+ caracteres
-        words = re.findall(r'\b[a-zA-ZáéíóúñüÁÉÍÓÚÑÜ]{4,}\b', text)
-        
-        # Filtrar palabras relevantes
-        relevant_words = []
-        for word in words:
-            word_lower = word.lower()
-            if (word_lower not in stop_words and 
-                len(word_lower) > 3 and 
-                not word_lower.isdigit() and
-                self._is_trending_keyword(word_lower)):
-                relevant_words.append(word_lower)
-        
-        return relevant_words
+        return extract_trending_keywords(text)
     
     def _is_trending_keyword(self, word: str) -> bool:
         """Determinar si una palabra tiene potencial viral"""
-        # Palabras que indican trending
-        trending_indicators = {
-            'nuevo', 'nueva', 'último', 'última', 'reciente', 'actual', 'actualidad',
-            'tendencia', 'viral', 'popular', 'destacado', 'importante', 'urgente',
-            'exclusivo', 'sorprendente', 'increíble', 'impactante', 'revelación',
-            'escándalo', 'polémica', 'controversia', 'crisis', 'emergencia',
-            'descubrimiento', 'innovación', 'tecnología', 'avance', 'logro',
-            'récord', 'histórico', 'primera', 'primero', 'único', 'única'
-        }
-        
-        # Categorías con alto potencial viral
-        viral_categories = {
-            'política', 'gobierno', 'presidente', 'ministro', 'congreso', 'elecciones',
-            'economía', 'dólar', 'inflación', 'crisis', 'mercado', 'empresa',
-            'deportes', 'fútbol', 'mundial', 'olimpiadas', 'campeonato', 'liga',
-            'entretenimiento', 'celebridad', 'famoso', 'actor', 'cantante', 'película',
-            'tecnología', 'internet', 'redes', 'sociales', 'app', 'digital',
-            'salud', 'medicina', 'vacuna', 'enfermedad', 'pandemia', 'virus',
-            'medio', 'ambiente', 'cambio', 'climático', 'contaminación', 'energía'
-        }
-        
-        return (word in trending_indicators or 
-                word in viral_categories or 
-                any(indicator in word for indicator in trending_indicators))
+        return is_trending_keyword(word)
     
-    def _calculate_growth_patterns(self, daily_keywords: Dict, topic_momentum: Dict) -> Dict:
-        """Calcular patrones de crecimiento de temas"""
-        growth_patterns = {}
+    def _calculate_growth_patterns(self, rows: List[Tuple[str, str, int]]) -> Dict:
+        """Calcular patrones de crecimiento de todos los términos a la vez.
+        
+        rows son tuplas (term, day, count). Se arma una matriz términos x días y se
+        calculan growth rate, momentum y viral potential con NumPy; solo cuentan los
+        días con menciones, igual que la serie de fechas del análisis original.
+        """
+        terms = sorted({row[0] for row in rows})
+        days = sorted({row[1] for row in rows})
+        term_index = {term: i for i, term in enumerate(terms)}
+        day_index = {day: j for j, day in enumerate(days)}
+        
+        counts = np.zeros((len(terms), len(days)), dtype=np.float64)
+        for term, day, count in rows:
+            counts[term_index[term], day_index[day]] += count
+        
+        total_mentions = counts.sum(axis=1)
+        active_days = np.count_nonzero(counts, axis=1)
+        
+        # Valores no nulos en orden (término, día): r = fila, v = conteo
+        r, c = np.nonzero(counts)
+        v = counts[r, c]
+        
+        # Tasa de crecimiento: promedio de (actual - anterior) / anterior entre días consecutivos con menciones
+        same_term = r[1:] == r[:-1]
+        ratios = (v[1:] - v[:-1]) / v[:-1]
+        growth_sum = np.bincount(r[1:][same_term], weights=ratios[same_term], minlength=len(terms))
+        growth_n = np.bincount(r[1:][same_term], minlength=len(terms))
+        growth_rate = np.divide(growth_sum, growth_n, out=np.zeros(len(terms)), where=growth_n > 0)
+        
+        # Momentum: tendencia entre el antepenúltimo y el último día con menciones (máximo 5.0)
+        momentum = np.zeros(len(terms))
+        ends = np.cumsum(active_days) - 1
+        has_momentum = active_days >= 3
+        last = v[ends[has_momentum]]
+        first = v[ends[has_momentum] - 2]
+        momentum[has_momentum] = np.minimum((last - first) / np.maximum(first, 1), 5.0)
+        
+        # Viral potential: base + crecimiento + momentum + factor del tema
+        topic_factor = np.array([self._get_topic_viral_factor(term) for term in terms])
+        viral_potential = np.minimum(
+            0.3 + np.minimum(growth_rate * 0.2, 0.4) + np.minimum(momentum * 0.1, 0.3) + topic_factor,
+            1.0
+        )
+        
+        # Tiempo estimado para trending (horas)
+        estimated = 48 - np.maximum(0, 1 - growth_rate) * 24 - np.maximum(0, 1 - momentum) * 12
+        time_to_trend = np.where((growth_rate <= 0) & (momentum <= 0), 72, np.clip(estimated, 6, 72))
+        
+        # Día pico: el más reciente con el máximo de menciones
+        peak_day = len(days) - 1 - np.argmax(counts[:, ::-1], axis=1)
+        
+        # Necesitamos al menos 3 menciones en 2 días distintos
+        candidates = np.nonzero((total_mentions >= 3) & (active_days >= 2))[0]
+        candidates = candidates[np.argsort(-viral_potential[candidates], kind='stable')]
         
-        for topic, dates in topic_momentum.items():
-            if len(dates) < 3:  # Necesitamos al menos 3 menciones
-                continue
-            
-            # Contar menciones por día
-            daily_counts = Counter(dates)
-            sorted_dates = sorted(daily_counts.keys())
-            
-            if len(sorted_dates) < 2:
-                continue
-            
-            # Calcular tasa de crecimiento
-            growth_rate = self._calculate_growth_rate(daily_counts, sorted_dates)
-            
-            # Calcular momentum
-            momentum = self._calculate_momentum(daily_counts, sorted_dates)
-            
-            # Calcular viral potential
-            viral_potential = self._calculate_viral_potential(topic, growth_rate, momentum)
-            
-            # Calcular tiempo estimado para trending
-            time_to_trend = self._estimate_time_to_trend(growth_rate, momentum)
-            
-            growth_patterns[topic] = {
-                'growth_rate': growth_rate,
-                'momentum': momentum,
-                'viral_potential': viral_potential,
-                'time_to_trend_hours': time_to_trend,
-                'total_mentions': len(dates),
-                'peak_day': max(daily_counts, key=daily_counts.get),
-                'trending_probability': min(viral_potential * 100, 95)  # Máximo 95%
+        growth_patterns = {}
+        for i in candidates:
+            growth_patterns[terms[i]] = {
+                'growth_rate': float(growth_rate[i]),
+                'momentum': float(momentum[i]),
+                'viral_potential': float(viral_potential[i]),
+                'time_to_trend_hours': float(time_to_trend[i]),
+                'total_mentions': int(total_mentions[i]),
+                'peak_day': datetime.strptime(days[peak_day[i]], '%Y-%m-%d').date(),
+                'trending_probability': float(min(viral_potential[i] * 100, 95))  # Máximo 95%
             }
         
-        # Ordenar por viral potential
-        sorted_patterns = dict(sorted(
-            growth_patterns.items(), 
-            key=lambda x: x[1]['viral_potential'], 
-            reverse=True
-        ))
-        
-        return sorted_patterns
-    
-    def _calculate_growth_rate(self, daily_counts: Counter, sorted_dates: List) -> float:
-        """Calcular tasa de crecimiento"""
-        if len(sorted_dates) < 2:
-            return 0.0
-        
-        # Calcular crecimiento promedio
-        growth_rates = []
-        for i in range(1, len(sorted_dates)):
-            prev_count = daily_counts[sorted_dates[i-1]]
-            curr_count = daily_counts[sorted_dates[i]]
-            
-            if prev_count > 0:
-                growth_rate = (curr_count - prev_count) / prev_count
-                growth_rates.append(growth_rate)
-        
-        return sum(growth_rates) / len(growth_rates) if growth_rates else 0.0
-    
-    def _calculate_momentum(self, daily_counts: Counter, sorted_dates: List) -> float:
-        """Calcular momentum del tema"""
-        if len(sorted_dates) < 3:
-            return 0.0
-        
-        # Momentum basado en tendencia reciente
-        recent_dates = sorted_dates[-3:]  # Últimos 3 días
-        recent_counts = [daily_counts[date] for date in recent_dates]
-        
-        # Calcular tendencia
-        if len(recent_counts) >= 2:
-            momentum = (recent_counts[-1] - recent_counts[0]) / max(recent_counts[0], 1)
-            return min(momentum, 5.0)  # Máximo momentum de 5.0
-        
-        return 0.0
-    
-    def _calculate_viral_potential(self, topic: str, growth_rate: float, momentum: float) -> float:
-        """Calcular potencial viral de un tema"""
-        base_potential = 0.3
-        
-        # Factores de crecimiento
-        growth_factor = min(growth_rate * 0.2, 0.4)
-        
-        # Factores de momentum
-        momentum_factor = min(momentum * 0.1, 0.3)
-        
-        # Factores específicos del tema
-        topic_factor = self._get_topic_viral_factor(topic)
-        
-        viral_potential = base_potential + growth_factor + momentum_factor + topic_factor
-        return min(viral_potential, 1.0)  # Máximo 1.0
+        return growth_patterns
     
     def _get_topic_viral_factor(self, topic: str) -> float:
         """Obtener factor viral específico del tema"""
@@ -338,19 +382,6 @@ class TrendingTopicsPredictor:
         else:
             return 0.05
     
-    def _estimate_time_to_trend(self, growth_rate: float, momentum: float) -> int:
-        """Estimar tiempo en horas para que un tema se vuelva trending"""
-        if growth_rate <= 0 and momentum <= 0:
-            return 72  # 3 días si no hay crecimiento
-        
-        # Fórmula basada en crecimiento y momentum
-        base_time = 48  # 2 días base
-        growth_factor = max(0, 1 - growth_rate) * 24  # Reducir tiempo con crecimiento
-        momentum_factor = max(0, 1 - momentum) * 12   # Reducir tiempo con momentum
-        
-        estimated_hours = base_time - growth_factor - momentum_factor
-        return max(6, min(estimated_hours, 72))  # Entre 6 horas y 3 días
-    
     def generate_predictions(self, user_id: int, limit: int = 10) -> Dict:
         """Generar predicciones de trending topics para un usuario"""
         logger.info(f"🔮 Generando {limit} predicciones para usuario {user_id}")
@@ -389,14 +420,14 @@ class TrendingTopicsPredictor:
         
         # Guardar predicciones
         try:
-        self._save_predictions(user_id, predictions)
+            self._save_predictions(user_id, predictions)
         except Exception as e:
             logger.error(f"Error guardando predicciones: {e}", exc_info=True)
             # Continuar aunque falle el guardado
         
         # Actualizar uso diario
         try:
-        self._update_daily_usage(user_id)
+            self._update_daily_usage(user_id)
         except Exception as e:
             logger.error(f"Error actualizando uso diario: {e}", exc_info=True)
             # Continuar aunque falle la actualización
@@ -488,33 +519,33 @@ class TrendingTopicsPredictor:
     def _save_predictions(self, user_id: int, predictions: List[Dict]):
         """Guardar predicciones en la base de datos"""
         try:
-        conn = sqlite3.connect("trending_predictions.db")
-        cursor = conn.cursor()
-        
-        for prediction in predictions:
+            conn = sqlite3.connect("trending_predictions.db")
+            cursor = conn.cursor()
+            
+            for prediction in predictions:
                 try:
-            cursor.execute('''
-                INSERT INTO predictions 
-                (user_id, prediction_date, topic, confidence_score, viral_potential, 
-                 time_to_trend, keywords, sources, category)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                user_id,
-                datetime.now(),
-                prediction['topic'],
-                prediction['confidence_score'],
-                prediction['viral_potential'],
-                prediction['time_to_trend_hours'],
-                json.dumps(prediction['keywords']),
-                json.dumps(prediction['sources']),
-                prediction['category']
-            ))
+                    cursor.execute('''
+                        INSERT INTO predictions 
+                        (user_id, prediction_date, topic, confidence_score, viral_potential, 
+                         time_to_trend, keywords, sources, category)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        user_id,
+                        datetime.now(),
+                        prediction['topic'],
+                        prediction['confidence_score'],
+                        prediction['viral_potential'],
+                        prediction['time_to_trend_hours'],
+                        json.dumps(prediction['keywords']),
+                        json.dumps(prediction['sources']),
+                        prediction['category']
+                    ))
                 except Exception as e:
                     logger.error(f"Error guardando predicción individual: {e}")
                     continue
-        
-        conn.commit()
-        conn.close()
+            
+            conn.commit()
+            conn.close()
         except Exception as e:
             logger.error(f"Error en _save_predictions: {e}", exc_info=True)
             raise
@@ -522,12 +553,12 @@ class TrendingTopicsPredictor:
     def _update_daily_usage(self, user_id: int):
         """Actualizar uso diario del usuario"""
         try:
-        conn = sqlite3.connect("trending_predictions.db")
-        cursor = conn.cursor()
-        
-        today = datetime.now().date()
-        plan_type = "creator"  # Por defecto
-        
+            conn = sqlite3.connect("trending_predictions.db")
+            cursor = conn.cursor()
+            
+            today = datetime.now().date()
+            plan_type = "creator"  # Por defecto
+            
             # Primero verificar si existe un registro para hoy
             cursor.execute('''
                 SELECT predictions_used FROM daily_predictions_usage 
@@ -545,14 +576,14 @@ class TrendingTopicsPredictor:
                 ''', (new_count, user_id, today))
             else:
                 # Crear nuevo registro
-        cursor.execute('''
+                cursor.execute('''
                     INSERT INTO daily_predictions_usage 
-            (user_id, usage_date, predictions_used, plan_type)
+                    (user_id, usage_date, predictions_used, plan_type)
                     VALUES (?, ?, 1, ?)
                 ''', (user_id, today, plan_type))
-        
-        conn.commit()
-        conn.close()
+            
+            conn.commit()
+            conn.close()
         except Exception as e:
             logger.error(f"Error en _update_daily_usage: {e}", exc_info=True)
             raise
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Índice vectorial local de artículos (búsqueda semántica sin red)
+
+Cada artículo se representa con un vector de n-gramas hasheados (palabras,
+bigramas y 4-gramas de caracteres) ponderados con TF sublineal e IDF, y
+proyectados con signo a DIM dimensiones. Los vectores normalizados se guardan
+en una matriz float32 memory-mapped (vectors.f32) junto a los ids de artículo
+(ids.i64) y las frecuencias de documento por bucket (df.i32), así que el
+índice se carga al instante y crece en la ingesta sin reconstruirse.
+
+Las consultas son un producto matriz-vector por fuerza bruta sobre todo el
+corpus (top-k con argpartition): milisegundos hasta cientos de miles de
+artículos. El IDF de los vectores ya guardados es el del momento en que se
+indexaron; rebuild() los recalcula todos.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.utils.article_store import articles_source
+from backend.utils.data_version import ARTICLES, get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Dimensiones del vector proyectado y buckets para las frecuencias de documento
+DIM = 512
+DF_BUCKETS = 1 << 20
+# Filas reservadas al crear el índice (crece duplicando)
+INITIAL_CAPACITY = 4096
+# Peso del título frente al cuerpo y de los 4-gramas de caracteres frente a las palabras
+TITLE_WEIGHT = 2.0
+CHAR_NGRAM_WEIGHT = 0.35
+BIGRAM_WEIGHT = 0.75
+# Máximo de caracteres del cuerpo que se vectorizan
+MAX_TEXT_CHARS = 20000
+# Artículos por lote al sincronizar o reconstruir desde la BD
+SYNC_BATCH = 500
+
+STOP_WORDS = frozenset([
+    'de', 'la', 'el', 'los', 'las', 'y', 'o', 'u', 'en', 'del', 'al', 'para', 'por', 'con', 'un', 'una',
+    'que', 'se', 'su', 'sus', 'a', 'es', 'son', 'estan', 'fue', 'fueron', 'sobre', 'como', 'pero', 'mas',
+    'este', 'esta', 'estos', 'estas', 'ese', 'esa', 'lo', 'le', 'les', 'no', 'ha', 'han', 'muy', 'sin',
+    'entre', 'desde', 'hasta', 'tras', 'ante', 'segun', 'cuando', 'donde', 'porque', 'tambien', 'ya',
+    'the', 'and', 'for', 'with', 'that', 'this'
+])
+
+_WORD_PATTERN = re.compile(r'\w+')
+_COMBINING_MARKS = re.compile('[\u0300-\u036f]')
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas y sin tildes"""
+    return _COMBINING_MARKS.sub('', unicodedata.normalize('NFD', text.lower()))
+
+
+def _words(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [
+        w for w in _WORD_PATTERN.findall(_normalize(text[:MAX_TEXT_CHARS]))
+        if len(w) > 2 and w not in STOP_WORDS and not w.isdigit()
+    ]
+
+
+def _hash(feature: str) -> int:
+    return zlib.crc32(feature.encode('utf-8'))
+
+
+@lru_cache(maxsize=200000)
+def _word_features(word: str) -> Tuple[int, Tuple[int, ...]]:
+    """Hash de la palabra y de sus 4-gramas de caracteres (las palabras se repiten mucho entre artículos)"""
+    padded = f"<{word}>"
+    return _hash('w:' + word), tuple(_hash('c:' + padded[j:j + 4]) for j in range(len(padded) - 3))
+
+
+def extract_features(title: Optional[str], text: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """N-gramas hasheados únicos de un documento o consulta y su peso (antes del IDF)"""
+    keys: List[int] = []
+    weights: List[float] = []
+    for words, field_weight in ((_words(title), TITLE_WEIGHT), (_words(text), 1.0)):
+        if not words:
+            continue
+        word_keys = []
+        char_keys: List[int] = []
+        for word in words:
+            word_hash, char_hashes = _word_features(word)
+            word_keys.append(word_hash)
+            char_keys.extend(char_hashes)
+        bigram_keys = [_hash('b:' + a + ' ' + b) for a, b in zip(words, words[1:])]
+        keys.extend(word_keys)
+        keys.extend(bigram_keys)
+        keys.extend(char_keys)
+        weights.extend((field_weight,) * len(word_keys))
+        weights.extend((field_weight * BIGRAM_WEIGHT,) * len(bigram_keys))
+        weights.extend((field_weight * CHAR_NGRAM_WEIGHT,) * len(char_keys))
+    if not keys:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.float32)
+    # Sumar los pesos de cada n-grama repetido (vectorizado)
+    hashes, inverse = np.unique(np.array(keys, dtype=np.uint32), return_inverse=True)
+    tf = np.bincount(inverse, weights=np.array(weights, dtype=np.float32)).astype(np.float32)
+    return hashes, tf
+
+
+class ArticleVectorIndex:
+    """Matriz de embeddings de artículos en disco (memory-mapped) con altas incrementales"""
+
+    def __init__(self, index_dir: str, dim: int = DIM):
+        self.index_dir = index_dir
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._ids: Optional[np.memmap] = None
+        self._df: Optional[np.memmap] = None
+        self._rows: Dict[int, int] = {}
+        self._count = 0       # filas usadas (incluye las borradas)
+        self._docs = 0        # documentos vivos para el IDF
+        self._capacity = 0
+        self._synced_version: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Almacenamiento
+    # ------------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def _open(self):
+        """Abrir (o crear) los ficheros del índice; se llama con el lock tomado"""
+        if self._vectors is not None:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        meta = {}
+        if os.path.exists(self._path('meta.json')):
+            try:
+                with open(self._path('meta.json'), 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Metadatos del índice vectorial ilegibles, se recrea: {e}")
+                meta = {}
+        if meta.get('dim') != self.dim or meta.get('df_buckets') != DF_BUCKETS:
+            meta = {}
+
+        self._count = int(meta.get('count', 0))
+        self._docs = int(meta.get('docs', 0))
+        self._capacity = max(int(meta.get('capacity', 0)), INITIAL_CAPACITY)
+        fresh = not meta
+        self._vectors = self._map('vectors.f32', np.float32, (self._capacity, self.dim), fresh)
+        self._ids = self._map('ids.i64', np.int64, (self._capacity,), fresh)
+        self._df = self._map('df.i32', np.int32, (DF_BUCKETS,), fresh)
+        if fresh:
+            self._ids[:] = -1
+        self._rows = {int(article_id): row for row, article_id in enumerate(self._ids[:self._count]) if article_id >= 0}
+        if fresh:
+            self._save_meta()
+
+    def _map(self, name: str, dtype, shape: Tuple[int, ...], fresh: bool) -> np.memmap:
+        path = self._path(name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        mode = 'r+'
+        if fresh or not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.truncate(size)
+        elif os.path.getsize(path) < size:
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def _grow(self, needed: int):
+        """Ampliar la capacidad (duplicando) para alojar `needed` filas"""
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        self._vectors.flush()
+        self._ids.flush()
+        old_capacity = self._capacity
+        self._vectors = None
+        self._ids = None
+        self._capacity = capacity
+        self._vectors = self._map('vectors.f32', np.float32, (capacity, self.dim), False)
+        self._ids = self._map('ids.i64', np.int64, (capacity,), False)
+        self._ids[old_capacity:] = -1
+
+    def _save_meta(self):
+        meta = {'dim': self.dim, 'df_buckets': DF_BUCKETS, 'count': self._count,
+                'docs': self._docs, 'capacity': self._capacity}
+        tmp = self._path('meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path('meta.json'))
+
+    def _flush(self):
+        self._vectors.flush()
+        self._ids.flush()
+        self._df.flush()
+        self._save_meta()
+
+    # ------------------------------------------------------------------
+    # Vectorización
+    # ------------------------------------------------------------------
+
+    def _embed(self, features: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        hashes, tf = features
+        if not hashes.size:
+            return np.zeros(self.dim, dtype=np.float32)
+        df = self._df[hashes & (DF_BUCKETS - 1)].astype(np.float32)
+        idf = np.log((1.0 + self._docs) / (1.0 + df)) + 1.0
+        values = (1.0 + np.log1p(tf)) * idf
+        # Proyección con signo: bits altos del hash -> dimensión y signo
+        columns = (hashes >> 20) % self.dim
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        vector = np.bincount(columns, weights=values * signs, minlength=self.dim).astype(np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    # ------------------------------------------------------------------
+    # Altas y bajas
+    # ------------------------------------------------------------------
+
+    def add(self, articles: Iterable[Tuple[int, Optional[str], Optional[str]]], count_df: bool = True) -> int:
+        """Indexar (o re-indexar) artículos (id, title, text). Devuelve cuántos se indexaron"""
+        articles = [(int(a[0]), a[1], a[2]) for a in articles if a[0] is not None]
+        if not articles:
+            return 0
+        with self._lock:
+            self._open()
+            features = [extract_features(title, text) for _, title, text in articles]
+
+            # Las frecuencias de documento se actualizan antes de vectorizar el lote
+            if count_df:
+                for (article_id, _, _), document in zip(articles, features):
+                    if article_id not in self._rows:
+                        self._count_document(document)
+
+            self._grow(self._count + len({a[0] for a in articles if a[0] not in self._rows}))
+            for (article_id, _, _), document in zip(articles, features):
+                row = self._rows.get(article_id)
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._rows[article_id] = row
+                    self._ids[row] = article_id
+                self._vectors[row] = self._embed(document)
+            self._flush()
+            return len(articles)
+
+    def _count_document(self, features: Tuple[np.ndarray, np.ndarray], delta: int = 1):
+        hashes = features[0]
+        if not hashes.size:
+            return
+        buckets = np.unique(hashes & (DF_BUCKETS - 1))
+        self._df[buckets] = np.maximum(self._df[buckets] + delta, 0)
+        self._docs = max(0, self._docs + delta)
+
+    def remove(self, articles: Iterable[Tuple[int, Optional[str], Optional[str]]]):
+        """Quitar artículos (id, title, text) del índice; sus filas quedan vacías.
+
+        El texto es el mismo que se indexó (se recalculan sus n-gramas para
+        descontarlos de las frecuencias de documento).
+        """
+        with self._lock:
+            self._open()
+            removed = 0
+            for article_id, title, text in articles:
+                row = self._rows.pop(int(article_id), None)
+                if row is not None:
+                    self._ids[row] = -1
+                    self._vectors[row] = 0.0
+                    self._count_document(extract_features(title, text), delta=-1)
+                    removed += 1
+            if removed:
+                self._flush()
+
+    def clear(self):
+        """Vaciar el índice (al borrar todos los artículos)"""
+        with self._lock:
+            self._vectors = self._ids = self._df = None
+            for name in ('meta.json', 'vectors.f32', 'ids.i64', 'df.i32'):
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+            self._rows = {}
+            self._count = self._docs = self._capacity = 0
+            self._synced_version = None
+            self._open()
+
+    # ------------------------------------------------------------------
+    # Sincronización con la base de datos
+    # ------------------------------------------------------------------
+
+    def _db_batches(self, db_path: str, article_ids: Optional[List[int]] = None):
+        """Artículos (id, title, texto) de la BD en lotes: todos, o solo los ids dados"""
+        conn = sqlite3.connect(db_path)
+        try:
+            cur = conn.cursor()
+            source = articles_source(cur)
+            if article_ids is not None:
+                for start in range(0, len(article_ids), SYNC_BATCH):
+                    chunk = article_ids[start:start + SYNC_BATCH]
+                    cur.execute(f"SELECT id, title, summary, content FROM {source} "
+                                f"WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY id", chunk)
+                    yield [(r[0], r[1], f"{r[2] or ''} {r[3] or ''}") for r in cur.fetchall()]
+                return
+            last_id = 0
+            while True:
+                cur.execute(f"SELECT id, title, summary, content FROM {source} WHERE id > ? ORDER BY id LIMIT ?",
+                            (last_id, SYNC_BATCH))
+                rows = cur.fetchall()
+                if not rows:
+                    return
+                yield [(r[0], r[1], f"{r[2] or ''} {r[3] or ''}") for r in rows]
+                last_id = rows[-1][0]
+        finally:
+            conn.close()
+
+    def _unindexed_ids(self, db_path: str) -> List[int]:
+        """Ids de la BD que no están en el índice (se comparan conjuntos: otro proceso
+        puede haber guardado ids menores que los indexados aquí)"""
+        conn = sqlite3.connect(db_path)
+        try:
+            db_ids = [row[0] for row in conn.execute("SELECT id FROM articles ORDER BY id")]
+        finally:
+            conn.close()
+        with self._lock:
+            return [article_id for article_id in db_ids if article_id not in self._rows]
+
+    def sync(self, db_path: str) -> int:
+        """Indexar los artículos que aún no están en el índice (p.ej. guardados por otro proceso).
+
+        Solo consulta la BD cuando cambió la versión de datos de artículos. El
+        lock del índice se toma por lote, así las búsquedas siguen respondiendo
+        mientras se indexa.
+        """
+        version = get_data_version(db_path, ARTICLES)
+        with self._sync_lock:
+            with self._lock:
+                self._open()
+                if version == self._synced_version:
+                    return 0
+            added = 0
+            try:
+                missing = self._unindexed_ids(db_path)
+                for batch in self._db_batches(db_path, missing):
+                    added += self.add(batch)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"⚠️ No se pudo sincronizar el índice vectorial: {e}")
+                return added
+            self._synced_version = version
+            if added:
+                logger.info(f"🧭 Índice vectorial: {added} artículos nuevos indexados")
+            return added
+
+    def sync_in_background(self, db_path: str):
+        """Lanzar sync() en un hilo si no hay otra sincronización en curso"""
+        if self._sync_lock.locked():
+            return
+
+        def run():
+            try:
+                self.sync(db_path)
+            except Exception as e:
+                logger.error(f"❌ Error sincronizando el índice vectorial: {e}")
+
+        threading.Thread(target=run, name='vector-index-sync', daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        """True cuando el índice cubre la BD (al menos una sincronización completa)"""
+        return self._synced_version is not None
+
+    def rebuild(self, db_path: str) -> int:
+        """Reconstruir el índice completo desde la BD (recalcula el IDF de todos los vectores)"""
+        version = get_data_version(db_path, ARTICLES)
+        with self._sync_lock, self._lock:
+            self.clear()
+            # Primera pasada: frecuencias de documento de todo el corpus
+            for batch in self._db_batches(db_path):
+                for _, title, text in batch:
+                    self._count_document(extract_features(title, text))
+            # Segunda pasada: vectores con el IDF final
+            added = 0
+            for batch in self._db_batches(db_path):
+                added += self.add(batch, count_df=False)
+            self._synced_version = version
+            logger.info(f"✅ Índice vectorial reconstruido con {added} artículos")
+            return added
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _top_k(self, query_vector: np.ndarray, k: int, candidate_ids: Optional[Iterable[int]],
+               exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        if self._count == 0 or not query_vector.any():
+            return []
+        ids = self._ids[:self._count]
+        if candidate_ids is not None:
+            rows = np.array(sorted(self._rows[i] for i in set(candidate_ids) if i in self._rows), dtype=np.int64)
+            if rows.size == 0:
+                return []
+            scores = self._vectors[rows] @ query_vector
+            ids = ids[rows]
+        else:
+            scores = self._vectors[:self._count] @ query_vector
+        if exclude is not None:
+            scores = np.where(ids == exclude, -np.inf, scores)
+        scores = np.where(ids < 0, -np.inf, scores)
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i]) and scores[i] > 0]
+
+    def search(self, query: str, k: int = 10, candidate_ids: Optional[Iterable[int]] = None,
+               min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """Top-k artículos (id, similitud coseno) para un texto de consulta"""
+        with self._lock:
+            self._open()
+            query_vector = self._embed(extract_features(None, query))
+            return [(i, s) for i, s in self._top_k(query_vector, k, candidate_ids) if s >= min_score]
+
+    def similar(self, article_id: int, k: int = 5, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """Artículos más parecidos a uno ya indexado (sin incluirlo)"""
+        with self._lock:
+            self._open()
+            row = self._rows.get(int(article_id))
+            if row is None:
+                return []
+            query_vector = np.array(self._vectors[row])
+            return [(i, s) for i, s in self._top_k(query_vector, k, None, exclude=int(article_id)) if s >= min_score]
+
+    def __contains__(self, article_id: int) -> bool:
+        with self._lock:
+            self._open()
+            return int(article_id) in self._rows
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            self._open()
+            return {
+                'articles': len(self._rows),
+                'rows': self._count,
+                'capacity': self._capacity,
+                'dim': self.dim,
+                'size_mb': round(self._capacity * self.dim * 4 / (1024 * 1024), 1),
+                'ready': self.ready,
+                'syncing': self._sync_lock.locked(),
+            }
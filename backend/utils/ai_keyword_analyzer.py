@@ -1,10 +1,10 @@
 import sqlite3
 import json
-import re
-from collections import Counter
 from typing import List, Dict, Tuple
 import logging
 
+from backend.systems.corpus_stats_index import CorpusStatsIndex
+
 logger = logging.getLogger(__name__)
 
 # Base de datos de palabras clave por periódico (basada en análisis real)
@@ -50,6 +50,7 @@ class AIKeywordAnalyzer:
     
     def __init__(self, db_path: str = "news_database.db"):
         self.db_path = db_path
+        self.corpus_index = CorpusStatsIndex(db_path)
         
     def analyze_articles_for_keywords(self, competitor_name: str, limit: int = 1000) -> Dict:
         """
@@ -63,37 +64,29 @@ class AIKeywordAnalyzer:
             Dict con sugerencias de palabras clave y su relevancia
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Buscar artículos que mencionen el competidor
-            cursor.execute('''
-                SELECT title, content, newspaper, url
-                FROM articles 
-                WHERE (title LIKE ? OR content LIKE ?)
-                ORDER BY id DESC
-                LIMIT ?
-            ''', (f'%{competitor_name}%', f'%{competitor_name}%', limit))
-            
-            articles = cursor.fetchall()
-            conn.close()
+            # Términos que co-ocurren con el competidor en sus `limit` artículos más recientes,
+            # leídos del índice de estadísticas del corpus (sin re-tokenizar artículos)
+            stats = self.corpus_index.top_terms(
+                limit=50,
+                entity=competitor_name,
+                max_entity_docs=limit,
+                rank='count'
+            )
+            articles_analyzed = stats['documents']
             
-            if not articles:
+            if not articles_analyzed:
                 return self._get_fallback_suggestions(competitor_name)
             
-            # Analizar contenido
-            all_text = " ".join([f"{article[0]} {article[1]}" for article in articles])
-            
             # Extraer palabras clave
-            suggestions = self._extract_keywords(all_text, competitor_name)
+            suggestions = self._suggestions_from_term_stats(stats['terms'], competitor_name)
             
             # Calcular relevancia
-            suggestions = self._calculate_relevance(suggestions, articles)
+            suggestions = self._calculate_relevance(suggestions, articles_analyzed)
             
             return {
                 'success': True,
                 'competitor': competitor_name,
-                'articles_analyzed': len(articles),
+                'articles_analyzed': articles_analyzed,
                 'suggestions': suggestions,
                 'confidence': self._calculate_confidence(suggestions)
             }
@@ -102,43 +95,18 @@ class AIKeywordAnalyzer:
             logger.error(f"Error analyzing articles: {e}")
             return self._get_fallback_suggestions(competitor_name)
     
-    def _extract_keywords(self, text: str, competitor_name: str) -> List[Dict]:
-        """Extrae palabras clave relevantes del texto"""
-        
-        # Limpiar texto
-        text = re.sub(r'[^\w\s]', ' ', text.lower())
-        words = text.split()
-        
-        # Filtrar palabras comunes
-        stop_words = {
-            'el', 'la', 'de', 'del', 'en', 'con', 'por', 'para', 'un', 'una', 'los', 'las',
-            'que', 'se', 'no', 'es', 'son', 'fue', 'ser', 'tiene', 'tienen', 'hace', 'hacen',
-            'este', 'esta', 'estos', 'estas', 'su', 'sus', 'le', 'les', 'lo', 'al', 'más',
-            'como', 'pero', 'sin', 'sobre', 'entre', 'durante', 'después', 'antes', 'muy',
-            'todo', 'todos', 'toda', 'todas', 'cada', 'cual', 'cuando', 'donde', 'porque',
-            'también', 'solo', 'solo', 'puede', 'pueden', 'debe', 'deben', 'dice', 'dicen'
-        }
-        
-        # Filtrar palabras relevantes
-        relevant_words = [
-            word for word in words 
-            if len(word) > 3 and word not in stop_words and word != competitor_name.lower()
-        ]
-        
-        # Contar frecuencia
-        word_counts = Counter(relevant_words)
-        
-        # Crear sugerencias
+    def _suggestions_from_term_stats(self, terms: List[Dict], competitor_name: str) -> List[Dict]:
+        """Crea sugerencias a partir de los términos del índice del corpus"""
         suggestions = []
-        for word, count in word_counts.most_common(50):
-            if count >= 2:  # Solo palabras que aparecen al menos 2 veces
+        for term in terms:
+            if term['count'] >= 2:  # Solo palabras que aparecen al menos 2 veces
                 suggestions.append({
-                    'keyword': word,
-                    'frequency': count,
-                    'relevance_score': self._calculate_word_relevance(word, competitor_name),
-                    'confidence': min(count / 10, 1.0)  # Normalizar confianza
+                    'keyword': term['term'],
+                    'frequency': term['count'],
+                    'doc_count': term['doc_count'],
+                    'relevance_score': self._calculate_word_relevance(term['term'], competitor_name),
+                    'confidence': min(term['count'] / 10, 1.0)  # Normalizar confianza
                 })
-        
         return suggestions
     
     def _calculate_word_relevance(self, word: str, competitor_name: str) -> float:
@@ -179,20 +147,12 @@ class AIKeywordAnalyzer:
         # Relevancia base
         return 0.5
     
-    def _calculate_relevance(self, suggestions: List[Dict], articles: List) -> List[Dict]:
+    def _calculate_relevance(self, suggestions: List[Dict], articles_analyzed: int) -> List[Dict]:
         """Calcula la relevancia final de las sugerencias"""
         
         for suggestion in suggestions:
-            keyword = suggestion['keyword']
-            
-            # Contar en cuántos artículos aparece
-            article_count = 0
-            for article in articles:
-                if keyword.lower() in f"{article[0]} {article[1]}".lower():
-                    article_count += 1
-            
-            # Calcular relevancia final
-            suggestion['article_coverage'] = article_count / len(articles)
+            # Proporción de artículos del competidor en los que aparece
+            suggestion['article_coverage'] = suggestion.pop('doc_count', 0) / articles_analyzed
             suggestion['final_relevance'] = (
                 suggestion['relevance_score'] * 0.4 +
                 suggestion['confidence'] * 0.3 +
@@ -323,10 +283,6 @@ class AIKeywordAnalyzer:
         Returns:
             Dict con dominio y palabras clave automáticas
         """
-        import sqlite3
-        from collections import Counter
-        import re
-        
         # 1. Buscar en base de datos de periódicos conocidos
         if competitor_name in NEWSPAPER_DOMAINS:
             domain = NEWSPAPER_DOMAINS[competitor_name]
@@ -360,30 +316,13 @@ class AIKeywordAnalyzer:
                 first_url = results[0][1]
                 domain = first_url.split('/')[2]  # Extraer dominio
                 
-                # Analizar artículos para obtener palabras clave
-                cursor.execute('''
-                    SELECT title, content 
-                    FROM articles 
-                    WHERE newspaper = ?
-                    LIMIT 50
-                ''', (results[0][0],))
+                conn.close()
                 
-                articles = cursor.fetchall()
+                # Palabras clave reales del periódico desde el índice del corpus
+                stats = self.corpus_index.top_terms(limit=10, newspaper=results[0][0], rank='count', alpha_only=True)
+                top_keywords = [t['term'] for t in stats['terms']]
                 
-                if articles:
-                    # Extraer palabras clave reales
-                    all_text = ' '.join([f'{title} {content}' for title, content in articles])
-                    words = re.findall(r'\b[a-zA-ZáéíóúñüÁÉÍÓÚÑÜ]{4,}\b', all_text.lower())
-                    
-                    # Filtrar palabras relevantes
-                    stop_words = {'este', 'esta', 'estos', 'estas', 'para', 'con', 'por', 'que', 'como', 'más', 'muy', 'pero', 'sin', 'bajo', 'sobre', 'entre', 'hasta', 'desde', 'hacia', 'durante', 'mediante', 'según', 'aunque', 'mientras', 'donde', 'cuando', 'porque', 'aunque', 'también', 'solo', 'solo', 'tanto', 'cada', 'todo', 'toda', 'todos', 'todas', 'alguno', 'alguna', 'algunos', 'algunas', 'ninguno', 'ninguna', 'ningunos', 'ningunas', 'otro', 'otra', 'otros', 'otras', 'mismo', 'misma', 'mismos', 'mismas', 'tal', 'tales', 'cual', 'cuales', 'cuanto', 'cuanta', 'cuantos', 'cuantas', 'mucho', 'mucha', 'muchos', 'muchas', 'poco', 'poca', 'pocos', 'pocas', 'demasiado', 'demasiada', 'demasiados', 'demasiadas', 'bastante', 'bastantes', 'suficiente', 'suficientes', 'viernes', 'miércoles', 'jueves', 'martes', 'sábado', 'domingo', 'lunes', 'semana', 'día'}
-                    
-                    relevant_words = [word for word in words if word not in stop_words and len(word) > 3]
-                    word_freq = Counter(relevant_words)
-                    top_keywords = [word for word, freq in word_freq.most_common(10)]
-                    
-                    conn.close()
-                    
+                if top_keywords:
                     return {
                         'success': True,
                         'domain': domain,
@@ -392,13 +331,17 @@ class AIKeywordAnalyzer:
                         'confidence': 'medium',
                         'newspaper_found': results[0][0]
                     }
+                return self._fallback_domain_and_keywords(competitor_name)
             
             conn.close()
             
         except Exception as e:
             logger.error(f"Error en detección automática: {e}")
         
-        # 3. Fallback: usar nombre del competidor como palabra clave
+        return self._fallback_domain_and_keywords(competitor_name)
+    
+    def _fallback_domain_and_keywords(self, competitor_name: str) -> Dict:
+        """Fallback: usar nombre del competidor como palabra clave"""
         return {
             'success': True,
             'domain': f"{competitor_name.lower().replace(' ', '')}.com",
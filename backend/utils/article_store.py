@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Almacenamiento del cuerpo de los artículos (separación caliente/frío)
+
+La tabla articles guarda solo metadatos (título, resumen, periódico, fechas...)
+y el texto completo vive comprimido con zstd en article_bodies, una fila por
+artículo. Así los filtros, ordenaciones y GROUP BY sobre articles recorren
+páginas pequeñas y el working set cabe en la caché de páginas de SQLite.
+
+Acceso:
+- write_bodies(cursor, [(id, content)]): guardar/actualizar cuerpos en la transacción del llamador
+- ARTICLES_VIEW ('articles_with_body'): vista con las columnas de articles y content
+  descomprimido; requiere register_article_functions(conn) en la conexión
+- fetch_bodies(cursor, ids): cuerpos descomprimidos desde Python
+
+Las imágenes de cada artículo son filas de la tabla images (article_ref -> articles.id,
+position, is_primary) en lugar del JSON articles.images_data:
+- replace_article_images(cursor, [(id, article_id, images)]): escribir en la ingesta
+- primary_image_sql(alias) / image_count_sql(alias): subconsultas para listados
+- fetch_article_images(cursor, ids): imágenes completas para el detalle
+- fetch_export_rows(cursor, columns): filas completas para exportadores (content e images_data resueltos)
+
+Las filas antiguas (o escritas por procesos que aún guardan content en línea)
+siguen funcionando: la vista usa articles.content cuando no hay cuerpo separado.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ARTICLES_VIEW = 'articles_with_body'
+
+# Códec para los cuerpos nuevos (zlib si zstandard no está instalado)
+BODY_CODEC = 'zstd' if ZSTD_AVAILABLE else 'zlib'
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+# Los compresores de zstandard no son thread-safe: uno por hilo
+_local = threading.local()
+
+
+def _zstd_compressor():
+    compressor = getattr(_local, 'compressor', None)
+    if compressor is None:
+        compressor = _local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return compressor
+
+
+def _zstd_decompressor():
+    decompressor = getattr(_local, 'decompressor', None)
+    if decompressor is None:
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+
+def compress_text(text: Optional[str]) -> Tuple[Optional[bytes], str]:
+    """Comprimir un texto con el códec por defecto. Devuelve (blob, códec)"""
+    if text is None:
+        return None, BODY_CODEC
+    data = text.encode('utf-8')
+    if BODY_CODEC == 'zstd':
+        return _zstd_compressor().compress(data), 'zstd'
+    return zlib.compress(data, ZLIB_LEVEL), 'zlib'
+
+
+def decompress_text(blob: Optional[bytes], codec: Optional[str]) -> Optional[str]:
+    """Descomprimir un cuerpo guardado con compress_text"""
+    if blob is None:
+        return None
+    if codec == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("El cuerpo está comprimido con zstd pero zstandard no está instalado")
+        return _zstd_decompressor().decompress(blob).decode('utf-8')
+    if codec == 'zlib':
+        return zlib.decompress(blob).decode('utf-8')
+    return blob.decode('utf-8') if isinstance(blob, bytes) else blob
+
+
+def register_article_functions(conn: sqlite3.Connection):
+    """Registrar article_body(blob, codec) en la conexión (necesaria para leer la vista)"""
+    conn.create_function('article_body', 2, decompress_text, deterministic=True)
+
+
+def articles_source(cursor) -> str:
+    """Tabla desde la que leer artículos con content para un cursor de otro módulo.
+
+    Registra article_body en la conexión y devuelve la vista si existe; en una
+    base sin migrar devuelve 'articles'.
+    """
+    register_article_functions(cursor.connection)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = ?", (ARTICLES_VIEW,))
+    return ARTICLES_VIEW if cursor.fetchone() else 'articles'
+
+
+def ensure_article_bodies_table(cursor):
+    """Crear article_bodies y (re)crear la vista articles_with_body con las columnas actuales"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS article_bodies (
+            article_id INTEGER PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+            codec TEXT NOT NULL,
+            content BLOB,
+            raw_size INTEGER DEFAULT 0
+        )
+    ''')
+    create_articles_view(cursor)
+
+
+def create_articles_view(cursor):
+    """Vista con todas las columnas de articles y content resuelto desde article_bodies.
+
+    Se recrea al arrancar para recoger columnas añadidas con ALTER TABLE.
+    """
+    cursor.execute("PRAGMA table_info(articles)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if not columns:
+        return
+    select_list = ', '.join(
+        'COALESCE(article_body(b.content, b.codec), a.content) AS content' if column == 'content' else f'a.{column}'
+        for column in columns
+    )
+    cursor.execute(f"DROP VIEW IF EXISTS {ARTICLES_VIEW}")
+    cursor.execute(f'''
+        CREATE VIEW {ARTICLES_VIEW} AS
+        SELECT {select_list}
+        FROM articles a LEFT JOIN article_bodies b ON b.article_id = a.id
+    ''')
+
+
+def write_bodies(cursor, rows: Iterable[Tuple[int, Optional[str]]]) -> int:
+    """Guardar (o reemplazar) los cuerpos de los artículos dados y vaciar su content en línea"""
+    body_rows = []
+    ids = []
+    for article_id, content in rows:
+        blob, codec = compress_text(content or '')
+        body_rows.append((article_id, codec, blob, len(content or '')))
+        ids.append((article_id,))
+    if not body_rows:
+        return 0
+    cursor.executemany('''
+        INSERT INTO article_bodies (article_id, codec, content, raw_size) VALUES (?, ?, ?, ?)
+        ON CONFLICT(article_id) DO UPDATE SET
+            codec = excluded.codec, content = excluded.content, raw_size = excluded.raw_size
+    ''', body_rows)
+    cursor.executemany("UPDATE articles SET content = NULL WHERE id = ? AND content IS NOT NULL", ids)
+    return len(body_rows)
+
+
+def fetch_bodies(cursor, article_ids: List[int]) -> Dict[int, str]:
+    """Cuerpos descomprimidos por id (con fallback al content en línea)"""
+    bodies: Dict[int, str] = {}
+    for start in range(0, len(article_ids), 500):
+        chunk = article_ids[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'''
+            SELECT a.id, b.content, b.codec, a.content
+            FROM articles a LEFT JOIN article_bodies b ON b.article_id = a.id
+            WHERE a.id IN ({placeholders})
+        ''', chunk)
+        for article_id, blob, codec, inline in cursor.fetchall():
+            bodies[article_id] = decompress_text(blob, codec) if blob is not None else (inline or '')
+    return bodies
+
+
+def prune_orphan_bodies(cursor) -> int:
+    """Borrar cuerpos cuyo artículo ya no existe (las FK no están activas en las conexiones)"""
+    cursor.execute("DELETE FROM article_bodies WHERE article_id NOT IN (SELECT id FROM articles)")
+    return cursor.rowcount
+
+
+def migrate_inline_bodies(conn: sqlite3.Connection, batch_size: int = 1000, progress=None) -> int:
+    """Mover a article_bodies los content que sigan en línea en articles.
+
+    Confirma cada lote por separado para no mantener una transacción enorme.
+    Devuelve el número de artículos migrados.
+    """
+    cursor = conn.cursor()
+    migrated = 0
+    last_id = 0
+    while True:
+        cursor.execute('''
+            SELECT id, content FROM articles
+            WHERE id > ? AND content IS NOT NULL
+            ORDER BY id LIMIT ?
+        ''', (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        migrated += write_bodies(cursor, rows)
+        conn.commit()
+        last_id = rows[-1][0]
+        if progress:
+            progress(migrated, last_id)
+    return migrated
+
+
+# ============================================================
+# Imágenes de artículos (filas normalizadas en la tabla images)
+# ============================================================
+
+IMAGE_FIELDS = ('url', 'local_path', 'alt_text', 'title', 'width', 'height', 'format', 'size_bytes', 'relevance_score')
+
+
+def parse_images_data(images_data: Any) -> List[Dict]:
+    """Lista de imágenes a partir de images_data (lista o JSON)"""
+    if isinstance(images_data, str):
+        if not images_data or images_data == '[]':
+            return []
+        try:
+            images_data = json.loads(images_data)
+        except (json.JSONDecodeError, TypeError):
+            return []
+    if not isinstance(images_data, list):
+        return []
+    return [image for image in images_data if isinstance(image, dict) and (image.get('url') or image.get('local_path'))]
+
+
+def ensure_article_images_schema(cursor):
+    """Añadir a images la referencia numérica al artículo, la posición y la marca de imagen principal"""
+    for column, definition in (
+        ('article_ref', 'INTEGER REFERENCES articles(id) ON DELETE CASCADE'),
+        ('position', 'INTEGER DEFAULT 0'),
+        ('is_primary', 'INTEGER DEFAULT 0'),
+    ):
+        try:
+            cursor.execute(f"ALTER TABLE images ADD COLUMN {column} {definition}")
+        except sqlite3.OperationalError:
+            pass
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_images_article_ref ON images(article_ref, position)")
+    # Índice parcial que cubre la imagen principal de los listados
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_images_primary ON images(article_ref, is_primary, url, local_path) WHERE is_primary = 1")
+
+
+def replace_article_images(cursor, rows: Iterable[Tuple[int, Optional[str], Any]]) -> int:
+    """Reemplazar las imágenes de los artículos dados.
+
+    Args:
+        rows: (id del artículo, article_id de texto, images_data como lista o JSON)
+
+    Returns:
+        Número de imágenes escritas
+    """
+    refs = []
+    image_rows = []
+    for article_ref, article_id, images_data in rows:
+        refs.append((article_ref,))
+        for position, image in enumerate(parse_images_data(images_data)):
+            image_rows.append((
+                article_id, article_ref, position, 1 if position == 0 else 0,
+                image.get('url') or image.get('local_path'),
+                image.get('local_path'),
+                image.get('alt_text') or image.get('alt'),
+                image.get('title'),
+                image.get('width'),
+                image.get('height'),
+                image.get('format'),
+                image.get('size_bytes'),
+                image.get('relevance_score', 0),
+            ))
+    if not refs:
+        return 0
+    cursor.executemany("DELETE FROM images WHERE article_ref = ?", refs)
+    cursor.executemany('''
+        INSERT INTO images (article_id, article_ref, position, is_primary, url, local_path, alt_text,
+                            title, width, height, format, size_bytes, relevance_score)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', image_rows)
+    return len(image_rows)
+
+
+def primary_image_sql(alias: str) -> str:
+    """Columnas thumbnail_url, thumbnail_path con la imagen principal del artículo {alias}.id"""
+    return (
+        f"(SELECT url FROM images WHERE article_ref = {alias}.id AND is_primary = 1) AS thumbnail_url, "
+        f"(SELECT local_path FROM images WHERE article_ref = {alias}.id AND is_primary = 1) AS thumbnail_path"
+    )
+
+
+def image_count_sql(alias: str) -> str:
+    """Columna image_count con el número de imágenes del artículo {alias}.id"""
+    return f"(SELECT COUNT(*) FROM images WHERE article_ref = {alias}.id) AS image_count"
+
+
+def fetch_article_images(cursor, article_ids: List[int]) -> Dict[int, List[Dict]]:
+    """Imágenes ordenadas por posición para cada artículo (formato de images_data)"""
+    images: Dict[int, List[Dict]] = {article_id: [] for article_id in article_ids}
+    for start in range(0, len(article_ids), 500):
+        chunk = article_ids[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'''
+            SELECT article_ref, {', '.join(IMAGE_FIELDS)}
+            FROM images
+            WHERE article_ref IN ({placeholders})
+            ORDER BY article_ref, position
+        ''', chunk)
+        for row in cursor.fetchall():
+            images[row[0]].append(dict(zip(IMAGE_FIELDS, row[1:])))
+    return images
+
+
+def fetch_export_rows(cursor, columns: List[str]) -> List[tuple]:
+    """Filas de todos los artículos con las columnas pedidas, en ese orden, para exportadores.
+
+    content sale descomprimido de article_bodies e images_data (ya vacío en articles) se
+    reconstruye desde images. Las columnas que no existan en articles salen como NULL.
+    """
+    cursor.execute("PRAGMA table_info(articles)")
+    existing = {row[1] for row in cursor.fetchall()}
+    select_list = ', '.join(column if column in existing else f'NULL AS {column}' for column in columns)
+    cursor.execute(f"SELECT id, {select_list} FROM {articles_source(cursor)} ORDER BY id")
+    rows = [list(row) for row in cursor.fetchall()]
+    if 'images_data' in columns:
+        position = columns.index('images_data') + 1
+        cursor.execute("PRAGMA table_info(images)")
+        if 'article_ref' in {row[1] for row in cursor.fetchall()}:
+            missing = [row[0] for row in rows if row[position] is None]
+            images = fetch_article_images(cursor, missing)
+            for row in rows:
+                if row[position] is None:
+                    row[position] = json.dumps(images.get(row[0], []), ensure_ascii=False)
+    return [tuple(row[1:]) for row in rows]
+
+
+def migrate_images_data(cursor, batch_size: int = 1000) -> int:
+    """Convertir los images_data JSON que queden en articles en filas de images. Devuelve artículos migrados"""
+    migrated = 0
+    last_id = 0
+    while True:
+        cursor.execute('''
+            SELECT id, article_id, images_data FROM articles
+            WHERE id > ? AND images_data IS NOT NULL
+            ORDER BY id LIMIT ?
+        ''', (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        replace_article_images(cursor, rows)
+        cursor.executemany("UPDATE articles SET images_data = NULL WHERE id = ?", [(row[0],) for row in rows])
+        migrated += len(rows)
+        last_id = rows[-1][0]
+    return migrated
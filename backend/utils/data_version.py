@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Contadores de versión de datos
+
+Cada espacio de nombres ('articles', 'social') tiene un contador en la tabla
+data_versions de news_database.db que se incrementa en la misma transacción
+que modifica los datos (ingesta de artículos, guardado de posts, borrados).
+La caché de respuestas usa la versión como parte de su validez, de modo que
+un scrape confirmado invalida las respuestas de lectura, incluso si lo hizo
+otro proceso (el scheduler o el auto-scraper).
+"""
+
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+ARTICLES = 'articles'
+SOCIAL = 'social'
+
+# Cada cuánto se vuelve a leer la versión desde la BD (cambios hechos por otros procesos)
+VERSION_CHECK_SECONDS = 5.0
+
+_lock = threading.Lock()
+# (db_path, namespace) -> (versión, momento de la última lectura)
+_known_versions: Dict[Tuple[str, str], Tuple[int, float]] = {}
+
+
+def ensure_data_versions_table(cursor):
+    """Crear la tabla de versiones si no existe"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            namespace TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def bump_data_version(cursor, namespace: str, db_path: str = None):
+    """Incrementar la versión de un espacio de nombres dentro de la transacción del cursor.
+
+    Conviene llamarla justo antes del commit. La versión conocida en este
+    proceso se marca como vencida para que la próxima lectura la refresque.
+    """
+    ensure_data_versions_table(cursor)
+    cursor.execute('''
+        INSERT INTO data_versions (namespace, version, updated_at) VALUES (?, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT(namespace) DO UPDATE SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    ''', (namespace,))
+    with _lock:
+        for key in [k for k in _known_versions if k[1] == namespace and (db_path is None or k[0] == db_path)]:
+            version, _ = _known_versions[key]
+            _known_versions[key] = (version, 0.0)
+
+
+def get_data_version(db_path: str, namespace: str) -> int:
+    """Versión actual de un espacio de nombres (leída de la BD como mucho cada VERSION_CHECK_SECONDS)"""
+    key = (db_path, namespace)
+    now = time.monotonic()
+    with _lock:
+        known = _known_versions.get(key)
+    if known and now - known[1] < VERSION_CHECK_SECONDS:
+        return known[0]
+
+    version = known[0] if known else 0
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            row = conn.execute('SELECT version FROM data_versions WHERE namespace = ?', (namespace,)).fetchone()
+            version = row[0] if row else 0
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.debug(f"No se pudo leer data_versions ({namespace}): {e}")
+    with _lock:
+        _known_versions[key] = (version, now)
+    return version
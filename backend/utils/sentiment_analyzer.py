@@ -233,4 +233,6 @@ class SentimentAnalyzer:
 sentiment_analyzer = SentimentAnalyzer()
 
 
-
+def article_polarity(title: Optional[str], summary: Optional[str]) -> str:
+    """Polaridad ('positive' | 'negative' | 'neutral') de un artículo según su título y resumen"""
+    return sentiment_analyzer.analyze_sentiment(f"{title or ''} {summary or ''}")['polarity']
@@ -0,0 +1,3 @@
+"""
+Corpus HTML offline y benchmarks de extracción (ver benchmarks/corpus.py)
+"""
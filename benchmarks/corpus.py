@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Corpus HTML offline para los benchmarks de extracción
+
+Reconstruye la maqueta de portada y de artículo de varios medios (El Comercio,
+Peru21, El Peruano, Andina, RPP y NYTimes): mismas rutas de URL, clases,
+metadatos (og:*, article:published_time, JSON-LD) y estructura de imágenes
+que apuntan los extractores, con textos sintéticos deterministas en lugar del
+contenido real. Cada portada trae también el ruido habitual (menús de
+categorías, enlaces de autor, etiquetas, publicidad, scripts, pie de página).
+
+Los ficheros de benchmarks/fixtures/ se generan con:
+
+    python -m benchmarks.corpus
+
+y se versionan tal cual; index.json asocia cada fichero a la URL con la que
+se sirvió. Regenerarlos cambia las salidas de referencia (benchmarks/golden/).
+"""
+
+import json
+import random
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from html import escape
+from pathlib import Path
+from typing import Dict, List, Optional
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+# Tarjetas por portada y artículos guardados por medio
+HOME_CARDS = 48
+ARTICLES_PER_SITE = 3
+PARAGRAPHS_PER_ARTICLE = 12
+BASE_DATE = datetime(2025, 3, 14, 9, 30)
+
+SUBJECTS = [
+    'El Congreso', 'El Ministerio de Economía', 'La Municipalidad de Lima', 'El Banco Central de Reserva',
+    'La Sunat', 'El Gobierno Regional de Arequipa', 'La selección peruana', 'Los productores de café de Junín',
+    'El Minsa', 'La Cancillería', 'Los transportistas de carga', 'El Poder Judicial', 'Indecopi',
+    'La Universidad de San Marcos', 'Los agricultores del Valle del Mantaro', 'El Senamhi',
+]
+PREDICATES = [
+    'aprueba nuevo presupuesto para obras de infraestructura vial',
+    'anuncia medidas para reducir la informalidad laboral en el país',
+    'presenta plan de emergencia ante las lluvias en la sierra sur',
+    'advierte sobre el impacto del fenómeno El Niño costero en la pesca',
+    'inicia campaña de vacunación en colegios de Lima Metropolitana',
+    'mantiene la tasa de referencia por tercer mes consecutivo',
+    'firma convenio para ampliar la red de agua potable en zonas rurales',
+    'evalúa cambios en el reglamento de transporte interprovincial',
+    'reporta récord de exportaciones agrícolas durante el primer trimestre',
+    'convoca a mesa de diálogo tras paro de cuarenta y ocho horas',
+]
+SENTENCES = [
+    'La medida fue anunciada durante una conferencia de prensa realizada en la mañana de este viernes.',
+    'Según las autoridades, el cronograma de ejecución contempla tres etapas a lo largo del año.',
+    'Los especialistas consultados coincidieron en que el impacto dependerá de la coordinación entre sectores.',
+    'El informe técnico detalla que la inversión prevista supera los 120 millones de soles.',
+    'Representantes de los gremios empresariales pidieron mayor claridad sobre los plazos de aplicación.',
+    'En las regiones del sur, los gobiernos locales ya iniciaron los trabajos de prevención.',
+    'La oposición cuestionó la falta de consulta previa con las organizaciones de base.',
+    'De acuerdo con cifras oficiales, el indicador creció 4,2 % respecto al mismo periodo del año anterior.',
+    'El titular del sector aseguró que los recursos serán transferidos antes de fin de mes.',
+    'Vecinos de los distritos afectados denunciaron demoras en la atención de sus reclamos.',
+    'El documento será evaluado por la comisión correspondiente la próxima semana.',
+    'Analistas advierten que la volatilidad internacional podría afectar las proyecciones.',
+    'Las clases continuarán con normalidad mientras se completa la evaluación de los locales escolares.',
+    'La entidad recordó que las consultas pueden realizarse a través de su plataforma digital.',
+    'Fuentes del sector indicaron que la propuesta incluye incentivos tributarios para pequeñas empresas.',
+    'El proyecto beneficiará directamente a más de 35 mil familias de la zona.',
+    'Durante la jornada se registraron largas colas en los principales puntos de atención.',
+    'El pronóstico prevé precipitaciones de moderada a fuerte intensidad hasta el domingo.',
+    'La fiscalía abrió una investigación preliminar para determinar responsabilidades.',
+    'Los dirigentes anunciaron que se mantendrán vigilantes al cumplimiento de los acuerdos.',
+    'En paralelo, se habilitaron rutas alternas para reducir la congestión vehicular.',
+    'La institución precisó que el padrón de beneficiarios será publicado en los próximos días.',
+    'Expertos en salud pública recomendaron reforzar las medidas de prevención en los hogares.',
+    'El comunicado oficial fue difundido a través de las redes sociales de la entidad.',
+]
+AUTHORS = ['Redacción', 'María Quispe Rojas', 'Luis Fernández Soto', 'Carla Mendoza Ríos', 'Jorge Huamán Díaz']
+
+
+def slugify(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9]+', '-', text).strip('-')
+
+
+def _article_model(site: str, n: int) -> Dict:
+    """Datos deterministas del artículo n de un medio"""
+    spec = SITES[site]
+    rng = random.Random(f'{site}-{n}')
+    title = f"{SUBJECTS[n % len(SUBJECTS)]} {PREDICATES[(n * 7 + len(site)) % len(PREDICATES)]}"
+    category = spec['categories'][n % len(spec['categories'])]
+    published = BASE_DATE - timedelta(hours=n * 3, minutes=n * 7 % 60)
+    article = {
+        'site': site,
+        'n': n,
+        'title': title,
+        'slug': slugify(title),
+        'category': category,
+        'published': published,
+        'author': AUTHORS[n % len(AUTHORS)],
+        'summary': ' '.join(rng.sample(SENTENCES, 2)),
+        'paragraphs': [' '.join(rng.sample(SENTENCES, 3)) for _ in range(PARAGRAPHS_PER_ARTICLE)],
+    }
+    article['path'] = spec['article_path'](article)
+    article['url'] = spec['base'] + article['path']
+    article['images'] = spec['image_urls'](article)
+    return article
+
+
+def site_articles(site: str, count: int, start: int = 1) -> List[Dict]:
+    return [_article_model(site, n) for n in range(start, start + count)]
+
+
+# ---------------------------------------------------------------------------
+# Rutas e imágenes por medio
+# ---------------------------------------------------------------------------
+
+def _ymd(article, sep='/'):
+    return article['published'].strftime(f'%Y{sep}%m{sep}%d')
+
+
+SITES = {
+    'elcomercio': {
+        'base': 'https://elcomercio.pe',
+        'home_path': '/',
+        'name': 'El Comercio',
+        'categories': ['politica', 'economia', 'lima', 'mundo', 'deporte-total'],
+        'article_path': lambda a: f"/{a['category']}/actualidad/{a['slug']}-noticia/",
+        'image_urls': lambda a: [
+            f"https://elcomercio.pe/resizer/v2/{slugify(a['title'])[:24].upper()}{a['n']:04d}.jpg"
+            f"?auth=9f1c{a['n']:04d}&width=980&height=528&quality=75&smart=true",
+            f"https://elcomercio.pe/resizer/v2/GALERIA{a['n']:04d}B.jpg?width=640",
+        ],
+    },
+    'peru21': {
+        'base': 'https://peru21.pe',
+        'home_path': '/',
+        'name': 'Peru21',
+        'categories': ['politica', 'economia', 'lima', 'deportes', 'mundo'],
+        'article_path': lambda a: f"/{a['category']}/{a['slug']}/",
+        'image_urls': lambda a: [
+            f"https://peru21.pe/resizer/v2/P21{a['n']:05d}ABCDEF.jpg?auth=21{a['n']:04d}&width=1200&height=675",
+        ],
+    },
+    'elperuano': {
+        'base': 'https://elperuano.pe',
+        'home_path': '/',
+        'name': 'El Peruano',
+        'categories': ['economia', 'politica', 'pais', 'derecho'],
+        'article_path': lambda a: f"/noticia/{254300 + a['n']}-{a['slug']}",
+        'image_urls': lambda a: [
+            f"https://elperuano.pe/fotografia/thumbnail/{_ymd(a)}/000{312000 + a['n']}M.jpg",
+        ],
+    },
+    'andina': {
+        'base': 'https://andina.pe',
+        'home_path': '/agencia/',
+        'name': 'Andina',
+        'categories': ['economia', 'politica', 'regionales', 'sociedad'],
+        'article_path': lambda a: f"/agencia/noticia-{a['slug'][:60].rstrip('-')}-{1012000 + a['n']}.aspx",
+        'image_urls': lambda a: [
+            f"https://portal.andina.pe/EDPfotografia3/Thumbnail/{_ymd(a)}/000{912000 + a['n']}W.jpg",
+            f"https://portal.andina.pe/EDPfotografia3/Thumbnail/{_ymd(a)}/000{912500 + a['n']}M.jpg",
+        ],
+    },
+    'rpp': {
+        'base': 'https://rpp.pe',
+        'home_path': '/',
+        'name': 'RPP',
+        'categories': ['politica', 'economia', 'lima', 'mundo', 'deportes'],
+        'article_path': lambda a: f"/{a['category']}/actualidad/{a['slug']}-noticia-{1612000 + a['n']}",
+        'image_urls': lambda a: [
+            f"https://e.rpp-noticias.io/large/{_ymd(a)}/{a['n']:03d}1234_{1612000 + a['n']}.webp",
+            f"https://e.rpp-noticias.io/small/{_ymd(a)}/{a['n']:03d}1234_{1612000 + a['n']}.webp",
+        ],
+    },
+    'nytimes': {
+        'base': 'https://www.nytimes.com',
+        'home_path': '/section/world/americas',
+        'name': 'The New York Times',
+        'categories': ['world/americas', 'business', 'climate', 'world'],
+        'article_path': lambda a: f"/{_ymd(a)}/{a['category']}/{a['slug'][:70].rstrip('-')}.html",
+        'image_urls': lambda a: [
+            f"https://static01.nyt.com/images/{_ymd(a)}/multimedia/{a['n']:02d}peru-{a['slug'][:20].rstrip('-')}"
+            f"-01-superJumbo.jpg",
+            f"https://static01.nyt.com/images/{_ymd(a)}/multimedia/{a['n']:02d}peru-map-articleLarge.png",
+        ],
+    },
+}
+
+
+# ---------------------------------------------------------------------------
+# Piezas comunes
+# ---------------------------------------------------------------------------
+
+def _page(head: str, body: str, lang: str = 'es') -> str:
+    return f"""<!DOCTYPE html>
+<html lang="{lang}">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+{head}
+<link rel="stylesheet" href="/static/css/main.7c1e2a.css">
+<script async src="https://securepubads.g.doubleclick.net/tag/js/gpt.js"></script>
+<script>window.dataLayer = window.dataLayer || []; function gtag(){{dataLayer.push(arguments);}}</script>
+</head>
+<body>
+{body}
+<script src="/static/js/vendor.4b1f0e.js" defer></script>
+<script src="/static/js/main.7c1e2a.js" defer></script>
+</body>
+</html>
+"""
+
+
+def _nav(spec: Dict) -> str:
+    items = ''.join(f'<li class="nav__item"><a href="/{c}/">{escape(c.replace("-", " ").title())}</a></li>'
+                    for c in spec['categories'])
+    extra = ''.join(f'<li class="nav__item"><a href="{href}">{label}</a></li>' for href, label in (
+        ('/ultimas-noticias/', 'Últimas noticias'), ('/opinion/', 'Opinión'), ('/videos/', 'Videos'),
+        ('/tag/congreso/', 'Congreso'), ('/buscar/', 'Buscar'), ('/login/', 'Ingresar'),
+    ))
+    return f"""<header class="header">
+<a class="header__logo" href="/"><img src="/static/img/logo.svg" alt="{escape(spec['name'])}" width="180" height="40"></a>
+<nav class="nav" role="navigation"><ul class="nav__list">{items}{extra}</ul></nav>
+</header>"""
+
+
+def _footer(spec: Dict) -> str:
+    links = ''.join(f'<li><a href="{href}">{label}</a></li>' for href, label in (
+        ('/contact/', 'Contáctanos'), ('/about/', 'Quiénes somos'), ('/privacy/', 'Política de privacidad'),
+        ('/terms/', 'Términos y condiciones'), ('/sitemap/', 'Mapa del sitio'), ('/rss/', 'RSS'),
+        ('https://www.facebook.com/' + slugify(spec['name']), 'Facebook'),
+        ('https://twitter.com/' + slugify(spec['name']), 'Twitter'),
+    ))
+    return f"""<footer class="footer">
+<ul class="footer__links">{links}</ul>
+<p class="footer__copy">© 2025 {escape(spec['name'])}. Todos los derechos reservados.</p>
+</footer>"""
+
+
+def _ad(slot: int) -> str:
+    return (f'<div class="ad ad--box" id="ads_{slot}" data-ad-slot="/28253241/home_{slot}">'
+            f'<script>googletag.cmd.push(function() {{ googletag.display("ads_{slot}"); }});</script></div>')
+
+
+def _author_links(spec: Dict) -> str:
+    """Enlaces de autor y etiquetas que los extractores deben descartar"""
+    authors = ''.join(f'<a class="author-link" href="/autor/{slugify(a)}">{escape(a)}</a>' for a in AUTHORS[1:])
+    tags = ''.join(f'<a class="tag" href="/noticias-de-{slugify(s)}/">{escape(s)}</a>' for s in SUBJECTS[:6])
+    return f'<aside class="sidebar"><div class="authors">{authors}</div><div class="tags">{tags}</div></aside>'
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime('%Y-%m-%dT%H:%M:%S-05:00')
+
+
+def _json_ld(data) -> str:
+    return f'<script type="application/ld+json">{json.dumps(data, ensure_ascii=False)}</script>'
+
+
+# ---------------------------------------------------------------------------
+# Tarjetas de portada
+# ---------------------------------------------------------------------------
+
+def _card_arc(a: Dict) -> str:
+    return f"""<div class="story-item story-item--{a['category']}">
+  <div class="story-item__information-box">
+    <h3 class="story-item__section"><a href="/{a['category']}/">{escape(a['category'].title())}</a></h3>
+    <h2 class="story-item__content-title"><a class="story-item__title" href="{a['path']}">{escape(a['title'])}</a></h2>
+    <p class="story-item__subtitle">{escape(a['summary'])}</p>
+    <span class="story-item__date">{a['published'].strftime('%d/%m/%Y')}</span>
+  </div>
+  <a class="story-item__link-img" href="{a['path']}"><picture>
+    <source srcset="{escape(a['images'][0])}&amp;width=320" media="(max-width: 639px)">
+    <img class="story-item__img lazy" src="data:image/gif;base64,R0lGODlhAQABAAAAACw=" data-src="{escape(a['images'][0])}" alt="{escape(a['title'])}" width="320" height="180">
+  </picture></a>
+</div>"""
+
+
+def _card_elperuano(a: Dict) -> str:
+    return f"""<div class="card card-noticia">
+  <a href="{a['path']}"><img class="card-img-top" src="{escape(a['images'][0])}" alt=""></a>
+  <div class="card-body">
+    <span class="card-seccion">{escape(a['category'].upper())}</span>
+    <h3 class="card-title"><a href="{a['path']}">{escape(a['title'])}</a></h3>
+    <p class="card-text">{escape(a['summary'])}</p>
+  </div>
+</div>"""
+
+
+def _card_andina(a: Dict) -> str:
+    return f"""<div class="col s12 m6 l4 noticia-item">
+  <div class="card-image"><a href="{a['path']}"><img src="{escape(a['images'][0])}" alt="{escape(a['title'])}"></a></div>
+  <h3 class="titulo"><a href="{a['path']}">{escape(a['title'])}</a></h3>
+  <p class="resumen">{escape(a['summary'])}</p>
+</div>"""
+
+
+def _card_rpp(a: Dict) -> str:
+    return f"""<article class="news news--summary">
+  <div class="news__media"><a href="{a['path']}"><img src="{escape(a['images'][1])}" alt="{escape(a['title'])}" loading="lazy"></a></div>
+  <div class="news__data">
+    <h2 class="news__title"><a href="{a['path']}">{escape(a['title'])}</a></h2>
+    <time class="news__date" datetime="{_iso(a['published'])}">{a['published'].strftime('%H:%M')}</time>
+  </div>
+</article>"""
+
+
+def _card_nytimes(a: Dict) -> str:
+    return f"""<li class="css-18yolpw"><div class="css-1cp3ece"><article class="css-1l4spti">
+  <a class="css-8hzhxf" href="{a['path']}"><h3 class="css-1j88qqx e15t083i0">{escape(a['title'])}</h3>
+  <p class="css-1pga48a e15t083i1">{escape(a['summary'])}</p></a>
+  <div class="css-1i4y2t3"><span class="css-1n7hynb">By {escape(a['author'])}</span></div>
+  <figure class="css-1vs2bm0"><img alt="" class="css-rq4mmj" src="{escape(a['images'][0].replace('superJumbo', 'threeByTwoSmallAt2X'))}" width="600" height="400"></figure>
+</article></div></li>"""
+
+
+CARD_RENDERERS = {
+    'elcomercio': _card_arc,
+    'peru21': _card_arc,
+    'elperuano': _card_elperuano,
+    'andina': _card_andina,
+    'rpp': _card_rpp,
+    'nytimes': _card_nytimes,
+}
+
+
+def render_home(site: str, articles: List[Dict], extra_html: str = '') -> str:
+    """Portada con una tarjeta por artículo, intercalando publicidad y barra lateral"""
+    spec = SITES[site]
+    cards = []
+    for i, article in enumerate(articles):
+        cards.append(CARD_RENDERERS[site](article))
+        if i % 8 == 7:
+            cards.append(_ad(i))
+    if site == 'nytimes':
+        main = f'<main id="site-content"><section id="stream-panel"><ol>{"".join(cards)}</ol></section>' \
+               f'<a href="/games/wordle/index.html">Wordle</a><a href="/crosswords">Crossword</a></main>'
+    else:
+        main = f'<main class="content"><section class="home-stories">{"".join(cards)}</section></main>'
+    head = f"""<title>{escape(spec['name'])} | Noticias del Perú y el mundo</title>
+<meta name="description" content="Últimas noticias de {escape(spec['name'])}">
+<meta property="og:site_name" content="{escape(spec['name'])}">
+<meta property="og:type" content="website">
+<link rel="canonical" href="{spec['base']}{spec['home_path']}">"""
+    body = f"{_nav(spec)}\n{main}\n{_author_links(spec)}\n{extra_html}\n{_footer(spec)}"
+    return _page(head, body, lang='en' if site == 'nytimes' else 'es')
+
+
+# ---------------------------------------------------------------------------
+# Páginas de artículo
+# ---------------------------------------------------------------------------
+
+def _paragraphs(a: Dict, p_class: str = '', related: Optional[Dict] = None) -> str:
+    parts = []
+    attr = f' class="{p_class}"' if p_class else ''
+    for i, text in enumerate(a['paragraphs']):
+        parts.append(f'<p{attr}>{escape(text)}</p>')
+        if i == 3 and related:
+            parts.append(f'<p{attr}><strong>Lee también: </strong><a href="{related["path"]}">'
+                         f'{escape(related["title"])}</a></p>')
+        if i == 6:
+            parts.append(_ad(100 + i))
+    return '\n'.join(parts)
+
+
+def _share() -> str:
+    return ('<div class="share-buttons"><a href="#" class="share-facebook">Compartir en Facebook</a>'
+            '<a href="#" class="share-twitter">Compartir en Twitter</a>'
+            '<a href="#" class="share-whatsapp">Compartir en WhatsApp</a></div>')
+
+
+def _related(related: List[Dict]) -> str:
+    items = ''.join(f'<li><a href="{r["path"]}">{escape(r["title"])}</a></li>' for r in related)
+    return f'<section class="related-stories"><h4>Más noticias</h4><ul>{items}</ul></section>'
+
+
+def _article_arc(a: Dict, related: List[Dict], with_body_ld: bool) -> str:
+    spec = SITES[a['site']]
+    ld = {
+        '@context': 'https://schema.org', '@type': 'NewsArticle', 'headline': a['title'],
+        'image': [a['images'][0]], 'author': {'@type': 'Person', 'name': a['author']},
+        'publisher': {'@type': 'Organization', 'name': spec['name']},
+        'datePublished': _iso(a['published']), 'dateModified': _iso(a['published'] + timedelta(hours=1)),
+    }
+    if with_body_ld:
+        ld['articleBody'] = ' '.join(a['paragraphs'])
+        head_date = f'<meta property="article:published_time" content="{_iso(a["published"])}">'
+        ld_html = _json_ld(ld)
+    else:
+        head_date = ''
+        ld_html = _json_ld([ld, {'@context': 'https://schema.org', '@type': 'BreadcrumbList', 'itemListElement': []}])
+    head = f"""<title>{escape(a['title'])} | {escape(spec['name'])}</title>
+<meta name="description" content="{escape(a['summary'])}">
+<meta property="og:title" content="{escape(a['title'])}">
+<meta property="og:image" content="{escape(a['images'][0])}">
+<meta property="og:type" content="article">
+{head_date}
+{ld_html}"""
+    gallery = ''.join(f'<figure class="s-multimedia"><img src="{escape(src)}" alt="{escape(a["title"])}" width="980" height="528">'
+                      f'<figcaption>Foto: {escape(spec["name"])}</figcaption></figure>' for src in a['images'])
+    body = f"""{_nav(spec)}
+<main class="story">
+  <div class="sht"><h1 class="sht__title">{escape(a['title'])}</h1><h2 class="sht__summary">{escape(a['summary'])}</h2></div>
+  <div class="s-aut"><a class="s-aut__n" href="/autor/{slugify(a['author'])}">{escape(a['author'])}</a>
+  <time class="s-aut__time">Actualizado el {a['published'].strftime('%d/%m/%Y %H:%M')}</time></div>
+  {gallery}
+  {_share()}
+  <div class="story-contents__content story-content__body">
+{_paragraphs(a, 'story-contents__font-paragraph', related[0] if related else None)}
+  </div>
+  {_related(related)}
+</main>
+{_footer(spec)}"""
+    return _page(head, body)
+
+
+def _article_elperuano(a: Dict, related: List[Dict]) -> str:
+    spec = SITES['elperuano']
+    head = f"""<title>{escape(a['title'])}</title>
+<meta property="og:title" content="{escape(a['title'])}">
+<meta property="og:image" content="{escape(a['images'][0])}">"""
+    body = f"""{_nav(spec)}
+<div class="container"><div class="row"><div class="col-md-8">
+  <article class="story">
+    <span class="seccion">{escape(a['category'].upper())}</span>
+    <h1 class="titular">{escape(a['title'])}</h1>
+    <div class="article-date">{a['published'].strftime('%Y-%m-%d %H:%M')}</div>
+    <img class="img-fluid" src="{escape(a['images'][0])}" alt="{escape(a['title'])}">
+    <div class="notatexto">
+{_paragraphs(a, '', related[0] if related else None)}
+    </div>
+    {_share()}
+  </article>
+</div><div class="col-md-4">{_related(related)}</div></div></div>
+{_footer(spec)}"""
+    return _page(head, body)
+
+
+def _article_andina(a: Dict, related: List[Dict]) -> str:
+    spec = SITES['andina']
+    head = f"""<title>{escape(a['title'])}</title>
+<meta name="date" content="{a['published'].strftime('%Y-%m-%d')}">
+<meta property="og:image" content="https://andina.pe/agencia/img/logo-andina-og.png">"""
+    body = f"""{_nav(spec)}
+<div class="row"><div class="col s12 m8 l9">
+  <article>
+    <h1 class="titulo-nota">{escape(a['title'])}</h1>
+    <div class="fecha-nota">{a['published'].strftime('%H:%M | Lima, %b. %d.')}</div>
+    <figure><img src="{escape(a['images'][0])}" alt="{escape(a['title'])}"><figcaption>Foto: ANDINA/Difusión</figcaption></figure>
+    <div class="article-content">
+{_paragraphs(a, '', related[0] if related else None)}
+    </div>
+    <figure><img src="{escape(a['images'][1])}" alt="Galería"></figure>
+  </article>
+</div><div class="col s12 m4 l3">{_related(related)}</div></div>
+{_footer(spec)}"""
+    return _page(head, body)
+
+
+def _article_rpp(a: Dict, related: List[Dict]) -> str:
+    spec = SITES['rpp']
+    head = f"""<title>{escape(a['title'])} | RPP Noticias</title>
+<meta name="description" content="{escape(a['summary'])}">"""
+    body = f"""{_nav(spec)}
+<main><article class="article">
+  <header><h1 class="article__title">{escape(a['title'])}</h1>
+  <span class="article__date" data-published="{_iso(a['published'])}">{a['published'].strftime('%d de marzo de %Y')}</span></header>
+  <div class="cover"><img src="{escape(a['images'][0])}" alt="{escape(a['title'])}" width="1200" height="675"></div>
+  <div id="article-body" class="body">
+{_paragraphs(a, '', related[0] if related else None)}
+  </div>
+  <img class="avatar" src="https://e.rpp-noticias.io/avatar/{slugify(a['author'])}.png" alt="{escape(a['author'])}">
+</article>
+{_related(related)}</main>
+{_footer(spec)}"""
+    return _page(head, body)
+
+
+def _article_nytimes(a: Dict, related: List[Dict]) -> str:
+    spec = SITES['nytimes']
+    ld = {
+        '@context': 'https://schema.org', '@type': 'NewsArticle', 'headline': a['title'],
+        'image': [{'@type': 'ImageObject', 'url': src, 'width': 2048, 'height': 1365} for src in a['images']],
+        'datePublished': a['published'].strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        'author': [{'@type': 'Person', 'name': a['author']}],
+    }
+    head = f"""<title>{escape(a['title'])} - {spec['name']}</title>
+<meta property="og:title" content="{escape(a['title'])}">
+<meta property="og:image" content="{escape(a['images'][0])}">
+{_json_ld(ld)}"""
+    paragraphs = '\n'.join(
+        f'<div class="css-53u6y8 StoryBodyCompanionColumn"><div class="css-at9mc1"><p class="css-at9mc1 evys1bk0">{escape(text)}</p></div></div>'
+        for text in a['paragraphs'])
+    body = f"""<div id="app"><header class="css-1vxc2sl"><a href="/">{spec['name']}</a></header>
+<main id="site-content"><article id="story">
+  <header class="css-1ugt2t3"><h1 data-testid="headline" class="css-88wicj e1h9rw200">{escape(a['title'])}</h1>
+  <p id="article-summary" class="css-79rysd">{escape(a['summary'])}</p>
+  <time class="css-1baulvz" datetime="{a['published'].strftime('%Y-%m-%dT%H:%M:%S-05:00')}">{a['published'].strftime('%B %d, %Y')}</time></header>
+  <figure class="css-1a48zt4"><picture><img alt="{escape(a['title'])}" class="css-rq4mmj" src="{escape(a['images'][0])}" width="2048" height="1365"></picture></figure>
+  <section name="articleBody" data-testid="article-body" class="meteredContent css-1r7ky0e">
+{paragraphs}
+  </section>
+</article>{_related(related)}</main></div>"""
+    return _page(head, body, lang='en')
+
+
+def render_article(site: str, article: Dict, related: List[Dict]) -> str:
+    if site in ('elcomercio', 'peru21'):
+        return _article_arc(article, related, with_body_ld=site == 'elcomercio')
+    return {
+        'elperuano': _article_elperuano,
+        'andina': _article_andina,
+        'rpp': _article_rpp,
+        'nytimes': _article_nytimes,
+    }[site](article, related)
+
+
+def write_corpus(target: Path = FIXTURES_DIR) -> Dict[str, Dict]:
+    """Escribir portada y artículos de cada medio en target/<medio>/ y el índice fichero -> URL"""
+    index = {}
+    for site, spec in SITES.items():
+        site_dir = target / site
+        site_dir.mkdir(parents=True, exist_ok=True)
+        home_articles = site_articles(site, HOME_CARDS)
+        home_file = f'{site}/home.html'
+        (target / home_file).write_text(render_home(site, home_articles), encoding='utf-8')
+        index[home_file] = {'site': site, 'kind': 'home', 'url': spec['base'] + spec['home_path']}
+        for article in home_articles[:ARTICLES_PER_SITE]:
+            related = home_articles[article['n']:article['n'] + 4]
+            article_file = f"{site}/article_{article['n']}.html"
+            (target / article_file).write_text(render_article(site, article, related), encoding='utf-8')
+            index[article_file] = {'site': site, 'kind': 'article', 'url': article['url']}
+    (target / 'index.json').write_text(json.dumps(index, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    return index
+
+
+if __name__ == '__main__':
+    written = write_corpus()
+    print(f"✅ {len(written)} páginas escritas en {FIXTURES_DIR}")
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Benchmark de extremo a extremo de los motores de crawling contra el servidor local
+
+Levanta benchmarks/replay_server.py (medio sintético con paginación numerada,
+"VER MÁS", artículos e imágenes, con latencia y fallos configurables) y
+recorre el sitio con cada motor, tal como los usa api_server:
+
+    improved    ImprovedScraper.scrape_articles (portada + cada artículo)
+    smart       SmartScraper.crawl_and_scrape_parallel
+    hybrid      HybridDataCrawler.hybrid_crawl_articles (solo tarjetas del listado)
+    pagination  PaginationCrawler.crawl_all_pages sobre las páginas numeradas con ImprovedScraper
+    load-more   PaginationCrawler.crawl_all_pages sobre el botón "VER MÁS" (necesita Chrome)
+
+Cada motor corre en un proceso nuevo (estado global del planificador, del
+cortacircuitos y de la caché de paginación limpio, y memoria medida por
+separado). Por motor se informa: artículos/s, p95 de la latencia por artículo
+(extracción completa de uno, solo en motores que abren cada artículo), pico de
+RSS del proceso y bytes descargados (cuerpos servidos por el servidor local).
+
+El ritmo por host del planificador se fija con --host-rate (200 req/s por
+defecto) para medir el motor y no la cortesía; con --host-rate 0 se usa el
+ritmo adaptativo normal. Sin Chrome, 'hybrid' usa directamente su método
+Requests, 'smart' no intenta su fallback Selenium y 'load-more' se omite.
+La maqueta por defecto es la de RPP, de la que todos los motores sacan artículos
+(el extractor de tarjetas del híbrido no reconoce la de El Comercio / Peru21).
+
+Uso:
+    python -m benchmarks.crawl_benchmark
+    python -m benchmarks.crawl_benchmark --latency 0.05 --jitter 0.05 --fail-rate 0.05 --engines improved smart
+    python -m benchmarks.crawl_benchmark --save-baseline benchmarks/.crawl_baseline.json
+    python -m benchmarks.crawl_benchmark --baseline benchmarks/.crawl_baseline.json   # falla si baja el ritmo
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+from benchmarks.replay_server import ReplayServer
+
+ENGINES = ('improved', 'smart', 'hybrid', 'pagination', 'load-more')
+BROWSER_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+
+DEFAULT_SITE = 'rpp'
+DEFAULT_HOST_RATE = 200.0
+DEFAULT_WORKERS = 10
+ENGINE_TIMEOUT = 600
+MAX_REGRESSION = 1.3
+
+
+def browser_available() -> bool:
+    return any(shutil.which(name) for name in BROWSER_BINARIES)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Percentil por rango más cercano (None sin valores)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def peak_rss_mb() -> Optional[float]:
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss va en KB en Linux y en bytes en macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _timed(func, latencies: List[float]):
+    """func que anota en latencies la duración de cada llamada"""
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+    return wrapper
+
+
+def _crawl(engine: str, urls: Dict[str, str], max_articles: int, workers: int, use_browser: bool,
+           latencies: List[float]):
+    """Recorrer el sitio con un motor; devuelve (artículos, modo)"""
+    if engine in ('improved', 'pagination', 'load-more'):
+        from backend.scrapers.improved_scraper import ImprovedScraper
+        scraper = ImprovedScraper()
+        scraper._scrape_article = _timed(scraper._scrape_article, latencies)
+        try:
+            if engine == 'improved':
+                return scraper.scrape_articles(urls['home'], max_articles), 'requests'
+            from backend.scrapers.pagination_crawler import PAGE_WORKERS, PaginationCrawler
+            crawler = PaginationCrawler(use_selenium=use_browser)
+            try:
+                url = urls['home'] if engine == 'pagination' else urls['load_more']
+                articles = crawler.crawl_all_pages(
+                    url, max_articles, extract_articles_func=lambda page_url: scraper.scrape_articles(page_url, max_articles),
+                    page_workers=PAGE_WORKERS, scrape_article_func=scraper.scrape_article,
+                )
+                return articles, 'selenium' if crawler.driver else 'requests'
+            finally:
+                crawler.close()
+        finally:
+            scraper.close()
+
+    if engine == 'smart':
+        from backend.scrapers.optimized_scraper import SmartScraper
+        scraper = SmartScraper(max_workers=workers)
+        scraper.process_single_article = _timed(scraper.process_single_article, latencies)
+        if not use_browser:
+            # Sin Chrome el fallback solo gastaría tiempo intentando descargar chromedriver
+            scraper.get_page_with_selenium = lambda url: None
+        try:
+            mode = 'requests' if use_browser else 'requests (sin navegador)'
+            return scraper.crawl_and_scrape_parallel(urls['home'], max_articles), mode
+        finally:
+            scraper.close()
+
+    if engine == 'hybrid':
+        from backend.scrapers.hybrid_crawler import HybridDataCrawler
+        crawler = HybridDataCrawler(max_workers=workers)
+        try:
+            if use_browser:
+                return crawler.hybrid_crawl_articles(urls['home'], max_articles), 'hybrid'
+            return crawler.crawl_articles_with_requests(urls['home'], max_articles), 'requests (sin navegador)'
+        finally:
+            crawler.close()
+
+    raise ValueError(f"Motor desconocido: {engine}")
+
+
+def run_engine(engine: str, urls: Dict[str, str], max_articles: int, workers: int = DEFAULT_WORKERS,
+               host_rate: float = DEFAULT_HOST_RATE, use_browser: bool = False, verbose: bool = False) -> Dict:
+    """Ejecutar un motor en el proceso actual y medirlo (pensado para un proceso nuevo por motor)"""
+    logging.basicConfig(level=logging.INFO if verbose else logging.ERROR, force=True)
+    warnings.simplefilter('ignore', FutureWarning)
+    from backend.scrapers.host_scheduler import host_limiter
+
+    if host_rate > 0:
+        host_limiter.set_rate(urls['home'], host_rate)
+    latencies: List[float] = []
+    cwd = os.getcwd()
+    # SmartScraper deja su caché sqlite y la carpeta de imágenes en el directorio actual
+    with tempfile.TemporaryDirectory(prefix='crawl-bench-') as workdir:
+        os.chdir(workdir)
+        try:
+            started = time.perf_counter()
+            articles, mode = _crawl(engine, urls, max_articles, workers, use_browser, latencies)
+            elapsed = time.perf_counter() - started
+        finally:
+            os.chdir(cwd)
+    count = len(articles or [])
+    p95 = percentile(latencies, 0.95)
+    return {
+        'engine': engine,
+        'mode': mode,
+        'articles': count,
+        'seconds': round(elapsed, 3),
+        'articles_per_sec': round(count / elapsed, 2) if elapsed > 0 else None,
+        'p95_article_ms': round(p95 * 1000, 1) if p95 is not None else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_benchmark(server: ReplayServer, engines=ENGINES, max_articles: Optional[int] = None,
+                  workers: int = DEFAULT_WORKERS, host_rate: float = DEFAULT_HOST_RATE,
+                  use_browser: Optional[bool] = None, verbose: bool = False,
+                  timeout: float = ENGINE_TIMEOUT) -> List[Dict]:
+    """Medir cada motor contra un ReplayServer ya arrancado, uno tras otro y cada uno en su proceso"""
+    if use_browser is None:
+        use_browser = browser_available()
+    if max_articles is None:
+        max_articles = len(server.site.articles)
+    urls = {'home': server.home_url, 'load_more': server.load_more_url}
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for engine in engines:
+        if engine == 'load-more' and not use_browser:
+            results.append({'engine': engine, 'skipped': 'sin Chrome para el botón VER MÁS'})
+            continue
+        server.reset_stats()
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_engine, engine, urls, max_articles, workers, host_rate, use_browser,
+                                     verbose).result(timeout=timeout)
+        except Exception as e:
+            results.append({'engine': engine, 'error': f"{type(e).__name__}: {e}"})
+            continue
+        stats = server.stats()
+        result['requests'] = stats['requests'].get('requests', 0)
+        result['failed_requests'] = stats['requests'].get('failed', 0)
+        result['bytes_fetched'] = stats['bytes'].get('total', 0)
+        results.append(result)
+    return results
+
+
+def format_results(results: List[Dict]) -> str:
+    header = (f"{'motor':<12} {'modo':<24} {'artículos':>9} {'art/s':>8} {'p95 ms':>8} {'RSS MB':>8} "
+              f"{'peticiones':>10} {'KB':>9}")
+    lines = [header, '-' * len(header)]
+    for r in results:
+        if 'skipped' in r or 'error' in r:
+            lines.append(f"{r['engine']:<12} {'omitido: ' + r['skipped'] if 'skipped' in r else 'error: ' + r['error']}")
+            continue
+
+        def cell(value, width):
+            return f"{'—' if value is None else value:>{width}}"
+        lines.append(f"{r['engine']:<12} {r['mode']:<24} {r['articles']:>9} {cell(r['articles_per_sec'], 8)} "
+                     f"{cell(r['p95_article_ms'], 8)} {cell(r['peak_rss_mb'], 8)} {r['requests']:>10} "
+                     f"{r['bytes_fetched'] / 1024:>9.1f}")
+    return '\n'.join(lines)
+
+
+def compare_with_baseline(results: List[Dict], baseline: Dict, scenario: Dict,
+                          max_regression: float = MAX_REGRESSION) -> List[str]:
+    """Motores cuyo ritmo (artículos/s) cae por debajo de la referencia / max_regression"""
+    if baseline.get('scenario') != scenario:
+        logging.warning("⚠️ La referencia se midió con otro escenario; no se compara")
+        return []
+    regressions = []
+    for r in results:
+        reference = baseline.get('engines', {}).get(r['engine'])
+        current = r.get('articles_per_sec')
+        if reference and current is not None and current < reference / max_regression:
+            regressions.append(f"{r['engine']}: {current} art/s < {reference / max_regression:.2f} "
+                               f"(referencia {reference}, tolerancia {max_regression}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de extremo a extremo de los motores de crawling')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    parser.add_argument('--site', default=DEFAULT_SITE, help='maqueta de benchmarks/corpus.py')
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--max-articles', type=int, default=None, help='por defecto, todos los del sitio')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='hilos de SmartScraper / híbrido')
+    parser.add_argument('--latency', type=float, default=0.0, help='segundos fijos por respuesta')
+    parser.add_argument('--jitter', type=float, default=0.0, help='segundos aleatorios extra por respuesta')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fracción de respuestas con error')
+    parser.add_argument('--fail-status', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--host-rate', type=float, default=DEFAULT_HOST_RATE,
+                        help='req/s fijas al servidor local (0 = ritmo adaptativo normal)')
+    parser.add_argument('--no-browser', action='store_true', help='no usar Chrome aunque esté instalado')
+    parser.add_argument('--json', type=Path, help='guardar los resultados en este fichero')
+    parser.add_argument('--save-baseline', type=Path, help='guardar artículos/s por motor como referencia')
+    parser.add_argument('--baseline', type=Path, help='fallar si algún motor baja de la referencia')
+    parser.add_argument('--max-regression', type=float, default=MAX_REGRESSION)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    scenario = {key: getattr(args, key) for key in ('site', 'pages', 'per_page', 'max_articles', 'workers',
+                                                    'latency', 'jitter', 'fail_rate', 'fail_status', 'seed',
+                                                    'host_rate')}
+    use_browser = browser_available() and not args.no_browser
+    with ReplayServer(args.site, args.pages, args.per_page, args.latency, args.jitter, args.fail_rate,
+                      args.fail_status, args.seed) as server:
+        print(f"🌐 Sitio sintético en {server.home_url} ({len(server.site.articles)} artículos, "
+              f"navegador: {'sí' if use_browser else 'no'})")
+        results = run_benchmark(server, args.engines, args.max_articles, args.workers, args.host_rate,
+                                use_browser, args.verbose)
+    print(format_results(results))
+
+    if args.json:
+        args.json.write_text(json.dumps({'scenario': scenario, 'results': results}, indent=2) + '\n')
+    if args.save_baseline:
+        engines = {r['engine']: r['articles_per_sec'] for r in results if r.get('articles_per_sec')}
+        args.save_baseline.write_text(json.dumps({'scenario': scenario, 'engines': engines}, indent=2) + '\n')
+        print(f"💾 Referencia guardada en {args.save_baseline}")
+    if args.baseline:
+        regressions = compare_with_baseline(results, json.loads(args.baseline.read_text()), scenario,
+                                            args.max_regression)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ Sin regresiones respecto a la referencia")
+
+
+if __name__ == '__main__':
+    main()
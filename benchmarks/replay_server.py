@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local que reproduce un medio sintético de varias páginas
+
+Sirve, con la maqueta de benchmarks/corpus.py, un sitio completo en
+http://127.0.0.1:<puerto>:
+
+    /                         portada = página 1 de la paginación numerada
+    /page/<n>/                páginas numeradas (bloque .pagination con 1 2 3 ... Siguiente)
+    /mas-noticias/            portada con botón "VER MÁS" (.load-more)
+    /mas-noticias/fragmento?page=<n>  tarjetas que añade cada clic en "VER MÁS"
+    <ruta de cada artículo>   páginas de artículo
+    cualquier .jpg/.png/.webp/.gif/.svg  imágenes (un JPEG mínimo)
+    /robots.txt               sin Crawl-delay
+
+Todas las páginas se generan al arrancar, así que el servidor solo copia bytes,
+y las URLs absolutas de imágenes y metadatos se reescriben al servidor local
+para que ningún motor salga a la red.
+Se puede añadir latencia (fija + aleatoria) y fallos: una fracción de las
+peticiones de páginas numeradas, artículos, fragmentos e imágenes responde con
+`fail_status` (las portadas y robots.txt siempre responden, para que todos los
+motores tengan algo que recorrer). stats() cuenta peticiones, bytes servidos y
+fallos inyectados.
+
+Uso suelto (Ctrl+C para parar):
+
+    python -m benchmarks.replay_server --pages 5 --per-page 20 --latency 0.05 --fail-rate 0.05
+"""
+
+import argparse
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.corpus import CARD_RENDERERS, SITES, render_article, render_home, site_articles
+
+HOME_PATH = '/'
+LOAD_MORE_PATH = '/mas-noticias/'
+FRAGMENT_PATH = '/mas-noticias/fragmento'
+
+# JPEG gris de 1x1 (332 bytes) para todas las imágenes
+TINY_JPEG = bytes.fromhex(
+    'ffd8ffe000104a46494600010100000100010000ffdb004300080606070605080707070909080a0c140d0c0b0b0c1912130f141d1a1f1e1d1a1c1c'
+    '20242e2720222c231c1c2837292c30313434341f27393d38323c2e333432ffc0000b080001000101011100ffc4001f000001050101010101010000'
+    '0000000000000102030405060708090a0bffc400b5100002010303020403050504040000017d01020300041105122131410613516107227114328191'
+    'a1082342b1c11552d1f02433627282090a161718191a25262728292a3435363738393a434445464748494a535455565758595a636465666768696a73'
+    '7475767778797a838485868788898a92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6c7c8c9cad2d3d4d5d6d7d8d9da'
+    'e1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffda0008010100003f00fbd3ffd9'
+)
+
+HTML = 'text/html; charset=utf-8'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg')
+# Atributos con URL de otro host que un motor podría descargar (imágenes, og:image...)
+ABSOLUTE_ASSET_RE = re.compile(r'\b((?:src|data-src|srcset|content)=")https?://[^/"]+')
+
+
+def _pagination_html(page: int, pages: int) -> str:
+    links = []
+    for n in range(1, pages + 1):
+        href = HOME_PATH if n == 1 else f'/page/{n}/'
+        current = ' class="current" aria-current="page"' if n == page else ''
+        links.append(f'<a href="{href}"{current}>{n}</a>')
+    if page < pages:
+        links.append(f'<a class="next" href="/page/{page + 1}/">Siguiente</a>')
+    return f'<nav class="pagination" aria-label="Paginación">{"".join(links)}</nav>'
+
+
+def _load_more_html(pages: int) -> str:
+    """Botón "VER MÁS" que pide el fragmento siguiente y lo añade a la lista de tarjetas"""
+    return f"""<div class="load-more-box"><button class="load-more" type="button" data-page="2" data-pages="{pages}">VER MÁS</button></div>
+<script>
+document.querySelector('.load-more').addEventListener('click', function () {{
+  var button = this, page = parseInt(button.dataset.page, 10);
+  fetch('{FRAGMENT_PATH}?page=' + page).then(function (r) {{ return r.text(); }}).then(function (html) {{
+    document.querySelector('.home-stories').insertAdjacentHTML('beforeend', html);
+    button.dataset.page = page + 1;
+    if (page >= parseInt(button.dataset.pages, 10)) {{ button.parentNode.removeChild(button); }}
+  }});
+}});
+</script>"""
+
+
+def _localize(article: Dict, base_url: str) -> Dict:
+    """Apuntar la URL del artículo y sus imágenes al servidor local"""
+    local = dict(article)
+    local['url'] = base_url + article['path']
+    local['images'] = []
+    for src in article['images']:
+        parsed = urlparse(src)
+        local['images'].append(base_url + parsed.path + (f'?{parsed.query}' if parsed.query else ''))
+    return local
+
+
+class ReplaySite:
+    """Páginas del sitio sintético ya renderizadas: ruta -> (tipo, content-type, bytes)"""
+
+    def __init__(self, base_url: str, site: str = 'elcomercio', pages: int = 5, per_page: int = 20):
+        if site not in CARD_RENDERERS:
+            raise ValueError(f"Medio desconocido: {site} (disponibles: {', '.join(SITES)})")
+        self.base_url = base_url
+        self.site = site
+        self.pages = pages
+        self.per_page = per_page
+        self.articles = [_localize(a, base_url) for a in site_articles(site, pages * per_page)]
+        self.routes: Dict[str, Tuple[str, str, bytes]] = {}
+        self._render()
+
+    def page_articles(self, page: int) -> List[Dict]:
+        return self.articles[(page - 1) * self.per_page:page * self.per_page]
+
+    def _add(self, path: str, kind: str, content_type: str, body: str):
+        body = ABSOLUTE_ASSET_RE.sub(lambda m: m.group(1) + self.base_url,
+                                     body.replace(SITES[self.site]['base'], self.base_url))
+        self.routes[path] = (kind, content_type, body.encode('utf-8'))
+
+    def _render(self):
+        for page in range(1, self.pages + 1):
+            html = render_home(self.site, self.page_articles(page), _pagination_html(page, self.pages))
+            self._add(HOME_PATH if page == 1 else f'/page/{page}/', 'home' if page == 1 else 'page', HTML, html)
+            if page > 1:
+                cards = ''.join(CARD_RENDERERS[self.site](a) for a in self.page_articles(page))
+                self._add(f'{FRAGMENT_PATH}?page={page}', 'fragment', HTML, cards)
+        self._add(LOAD_MORE_PATH, 'home', HTML, render_home(self.site, self.page_articles(1), _load_more_html(self.pages)))
+        for i, article in enumerate(self.articles):
+            related = self.articles[i + 1:i + 5]
+            self._add(urlparse(article['url']).path, 'article', HTML, render_article(self.site, article, related))
+        self._add('/robots.txt', 'robots', 'text/plain; charset=utf-8', 'User-agent: *\nAllow: /\n')
+
+    def lookup(self, raw_path: str) -> Optional[Tuple[str, str, bytes]]:
+        parsed = urlparse(raw_path)
+        if parsed.path == FRAGMENT_PATH:
+            page = parse_qs(parsed.query).get('page', [''])[0]
+            return self.routes.get(f'{FRAGMENT_PATH}?page={page}')
+        if parsed.path.lower().endswith(IMAGE_EXTENSIONS):
+            return 'image', 'image/jpeg', TINY_JPEG
+        return self.routes.get(parsed.path)
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ReplayNews/1.0'
+
+    def do_GET(self):
+        self.server.replay.handle(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """Servidor del sitio sintético en un hilo propio, con latencia y fallos configurables
+
+    latency: segundos fijos por respuesta; jitter: segundos aleatorios extra (0..jitter);
+    fail_rate: fracción de peticiones de páginas, artículos e imágenes que responden fail_status.
+    """
+
+    def __init__(self, site: str = 'elcomercio', pages: int = 5, per_page: int = 20, latency: float = 0.0,
+                 jitter: float = 0.0, fail_rate: float = 0.0, fail_status: int = 500, seed: int = 0,
+                 port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._bytes = Counter()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), _ReplayHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.replay = self
+        self.base_url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+        self.site = ReplaySite(self.base_url, site, pages, per_page)
+        self._thread = None
+
+    @property
+    def home_url(self) -> str:
+        return self.base_url + HOME_PATH
+
+    @property
+    def load_more_url(self) -> str:
+        return self.base_url + LOAD_MORE_PATH
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='replay-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Atender peticiones en el hilo actual hasta Ctrl+C"""
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, handler: BaseHTTPRequestHandler):
+        route = self.site.lookup(handler.path)
+        kind = route[0] if route else 'not_found'
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = route is not None and kind not in ('home', 'robots') and self._random.random() < self.fail_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            status, content_type, body = self.fail_status, HTML, b'<html><body><h1>Error</h1></body></html>'
+        elif route is None:
+            status, content_type, body = 404, HTML, b'<html><body><h1>404</h1></body></html>'
+        else:
+            status, (_, content_type, body) = 200, route
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        if fail and status in (429, 503):
+            handler.send_header('Retry-After', '1')
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self._lock:
+            self._counts['requests'] += 1
+            self._counts[kind] += 1
+            if fail:
+                self._counts['failed'] += 1
+            self._bytes['total'] += len(body)
+            self._bytes[kind] += len(body)
+
+    def stats(self) -> Dict:
+        """Peticiones y bytes de cuerpo servidos desde el último reset_stats()"""
+        with self._lock:
+            return {'requests': dict(self._counts), 'bytes': dict(self._bytes)}
+
+    def reset_stats(self):
+        with self._lock:
+            self._counts.clear()
+            self._bytes.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local con un medio sintético de varias páginas')
+    parser.add_argument('--site', default='elcomercio', choices=sorted(CARD_RENDERERS))
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0, help='segundos fijos por respuesta')
+    parser.add_argument('--jitter', type=float, default=0.0, help='segundos aleatorios extra por respuesta')
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--fail-status', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    server = ReplayServer(args.site, args.pages, args.per_page, args.latency, args.jitter, args.fail_rate,
+                          args.fail_status, args.seed, args.port)
+    print(f"🌐 Sitio sintético ({args.site}, {args.pages} x {args.per_page} artículos) en {server.home_url}")
+    print(f"   'VER MÁS' en {server.load_more_url}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Pruebas del servidor local (benchmarks/replay_server.py) y del benchmark de
+crawling de extremo a extremo (benchmarks/crawl_benchmark.py) con un sitio pequeño
+"""
+
+import pytest
+
+requests = pytest.importorskip('requests')
+pytest.importorskip('bs4')
+
+from benchmarks.crawl_benchmark import percentile, run_benchmark
+from benchmarks.replay_server import ReplayServer
+
+
+def test_replay_server_routes_and_failure_injection():
+    with ReplayServer('rpp', pages=2, per_page=3, fail_rate=1.0, fail_status=503) as server:
+        article_url = server.site.articles[0]['url']
+        home = requests.get(server.home_url, timeout=5)
+        assert home.status_code == 200
+        assert article_url[len(server.base_url):] in home.text
+        assert 'class="pagination"' in home.text
+        assert 'class="load-more"' in requests.get(server.load_more_url, timeout=5).text
+
+        failed = requests.get(article_url, timeout=5)
+        assert failed.status_code == 503
+        assert failed.headers['Retry-After'] == '1'
+        assert requests.get(server.base_url + '/no-existe/', timeout=5).status_code == 404
+        assert requests.get(server.base_url + '/robots.txt', timeout=5).status_code == 200
+
+        stats = server.stats()
+        assert stats['requests']['requests'] == 5
+        assert stats['requests']['failed'] == 1
+        assert stats['bytes']['total'] == sum(stats['bytes'][kind] for kind in stats['bytes'] if kind != 'total')
+
+
+def test_replay_server_serves_every_article_and_image():
+    with ReplayServer('rpp', pages=2, per_page=3) as server:
+        for article in server.site.articles:
+            page = requests.get(article['url'], timeout=5)
+            assert page.status_code == 200
+            assert article['title'] in page.text
+            for src in article['images']:
+                image = requests.get(src, timeout=5)
+                assert image.status_code == 200
+                assert image.headers['Content-Type'] == 'image/jpeg'
+        assert 'https://e.rpp-noticias.io' not in page.text
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 0.95) is None
+    assert percentile([3.0], 0.95) == 3.0
+    assert percentile([float(n) for n in range(1, 101)], 0.95) == 95.0
+
+
+def test_crawl_benchmark_reports_metrics():
+    # Con muy pocas tarjetas ImprovedScraper recurre a enlaces de etiquetas: 10 por página
+    with ReplayServer('rpp', pages=2, per_page=10) as server:
+        results = run_benchmark(server, engines=('improved', 'pagination', 'load-more'), use_browser=False)
+    by_engine = {r['engine']: r for r in results}
+    assert 'skipped' in by_engine['load-more']
+    assert by_engine['improved']['articles'] == 10
+    assert by_engine['pagination']['articles'] == 20
+    for engine in ('improved', 'pagination'):
+        result = by_engine[engine]
+        assert result['articles_per_sec'] > 0
+        assert result['p95_article_ms'] > 0
+        assert result['bytes_fetched'] > 0
+        assert result['requests'] >= result['articles']
+        if result['peak_rss_mb'] is not None:
+            assert result['peak_rss_mb'] > 0
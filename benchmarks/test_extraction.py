@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de extracción sobre el corpus HTML offline (benchmarks/fixtures)
+
+Cada prueba mide una función de extracción con pytest-benchmark sobre las
+páginas guardadas (cada ronda recibe un BeautifulSoup recién parseado, porque
+varios extractores modifican el árbol) y compara la salida con la de
+referencia en benchmarks/golden/<función>.json. Ninguna prueba usa la red.
+
+Umbral de regresión: con un fichero de tiempos de referencia (mediana por
+prueba, propio de cada máquina) la prueba falla si la mediana actual lo
+supera en más de BENCHMARK_MAX_REGRESSION veces (1.3 por defecto).
+
+Uso:
+    python -m pytest -q benchmarks/                               # medir y comprobar salidas
+    python -m pytest -q benchmarks/ --benchmark-disable           # solo comprobar salidas
+    BENCHMARK_SAVE_BASELINE=1 python -m pytest -q benchmarks/     # guardar tiempos de referencia
+    UPDATE_GOLDEN=1 python -m pytest -q benchmarks/               # regenerar salidas de referencia
+"""
+
+import dataclasses
+import json
+import os
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('requests')
+BeautifulSoup = pytest.importorskip('bs4').BeautifulSoup
+
+from backend.scrapers.hybrid_crawler import HybridDataCrawler
+from backend.scrapers.improved_scraper import ImprovedScraper
+from backend.scrapers.optimized_scraper import SmartScraper
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+GOLDEN_DIR = BENCH_DIR / 'golden'
+BASELINE_FILE = Path(os.environ.get('BENCHMARK_BASELINE_FILE', BENCH_DIR / '.baseline.json'))
+
+ROUNDS = 15
+MAX_REGRESSION = float(os.environ.get('BENCHMARK_MAX_REGRESSION', '1.3'))
+UPDATE_GOLDEN = os.environ.get('UPDATE_GOLDEN') == '1'
+SAVE_BASELINE = os.environ.get('BENCHMARK_SAVE_BASELINE') == '1'
+
+INDEX = json.loads((FIXTURES_DIR / 'index.json').read_text(encoding='utf-8'))
+HOME_PAGES = sorted(name for name, meta in INDEX.items() if meta['kind'] == 'home')
+ARTICLE_PAGES = sorted(name for name, meta in INDEX.items() if meta['kind'] == 'article')
+
+
+@pytest.fixture(scope='module')
+def improved():
+    scraper = ImprovedScraper()
+    yield scraper
+    scraper.close()
+
+
+@pytest.fixture(scope='module')
+def smart(tmp_path_factory):
+    # SmartScraper crea su caché sqlite y la carpeta de imágenes en el directorio actual
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('smart'))
+    try:
+        scraper = SmartScraper(max_workers=1)
+    finally:
+        os.chdir(cwd)
+    yield scraper
+    scraper.session.close()
+
+
+@pytest.fixture(scope='module')
+def hybrid():
+    crawler = HybridDataCrawler()
+    yield crawler
+    crawler.session.close()
+
+
+@pytest.fixture(scope='session')
+def baseline():
+    times = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    yield times
+    if SAVE_BASELINE:
+        BASELINE_FILE.write_text(json.dumps(times, indent=2, sort_keys=True) + '\n')
+
+
+def _page(name):
+    return (FIXTURES_DIR / name).read_text(encoding='utf-8'), INDEX[name]['url']
+
+
+def _measure(benchmark, baseline, html, func):
+    """Medir func(soup) con un soup nuevo por ronda y aplicar el umbral de regresión"""
+    result = benchmark.pedantic(
+        func, setup=lambda: ((BeautifulSoup(html, 'html.parser'),), {}), rounds=ROUNDS, warmup_rounds=1
+    )
+    stats = getattr(benchmark, 'stats', None)
+    if stats is not None:
+        median = stats.stats.median
+        if SAVE_BASELINE:
+            baseline[benchmark.name] = median
+        elif benchmark.name in baseline:
+            limit = baseline[benchmark.name] * MAX_REGRESSION
+            assert median <= limit, (
+                f"{benchmark.name}: mediana {median * 1000:.2f} ms > {limit * 1000:.2f} ms "
+                f"({MAX_REGRESSION}x la referencia)"
+            )
+    return result
+
+
+def _check_golden(function_name, page, output):
+    """Comparar con benchmarks/golden/<función>.json (o actualizarlo con UPDATE_GOLDEN=1)"""
+    path = GOLDEN_DIR / f'{function_name}.json'
+    golden = json.loads(path.read_text(encoding='utf-8')) if path.exists() else {}
+    output = json.loads(json.dumps(output, ensure_ascii=False))
+    if UPDATE_GOLDEN:
+        golden[page] = output
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(json.dumps(golden, indent=2, ensure_ascii=False, sort_keys=True) + '\n', encoding='utf-8')
+        return
+    assert page in golden, f"Sin salida de referencia para {page} en {path.name} (UPDATE_GOLDEN=1)"
+    assert output == golden[page]
+
+
+@pytest.mark.parametrize('page', HOME_PAGES)
+def test_find_article_links(benchmark, baseline, improved, page):
+    html, url = _page(page)
+    domain = urlparse(url).netloc.lower()
+    links = _measure(benchmark, baseline, html, lambda soup: improved._find_article_links(soup, url, domain))
+    _check_golden('find_article_links', page, sorted(links))
+
+
+@pytest.mark.parametrize('page', HOME_PAGES)
+def test_hybrid_extract_articles_from_soup(benchmark, baseline, hybrid, page):
+    html, url = _page(page)
+    articles = _measure(benchmark, baseline, html, lambda soup: hybrid._extract_articles_from_soup(soup, url))
+    _check_golden('hybrid_extract_articles_from_soup', page, articles)
+
+
+@pytest.mark.parametrize('page', ARTICLE_PAGES)
+def test_extract_content(benchmark, baseline, improved, page):
+    html, url = _page(page)
+    content = _measure(benchmark, baseline, html, lambda soup: improved._extract_content(soup, url))
+    _check_golden('extract_content', page, content)
+
+
+@pytest.mark.parametrize('page', ARTICLE_PAGES)
+def test_extract_date(benchmark, baseline, improved, page):
+    html, url = _page(page)
+    date = _measure(benchmark, baseline, html, lambda soup: improved._extract_date(soup, url))
+    _check_golden('extract_date', page, date)
+
+
+@pytest.mark.parametrize('page', ARTICLE_PAGES)
+def test_extract_images(benchmark, baseline, improved, page):
+    html, url = _page(page)
+    images = _measure(benchmark, baseline, html, lambda soup: improved._extract_images(soup, url))
+    _check_golden('extract_images', page, images)
+
+
+@pytest.mark.parametrize('page', ARTICLE_PAGES)
+def test_smart_extract_article_data(benchmark, baseline, smart, page):
+    html, url = _page(page)
+    article = _measure(benchmark, baseline, html, lambda soup: smart.extract_article_data(soup, url))
+    data = dataclasses.asdict(article)
+    data.pop('scraped_at')
+    data['images_data'] = json.loads(data['images_data'])
+    _check_golden('smart_extract_article_data', page, data)
@@ -17,6 +17,8 @@ const ChatbotWidget: React.FC = () => {
   ]);
   const [loading, setLoading] = useState(false);
   const listRef = useRef<HTMLDivElement>(null);
+  // Identifica la conversación: el backend guarda sus búsquedas para los "resumen" siguientes
+  const sessionId = useRef(`${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`);
   const quickPrompts = [
     { label: 'La República hoy', value: 'la república hoy' },
     { label: 'Resumen selección peruana', value: 'resumen selección peruana esta semana' },
@@ -36,10 +38,32 @@ const ChatbotWidget: React.FC = () => {
       let date_to: string | undefined;
       const m = msg.match(/(20\d{2}-\d{2}-\d{2})\s*(?:a|hasta|to)\s*(20\d{2}-\d{2}-\d{2})/i);
       if (m) { date_from = m[1]; date_to = m[2]; }
-      const resp = await apiService.chat({ message: msg, date_from, date_to, limit: 10 });
-      const replyText: string = resp.reply || 'Listo.';
-      const citations: Array<{ title: string; url: string }> = resp.citations || [];
-      setMessages((m) => [...m, { role: 'assistant', text: replyText, citations }]);
+      const payload = { message: msg, date_from, date_to, limit: 10, session_id: sessionId.current };
+      // Mensaje del asistente que se va completando con las citas y los tokens del stream
+      let index = -1;
+      setMessages((m) => {
+        index = m.length;
+        return [...m, { role: 'assistant', text: '' }];
+      });
+      const update = (patch: (current: ChatMessage) => ChatMessage) =>
+        setMessages((m) => m.map((item, i) => (i === index ? patch(item) : item)));
+
+      let streamed = false;
+      try {
+        await apiService.chatStream(payload, {
+          onCitations: (citations) => { streamed = true; update((c) => ({ ...c, citations })); },
+          onToken: (text) => { streamed = true; update((c) => ({ ...c, text: c.text + text })); },
+          onMessage: (data) => {
+            streamed = true;
+            update((c) => ({ ...c, text: data.reply || 'Listo.', citations: data.citations || c.citations }));
+          },
+        });
+      } catch (streamError) {
+        if (streamed) throw streamError;
+        // Sin soporte de streaming (o proxy que lo corta): usar la respuesta completa
+        const resp = await apiService.chat(payload);
+        update(() => ({ role: 'assistant', text: resp.reply || 'Listo.', citations: resp.citations || [] }));
+      }
     } catch (e: any) {
       const errMsg = e?.response?.data?.error || e?.message || 'Error al consultar el chatbot.';
       setMessages((m) => [...m, { role: 'assistant', text: `⚠️ ${errMsg}` }]);
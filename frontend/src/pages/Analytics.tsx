@@ -36,6 +36,7 @@ interface TrendData {
   articles_count: number;
   images_count: number;
   newspapers_count: number;
+  stories_count: number;
 }
 
 interface SentimentData {
@@ -55,6 +56,7 @@ interface WordCloudData {
 interface ComparisonData {
   newspaper: string;
   total_articles: number;
+  unique_stories: number;
   total_images: number;
   categories_count: number;
   avg_content_length: number;
@@ -103,6 +103,7 @@ const ArticlesList: React.FC = () => {
       const params: any = {
         page,
         limit: 12,
+        view: 'card',  // sin content: el detalle se pide al abrir el artículo
       };
 
       if (selectedNewspaper) params.newspaper = selectedNewspaper;
@@ -336,9 +337,15 @@ const ArticlesList: React.FC = () => {
     }
   };
 
-  const handleArticleClick = (article: Article) => {
+  const handleArticleClick = async (article: Article) => {
     setSelectedArticle(article);
     setDialogOpen(true);
+    try {
+      const fullArticle = await apiService.getArticle(article.article_id);
+      setSelectedArticle(current => (current && current.article_id === article.article_id ? fullArticle : current));
+    } catch (err) {
+      console.error('Error cargando detalle del artículo:', err);
+    }
   };
 
   const handleCloseDialog = () => {
@@ -912,7 +919,7 @@ const ArticlesList: React.FC = () => {
                           mb: 2
                         }}
                       >
-                        {article.summary || article.content.substring(0, 200) + '...'}
+                        {article.summary || (article.content ? article.content.substring(0, 200) + '...' : '')}
                       </Typography>
                       
                       <Box sx={{ display: 'flex', flexWrap: 'wrap', gap: 1, mb: 3 }}>
@@ -96,10 +96,9 @@ const Dashboard: React.FC = () => {
     // Refrescar permisos al cargar el Dashboard
     refreshPermissions();
     
-    // Poll for scraping status updates (solo si es admin)
+    // Estado del scraping en tiempo real (solo si es admin)
     if (isAdmin) {
-    const interval = setInterval(loadScrapingStatus, 2000);
-    return () => clearInterval(interval);
+      return apiService.subscribeToStatus(setScrapingStatus);
     }
   }, [isAdmin]);
 
@@ -129,16 +128,6 @@ const Dashboard: React.FC = () => {
     }
   };
 
-  const loadScrapingStatus = async () => {
-    if (!isAdmin) return; // Solo admin puede ver el estado
-    try {
-      const statusData = await apiService.getStatus();
-      setScrapingStatus(statusData);
-    } catch (err) {
-      console.error('Error loading scraping status:', err);
-    }
-  };
-
   const loadNewspapers = async () => {
     try {
       setNewspapersLoading(true);
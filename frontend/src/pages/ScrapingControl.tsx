@@ -56,9 +56,8 @@ const ScrapingControl: React.FC = () => {
     loadUserSubscription();
     loadUsageLimits();
     
-    // Poll for status updates
-    const interval = setInterval(loadStatus, 2000);
-    return () => clearInterval(interval);
+    // Estado en tiempo real (SSE, con polling como respaldo)
+    return apiService.subscribeToStatus(setScrapingStatus);
   }, []);
 
   const loadUserSubscription = async () => {
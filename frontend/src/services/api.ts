@@ -85,6 +85,7 @@ export interface ScrapingStatus {
   analysis?: any;
   suggested_method?: string;
   confidence?: number;
+  job_id?: string | null;
 }
 
 export interface ScrapingConfig {
@@ -101,6 +102,7 @@ export interface ScrapingConfig {
 export interface Statistics {
   general: {
     total_articles: number;
+    unique_stories: number;
     total_newspapers: number;
     total_categories: number;
     total_images_found: number;
@@ -109,11 +111,13 @@ export interface Statistics {
   newspapers: Array<{
     newspaper: string;
     articles_count: number;
+    stories_count: number;
     images_count: number;
   }>;
   categories: Array<{
     category: string;
     articles_count: number;
+    stories_count: number;
   }>;
   sessions: Array<{
     session_id: string;
@@ -169,6 +173,39 @@ export const apiService = {
     return response.data as ScrapingStatus;
   },
 
+  // Subscribe to real-time scraping status (SSE, falls back to polling /status)
+  subscribeToStatus: (onStatus: (status: ScrapingStatus) => void, pollInterval = 2000): (() => void) => {
+    let pollTimer: ReturnType<typeof setInterval> | null = null;
+    const startPolling = () => {
+      if (pollTimer) return;
+      const poll = () => apiService.getStatus().then(onStatus).catch(() => undefined);
+      poll();
+      pollTimer = setInterval(poll, pollInterval);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return () => { if (pollTimer) clearInterval(pollTimer); };
+    }
+
+    const token = localStorage.getItem('token');
+    const query = token ? `?token=${encodeURIComponent(token)}` : '';
+    const source = new EventSource(`${API_BASE_URL}/events/stream${query}`);
+    source.addEventListener('scraping_progress', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      if (data.scraping_status) onStatus(data.scraping_status as ScrapingStatus);
+    });
+    source.onerror = () => {
+      // EventSource reconecta solo; si el servidor cerró definitivamente, volver al polling
+      if (source.readyState === EventSource.CLOSED) startPolling();
+    };
+
+    return () => {
+      source.close();
+      if (pollTimer) clearInterval(pollTimer);
+    };
+  },
+
   // Start scraping
   startScraping: async (config: ScrapingConfig) => {
     const response = await api.post('/start-scraping', config);
@@ -191,6 +228,8 @@ export const apiService = {
     search?: string;
     dateFrom?: string;
     dateTo?: string;
+    view?: 'card';
+    fields?: string;
   } = {}, config: Record<string, any> = {}) => {
     const response = await api.get('/articles', { params, ...config });
     return response.data;
@@ -208,6 +247,12 @@ export const apiService = {
     return response.data as Article;
   },
 
+  // Related articles (vector index)
+  getRelatedArticles: async (articleId: string, limit = 5): Promise<Array<Article & { similarity: number }>> => {
+    const response = await api.get(`/articles/${articleId}/related`, { params: { limit } });
+    return response.data.related;
+  },
+
   // Get images
   getImages: async (params: {
     page?: number;
@@ -361,6 +406,7 @@ export const apiService = {
     date_from?: string;
     date_to?: string;
     limit?: number;
+    session_id?: string;
   }): Promise<{
     reply: string;
     data?: any;
@@ -380,6 +426,61 @@ export const apiService = {
     };
   },
 
+  // Chat en streaming (SSE sobre POST): citas primero, luego tokens de la respuesta
+  chatStream: async (
+    payload: { message: string; date_from?: string; date_to?: string; limit?: number; session_id?: string },
+    handlers: {
+      onCitations?: (citations: Array<{ title: string; url: string }>) => void;
+      onToken?: (text: string) => void;
+      onMessage?: (data: { reply: string; citations?: Array<{ title: string; url: string }>; [key: string]: any }) => void;
+    },
+    signal?: AbortSignal
+  ): Promise<string> => {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify(payload),
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let reply = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const raw = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+        let event = 'message';
+        let data = '';
+        raw.split('\n').forEach((line) => {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        if (!data) continue;
+        const parsed = JSON.parse(data);
+        if (event === 'citations') handlers.onCitations?.(parsed.citations || []);
+        else if (event === 'token') handlers.onToken?.(parsed.text || '');
+        else if (event === 'message') handlers.onMessage?.(parsed);
+        else if (event === 'error') throw new Error(parsed.error || 'Error en el chat');
+        else if (event === 'done') reply = parsed.reply || reply;
+      }
+    }
+    return reply;
+  },
+
   // ===== BÚSQUEDA AVANZADA =====
   
   // Get search suggestions
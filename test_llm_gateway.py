@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la pasarela LLM (caché, hedging, streaming y marcador de proveedores)
+
+Levanta servidores HTTP locales que imitan proveedores compatibles con OpenAI:
+uno rápido, uno lento y uno que siempre falla. No hace llamadas externas.
+
+Uso:
+    python -m pytest -q test_llm_gateway.py
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+from backend.core.llm_gateway import (
+    LLMGateway, LLMProvider, LLMResponseCache, ProviderScoreboard, normalize_prompt, openai_chat_body
+)
+
+
+class StubProvider:
+    """Servidor local que responde a /v1/chat/completions (normal o en streaming) con retardo y estado configurables"""
+
+    def __init__(self, reply='hola', delay=0.0, status=200, token_delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.status = status
+        self.token_delay = token_delay
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                stub.requests += 1
+                length = int(self.headers.get('Content-Length', 0))
+                request_body = json.loads(self.rfile.read(length) or b'{}')
+                time.sleep(stub.delay)
+                if request_body.get('stream') and stub.status == 200:
+                    self.stream_reply()
+                    return
+                body = json.dumps({'choices': [{'message': {'content': stub.reply}}]}).encode()
+                self.send_response(stub.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def stream_reply(self):
+                # Formato SSE de chat/completions con stream=true: un chunk por palabra
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                for word in stub.reply.split(' '):
+                    chunk = {'choices': [{'delta': {'content': word + ' '}, 'finish_reason': None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    time.sleep(stub.token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+
+    def provider(self, name, timeout=5.0):
+        return LLMProvider(name, self.url, openai_chat_body('stub-model'), timeout=timeout)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(**kwargs):
+        stub = StubProvider(**kwargs)
+        created.append(stub)
+        return stub
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+def test_hedging_returns_first_successful_response(stubs):
+    slow = stubs(reply='lento', delay=2.0)
+    fast = stubs(reply='rápido')
+    gateway = LLMGateway(lambda: [slow.provider('slow'), fast.provider('fast')], hedge_delay=0.2)
+
+    start = time.monotonic()
+    text = gateway.generate('¿Qué es este portal?')
+    elapsed = time.monotonic() - start
+
+    assert text == 'rápido'
+    assert elapsed < 1.5  # no esperó al proveedor lento
+    assert slow.requests == 1 and fast.requests == 1
+
+
+def test_failure_falls_through_without_waiting_hedge_delay(stubs):
+    broken = stubs(status=500)
+    ok = stubs(reply='ok')
+    gateway = LLMGateway(lambda: [broken.provider('broken'), ok.provider('ok')], hedge_delay=5.0)
+
+    start = time.monotonic()
+    assert gateway.generate('hola') == 'ok'
+    assert time.monotonic() - start < 2.0
+    assert gateway.scoreboard.snapshot()['broken']['failures'] == 1
+
+
+def test_deadline_returns_none_when_nobody_answers(stubs):
+    slow = stubs(delay=2.0)
+    gateway = LLMGateway(lambda: [slow.provider('slow')], hedge_delay=0.1)
+
+    start = time.monotonic()
+    assert gateway.generate('hola', deadline=0.5) is None
+    assert time.monotonic() - start < 1.0
+
+
+def test_scoreboard_orders_fast_and_healthy_providers_first(stubs):
+    broken = stubs(status=503)
+    slow = stubs(reply='lento', delay=0.3)
+    fast = stubs(reply='rápido')
+    providers = [broken.provider('broken'), slow.provider('slow'), fast.provider('fast')]
+    gateway = LLMGateway(lambda: providers, hedge_delay=5.0)
+
+    # Cada proveedor se mide al menos una vez
+    gateway.generate('uno')
+    gateway.scoreboard.record_success('fast', 0.01)
+    order = [p.name for p in gateway.scoreboard.order(providers)]
+
+    assert order[0] == 'fast'
+    assert order[-1] == 'broken'  # en enfriamiento tras fallar
+
+
+def test_cache_answers_repeated_questions_without_calling_providers(stubs):
+    stub = stubs(reply='respuesta frecuente', delay=0.3)
+    gateway = LLMGateway(lambda: [stub.provider('stub')], cache=LLMResponseCache(ttl=60))
+
+    assert gateway.generate('¿Cómo exporto los artículos?', context_ids=[3, 1]) == 'respuesta frecuente'
+    start = time.monotonic()
+    # Misma pregunta con otra capitalización/tildes/espacios y mismos artículos en otro orden
+    assert gateway.generate('  como EXPORTO los articulos ', context_ids=[1, 3]) == 'respuesta frecuente'
+    assert time.monotonic() - start < 0.05
+    assert stub.requests == 1
+
+    # Otros artículos recuperados -> otra entrada
+    gateway.generate('¿Cómo exporto los artículos?', context_ids=[2])
+    assert stub.requests == 2
+
+
+def test_cache_ttl_and_lru_eviction():
+    cache = LLMResponseCache(max_entries=2, ttl=0.2)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    assert cache.get('a') == '1'
+    cache.set('c', '3')  # expulsa 'b' (menos usada recientemente)
+    assert cache.get('b') is None
+    assert cache.get('a') == '1'
+    time.sleep(0.25)
+    assert cache.get('a') is None
+
+
+def test_cache_text_ignores_volatile_prompt_context(stubs):
+    stub = stubs(reply='ok')
+    gateway = LLMGateway(lambda: [stub.provider('stub')], cache=LLMResponseCache())
+
+    gateway.generate('Pregunta + 100 artículos en la base', cache_text='¿qué secciones hay?')
+    gateway.generate('Pregunta + 101 artículos en la base', cache_text='¿Qué secciones hay?')
+    assert stub.requests == 1
+
+
+def test_stream_yields_tokens_from_first_provider_to_answer(stubs):
+    slow = stubs(reply='respuesta lenta', delay=2.0)
+    fast = stubs(reply='uno dos tres', token_delay=0.05)
+    gateway = LLMGateway(lambda: [slow.provider('slow'), fast.provider('fast')], hedge_delay=0.2)
+
+    start = time.monotonic()
+    stream = gateway.stream('hola')
+    first = next(stream)
+    time_to_first_token = time.monotonic() - start
+    rest = list(stream)
+
+    assert first == 'uno '
+    assert ''.join([first] + rest) == 'uno dos tres '
+    assert time_to_first_token < 1.0
+
+
+def test_stream_falls_through_failures_and_caches_complete_answer(stubs):
+    broken = stubs(status=500)
+    ok = stubs(reply='respuesta completa')
+    gateway = LLMGateway(lambda: [broken.provider('broken'), ok.provider('ok')],
+                         cache=LLMResponseCache(), hedge_delay=5.0)
+
+    assert ''.join(gateway.stream('¿qué hay hoy?', context_ids=[7])) == 'respuesta completa '
+    # La respuesta completa queda cacheada (también para generate())
+    assert list(gateway.stream('que hay hoy', context_ids=[7])) == ['respuesta completa ']
+    assert gateway.generate('Qué hay hoy', context_ids=[7]) == 'respuesta completa '
+    assert ok.requests == 1
+
+
+def test_stream_yields_nothing_when_no_provider_answers(stubs):
+    broken = stubs(status=503)
+    gateway = LLMGateway(lambda: [broken.provider('broken')])
+    assert list(gateway.stream('hola', deadline=1.0)) == []
+
+
+def test_normalize_prompt():
+    assert normalize_prompt('  ¿Qué   ES esto?! ') == 'que es esto'
+    assert ProviderScoreboard().order([]) == []
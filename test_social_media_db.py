@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Pruebas del guardado por lotes de posts de redes sociales (upsert por platform + dedup_key)
+
+Usa una base SQLite temporal; no toca news_database.db.
+
+Uso:
+    python -m pytest -q test_social_media_db.py
+"""
+
+import sqlite3
+
+from backend.systems.social_media_db import SocialMediaDB
+
+
+def _post(n, **extra):
+    post = {
+        'platform': 'twitter',
+        'username': f'@usuario{n}',
+        'text': f'Texto del post número {n}',
+        'likes': n,
+        'url': f'https://twitter.com/usuario{n}/status/{n}',
+    }
+    post.update(extra)
+    return post
+
+
+def _rows(db_path, query, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+
+def _social_version(db_path):
+    rows = _rows(db_path, "SELECT version FROM data_versions WHERE namespace = 'social'")
+    return rows[0][0] if rows else 0
+
+
+def test_resave_updates_instead_of_duplicating(tmp_path):
+    db_path = str(tmp_path / 'social.db')
+    db = SocialMediaDB(db_path)
+
+    assert db.save_batch([_post(1), _post(2)]) == {'inserted': 2, 'updated': 0}
+    # Re-scrapeo: el post 2 vuelve con métricas nuevas (como texto), el 3 es nuevo y el 1 aparece dos veces
+    result = db.save_batch([_post(1), _post(2, likes='1.2K'), _post(3), _post(1, likes=7)])
+
+    assert result == {'inserted': 1, 'updated': 2}
+    rows = _rows(db_path, "SELECT url, likes FROM social_media_posts ORDER BY id")
+    assert [likes for _, likes in rows] == [7, 1200, 3]
+    assert _social_version(db_path) == 2
+
+
+def test_bad_row_falls_back_to_per_row_inserts(tmp_path):
+    db_path = str(tmp_path / 'social.db')
+    db = SocialMediaDB(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TRIGGER reject_bad_post BEFORE INSERT ON social_media_posts
+        WHEN NEW.text = 'malo' BEGIN SELECT RAISE(ABORT, 'post inválido'); END
+    """)
+    conn.commit()
+    conn.close()
+
+    result = db.save_batch([_post(1), _post(2, text='malo'), _post(3)])
+
+    assert result == {'inserted': 2, 'updated': 0}
+    assert [row[0] for row in _rows(db_path, "SELECT username FROM social_media_posts ORDER BY id")] == ['@usuario1', '@usuario3']
+    assert _social_version(db_path) == 1
+
+
+def test_demo_posts_are_replaced_on_next_save(tmp_path):
+    db_path = str(tmp_path / 'social.db')
+    db = SocialMediaDB(db_path)
+
+    db.save_batch([_post(1, is_demo=True), _post(2, is_demo=True), _post(3, platform='facebook', is_demo=True)])
+    db.save_batch([_post(4, is_demo=True)])
+    assert db.save_batch([_post(5)]) == {'inserted': 1, 'updated': 0}
+
+    rows = _rows(db_path, "SELECT platform, username FROM social_media_posts ORDER BY id")
+    assert rows == [('facebook', '@usuario3'), ('twitter', '@usuario5')]
+
+
+def test_legacy_duplicates_are_removed_when_creating_the_index(tmp_path):
+    db_path = str(tmp_path / 'social.db')
+    conn = sqlite3.connect(db_path)
+    # Tabla de versiones anteriores: sin dedup_key y con el mismo post guardado en dos scrapeos
+    conn.execute("""
+        CREATE TABLE social_media_posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            platform TEXT NOT NULL, username TEXT NOT NULL, text TEXT NOT NULL,
+            cleaned_text TEXT, likes INTEGER DEFAULT 0, retweets INTEGER DEFAULT 0, replies INTEGER DEFAULT 0,
+            hashtags TEXT, category TEXT, sentiment TEXT, detected_language TEXT,
+            url TEXT, image_url TEXT, video_url TEXT, created_at TEXT,
+            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, processed_at TIMESTAMP
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO social_media_posts (platform, username, text, url) VALUES (?, ?, ?, ?)",
+        [('twitter', '@a', 'primero', 'https://x.com/a/1'), ('twitter', '@a', 'repetido', 'https://x.com/a/1'),
+         ('facebook', '@a', 'otra plataforma', 'https://x.com/a/1'), ('twitter', '@b', 'sin url', '')]
+    )
+    conn.commit()
+    conn.close()
+
+    db = SocialMediaDB(db_path)
+
+    assert _rows(db_path, "SELECT id, text FROM social_media_posts ORDER BY id") == [
+        (1, 'primero'), (3, 'otra plataforma'), (4, 'sin url')
+    ]
+    assert db.save_batch([{'platform': 'twitter', 'username': '@a', 'text': 'nuevo', 'url': 'https://x.com/a/1'}]) == {
+        'inserted': 0, 'updated': 1
+    }